@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Code Index - Trigram index that narrows code search to candidate files
+
+search_code used to open every file under the search root and run the regex
+on every line. The index keeps, per file, the set of lowercase 3-character
+substrings it contains; a regex's required literals give trigrams that any
+matching file must contain, so only files holding all of them are scanned.
+
+The index is refreshed incrementally: files whose (mtime, size) changed are
+re-read, deleted files are dropped, everything else is left alone.
+"""
+import fnmatch
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger(__name__)
+
+# Directories/files never worth searching (on top of caller patterns)
+DEFAULT_IGNORE_PATTERNS = [
+    '.git', '__pycache__', 'node_modules', '.venv', 'venv', '.ipynb_checkpoints',
+    '.pytest_cache', 'chroma_db', 'archive', 'legacy',
+    '*.pyc', '*.so', '*.o', '*.bin', '*.sqlite3', '*.db', '*.npy', '*.onnx',
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.pdf', '*.zip', '*.gz', '*.tar',
+    '*.wav', '*.mp3', '*.flac', '*.mp4',
+]
+
+MAX_INDEXED_FILE_BYTES = 1_000_000
+
+
+def trigrams(text: str) -> Set[str]:
+    """Lowercase 3-character substrings of text"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def is_ignored(rel_path: str, patterns: List[str]) -> bool:
+    """True if any path component (or the whole relative path) matches a pattern"""
+    parts = rel_path.split('/')
+    for pattern in patterns:
+        if '/' in pattern:
+            if fnmatch.fnmatch(rel_path, pattern) or rel_path.startswith(pattern.rstrip('/') + '/'):
+                return True
+        elif any(fnmatch.fnmatch(part, pattern) for part in parts):
+            return True
+    return False
+
+
+def walk_files(root: Path, base: Path, patterns: List[str]) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path relative to base, stat) for non-ignored files under root"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, base)
+        rel_dir = '' if rel_dir == '.' else rel_dir.replace(os.sep, '/') + '/'
+        # Prune ignored directories in place so os.walk never descends into them
+        dirnames[:] = sorted(d for d in dirnames if not is_ignored(rel_dir + d, patterns))
+        for name in sorted(filenames):
+            rel = rel_dir + name
+            if is_ignored(rel, patterns):
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            yield rel, st
+
+
+def _required_literals(parsed) -> List[str]:
+    """Literal runs every match of one parsed regex sequence must contain"""
+    runs: List[str] = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            runs.append(''.join(current))
+            current.clear()
+
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(av))
+            continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            runs.extend(_required_literals(av[-1]))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, _high, body = av
+            if low >= 1:
+                runs.extend(_required_literals(body))
+        elif op is sre_constants.BRANCH:
+            pass  # nested alternation: no literal is guaranteed, be conservative
+    flush()
+    return runs
+
+
+def required_trigrams(pattern: str, flags: int = 0) -> Optional[List[Set[str]]]:
+    """
+    Trigram sets a file must contain to possibly match the regex
+
+    Returns:
+        List of alternatives (file must contain every trigram of at least one
+        set), or None when the regex has no usable literals and every file
+        is a candidate.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+    items = list(parsed)
+    # Top-level alternation: a|b|c -> one requirement set per branch
+    if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+        alternatives = []
+        for branch in items[0][1][1]:
+            runs = _required_literals(branch)
+            grams = set().union(*(trigrams(r) for r in runs)) if runs else set()
+            if not grams:
+                return None  # one unconstrained branch means any file may match
+            alternatives.append(grams)
+        return alternatives
+
+    runs = _required_literals(parsed)
+    grams = set().union(*(trigrams(r) for r in runs)) if runs else set()
+    return [grams] if grams else None
+
+
+class TrigramIndex:
+    """Incrementally refreshed trigram -> files index for one directory tree"""
+
+    def __init__(self, root: Path, ignore_patterns: Optional[List[str]] = None,
+                 max_file_bytes: int = MAX_INDEXED_FILE_BYTES, min_refresh_interval: float = 2.0):
+        """
+        Args:
+            root: Directory to index (paths are stored relative to it)
+            ignore_patterns: fnmatch patterns for files/directories to skip
+            max_file_bytes: Larger files are not indexed (always scanned instead)
+            min_refresh_interval: Seconds between filesystem re-walks on refresh()
+        """
+        self.root = Path(root).resolve()
+        self.ignore_patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        self.max_file_bytes = max_file_bytes
+        self.min_refresh_interval = min_refresh_interval
+
+        self._lock = threading.RLock()
+        self._files: Dict[str, Tuple[float, int]] = {}      # rel path -> (mtime, size)
+        self._file_grams: Dict[str, Set[str]] = {}           # rel path -> trigrams
+        self._postings: Dict[str, Set[str]] = {}             # trigram -> rel paths
+        self._unindexed: Set[str] = set()                    # too large / unreadable
+        self._last_refresh = 0.0
+        # Bumped whenever indexed content changes, so results derived from the
+        # index (e.g. cached searches) can tell they are out of date
+        self.generation = 0
+        self.stats = {'refreshes': 0, 'files_indexed': 0, 'files_reindexed': 0,
+                      'files_removed': 0, 'last_refresh_ms': 0.0}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _index_file(self, rel: str) -> None:
+        path = self.root / rel
+        self._drop_file(rel)
+        try:
+            st = path.stat()
+            if st.st_size > self.max_file_bytes:
+                self._unindexed.add(rel)
+            else:
+                data = path.read_bytes()
+                if b'\x00' in data[:8192]:
+                    grams: Set[str] = set()  # binary: never a text match
+                else:
+                    grams = trigrams(data.decode('utf-8', errors='ignore'))
+                self._file_grams[rel] = grams
+                for g in grams:
+                    self._postings.setdefault(g, set()).add(rel)
+            self._files[rel] = (st.st_mtime, st.st_size)
+        except OSError:
+            self._unindexed.add(rel)
+
+    def _drop_file(self, rel: str) -> None:
+        for g in self._file_grams.pop(rel, ()):
+            files = self._postings.get(g)
+            if files is not None:
+                files.discard(rel)
+                if not files:
+                    del self._postings[g]
+        self._files.pop(rel, None)
+        self._unindexed.discard(rel)
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Re-walk the tree and re-index files whose mtime/size changed
+
+        Returns:
+            Counts of added/changed/removed files for this refresh
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.min_refresh_interval:
+                return {'added': 0, 'changed': 0, 'removed': 0, 'skipped': 1}
+            start = time.perf_counter()
+            seen = set()
+            added = changed = 0
+            for rel, st in walk_files(self.root, self.root, self.ignore_patterns):
+                seen.add(rel)
+                known = self._files.get(rel)
+                if known is None:
+                    self._index_file(rel)
+                    added += 1
+                elif known != (st.st_mtime, st.st_size):
+                    self._index_file(rel)
+                    changed += 1
+            removed = [rel for rel in self._files if rel not in seen]
+            for rel in removed:
+                self._drop_file(rel)
+
+            self._last_refresh = time.monotonic()
+            self.stats['refreshes'] += 1
+            self.stats['files_indexed'] = len(self._files)
+            self.stats['files_reindexed'] += changed
+            self.stats['files_removed'] += len(removed)
+            self.stats['last_refresh_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            if added or changed or removed:
+                self.generation += 1
+                logger.info(f"Code index refreshed: +{added} ~{changed} -{len(removed)} "
+                            f"({len(self._files)} files, {self.stats['last_refresh_ms']}ms)")
+            return {'added': added, 'changed': changed, 'removed': len(removed), 'skipped': 0}
+
+    def invalidate(self, rel_path: str) -> None:
+        """Re-index one file now (e.g. after a write through the tool system)"""
+        with self._lock:
+            if (self.root / rel_path).is_file() and not is_ignored(rel_path, self.ignore_patterns):
+                self._index_file(rel_path)
+            else:
+                self._drop_file(rel_path)
+            self.generation += 1
+
+    def candidates(self, pattern: str, flags: int = 0, prefix: str = '') -> Optional[List[str]]:
+        """
+        Sorted files under prefix that may match the regex
+
+        Returns:
+            Candidate relative paths, or None when the regex can't be narrowed
+        """
+        alternatives = required_trigrams(pattern, flags)
+        if alternatives is None:
+            return None
+        with self._lock:
+            matched: Set[str] = set()
+            for grams in alternatives:
+                # Intersect rarest posting lists first
+                lists = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                files = set(lists[0]) if lists else set()
+                for posting in lists[1:]:
+                    if not files:
+                        break
+                    files &= posting
+                matched |= files
+            matched |= self._unindexed  # unknown content: must be scanned
+            if prefix:
+                prefix = prefix.rstrip('/') + '/'
+                matched = {f for f in matched if f.startswith(prefix)}
+            return sorted(matched)
@@ -9,17 +9,15 @@ from flask_sock import Sock
 import json
 import asyncio
 import os
+import queue
+import threading
+import uuid
+from concurrent.futures import CancelledError
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 import logging
 
 # Import our systems
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-
 try:
     import chromadb
     CHROMADB_AVAILABLE = True
@@ -30,6 +28,9 @@ from tool_executor import get_executor
 from tool_registry import get_registry
 from executors.filesystem import FilesystemExecutor
 from executors.process import ProcessExecutor
+from runtime.event_loop import get_background_loop
+from providers.gemini import GeminiProvider
+from providers.registry import register_provider, provider_snapshot
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -43,6 +44,7 @@ sock = Sock(app)
 
 CONFIG = {
     'gemini_model': 'gemini-2.0-flash-exp',
+    'gemini_timeout': float(os.getenv('FAITHH_GEMINI_TIMEOUT', '30')),
     'chromadb_host': 'localhost',
     'chromadb_port': 8000,
     'collection_name': 'documents',
@@ -56,15 +58,14 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not found in environment. Gemini features will be disabled.")
 
-# Initialize Gemini
+# Initialize Gemini (configured once; model objects cached by the provider)
 gemini_model = None
-if GEMINI_AVAILABLE and GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel(CONFIG['gemini_model'])
-        logger.info("✅ Gemini initialized")
-    except Exception as e:
-        logger.warning(f"⚠️  Gemini init failed: {e}")
+gemini_provider = GeminiProvider(GEMINI_API_KEY, default_model=CONFIG['gemini_model'],
+                                 timeout=CONFIG['gemini_timeout'])
+register_provider(gemini_provider)
+if gemini_provider.available():
+    gemini_model = gemini_provider
+    logger.info("✅ Gemini initialized")
 
 # Initialize ChromaDB
 chroma_client = None
@@ -84,7 +85,9 @@ tool_registry = get_registry()
 
 # Register executors
 tool_executor.register_executor('filesystem', FilesystemExecutor())
-tool_executor.register_executor('process', ProcessExecutor())
+tool_executor.register_executor(
+    'process', ProcessExecutor(**tool_executor.config.get('tools', {}).get('output', {}))
+)
 
 # Register tools
 tool_registry.register_tool({
@@ -92,7 +95,8 @@ tool_registry.register_tool({
     'description': 'Read file contents',
     'category': 'filesystem',
     'executor': 'filesystem',
-    'permissions': ['file.read']
+    'permissions': ['file.read'],
+    'idempotent': True
 })
 
 tool_registry.register_tool({
@@ -103,6 +107,41 @@ tool_registry.register_tool({
     'permissions': ['file.write']
 })
 
+tool_registry.register_tool({
+    'name': 'edit_file',
+    'description': 'Replace text in a file (streamed for large files)',
+    'category': 'filesystem',
+    'executor': 'filesystem',
+    'permissions': ['file.write']
+})
+
+tool_registry.register_tool({
+    'name': 'count_lines',
+    'description': 'Count lines in a file without decoding it',
+    'category': 'filesystem',
+    'executor': 'filesystem',
+    'permissions': ['file.read'],
+    'idempotent': True
+})
+
+tool_registry.register_tool({
+    'name': 'list_directory',
+    'description': 'List directory contents',
+    'category': 'filesystem',
+    'executor': 'filesystem',
+    'permissions': ['file.read'],
+    'idempotent': True
+})
+
+tool_registry.register_tool({
+    'name': 'file_info',
+    'description': 'Get file metadata',
+    'category': 'filesystem',
+    'executor': 'filesystem',
+    'permissions': ['file.read'],
+    'idempotent': True
+})
+
 tool_registry.register_tool({
     'name': 'run_command',
     'description': 'Execute shell command',
@@ -148,18 +187,21 @@ class ChatOrchestrator:
         return tools
     
     async def search_rag(self, query: str, n_results: int = 3) -> Optional[Dict]:
-        """Search RAG database"""
+        """Search RAG database (the blocking query runs off the event loop)"""
         if not self.chroma:
             return None
         
-        try:
+        def query_sync():
             # Note: We have embedding dimension mismatch (768 vs 384)
             # Using query_texts instead of embeddings for now
             collection = self.chroma.get_collection(CONFIG['collection_name'])
-            results = collection.query(
+            return collection.query(
                 query_texts=[query],
                 n_results=n_results
             )
+        
+        try:
+            results = await asyncio.to_thread(query_sync)
             
             if results and results.get('documents') and len(results['documents'][0]) > 0:
                 sources = []
@@ -182,14 +224,64 @@ class ChatOrchestrator:
             logger.error(f"RAG search error: {e}")
             return None
     
+    async def stream_gemini(self, prompt: str):
+        """
+        Yield response text deltas as Gemini produces them
+        
+        The provider's stream is a blocking iterator, so it is drained on a
+        worker thread; cancelling the consumer stops the thread at the next chunk.
+        """
+        loop = asyncio.get_running_loop()
+        deltas: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+        
+        def pump():
+            try:
+                for text in self.gemini.stream(prompt):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(deltas.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(deltas.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(deltas.put_nowait, done)
+        
+        loop.run_in_executor(None, pump)
+        try:
+            while True:
+                item = await deltas.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+    
     async def generate_response(
         self,
         message: str,
         use_rag: bool = True,
         use_tools: bool = True,
-        context: Optional[List[Dict]] = None
+        context: Optional[List[Dict]] = None,
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
-        """Generate complete response with RAG and tools"""
+        """
+        Generate complete response with RAG and tools
+        
+        Args:
+            message: User message
+            use_rag: Search the RAG database when the message calls for it
+            use_tools: Detect tools the message asks for
+            context: Prior conversation turns (unused for now)
+            emit: Optional non-blocking callback receiving frames as they are
+                ready: {'type': 'sources'}, {'type': 'delta'}, {'type': 'tool'}
+        
+        Returns:
+            The complete result (the same whether or not frames were emitted)
+        """
+        emit = emit or (lambda frame: None)
         
         result = {
             'message': message,
@@ -208,8 +300,20 @@ class ChatOrchestrator:
                 result['used_rag'] = True
                 result['rag_sources'] = rag_results['sources']
                 logger.info(f"📚 RAG: Found {len(rag_results['sources'])} sources")
+                emit({'type': 'sources', 'sources': rag_results['sources']})
+        
+        # Step 2: Tool detection only needs the message, so report it before generating
+        if use_tools:
+            detected_tools = self.detect_tool_needs(message)
+            if detected_tools:
+                logger.info(f"🔧 Tools detected: {detected_tools}")
+                # Note: For now, just flag tools. Full execution in next iteration
+                result['used_tools'] = True
+                result['tool_results'] = [f"Tool '{t}' available" for t in detected_tools]
+                for t in detected_tools:
+                    emit({'type': 'tool', 'tool': t, 'status': 'available'})
         
-        # Step 2: Build context for Gemini
+        # Step 3: Build context for Gemini
         context_parts = []
         if result['rag_sources']:
             context_parts.append("Relevant information from your documents:")
@@ -217,12 +321,15 @@ class ChatOrchestrator:
                 context_parts.append(f"\nSource {i}: {source['content']}")
             context_parts.append(f"\nUser question: {message}")
         
-        # Step 3: Generate response with Gemini
+        # Step 4: Generate response with Gemini, streaming deltas
         if self.gemini:
+            parts = []
             try:
                 full_prompt = "\n".join(context_parts) if context_parts else message
-                response = self.gemini.generate_content(full_prompt)
-                result['response'] = response.text
+                async for delta in self.stream_gemini(full_prompt):
+                    parts.append(delta)
+                    emit({'type': 'delta', 'text': delta})
+                result['response'] = ''.join(parts)
                 logger.info("✅ Gemini response generated")
             except Exception as e:
                 result['response'] = f"Error generating response: {str(e)}"
@@ -230,15 +337,6 @@ class ChatOrchestrator:
         else:
             result['response'] = "Gemini not available"
         
-        # Step 4: Check if tools mentioned in response/message
-        if use_tools:
-            detected_tools = self.detect_tool_needs(message)
-            if detected_tools:
-                logger.info(f"🔧 Tools detected: {detected_tools}")
-                # Note: For now, just flag tools. Full execution in next iteration
-                result['used_tools'] = True
-                result['tool_results'] = [f"Tool '{t}' available" for t in detected_tools]
-        
         return result
 
 # Global orchestrator
@@ -259,16 +357,11 @@ def chat():
     
     logger.info(f"💬 Chat: {message[:60]}...")
     
-    # Run async function
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(
-            orchestrator.generate_response(message, use_rag, use_tools)
-        )
-        return jsonify(result)
-    finally:
-        loop.close()
+    # Run on the shared background loop
+    result = get_background_loop().run(
+        orchestrator.generate_response(message, use_rag, use_tools)
+    )
+    return jsonify(result)
 
 
 @app.route('/api/status', methods=['GET'])
@@ -288,7 +381,11 @@ def status():
         'stats': {
             'executors': list(tool_executor.executors.keys()),
             'tools': len(tool_registry.list_tools()),
+            'scheduler': tool_executor.scheduler.snapshot(),
+            'result_cache': (tool_executor.result_cache.snapshot()
+                             if tool_executor.result_cache else None),
         },
+        'providers': provider_snapshot(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -326,10 +423,142 @@ def root():
 
 # ============= WEBSOCKET (Streaming) =============
 
+class SocketSession:
+    """
+    One WebSocket connection with concurrent in-flight work and cancellation
+    
+    Work runs on the shared background loop. Frames go through a queue
+    drained by a sender thread, so a slow client never blocks the loop.
+    """
+    
+    def __init__(self, ws):
+        self.ws = ws
+        self.inflight: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._outbox: queue.Queue = queue.Queue()
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+    
+    def _send_loop(self) -> None:
+        while True:
+            frame = self._outbox.get()
+            if frame is None:
+                break
+            try:
+                self.ws.send(json.dumps(frame))
+            except Exception as e:
+                logger.warning(f"WebSocket send failed: {e}")
+                break
+    
+    def send(self, frame: Dict[str, Any]) -> None:
+        """Queue a frame (safe from any thread, never blocks)"""
+        self._outbox.put(frame)
+    
+    def claim(self, msg_id: str) -> bool:
+        """
+        Reserve an id for new work
+        
+        Returns:
+            False (after sending an error frame) if that id is still in
+            flight - reusing it would orphan the earlier request, which
+            could then no longer be cancelled or finished
+        """
+        with self._lock:
+            duplicate = msg_id in self.inflight
+            if not duplicate:
+                self.inflight[msg_id] = None
+        if duplicate:
+            self.send({'type': 'error', 'id': msg_id,
+                       'message': f'A request with id {msg_id} is already in flight'})
+        return not duplicate
+    
+    def submit(self, msg_id: str, coro, result_type: str) -> None:
+        """Run coro (for an id from claim()) on the background loop; its result is sent as a result_type frame"""
+        try:
+            future = get_background_loop().submit(coro)
+        except Exception:
+            with self._lock:
+                self.inflight.pop(msg_id, None)
+            raise
+        with self._lock:
+            self.inflight[msg_id] = future
+        future.add_done_callback(lambda f: self._finish(msg_id, f, result_type))
+    
+    def _finish(self, msg_id: str, future, result_type: str) -> None:
+        with self._lock:
+            self.inflight.pop(msg_id, None)
+        try:
+            self.send({'type': result_type, 'id': msg_id, 'data': future.result()})
+        except CancelledError:
+            self.send({'type': 'cancelled', 'id': msg_id})
+        except Exception as e:
+            logger.error(f"WebSocket task error: {e}")
+            self.send({'type': 'error', 'id': msg_id, 'message': str(e)})
+    
+    def cancel(self, msg_id: Optional[str] = None) -> List[str]:
+        """Cancel one in-flight message, or all of them"""
+        with self._lock:
+            targets = [msg_id] if msg_id else list(self.inflight)
+            futures = [(i, self.inflight.get(i)) for i in targets]
+        return [i for i, f in futures if f is not None and f.cancel()]
+    
+    def close(self) -> None:
+        self.cancel()
+        self._outbox.put(None)
+
+
+class ChatSocketSession(SocketSession):
+    """One /ws/chat connection"""
+    
+    def start(self, data: Dict[str, Any]) -> None:
+        """Begin answering one message; frames carry its id"""
+        msg_id = str(data.get('id') or uuid.uuid4().hex[:12])
+        if not self.claim(msg_id):
+            return
+        
+        def emit(frame: Dict[str, Any]) -> None:
+            self.send({**frame, 'id': msg_id})
+        
+        emit({'type': 'status', 'message': 'Processing...'})
+        self.submit(msg_id, orchestrator.generate_response(
+            data.get('message', ''), data.get('use_rag', True), data.get('use_tools', True),
+            emit=emit
+        ), 'response')
+
+
+class ToolSocketSession(SocketSession):
+    """One /ws/tools connection"""
+    
+    def start(self, data: Dict[str, Any]) -> None:
+        """Begin one tool execution; output and result frames carry its id"""
+        msg_id = str(data.get('id') or uuid.uuid4().hex[:12])
+        if not self.claim(msg_id):
+            return
+        tool_name = data.get('tool_name')
+        
+        def send_output(chunk: Dict[str, Any]) -> None:
+            self.send({'type': 'output', 'id': msg_id, 'tool': tool_name, **chunk})
+        
+        self.send({'type': 'status', 'id': msg_id, 'message': f'Executing {tool_name}...'})
+        self.submit(msg_id, tool_executor.execute_tool(
+            tool_name, data.get('parameters', {}), data.get('permissions'),
+            on_output=send_output if data.get('stream', True) else None
+        ), 'result')
+
+
 @sock.route('/ws/chat')
 def websocket_chat(ws):
-    """WebSocket for streaming chat responses"""
+    """
+    WebSocket for streaming chat responses
+    
+    Send {'message': ..., 'id': optional} to start a reply; several may be
+    in flight at once. Frames for a message share its id: status, sources,
+    tool, delta (response text as generated), then response (the full
+    result), cancelled or error. Send {'action': 'cancel', 'id': ...} to
+    stop one (omit id to stop all), {'action': 'ping'} for a pong.
+    """
     logger.info("🔌 WebSocket client connected")
+    session = ChatSocketSession(ws)
     
     try:
         while True:
@@ -338,41 +567,75 @@ def websocket_chat(ws):
                 break
             
             data = json.loads(message_data)
-            message = data.get('message', '')
-            use_rag = data.get('use_rag', True)
-            use_tools = data.get('use_tools', True)
-            
-            # Send status
-            ws.send(json.dumps({
-                'type': 'status',
-                'message': 'Processing...'
-            }))
+            action = data.get('action', 'chat')
             
-            # Generate response
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(
-                    orchestrator.generate_response(message, use_rag, use_tools)
-                )
-                
-                # Send result
-                ws.send(json.dumps({
-                    'type': 'response',
-                    'data': result
-                }))
-            finally:
-                loop.close()
+            if action == 'chat':
+                session.start(data)
+            elif action == 'cancel':
+                cancelled = session.cancel(data.get('id'))
+                logger.info(f"🛑 Cancelled: {cancelled or 'nothing in flight'}")
+            elif action == 'ping':
+                session.send({'type': 'pong', 'inflight': list(session.inflight)})
                 
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        ws.send(json.dumps({
+        session.send({
             'type': 'error',
             'message': str(e)
-        }))
+        })
     finally:
+        session.close()
         logger.info("🔌 WebSocket client disconnected")
 
+@sock.route(tool_executor.config.get('api', {}).get('websocket_path', '/ws/tools'))
+def websocket_tools(ws):
+    """
+    WebSocket for tool execution; run_command output streams as it is produced
+    
+    Send {'action': 'execute_tool', 'tool_name': ..., 'parameters': ...,
+    'id': optional}; several may be in flight at once, each running on the
+    shared background loop. Frames for an execution share its id: status,
+    output (when 'stream' is true, the default), then result, cancelled or
+    error. {'action': 'cancel', 'id': ...} stops one (omit id for all).
+    """
+    logger.info("🔌 Tools WebSocket client connected")
+    session = ToolSocketSession(ws)
+    
+    try:
+        while True:
+            message_data = ws.receive()
+            if not message_data:
+                break
+            
+            data = json.loads(message_data)
+            action = data.get('action')
+            
+            if action == 'execute_tool':
+                session.start(data)
+            
+            elif action == 'cancel':
+                cancelled = session.cancel(data.get('id'))
+                logger.info(f"🛑 Cancelled tools: {cancelled or 'nothing in flight'}")
+            
+            elif action == 'list_tools':
+                session.send({
+                    'type': 'tools_list',
+                    'tools': tool_registry.list_tools()
+                })
+            
+            elif action == 'ping':
+                session.send({'type': 'pong', 'inflight': list(session.inflight)})
+                
+    except Exception as e:
+        logger.error(f"Tools WebSocket error: {e}")
+        session.send({
+            'type': 'error',
+            'message': str(e)
+        })
+    finally:
+        session.close()
+        logger.info("🔌 Tools WebSocket client disconnected")
+
 # ============= STARTUP =============
 
 if __name__ == '__main__':
@@ -396,7 +659,8 @@ if __name__ == '__main__':
     
     print("\n📡 Endpoints:")
     print("   HTTP:      http://localhost:5556")
-    print("   WebSocket: ws://localhost:5556/ws/chat")
+    print("   WebSocket: ws://localhost:5556/ws/chat (streaming, cancellable)")
+    print(f"   Tools WS:  ws://localhost:5556{tool_executor.config.get('api', {}).get('websocket_path', '/ws/tools')}")
     print("\n" + "="*60 + "\n")
     
     app.run(host='0.0.0.0', port=5556, debug=True)
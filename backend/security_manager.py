@@ -5,15 +5,195 @@ This module provides security checks for tool execution including:
 - Path validation (allowed directories)
 - Command validation (blocked commands)
 - Permission checking
+
+Paths and commands are checked against a SecurityPolicy compiled once from
+config, so validation stays cheap when recursive tools check every file.
 """
 import os
-from typing import List, Set
+import re
+import stat
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class SecurityPolicy:
+    """
+    Compiled path/command policy, cheap enough to run once per file
+
+    Allowed roots are realpath-normalized into a component trie, so a check is
+    one dict walk over the path's components (and /tmp/faithh never admits
+    /tmp/faithh-other). Paths are resolved physically, symlinks and '..'
+    included, with an LRU of resolved parent directories. A cached directory
+    is only trusted after re-lstat-ing every component of its realpath (same
+    inode, still a directory, not a symlink), so a directory swapped for a
+    symlink after it was cached is resolved again rather than let through.
+    """
+
+    _TERMINAL = object()
+    # Command separators: ; & | newline (covers &&, ||, |&), plus subshells,
+    # command substitution and brace groups
+    _SEGMENT_SPLIT = re.compile(r'[;&|\n`(){}]+')
+    _ENV_ASSIGN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+    # Commands that run another command taken from their arguments
+    _WRAPPERS = frozenset({'sudo', 'doas', 'env', 'nohup', 'nice', 'ionice', 'time', 'timeout',
+                           'exec', 'command', 'builtin', 'xargs', 'stdbuf', 'setsid', 'chroot',
+                           'watch', 'sh', 'bash', 'dash', 'zsh'})
+
+    def __init__(self, allowed_roots: Iterable[str], blocked_commands: Iterable[str] = (),
+                 cache_size: int = 4096):
+        """
+        Args:
+            allowed_roots: Directories under which paths are allowed
+            blocked_commands: Command names that may not run
+            cache_size: Resolved directories kept in the LRU
+        """
+        self.roots = sorted({os.path.realpath(os.path.expanduser(r)) for r in allowed_roots})
+        self.blocked_commands = frozenset(blocked_commands)
+        self.cache_size = cache_size
+        self._trie: Dict[str, Any] = {}
+        for root in self.roots:
+            node = self._trie
+            for part in self._parts(root):
+                node = node.setdefault(part, {})
+            node[self._TERMINAL] = True
+        # raw directory -> (realpath, (st_dev, st_ino) of each realpath prefix)
+        self._dirs: "OrderedDict[str, Tuple[str, Tuple[Tuple[int, int], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0}
+
+    @staticmethod
+    def _parts(real: str) -> List[str]:
+        return [p for p in real.split(os.sep) if p]
+
+    def allows(self, real: str) -> bool:
+        """True if a realpath lies at or under an allowed root"""
+        node = self._trie
+        if self._TERMINAL in node:
+            return True
+        for part in self._parts(real):
+            node = node.get(part)
+            if node is None:
+                return False
+            if self._TERMINAL in node:
+                return True
+        return False
+
+    @staticmethod
+    def _identity(real: str) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """
+        (st_dev, st_ino) of every prefix of a realpath, or None if any prefix
+        is missing, not a directory or a symlink
+        """
+        ids = []
+        prefix = os.sep
+        for part in [''] + [p for p in real.split(os.sep) if p]:
+            prefix = os.path.join(prefix, part)
+            try:
+                st = os.lstat(prefix)
+            except OSError:
+                return None
+            if not stat.S_ISDIR(st.st_mode):
+                return None
+            ids.append((st.st_dev, st.st_ino))
+        return tuple(ids)
+
+    def _real_dir(self, directory: str) -> str:
+        """Realpath of a directory, from the LRU when its components are unchanged"""
+        with self._lock:
+            entry = self._dirs.get(directory)
+        if entry is not None:
+            real, ids = entry
+            if self._identity(real) == ids and (real == directory or self._same_dir(directory, ids[-1])):
+                with self._lock:
+                    if directory in self._dirs:
+                        self._dirs.move_to_end(directory)
+                    self.stats['hits'] += 1
+                return real
+            with self._lock:
+                self._dirs.pop(directory, None)
+                self.stats['stale'] += 1
+        with self._lock:
+            self.stats['misses'] += 1
+        real = os.path.realpath(directory)
+        ids = self._identity(real)
+        if ids is None:
+            return real  # may be created later (possibly as a symlink): don't cache
+        with self._lock:
+            self._dirs[directory] = (real, ids)
+            if len(self._dirs) > self.cache_size:
+                self._dirs.popitem(last=False)
+        return real
+
+    @staticmethod
+    def _same_dir(directory: str, identity: Tuple[int, int]) -> bool:
+        """True if directory (followed through symlinks) is the directory with this identity"""
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return False
+        return (st.st_dev, st.st_ino) == identity
+
+    def resolve(self, path: str, base: Optional[str] = None) -> str:
+        """
+        Physical realpath of path (relative paths are taken from base or the cwd)
+
+        The parent directory's resolution comes from the LRU (revalidated on
+        every hit); the final component is checked for a symlink per call.
+        """
+        raw = os.path.expanduser(str(path))
+        if not os.path.isabs(raw):
+            raw = os.path.join(base or os.getcwd(), raw)
+        parent, name = os.path.split(raw.rstrip(os.sep) or os.sep)
+        if name in ('', '.', '..'):
+            return self._real_dir(raw)
+        candidate = os.path.join(self._real_dir(parent), name)
+        if os.path.islink(candidate):
+            return os.path.realpath(candidate)
+        return candidate
+
+    def check_path(self, path: str, base: Optional[str] = None) -> Optional[str]:
+        """Realpath of path if it is allowed, else None"""
+        real = self.resolve(path, base)
+        return real if self.allows(real) else None
+
+    def check_paths(self, paths: Iterable[str], base: Optional[str] = None) -> List[bool]:
+        """Batch form of check_path for tools touching many files"""
+        return [self.allows(self.resolve(p, base)) for p in paths]
+
+    def blocked_command(self, command: str) -> Optional[str]:
+        """
+        First blocked command name in a shell command line, or None
+
+        Every chained segment (;, &&, ||, |, subshells) is checked by
+        basename. The command is the first word after VAR=value prefixes. If
+        it is a wrapper (sudo, timeout, xargs, sh, ...), every later word of
+        the segment is checked too: wrapper options and their values
+        (sudo -u root, nice -n 10) can't be told apart from the wrapped
+        command without parsing each wrapper's flags.
+        """
+        for seg in self._SEGMENT_SPLIT.split(command):
+            words = [word.strip('\'"') for word in seg.split()]
+            while words and self._ENV_ASSIGN.match(words[0]):
+                words.pop(0)
+            for i, word in enumerate(words):
+                name = os.path.basename(word)
+                if name in self.blocked_commands:
+                    return name
+                if i == 0 and name not in self._WRAPPERS:
+                    break
+        return None
+
+    def clear_cache(self) -> None:
+        """Forget resolved directories (cheap insurance after commands or writes)"""
+        with self._lock:
+            self._dirs.clear()
+
+
 class SecurityManager:
     """Manages security checks for tool execution"""
     
@@ -26,16 +206,16 @@ class SecurityManager:
                 - allowed_directories: List of allowed paths
                 - blocked_commands: List of forbidden commands
                 - default_permissions: Default permission set
+                - path_cache_size: Resolved directories cached (default 4096)
         """
         self.allowed_paths: List[str] = config.get('allowed_directories', [])
         self.blocked_commands: List[str] = config.get('blocked_commands', [])
         self.default_permissions: Set[str] = set(config.get('default_permissions', []))
         
-        # Normalize and expand allowed paths
-        self.allowed_paths_normalized = [
-            os.path.abspath(os.path.expanduser(p)) 
-            for p in self.allowed_paths
-        ]
+        # Compiled once: root trie, command set, resolved-path LRU
+        self.policy = SecurityPolicy(self.allowed_paths, self.blocked_commands,
+                                     config.get('path_cache_size', 4096))
+        self.allowed_paths_normalized = self.policy.roots
         
         logger.info(f"Security Manager initialized with {len(self.allowed_paths)} allowed paths")
         logger.info(f"Blocked commands: {', '.join(self.blocked_commands)}")
@@ -44,27 +224,18 @@ class SecurityManager:
         """
         Check if path is within allowed directories
         
+        The path is resolved physically (symlinks, '..') before the check.
+        
         Args:
             path: File or directory path to validate
             
         Returns:
             bool: True if path is allowed, False otherwise
         """
-        # TODO: Implement robust path validation
-        # - Resolve symlinks
-        # - Handle relative paths
-        # - Check for path traversal attempts
-        # - Normalize path separators
-        
         try:
-            # Normalize the input path
-            abs_path = os.path.abspath(os.path.expanduser(path))
-            
-            # Check against allowed paths
-            for allowed in self.allowed_paths_normalized:
-                if abs_path.startswith(allowed):
-                    logger.debug(f"Path allowed: {path}")
-                    return True
+            if self.policy.check_path(path) is not None:
+                logger.debug(f"Path allowed: {path}")
+                return True
             
             logger.warning(f"Path rejected: {path}")
             return False
@@ -73,6 +244,26 @@ class SecurityManager:
             logger.error(f"Path validation error: {e}")
             return False
     
+    def validate_paths(self, paths: List[str]) -> List[bool]:
+        """
+        Check many paths at once (e.g. every file a search or listing touches)
+        
+        Args:
+            paths: File or directory paths to validate
+            
+        Returns:
+            List of bools, one per path, in order
+        """
+        try:
+            results = self.policy.check_paths(paths)
+        except Exception as e:
+            logger.error(f"Path validation error: {e}")
+            return [False] * len(paths)
+        rejected = results.count(False)
+        if rejected:
+            logger.warning(f"Paths rejected: {rejected}/{len(paths)}")
+        return results
+    
     def validate_command(self, command: str) -> bool:
         """
         Check if command is allowed (not in blocked list)
@@ -83,25 +274,18 @@ class SecurityManager:
         Returns:
             bool: True if command allowed, False if blocked
         """
-        # TODO: Implement command validation
-        # - Extract command name from full command string
-        # - Check for shell metacharacters
-        # - Detect command chaining attempts
-        # - Check for privilege escalation (sudo, etc.)
-        
         # Extract base command (first word)
         cmd_parts = command.strip().split()
         if not cmd_parts:
             return False
         
-        cmd_name = cmd_parts[0]
-        
-        # Check if command is blocked
-        if cmd_name in self.blocked_commands:
-            logger.warning(f"Blocked command attempted: {cmd_name}")
+        # Check every chained segment against the blocked set
+        blocked = self.policy.blocked_command(command)
+        if blocked is not None:
+            logger.warning(f"Blocked command attempted: {blocked}")
             return False
         
-        logger.debug(f"Command allowed: {cmd_name}")
+        logger.debug(f"Command allowed: {cmd_parts[0]}")
         return True
     
     def check_permission(self, required: str, granted: Set[str]) -> bool:
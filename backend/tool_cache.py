@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Tool Cache - LRU result cache for idempotent tools, keyed on file identity
+
+Agents call read_file / list_directory / get_file_info / search_code on the
+same paths over and over within one conversation. A cached result is reused
+only while every path it depends on still has the same (inode, mtime_ns,
+size) fingerprint; callers must list every path the result reports on.
+Writes through the tool layer also invalidate explicitly: the path itself,
+everything under it, and every ancestor directory listing/search.
+
+Fingerprints are taken before the tool runs (fingerprints()) and handed to
+put(), which refuses to cache if any of them changed meanwhile - otherwise
+content read before a write would be stored under the post-write
+fingerprint and served as fresh. Paths only known from the result (a
+listing's entries) can't be fingerprinted up front; those must not have
+been modified since shortly before the tool started.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MISSING = ('missing',)
+
+# Result-only paths modified this close to the tool's start may have changed
+# while it ran (slack for coarse filesystem timestamps)
+RACY_WINDOW_NS = 1_000_000_000
+
+
+def fingerprint(path: str) -> Tuple:
+    """(inode, mtime_ns, size) of a path, or a marker if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return MISSING
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _estimate_bytes(value: Any) -> int:
+    """Cheap size estimate of a JSON-like result (strings dominate)"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _estimate_bytes(v) for k, v in value.items()) + 16
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_bytes(v) for v in value) + 8
+    return 8
+
+
+class ToolResultCache:
+    """Thread-safe LRU with entry and byte limits plus path-based invalidation"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Max cached results
+            max_bytes: Approximate max total size of cached results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (result, paths, fingerprints, size)
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[str, Any], Tuple[str, ...], Tuple, int]]" = OrderedDict()
+        self._by_path: Dict[str, set] = {}
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'invalidations': 0,
+                      'races': 0}
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> Optional['ToolResultCache']:
+        """Build from tools.result_cache in config.yaml (enabled: false -> None)"""
+        if not cache_config.get('enabled', True):
+            return None
+        return cls(max_entries=cache_config.get('max_entries', 512),
+                   max_bytes=cache_config.get('max_bytes', 32 * 1024 * 1024))
+
+    @staticmethod
+    def make_key(tool: str, params: Dict[str, Any], extra: Any = None) -> Tuple:
+        """Stable key for (tool, params[, extra state such as an index generation])"""
+        return (tool, json.dumps(params, sort_keys=True, default=str), extra)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Copy of the cached result if every dependent path is unchanged, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            result, paths, prints, _ = entry
+        if tuple(fingerprint(p) for p in paths) != prints:
+            with self._lock:
+                self._drop(key)
+                self.stats['stale'] += 1
+                self.stats['misses'] += 1
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        return copy.deepcopy(result)
+
+    @staticmethod
+    def fingerprints(paths: Iterable[str]) -> Dict[str, Tuple]:
+        """Fingerprints to take just before running a tool and pass to put(before=...)"""
+        return {os.path.abspath(p): fingerprint(p) for p in paths}
+
+    def put(self, key: Tuple, result: Dict[str, Any], paths: Iterable[str],
+            before: Optional[Dict[str, Tuple]] = None, started_ns: Optional[int] = None) -> None:
+        """
+        Cache a result that depends on the given paths
+
+        Args:
+            key: make_key() of the call
+            result: Tool result (a copy is stored)
+            paths: Every path the result reports on
+            before: fingerprints() taken before the tool ran; a path that
+                changed since is a race and the result isn't cached
+            started_ns: time.time_ns() when the tool started; paths missing
+                from `before` must be older than that (less RACY_WINDOW_NS)
+        """
+        paths = tuple(os.path.abspath(p) for p in paths)
+        prints = tuple(fingerprint(p) for p in paths)
+        for p, now in zip(paths, prints):
+            if before is not None and p in before:
+                racy = before[p] != now
+            else:
+                racy = started_ns is not None and now != MISSING and now[1] >= started_ns - RACY_WINDOW_NS
+            if racy:
+                with self._lock:
+                    self.stats['races'] += 1
+                return
+        result = copy.deepcopy(result)
+        size = _estimate_bytes(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (result, paths, prints, size)
+            self._bytes += size
+            for p in paths:
+                self._by_path.setdefault(p, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats['evictions'] += 1
+
+    def _drop(self, key: Tuple) -> None:
+        """Remove one entry (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, paths, _, size = entry
+        self._bytes -= size
+        for p in paths:
+            keys = self._by_path.get(p)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[p]
+
+    def invalidate_path(self, path: str) -> int:
+        """
+        Drop results depending on path, anything under it, or any ancestor
+
+        Returns:
+            Number of entries dropped
+        """
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        ancestors = set()
+        parent = os.path.dirname(path)
+        while True:
+            ancestors.add(parent)
+            up = os.path.dirname(parent)
+            if up == parent:
+                break
+            parent = up
+        with self._lock:
+            doomed = set()
+            for p, keys in self._by_path.items():
+                if p == path or p.startswith(prefix) or p in ancestors:
+                    doomed |= keys
+            for key in doomed:
+                self._drop(key)
+            self.stats['invalidations'] += len(doomed)
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._by_path.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self.stats['hits'] / total, 4) if total else 0.0,
+                **self.stats,
+            }
+
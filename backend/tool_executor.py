@@ -3,15 +3,20 @@
 Tool Executor - Core execution engine for FAITHH
 Orchestrates tool execution with security validation and executor routing
 """
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 import logging
+import os
 import yaml
 from pathlib import Path
 import asyncio
+import re
+import time
 
 # Import our modules
 from tool_registry import get_registry
 from security_manager import SecurityManager
+from tool_scheduler import ExecutionScheduler, QueueTimeoutError, INTERACTIVE, PRIORITY_CLASSES
+from tool_cache import ToolResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +28,8 @@ class ToolExecutor:
     """
     Core execution engine that orchestrates tool execution
     
-    Flow: Registry lookup -> Security check -> Route to executor -> Return result
+    Flow: Registry lookup -> Security check -> Result cache (idempotent
+          tools) -> Wait for a scheduler slot -> Route to executor -> Return result
     """
     
     def __init__(self, config_path: str = 'config.yaml'):
@@ -34,6 +40,12 @@ class ToolExecutor:
         security_config = self.config.get('security', {})
         self.security = SecurityManager(security_config)
         self.executors: Dict[str, Any] = {}
+        # Enforces tools.max_concurrent_executions + per-executor limits
+        self.scheduler = ExecutionScheduler.from_config(self.config.get('tools', {}))
+        # Results of tools marked 'idempotent' in the registry, keyed on the
+        # identity of params['path']; None when tools.result_cache.enabled is false
+        self.result_cache = ToolResultCache.from_config(
+            self.config.get('tools', {}).get('result_cache', {}))
         
         logger.info("Tool Executor initialized")
     
@@ -63,7 +75,9 @@ class ToolExecutor:
         self, 
         tool_name: str, 
         parameters: Dict[str, Any],
-        permissions: Optional[list] = None
+        permissions: Optional[list] = None,
+        priority: Optional[str] = None,
+        on_output: Optional[Callable[[Dict[str, Any]], Any]] = None
     ) -> Dict[str, Any]:
         """
         Execute a tool with security validation
@@ -72,10 +86,17 @@ class ToolExecutor:
             tool_name: Name of the tool to execute
             parameters: Tool parameters
             permissions: Optional permissions override
+            priority: 'interactive' or 'background' (default: tool's
+                'priority' field, else interactive)
+            on_output: Optional callback for incremental output chunks;
+                used when the executor implements execute_streaming()
             
         Returns:
             Dict with execution results
         """
+        # One deadline covers queue wait + execution
+        timeout = self.config.get('tools', {}).get('execution_timeout_ms', 30000) / 1000
+        deadline = time.monotonic() + timeout
         try:
             # Step 1: Lookup tool in registry
             tool_def = self.registry.get_tool(tool_name)
@@ -99,21 +120,58 @@ class ToolExecutor:
             
             executor = self.executors[executor_type]
             
-            # Step 5: Execute with timeout
-            timeout = self.config.get('tools', {}).get('execution_timeout_ms', 30000) / 1000
-            result = await asyncio.wait_for(
-                executor.execute(tool_name, validated_params),
-                timeout=timeout
-            )
+            # Step 5: Serve idempotent tools from cache while their path is unchanged
+            cache_key = self._cache_key(tool_def, validated_params)
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return {
+                        'success': True,
+                        'tool': tool_name,
+                        'result': cached,
+                        'executor': executor_type,
+                        'queue_wait_ms': 0.0,
+                        'cached': True
+                    }
             
-            # Step 6: Format and return result
+                started_ns = time.time_ns()
+                before = self.result_cache.fingerprints([validated_params['path']])
+            
+            # Step 6: Wait for a slot, then execute within the remaining time
+            priority = priority or tool_def.get('priority', INTERACTIVE)
+            if priority not in PRIORITY_CLASSES:
+                raise ToolExecutionError(f"Unknown priority class: {priority}")
+            async with self.scheduler.slot(executor_type, priority,
+                                           timeout=deadline - time.monotonic()) as queue_wait_ms:
+                if on_output is not None and hasattr(executor, 'execute_streaming'):
+                    run = executor.execute_streaming(tool_name, validated_params, on_output)
+                else:
+                    run = executor.execute(tool_name, validated_params)
+                result = await asyncio.wait_for(run, timeout=max(0.0, deadline - time.monotonic()))
+            
+            # Step 7: Cache the result, or drop what this tool may have changed
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result, self._dependent_paths(tool_def, validated_params, result),
+                                      before=before, started_ns=started_ns)
+            else:
+                self._invalidate_after(tool_def, validated_params)
+            
+            # Step 8: Format and return result
             return {
                 'success': True,
                 'tool': tool_name,
                 'result': result,
-                'executor': executor_type
+                'executor': executor_type,
+                'queue_wait_ms': round(queue_wait_ms, 2)
             }
             
+        except QueueTimeoutError as e:
+            logger.warning(f"Tool dropped from queue: {tool_name} ({e})")
+            return {
+                'success': False,
+                'error': 'Queue timeout',
+                'tool': tool_name
+            }
         except asyncio.TimeoutError:
             logger.error(f"Tool execution timeout: {tool_name}")
             return {
@@ -136,6 +194,32 @@ class ToolExecutor:
                 'tool': tool_name
             }
     
+    def _cache_key(self, tool_def: dict, params: Dict[str, Any]) -> Optional[tuple]:
+        """Cache key for an idempotent tool acting on a path, else None"""
+        if self.result_cache is None or not tool_def.get('idempotent'):
+            return None
+        if not isinstance(params.get('path'), str):
+            return None  # nothing to fingerprint, so no way to tell it's stale
+        return ToolResultCache.make_key(tool_def['name'], params)
+    
+    def _dependent_paths(self, tool_def: dict, params: Dict[str, Any], result: Any) -> list:
+        """Paths whose fingerprints a cached result depends on (listings: every entry too)"""
+        paths = [params['path']]
+        if tool_def['name'] == 'list_directory' and isinstance(result, dict):
+            paths.extend(os.path.join(params['path'], item['name']) for item in result.get('items', []))
+        return paths
+    
+    def _invalidate_after(self, tool_def: dict, params: Dict[str, Any]) -> None:
+        """Drop cached results (and resolved paths) a non-idempotent tool may have made stale"""
+        self.security.policy.clear_cache()
+        if self.result_cache is None:
+            return
+        if isinstance(params.get('path'), str):
+            self.result_cache.invalidate_path(params['path'])
+        elif 'process.execute' in tool_def.get('permissions', []):
+            # Commands can touch any file
+            self.result_cache.clear()
+    
     def _check_permissions(self, required: list, provided: Optional[list]) -> bool:
         """
         Check if provided permissions satisfy requirements
@@ -175,6 +259,12 @@ class ToolExecutor:
             if not self.security.validate_path(validated['path']):
                 raise ToolExecutionError(f"Invalid path: {validated['path']}")
         
+        # Tools touching many paths are checked in one batch
+        if isinstance(validated.get('paths'), list):
+            for path, ok in zip(validated['paths'], self.security.validate_paths(validated['paths'])):
+                if not ok:
+                    raise ToolExecutionError(f"Invalid path: {path}")
+        
         # If tool executes commands, validate them
         if 'command' in validated:
             if not self.security.validate_command(validated['command']):
@@ -182,12 +272,26 @@ class ToolExecutor:
         
         return validated
     
-    async def execute_combo(self, combo_tools: list) -> Dict[str, Any]:
+    async def execute_combo(self, combo_tools: list, priority: Optional[str] = None) -> Dict[str, Any]:
         """
-        Execute a combo of tools in sequence (Battle Chip combos!)
+        Execute a combo of tools (Battle Chip combos!)
+        
+        Steps run as soon as their dependencies succeed, so independent chips
+        run concurrently (still under the scheduler's limits) and the combo
+        takes as long as its critical path. A failed step skips everything
+        downstream of it; other branches keep going.
         
         Args:
-            combo_tools: List of (tool_name, parameters) tuples
+            combo_tools: Either a list of (tool_name, parameters) tuples, run
+                as a chain in order (each step depends on the previous one),
+                or a list of step dicts:
+                    {'id': 'a', 'tool': 'read_file', 'params': {...},
+                     'depends_on': ['b']}
+                String parameters may reference earlier results: a value of
+                exactly "${b.content}" is replaced by that field of step b's
+                result (any type); "${b.path}" inside a longer string is
+                interpolated. Referenced steps are implicit dependencies.
+            priority: Scheduler priority class for every step
             
         Returns:
             Combined results with bonus if enabled
@@ -195,28 +299,150 @@ class ToolExecutor:
         if not self.config.get('tools', {}).get('enable_combos', True):
             return {'success': False, 'error': 'Combos disabled'}
         
+        try:
+            steps = _normalize_combo(combo_tools)
+        except ToolExecutionError as e:
+            return {'success': False, 'error': str(e)}
+        
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        done: Dict[str, asyncio.Future] = {
+            step['id']: asyncio.get_running_loop().create_future() for step in steps
+        }
+        
+        async def run_step(step: Dict[str, Any]) -> None:
+            step_id = step['id']
+            try:
+                dep_ok = [await done[dep] for dep in step['depends_on']]
+                if not all(dep_ok):
+                    failed = [d for d, ok in zip(step['depends_on'], dep_ok) if not ok]
+                    outcomes[step_id] = {'status': 'skipped', 'blocked_by': failed}
+                    return
+                try:
+                    params = _resolve_refs(step['params'], outcomes)
+                except ToolExecutionError as e:
+                    result = {'success': False, 'error': str(e), 'tool': step['tool']}
+                else:
+                    result = await self.execute_tool(step['tool'], params, priority=priority)
+                outcomes[step_id] = {'status': 'success' if result.get('success') else 'failed',
+                                     'result': result}
+            finally:
+                if not done[step_id].done():
+                    done[step_id].set_result(outcomes.get(step_id, {}).get('status') == 'success')
+        
+        start = time.monotonic()
+        await asyncio.gather(*(run_step(step) for step in steps))
+        elapsed_ms = (time.monotonic() - start) * 1000
+        
+        # Results in declared order; skipped steps are listed separately
         results = []
-        for tool_name, params in combo_tools:
-            result = await self.execute_tool(tool_name, params)
-            results.append(result)
-            
-            # Stop combo chain on first failure
-            if not result.get('success'):
-                break
+        for step in steps:
+            outcome = outcomes[step['id']]
+            if outcome['status'] != 'skipped':
+                results.append({**outcome['result'], 'step': step['id']})
+        skipped = [step['id'] for step in steps if outcomes[step['id']]['status'] == 'skipped']
         
         # Calculate combo bonus
         bonus_multiplier = self.config.get('tools', {}).get('combo_bonus_multiplier', 1.0)
-        all_success = all(r.get('success') for r in results)
+        all_success = not skipped and all(r.get('success') for r in results)
         
         return {
             'success': all_success,
             'combo_size': len(results),
             'results': results,
+            'skipped': skipped,
+            'elapsed_ms': round(elapsed_ms, 2),
             'bonus_applied': all_success and bonus_multiplier > 1.0,
             'bonus_multiplier': bonus_multiplier if all_success else 1.0
         }
 
 
+_REF = re.compile(r'\$\{([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+)*)\}')
+
+
+def _find_refs(value: Any) -> set:
+    """Step ids referenced anywhere inside a parameter value"""
+    if isinstance(value, str):
+        return {m.group(1) for m in _REF.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(_find_refs(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(_find_refs(v) for v in value)) if value else set()
+    return set()
+
+
+def _lookup_ref(step_id: str, path: str, outcomes: Dict[str, Dict[str, Any]]) -> Any:
+    """Field of a finished step's result payload, e.g. ('read', '.content')"""
+    value = outcomes[step_id]['result'].get('result')
+    for key in filter(None, path.split('.')):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            raise ToolExecutionError(f"Reference ${{{step_id}{path}}} not found in result")
+    return value
+
+
+def _resolve_refs(value: Any, outcomes: Dict[str, Dict[str, Any]]) -> Any:
+    """Substitute ${step.field} references with upstream results"""
+    if isinstance(value, str):
+        whole = _REF.fullmatch(value)
+        if whole:
+            return _lookup_ref(whole.group(1), whole.group(2), outcomes)
+        return _REF.sub(lambda m: str(_lookup_ref(m.group(1), m.group(2), outcomes)), value)
+    if isinstance(value, dict):
+        return {k: _resolve_refs(v, outcomes) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(v, outcomes) for v in value]
+    return value
+
+
+def _normalize_combo(combo_tools: list) -> list:
+    """
+    Turn either combo format into validated step dicts
+    
+    Raises:
+        ToolExecutionError: Duplicate ids, unknown dependencies or cycles
+    """
+    steps = []
+    for i, entry in enumerate(combo_tools):
+        if isinstance(entry, dict):
+            step_id = str(entry.get('id') or f"step{i}")
+            tool = entry.get('tool') or entry.get('tool_name')
+            params = entry.get('params', entry.get('parameters', {})) or {}
+            depends_on = list(entry.get('depends_on', []))
+        else:
+            # Legacy (tool_name, params): a strict chain, as before
+            tool, params = entry
+            step_id = f"step{i}"
+            depends_on = [f"step{i - 1}"] if i else []
+        if not tool:
+            raise ToolExecutionError(f"Combo step {step_id} has no tool")
+        steps.append({'id': step_id, 'tool': tool, 'params': params, 'depends_on': depends_on})
+    
+    ids = [step['id'] for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ToolExecutionError("Duplicate combo step ids")
+    for step in steps:
+        deps = list(dict.fromkeys(step['depends_on'] + sorted(_find_refs(step['params']))))
+        unknown = [d for d in deps if d not in ids]
+        if unknown:
+            raise ToolExecutionError(f"Step {step['id']} depends on unknown step(s): {unknown}")
+        step['depends_on'] = deps
+    
+    # Kahn's algorithm: every step must be reachable without a cycle
+    remaining = {step['id']: set(step['depends_on']) for step in steps}
+    while remaining:
+        ready = [sid for sid, deps in remaining.items() if not deps]
+        if not ready:
+            raise ToolExecutionError(f"Combo has a dependency cycle among: {sorted(remaining)}")
+        for sid in ready:
+            del remaining[sid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return steps
+
+
 # Global executor instance
 _executor = None
 
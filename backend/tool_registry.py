@@ -35,6 +35,9 @@ class ToolRegistry:
                 Optional keys:
                 - code: str - Battle chip code (A-Z)
                 - parameters: dict - Expected input parameters
+                - priority: str - Scheduler class ('interactive'/'background')
+                - idempotent: bool - Result depends only on params['path'],
+                  so ToolExecutor may serve it from the result cache
         
         Returns:
             bool: True if registration successful, False otherwise
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Tool Scheduler - Concurrency limits, priority classes and queueing for tool runs
+
+ToolExecutor asks the scheduler for a slot before every tool execution:
+
+- Global limit: tools.max_concurrent_executions from config.yaml
+- Per-executor limits: tools.executor_limits (e.g. process: 2), so a burst of
+  run_command calls can't take every slot away from cheap read_file calls
+- Priority classes: interactive work is dispatched before background work;
+  background waiters older than tools.background_aging_ms are promoted so
+  they can't starve forever
+- Queue timeout: a caller that waits past its deadline is removed from the
+  queue and never starts
+
+The scheduler is thread-safe and loop-agnostic: Flask handlers each run their
+own event loop, so waiters are woken with call_soon_threadsafe on whichever
+loop they are waiting in.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND)
+_PRIORITY_RANK = {INTERACTIVE: 0, BACKGROUND: 1}
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a tool waited in the queue past its deadline"""
+    pass
+
+
+class _Waiter:
+    __slots__ = ('executor_type', 'priority', 'seq', 'loop', 'future', 'enqueued', 'state')
+
+    def __init__(self, executor_type: str, priority: str, seq: int, loop, future):
+        self.executor_type = executor_type
+        self.priority = priority
+        self.seq = seq
+        self.loop = loop
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.state = 'waiting'  # waiting -> granted | cancelled
+
+
+class _WaitStats:
+    """Queue wait samples for one priority class or executor"""
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.timeouts = 0
+        self.recent = deque(maxlen=window)
+
+    def add(self, wait_ms: float) -> None:
+        self.count += 1
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+        self.recent.append(wait_ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            'started': self.count,
+            'avg_wait_ms': round(self.total_ms / self.count, 2) if self.count else 0.0,
+            'p95_wait_ms': round(p95, 2),
+            'max_wait_ms': round(self.max_ms, 2),
+            'queue_timeouts': self.timeouts,
+        }
+
+
+class ExecutionScheduler:
+    """Global + per-executor semaphores with a priority queue in front"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 5,
+        executor_limits: Optional[Dict[str, int]] = None,
+        background_aging_ms: float = 5000,
+    ):
+        """
+        Args:
+            max_concurrent: Max tools running at once across all executors
+            executor_limits: Max running per executor type (missing = global limit)
+            background_aging_ms: Background waiters older than this compete as interactive
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.executor_limits = {k: max(1, int(v)) for k, v in (executor_limits or {}).items()}
+        self.background_aging = background_aging_ms / 1000.0
+
+        self._lock = threading.Lock()
+        self._running = 0
+        self._running_by_executor: Dict[str, int] = {}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._by_priority = {p: _WaitStats() for p in PRIORITY_CLASSES}
+        self._by_executor: Dict[str, _WaitStats] = {}
+
+    @classmethod
+    def from_config(cls, tools_config: Dict[str, Any]) -> 'ExecutionScheduler':
+        """Build from the `tools:` section of config.yaml"""
+        return cls(
+            max_concurrent=tools_config.get('max_concurrent_executions', 5),
+            executor_limits=tools_config.get('executor_limits') or {},
+            background_aging_ms=tools_config.get('background_aging_ms', 5000),
+        )
+
+    def _has_capacity(self, executor_type: str) -> bool:
+        limit = self.executor_limits.get(executor_type, self.max_concurrent)
+        return (self._running < self.max_concurrent
+                and self._running_by_executor.get(executor_type, 0) < limit)
+
+    def _take(self, executor_type: str) -> None:
+        self._running += 1
+        self._running_by_executor[executor_type] = self._running_by_executor.get(executor_type, 0) + 1
+
+    def _record_start(self, executor_type: str, priority: str, wait_ms: float) -> None:
+        self._by_priority[priority].add(wait_ms)
+        self._by_executor.setdefault(executor_type, _WaitStats()).add(wait_ms)
+
+    def _dispatch(self) -> None:
+        """Grant slots to the best runnable waiters (caller holds the lock)"""
+        now = time.monotonic()
+        self._waiters = [w for w in self._waiters if w.state == 'waiting']
+
+        def rank(w: _Waiter):
+            priority = _PRIORITY_RANK[w.priority]
+            if w.priority == BACKGROUND and now - w.enqueued >= self.background_aging:
+                priority = _PRIORITY_RANK[INTERACTIVE]
+            return (priority, w.seq)
+
+        for waiter in sorted(self._waiters, key=rank):
+            if self._running >= self.max_concurrent:
+                break
+            if not self._has_capacity(waiter.executor_type):
+                continue  # executor full: let other executors' work through
+            self._take(waiter.executor_type)
+            waiter.state = 'granted'
+            self._record_start(waiter.executor_type, waiter.priority, (now - waiter.enqueued) * 1000)
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+        self._waiters = [w for w in self._waiters if w.state == 'waiting']
+
+    def _release(self, executor_type: str) -> None:
+        with self._lock:
+            self._running -= 1
+            self._running_by_executor[executor_type] -= 1
+            self._dispatch()
+
+    async def acquire(self, executor_type: str, priority: str = INTERACTIVE,
+                      timeout: Optional[float] = None) -> float:
+        """
+        Wait for a slot
+
+        Returns:
+            Queue wait in milliseconds
+
+        Raises:
+            QueueTimeoutError: No slot within timeout (the request is dequeued)
+        """
+        if priority not in _PRIORITY_RANK:
+            raise ValueError(f"Unknown priority class: {priority}")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queued_ahead = any(w.state == 'waiting' for w in self._waiters)
+            if not queued_ahead and self._has_capacity(executor_type):
+                self._take(executor_type)
+                self._record_start(executor_type, priority, 0.0)
+                return 0.0
+            waiter = _Waiter(executor_type, priority, next(self._seq), loop, loop.create_future())
+            self._waiters.append(waiter)
+            self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                granted = waiter.state == 'granted'
+                if not granted:
+                    waiter.state = 'cancelled'
+                    stats = self._by_executor.setdefault(executor_type, _WaitStats())
+                    stats.timeouts += 1
+                    self._by_priority[priority].timeouts += 1
+            if granted:
+                # Slot arrived as we gave up: hand it straight back
+                self._release(executor_type)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise QueueTimeoutError(f"No {executor_type} slot within {timeout:.1f}s")
+        return (time.monotonic() - waiter.enqueued) * 1000
+
+    def release(self, executor_type: str) -> None:
+        """Return a slot obtained with acquire()"""
+        self._release(executor_type)
+
+    @asynccontextmanager
+    async def slot(self, executor_type: str, priority: str = INTERACTIVE,
+                   timeout: Optional[float] = None):
+        """async with scheduler.slot('process'): ... (yields queue wait ms)"""
+        wait_ms = await self.acquire(executor_type, priority, timeout)
+        try:
+            yield wait_ms
+        finally:
+            self.release(executor_type)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Running/queued counts and wait statistics (for /api/status)"""
+        with self._lock:
+            waiting = [w for w in self._waiters if w.state == 'waiting']
+            queued = {p: sum(1 for w in waiting if w.priority == p) for p in PRIORITY_CLASSES}
+            return {
+                'max_concurrent': self.max_concurrent,
+                'executor_limits': dict(self.executor_limits),
+                'running': self._running,
+                'running_by_executor': dict(self._running_by_executor),
+                'queued': queued,
+                'by_priority': {p: s.snapshot() for p, s in self._by_priority.items()},
+                'by_executor': {e: s.snapshot() for e, s in self._by_executor.items()},
+            }
+
+
+def _resolve(future) -> None:
+    if not future.done():
+        future.set_result(True)
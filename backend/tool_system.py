@@ -4,27 +4,66 @@ Tool System for Local AI Agent
 Provides file operations, code search, and command execution capabilities
 """
 import os
+import signal
 import subprocess
+import sys
 import json
 import re
+import fnmatch
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 
+from code_index import DEFAULT_IGNORE_PATTERNS, TrigramIndex, is_ignored, walk_files
+from tool_cache import ToolResultCache
+from security_manager import SecurityPolicy
+
+# executors/ lives at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from executors.output import (DEFAULT_HEAD_BYTES, DEFAULT_MAX_OUTPUT_BYTES, DRAIN_TIMEOUT, OutputCapture,
+                              clamp_cap, over_cap)
+from executors import file_io
+
 logger = logging.getLogger(__name__)
 
+# Read-only tools whose results can be reused while their paths are unchanged
+CACHEABLE_TOOLS = frozenset({"read_file", "count_lines", "get_file_info",
+                             "list_directory", "search_code"})
+
 
 class ToolSystem:
     """Function calling system for local AI agent"""
 
-    def __init__(self, workspace_root: str = None):
+    def __init__(self, workspace_root: str = None, ignore_patterns: Optional[List[str]] = None,
+                 use_code_index: bool = True, search_workers: int = 8,
+                 result_cache: Optional[ToolResultCache] = None, cache_results: bool = True,
+                 max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES, kill_on_cap: bool = True):
         """
         Initialize the tool system
 
         Args:
             workspace_root: Root directory for file operations (defaults to current directory)
+            ignore_patterns: Files/directories search_code skips (default: DEFAULT_IGNORE_PATTERNS)
+            use_code_index: Narrow search_code with a trigram index of the workspace
+            search_workers: Threads used to scan candidate files
+            result_cache: Cache for idempotent tool results (default: a new ToolResultCache)
+            cache_results: Set False to disable result caching entirely
+            max_output_bytes: Most run_command output kept per stream; calls can only lower it
+            kill_on_cap: Kill commands whose output passes the cap; calls can only turn it on
         """
         self.workspace_root = Path(workspace_root or os.getcwd()).resolve()
+        # Workspace confinement, compiled once and shared by every path check
+        self._policy = SecurityPolicy([str(self.workspace_root)])
+        self.ignore_patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        self.use_code_index = use_code_index
+        self.search_workers = search_workers
+        self._code_index: Optional[TrigramIndex] = None
+        self.result_cache = (result_cache or ToolResultCache()) if cache_results else None
+        self.max_output_bytes = max_output_bytes
+        self.kill_on_cap = kill_on_cap
         self.tools = {
             "read_file": self.read_file,
             "write_file": self.write_file,
@@ -35,6 +74,7 @@ class ToolSystem:
             "create_directory": self.create_directory,
             "delete_file": self.delete_file,
             "get_file_info": self.get_file_info,
+            "count_lines": self.count_lines,
         }
 
         logger.info(f"ToolSystem initialized with workspace: {self.workspace_root}")
@@ -52,26 +92,28 @@ class ToolSystem:
         Raises:
             ValueError: If path is outside workspace
         """
-        path = Path(filepath)
-        if not path.is_absolute():
-            path = self.workspace_root / path
-
-        path = path.resolve()
+        real = self._policy.resolve(filepath, base=str(self.workspace_root))
 
         # Security check: ensure path is within workspace
-        try:
-            path.relative_to(self.workspace_root)
-        except ValueError:
-            raise ValueError(f"Path {path} is outside workspace {self.workspace_root}")
+        if not self._policy.allows(real):
+            raise ValueError(f"Path {real} is outside workspace {self.workspace_root}")
 
-        return path
+        return Path(real)
 
-    def read_file(self, filepath: str) -> Dict[str, Any]:
+    def read_file(self, filepath: str, offset: Optional[int] = None, length: Optional[int] = None,
+                  start_line: Optional[int] = None, num_lines: Optional[int] = None) -> Dict[str, Any]:
         """
         Read a file and return contents
 
+        Whole files are read up to file_io.MAX_FULL_READ_BYTES; larger files
+        need a window, read through mmap without loading the rest.
+
         Args:
             filepath: Path to file to read
+            offset: Byte offset of a byte window
+            length: Bytes to read from offset (default: to end of file)
+            start_line: First line (1-based) of a line window
+            num_lines: Lines to read from start_line (default: to end of file)
 
         Returns:
             Dict with success status and content or error
@@ -91,15 +133,25 @@ class ToolSystem:
                     "error": f"Path is not a file: {filepath}"
                 }
 
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            window = {}
+            if start_line is not None or num_lines is not None:
+                data, first, taken = file_io.read_line_range(str(path), start_line or 1, num_lines)
+                content = data.decode('utf-8')
+                window = {"start_line": first, "lines": taken, "file_size": path.stat().st_size}
+            elif offset is not None or length is not None:
+                data, file_size = file_io.read_byte_range(str(path), offset or 0, length)
+                content = data.decode('utf-8', errors='replace')  # window may split a character
+                window = {"offset": offset or 0, "bytes": len(data), "file_size": file_size}
+            else:
+                content = file_io.read_text(str(path))
 
             logger.info(f"Read file: {filepath} ({len(content)} bytes)")
             return {
                 "success": True,
                 "filepath": str(path.relative_to(self.workspace_root)),
                 "content": content,
-                "size": len(content)
+                "size": len(content),
+                **window
             }
 
         except UnicodeDecodeError:
@@ -107,6 +159,12 @@ class ToolSystem:
                 "success": False,
                 "error": f"File is not text (binary file): {filepath}"
             }
+        except file_io.FileTooLargeError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "file_size": path.stat().st_size
+            }
         except Exception as e:
             logger.error(f"Error reading file {filepath}: {e}")
             return {
@@ -114,6 +172,46 @@ class ToolSystem:
                 "error": str(e)
             }
 
+    def iter_file_chunks(self, filepath: str, chunk_size: int = file_io.CHUNK_BYTES):
+        """
+        Yield a workspace file in byte chunks (for large files)
+
+        Args:
+            filepath: Path to file to read
+            chunk_size: Bytes per chunk (default: 1 MB)
+        """
+        yield from file_io.iter_chunks(str(self._resolve_path(filepath)), chunk_size)
+
+    def count_lines(self, filepath: str) -> Dict[str, Any]:
+        """
+        Count lines in a file without decoding it
+
+        Args:
+            filepath: Path to file
+
+        Returns:
+            Dict with success status and line count or error
+        """
+        try:
+            path = self._resolve_path(filepath)
+            if not path.is_file():
+                return {
+                    "success": False,
+                    "error": f"Path is not a file: {filepath}"
+                }
+            return {
+                "success": True,
+                "filepath": str(path.relative_to(self.workspace_root)),
+                "lines": file_io.count_lines(str(path)),
+                "size": path.stat().st_size
+            }
+        except Exception as e:
+            logger.error(f"Error counting lines in {filepath}: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     def write_file(self, filepath: str, content: str) -> Dict[str, Any]:
         """
         Write content to a file (creates new file or overwrites existing)
@@ -133,6 +231,7 @@ class ToolSystem:
 
             with open(path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            self._after_write(path)
 
             logger.info(f"Wrote file: {filepath} ({len(content)} bytes)")
             return {
@@ -162,6 +261,23 @@ class ToolSystem:
             Dict with success status and message or error
         """
         try:
+            # Large files: stream through a temp file instead of loading them
+            path = self._resolve_path(filepath)
+            if path.is_file() and path.stat().st_size > file_io.STREAM_EDIT_THRESHOLD:
+                if not file_io.stream_replace(str(path), old_text, new_text, count=1):
+                    return {
+                        "success": False,
+                        "error": f"Text not found in file: {old_text[:50]}..."
+                    }
+                self._after_write(path)
+                logger.info(f"Edited file (streamed): {filepath}")
+                return {
+                    "success": True,
+                    "filepath": str(path.relative_to(self.workspace_root)),
+                    "message": f"Successfully edited {filepath}",
+                    "size": path.stat().st_size
+                }
+
             # First read the file
             result = self.read_file(filepath)
             if not result["success"]:
@@ -241,14 +357,52 @@ class ToolSystem:
                 "error": str(e)
             }
 
-    def search_code(self, pattern: str, directory: str = ".", file_pattern: str = "*.py") -> Dict[str, Any]:
+    def _get_code_index(self) -> TrigramIndex:
+        """Workspace trigram index, built on first search and refreshed by mtime"""
+        if self._code_index is None:
+            self._code_index = TrigramIndex(self.workspace_root, self.ignore_patterns)
+        self._code_index.refresh()
+        return self._code_index
+
+    def _after_write(self, path: Path) -> None:
+        """Keep the code index, result cache and path policy current for writes made through this tool system"""
+        self._policy.clear_cache()
+        if self._code_index is not None:
+            self._code_index.invalidate(path.relative_to(self.workspace_root).as_posix())
+        if self.result_cache is not None:
+            self.result_cache.invalidate_path(str(path))
+
+    @staticmethod
+    def _scan_file(filepath: Path, regex) -> List[Tuple[int, str]]:
+        """Matching (line number, stripped line) pairs in one file"""
+        hits = []
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, 1):
+                    if regex.search(line):
+                        hits.append((line_num, line.strip()))
+        except (UnicodeDecodeError, PermissionError, OSError):
+            pass
+        return hits
+
+    def search_code(self, pattern: str, directory: str = ".", file_pattern: str = "*.py",
+                    max_results: int = 500, offset: int = 0,
+                    ignore_patterns: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Search for code pattern in files
 
+        Candidate files come from the workspace trigram index when the regex
+        has usable literals; otherwise every non-ignored file is scanned.
+        Either way files are scanned in parallel and in path order, so
+        offset/max_results pages are stable between calls.
+
         Args:
             pattern: Regex pattern to search for
             directory: Directory to search in (default: current)
             file_pattern: File glob pattern (default: *.py)
+            max_results: Max matches to return (default: 500)
+            offset: Number of matches to skip, for pagination
+            ignore_patterns: Extra file/directory patterns to skip for this call
 
         Returns:
             Dict with success status and search results or error
@@ -264,32 +418,72 @@ class ToolSystem:
 
             # Compile regex pattern
             regex = re.compile(pattern)
-
-            # Search in files
+            max_results = max(1, int(max_results))
+            offset = max(0, int(offset))
+            extra_ignore = list(ignore_patterns or [])
+            prefix = path.relative_to(self.workspace_root).as_posix()
+            prefix = '' if prefix == '.' else prefix
+
+            def wanted(rel: str) -> bool:
+                rel_to_dir = rel[len(prefix) + 1:] if prefix else rel
+                target = rel_to_dir if '/' in file_pattern else rel.rsplit('/', 1)[-1]
+                return fnmatch.fnmatch(target, file_pattern) and not is_ignored(rel, extra_ignore)
+
+            # Narrow with the trigram index, fall back to walking the tree
+            candidates = None
+            if self.use_code_index:
+                candidates = self._get_code_index().candidates(pattern, regex.flags, prefix)
+            indexed = candidates is not None
+            if candidates is None:
+                candidates = [rel for rel, _ in walk_files(path, self.workspace_root,
+                                                           self.ignore_patterns)]
+            files = [rel for rel in candidates if wanted(rel)]
+            # Drop symlinks that point outside the workspace (one batch check)
+            allowed = self._policy.check_paths([str(self.workspace_root / rel) for rel in files])
+            files = [rel for rel, ok in zip(files, allowed) if ok]
+
+            # Scan in parallel, consuming in path order until the page is full
             results = []
-            for filepath in path.rglob(file_pattern):
-                if not filepath.is_file():
-                    continue
-
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        for line_num, line in enumerate(f, 1):
-                            if regex.search(line):
-                                results.append({
-                                    "file": str(filepath.relative_to(self.workspace_root)),
-                                    "line": line_num,
-                                    "content": line.strip()
-                                })
-                except (UnicodeDecodeError, PermissionError):
-                    continue
-
-            logger.info(f"Searched code: {pattern} in {directory} ({len(results)} matches)")
+            skipped = 0
+            has_more = False
+            files_scanned = 0
+            chunk = max(1, self.search_workers * 4)
+            with ThreadPoolExecutor(max_workers=self.search_workers) as pool:
+                for start in range(0, len(files), chunk):
+                    batch = files[start:start + chunk]
+                    scans = pool.map(lambda rel: self._scan_file(self.workspace_root / rel, regex), batch)
+                    for rel, hits in zip(batch, scans):
+                        files_scanned += 1
+                        for line_num, content in hits:
+                            if skipped < offset:
+                                skipped += 1
+                                continue
+                            if len(results) >= max_results:
+                                has_more = True
+                                break
+                            results.append({
+                                "file": rel,
+                                "line": line_num,
+                                "content": content
+                            })
+                        if has_more:
+                            break
+                    if has_more:
+                        break
+
+            logger.info(f"Searched code: {pattern} in {directory} ({len(results)} matches, "
+                        f"{files_scanned}/{len(files)} files scanned, indexed={indexed})")
             return {
                 "success": True,
                 "pattern": pattern,
                 "directory": str(path.relative_to(self.workspace_root)),
                 "matches": results,
-                "count": len(results)
+                "count": len(results),
+                "offset": offset,
+                "has_more": has_more,
+                "next_offset": offset + len(results) if has_more else None,
+                "files_scanned": files_scanned,
+                "indexed": indexed
             }
 
         except Exception as e:
@@ -299,13 +493,27 @@ class ToolSystem:
                 "error": str(e)
             }
 
-    def run_command(self, command: str, timeout: int = 30) -> Dict[str, Any]:
+    def run_command(self, command: str, timeout: int = 30,
+                    max_output_bytes: Optional[int] = None,
+                    kill_on_cap: bool = False,
+                    on_output: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Run a shell command (use with caution!)
 
+        stdout/stderr are drained by reader threads as they are produced and
+        kept head + tail within max_output_bytes, so a chatty command can't
+        balloon memory. The command is killed on timeout, and on cap if the
+        tool system or the call asks for it.
+
         Args:
             command: Shell command to run
             timeout: Timeout in seconds (default: 30)
+            max_output_bytes: Bytes of stdout (and of stderr) kept, at most the
+                tool system's max_output_bytes (default: that cap)
+            kill_on_cap: Also kill the command once a stream exceeds the cap
+                (the tool system's kill_on_cap can't be turned off per call)
+            on_output: Optional callback({'stream', 'data'}) per chunk, called
+                from the reader threads
 
         Returns:
             Dict with success status, stdout, stderr, and exit code
@@ -313,28 +521,84 @@ class ToolSystem:
         try:
             logger.info(f"Running command: {command}")
 
-            result = subprocess.run(
+            max_output_bytes = clamp_cap(max_output_bytes, self.max_output_bytes)
+            kill_on_cap = self.kill_on_cap or kill_on_cap is True
+            head = min(DEFAULT_HEAD_BYTES, max_output_bytes // 2)
+            captures = {'stdout': OutputCapture(max_output_bytes, head),
+                        'stderr': OutputCapture(max_output_bytes, head)}
+            killed = {'reason': None}
+            lock = threading.Lock()
+            abandoned = threading.Event()
+
+            process = subprocess.Popen(
                 command,
                 shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=self.workspace_root
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.workspace_root,
+                start_new_session=True  # own process group, so kills reach children
             )
 
-            return {
-                "success": result.returncode == 0,
+            def kill(reason: str) -> None:
+                with lock:
+                    if killed['reason'] is None:
+                        killed['reason'] = reason
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    process.kill()
+
+            def pump(name: str, stream) -> None:
+                capture = captures[name]
+                for data in iter(lambda: stream.read1(65536), b''):
+                    if abandoned.is_set():
+                        break
+                    was_truncated = capture.truncated
+                    capture.feed(data)
+                    if on_output is not None and not was_truncated:
+                        on_output({'stream': name, 'data': capture.decode_chunk(data)})
+                        if capture.truncated:
+                            on_output({'stream': name, 'truncated': True})
+                    if kill_on_cap and capture.truncated and killed['reason'] is None:
+                        kill('output_cap')
+                stream.close()
+
+            readers = [threading.Thread(target=pump, args=(name, getattr(process, name)), daemon=True)
+                       for name in ('stdout', 'stderr')]
+            for reader in readers:
+                reader.start()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill('timeout')
+                process.wait()
+            # A killed command's pipes may stay open in a child that left the group
+            drain_until = time.monotonic() + DRAIN_TIMEOUT
+            for reader in readers:
+                reader.join(max(0.0, drain_until - time.monotonic()) if killed['reason'] else None)
+            if any(reader.is_alive() for reader in readers):
+                abandoned.set()
+                logger.warning(f"Output pipes still open {DRAIN_TIMEOUT}s after kill, abandoning: {command[:80]}")
+            # The command may have replaced directories with symlinks
+            self._policy.clear_cache()
+
+            result = {
+                "success": process.returncode == 0 and killed['reason'] is None,
                 "command": command,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "returncode": result.returncode
+                "stdout": captures['stdout'].text(),
+                "stderr": captures['stderr'].text(),
+                "returncode": process.returncode,
+                "truncated": over_cap(*captures.values()),
+                "stdout_bytes": captures['stdout'].total_bytes,
+                "stderr_bytes": captures['stderr'].total_bytes,
+                "killed": killed['reason']
             }
+            if killed['reason'] == 'timeout':
+                result["error"] = f"Command timed out after {timeout} seconds"
+            elif killed['reason'] == 'output_cap':
+                result["error"] = f"Output exceeded {max_output_bytes:,} bytes"
+            return result
 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": f"Command timed out after {timeout} seconds"
-            }
         except Exception as e:
             logger.error(f"Error running command: {e}")
             return {
@@ -355,6 +619,7 @@ class ToolSystem:
         try:
             path = self._resolve_path(dirpath)
             path.mkdir(parents=True, exist_ok=True)
+            self._after_write(path)
 
             logger.info(f"Created directory: {dirpath}")
             return {
@@ -396,6 +661,7 @@ class ToolSystem:
                 }
 
             path.unlink()
+            self._after_write(path)
 
             logger.info(f"Deleted file: {filepath}")
             return {
@@ -449,10 +715,51 @@ class ToolSystem:
                 "error": str(e)
             }
 
+    def _cache_spec(self, tool_name: str, kwargs: Dict[str, Any]) -> Optional[Tuple[tuple, List[str]]]:
+        """
+        (cache key, dependent paths) for a cacheable call, or None
+
+        File tools depend on the target's (inode, mtime, size); listings on the
+        directory's plus every listed entry's (see _result_paths), and only
+        for patterns that stay inside that one directory. search_code is keyed
+        on the code index generation, so an edit made outside the tool system
+        shows up once the index refreshes - which means a hit still costs the
+        index's (throttled) stat walk, just not the file scan.
+        """
+        if self.result_cache is None or tool_name not in CACHEABLE_TOOLS:
+            return None
+        try:
+            if tool_name == "search_code":
+                if not self.use_code_index:
+                    return None
+                path = self._resolve_path(kwargs.get("directory", "."))
+                extra = self._get_code_index().generation
+            elif tool_name == "list_directory":
+                pattern = kwargs.get("pattern", "*")
+                if "**" in pattern or "/" in pattern or os.sep in pattern:
+                    return None  # globs into subdirectories depend on more than one directory
+                path = self._resolve_path(kwargs.get("dirpath", "."))
+                extra = None
+            else:
+                path = self._resolve_path(kwargs["filepath"])
+                extra = None
+        except (KeyError, ValueError):
+            return None  # let the tool report the bad argument
+        return ToolResultCache.make_key(tool_name, kwargs, extra), [str(path)]
+
+    def _result_paths(self, tool_name: str, result: Dict[str, Any]) -> List[str]:
+        """Paths a cached result also reports on (a listing's entries, for their sizes)"""
+        if tool_name == "list_directory":
+            return [str(self.workspace_root / item["path"]) for item in result.get("files", [])]
+        return []
+
     def execute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
         """
         Execute a tool by name with arguments
 
+        Read-only tools (CACHEABLE_TOOLS) are served from the result cache
+        while the files they read are unchanged; hits carry "cached": True.
+
         Args:
             tool_name: Name of the tool to execute
             **kwargs: Tool-specific arguments
@@ -468,8 +775,24 @@ class ToolSystem:
             }
 
         try:
+            spec = self._cache_spec(tool_name, kwargs)
+            if spec is not None:
+                cached = self.result_cache.get(spec[0])
+                if cached is not None:
+                    return {**cached, "cached": True}
+                started_ns = time.time_ns()
+                before = self.result_cache.fingerprints(spec[1])
+
             tool_func = self.tools[tool_name]
             result = tool_func(**kwargs)
+
+            if spec is not None and result.get("success"):
+                self.result_cache.put(spec[0], result, spec[1] + self._result_paths(tool_name, result),
+                                      before=before, started_ns=started_ns)
+            elif tool_name == "run_command" and self.result_cache is not None:
+                # A shell command can touch anything; fingerprints would catch
+                # most of it, but don't bet a stale search on it
+                self.result_cache.clear()
             return result
         except TypeError as e:
             return {
@@ -499,6 +822,22 @@ class ToolSystem:
                         "filepath": {
                             "type": "string",
                             "description": "Path to the file to read"
+                        },
+                        "start_line": {
+                            "type": "integer",
+                            "description": "First line (1-based) of a line window, for large files"
+                        },
+                        "num_lines": {
+                            "type": "integer",
+                            "description": "Lines to read from start_line"
+                        },
+                        "offset": {
+                            "type": "integer",
+                            "description": "Byte offset of a byte window"
+                        },
+                        "length": {
+                            "type": "integer",
+                            "description": "Bytes to read from offset"
                         }
                     },
                     "required": ["filepath"]
@@ -578,6 +917,14 @@ class ToolSystem:
                         "file_pattern": {
                             "type": "string",
                             "description": "File glob pattern (default: *.py)"
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "Max matches to return (default: 500)"
+                        },
+                        "offset": {
+                            "type": "integer",
+                            "description": "Matches to skip; pass next_offset from the previous page"
                         }
                     },
                     "required": ["pattern"]
@@ -596,6 +943,10 @@ class ToolSystem:
                         "timeout": {
                             "type": "integer",
                             "description": "Timeout in seconds (default: 30)"
+                        },
+                        "max_output_bytes": {
+                            "type": "integer",
+                            "description": "Bytes of stdout/stderr kept, head + tail (default and max: 1 MB)"
                         }
                     },
                     "required": ["command"]
@@ -628,6 +979,20 @@ class ToolSystem:
                     },
                     "required": ["filepath"]
                 }
+            },
+            {
+                "name": "count_lines",
+                "description": "Count lines in a file without reading it into memory",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "filepath": {
+                            "type": "string",
+                            "description": "Path to the file"
+                        }
+                    },
+                    "required": ["filepath"]
+                }
             }
         ]
 
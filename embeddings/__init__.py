@@ -0,0 +1,4 @@
+"""
+Embeddings package - Shared embedding service, clients and encoders
+"""
+# Make this a package
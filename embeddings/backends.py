@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Embedding Backends - PyTorch or ONNX Runtime (optionally int8) encoders
+
+Every encoder here has the same SentenceTransformer-style .encode(), so
+callers don't care which one they got. Select with FAITHH_EMBED_BACKEND:
+
+    torch      sentence-transformers on PyTorch (default)
+    onnx       ONNX Runtime, fp32 export of the same weights
+    onnx-int8  ONNX Runtime, dynamic int8 quantized weights
+
+ONNX exports live in FAITHH_ONNX_DIR/<model> (default ~/ai-stack/models/onnx)
+and are produced by scripts/benchmark_embedding_backends.py export, which also
+measures cosine agreement against the PyTorch model and records it in the
+export's manifest. An ONNX variant is only used if its recorded minimum cosine
+is at least FAITHH_ONNX_MIN_COSINE (default 0.99); otherwise the loader warns
+and falls back to PyTorch so vectors stay compatible with documents_768.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = 'torch'
+DEFAULT_ONNX_DIR = Path.home() / "ai-stack" / "models" / "onnx"
+DEFAULT_MIN_COSINE = 0.99
+
+MANIFEST = "manifest.json"
+ONNX_FILES = {'onnx': "model.onnx", 'onnx-int8': "model_int8.onnx"}
+
+try:
+    from chromadb.api.types import EmbeddingFunction as _ChromaEmbeddingFunction
+except ImportError:  # chromadb not installed (e.g. service-only hosts)
+    _ChromaEmbeddingFunction = object
+
+
+def embedding_backend() -> str:
+    """Configured backend name (FAITHH_EMBED_BACKEND)"""
+    backend = os.environ.get('FAITHH_EMBED_BACKEND', DEFAULT_BACKEND).strip().lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown FAITHH_EMBED_BACKEND={backend!r}, using {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return backend
+
+
+def onnx_model_dir(model_name: str) -> Path:
+    """Export directory for a model (slashes in HF names become '__')"""
+    base = Path(os.environ.get('FAITHH_ONNX_DIR', DEFAULT_ONNX_DIR)).expanduser()
+    return base / model_name.replace('/', '__')
+
+
+def min_cosine_threshold() -> float:
+    return float(os.environ.get('FAITHH_ONNX_MIN_COSINE', DEFAULT_MIN_COSINE))
+
+
+class OnnxEncoder:
+    """Transformer forward pass in ONNX Runtime + mean pooling, like sentence-transformers"""
+
+    def __init__(self, model_dir: Path, quantized: bool = False, threads: Optional[int] = None):
+        """
+        Args:
+            model_dir: Directory written by export_onnx()
+            quantized: Use the int8 model instead of fp32
+            threads: ONNX Runtime intra-op threads (default: runtime's choice)
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        self.variant = 'onnx-int8' if quantized else 'onnx'
+        self.manifest = json.loads((self.model_dir / MANIFEST).read_text())
+        model_path = self.model_dir / ONNX_FILES[self.variant]
+        if not model_path.exists():
+            raise FileNotFoundError(f"{model_path} not found (run the export first)")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options,
+                                            providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.max_length = self.manifest.get('max_length', 384)
+        self.normalize = self.manifest.get('normalize', True)
+
+    @property
+    def agreement(self) -> Optional[Dict[str, Any]]:
+        """Recorded cosine agreement vs PyTorch for this variant"""
+        return self.manifest.get('agreement', {}).get(self.variant)
+
+    def require_agreement(self, threshold: float) -> None:
+        """Refuse exports that were never verified or fell below threshold"""
+        agreement = self.agreement
+        if not agreement:
+            raise ValueError(f"{self.variant} export in {self.model_dir} has no agreement check")
+        if agreement['min_cosine'] < threshold:
+            raise ValueError(f"{self.variant} min cosine {agreement['min_cosine']:.4f} "
+                             f"< required {threshold}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.manifest['dim']
+
+    def encode(self, sentences: Any, batch_size: int = 32, normalize_embeddings: Optional[bool] = None,
+               **kwargs) -> np.ndarray:
+        """SentenceTransformer.encode() equivalent (show_progress_bar etc. are ignored)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        normalize = self.normalize if normalize_embeddings is None else normalize_embeddings
+
+        out = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors='np')
+            feeds = {name: tokens[name].astype(np.int64)
+                     for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                     if name in self._input_names and name in tokens}
+            hidden = self.session.run(None, feeds)[0]
+            mask = tokens['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append(pooled.astype(np.float32))
+
+        vectors = np.vstack(out) if out else np.zeros((0, self.manifest['dim']), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+class EncoderEmbeddingFunction(_ChromaEmbeddingFunction):
+    """Chroma EmbeddingFunction over any encoder with .encode()"""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma EmbeddingFunction protocol"""
+        return np.asarray(self.encoder.encode(list(input)), dtype=np.float32).tolist()
+
+
+def export_onnx(model_name: str, out_dir: Optional[Path] = None, quantize: bool = True,
+                opset: int = 14) -> Path:
+    """
+    Export a sentence-transformers model's transformer to ONNX (+ int8 copy)
+
+    Args:
+        model_name: sentence-transformers model to export
+        out_dir: Target directory (default: onnx_model_dir(model_name))
+        quantize: Also write a dynamic int8 quantized model
+        opset: ONNX opset version
+
+    Returns:
+        Export directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = Path(out_dir or onnx_model_dir(model_name))
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    st = SentenceTransformer(model_name, device='cpu')
+    transformer = st[0].auto_model.eval()
+    pooling = st[1]
+    if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+        raise ValueError(f"{model_name} does not use mean pooling; export not supported")
+
+    dummy = st.tokenizer(["export sample"], return_tensors='pt')
+    input_names = [n for n in ('input_ids', 'attention_mask') if n in dummy]
+    dynamic = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[n] for n in input_names),
+            str(out_dir / ONNX_FILES['onnx']),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+        )
+    st.tokenizer.save_pretrained(str(out_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(out_dir / ONNX_FILES['onnx']), str(out_dir / ONNX_FILES['onnx-int8']),
+                         weight_type=QuantType.QInt8)
+
+    manifest = {
+        'model_name': model_name,
+        'dim': st.get_sentence_embedding_dimension(),
+        'max_length': st.max_seq_length,
+        'normalize': any(type(m).__name__ == 'Normalize' for m in st),
+        'pooling': 'mean',
+        'opset': opset,
+        'agreement': {},
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    logger.info(f"Exported {model_name} to {out_dir}")
+    return out_dir
+
+
+def measure_agreement(encoder, reference, texts: List[str]) -> Dict[str, float]:
+    """Row-wise cosine between encoder and reference vectors for the same texts"""
+    a = np.asarray(encoder.encode(texts), dtype=np.float32)
+    b = np.asarray(reference.encode(texts), dtype=np.float32)
+    a /= np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b /= np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    cos = (a * b).sum(axis=1)
+    return {'min_cosine': float(cos.min()), 'mean_cosine': float(cos.mean()),
+            'p01_cosine': float(np.percentile(cos, 1)), 'texts': len(texts)}
+
+
+def record_agreement(model_dir: Path, variant: str, agreement: Dict[str, float]) -> None:
+    """Store a measured agreement in the export's manifest"""
+    path = Path(model_dir) / MANIFEST
+    manifest = json.loads(path.read_text())
+    manifest.setdefault('agreement', {})[variant] = agreement
+    path.write_text(json.dumps(manifest, indent=2))
+
+
+def load_encoder(model_name: str, backend: Optional[str] = None, device: Optional[str] = None):
+    """
+    Local encoder for the configured backend
+
+    ONNX variants that are missing, unverified or below the cosine threshold
+    fall back to PyTorch with a warning rather than failing startup.
+    """
+    backend = backend or embedding_backend()
+    if backend != 'torch':
+        try:
+            encoder = OnnxEncoder(onnx_model_dir(model_name), quantized=(backend == 'onnx-int8'))
+            encoder.require_agreement(min_cosine_threshold())
+            logger.info(f"Using {backend} backend for {model_name} "
+                        f"(min cosine {encoder.agreement['min_cosine']:.4f})")
+            return encoder
+        except (ImportError, OSError, ValueError, KeyError) as e:
+            logger.warning(f"{backend} backend unavailable for {model_name} ({e}); using torch")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
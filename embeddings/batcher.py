@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Micro-Batcher - Coalesce concurrent embedding calls into one forward pass
+
+Each chat request embeds a single query. Run one at a time, every call is a
+batch-size-1 transformer pass, which is the least efficient way to use a CPU.
+MicroBatcher holds submitted texts for up to max_wait_ms (or until max_batch
+texts are waiting), encodes them together and scatters the vectors back to
+the callers.
+
+    batcher = MicroBatcher(model.encode, max_batch=32, max_wait_ms=5)
+    vectors = batcher.submit(["what is faithh?"])   # blocks until encoded
+
+BatchingEmbeddingFunction wraps any Chroma embedding function the same way.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from chromadb.api.types import EmbeddingFunction as _ChromaEmbeddingFunction
+except ImportError:  # chromadb not installed (e.g. service-only hosts)
+    _ChromaEmbeddingFunction = object
+
+
+class QueueFullError(Exception):
+    """Raised when the request queue is at capacity"""
+    pass
+
+
+class _Pending:
+    """Texts from one caller, completed by the batch worker"""
+
+    __slots__ = ('texts', 'enqueued', 'done', 'vectors', 'error')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.vectors: Optional[np.ndarray] = None
+        self.error: Optional[Exception] = None
+
+
+class MicroBatcher:
+    """Single worker thread that batches submit() calls for one encoder"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], object],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 0,
+        name: str = "embed",
+    ):
+        """
+        Args:
+            encode_fn: Callable(list of texts) -> array-like of vectors
+            max_batch: Flush once this many texts are waiting
+            max_wait_ms: Longest the first caller in a batch waits for company
+            max_queue: Max pending submits before QueueFullError (0 = unbounded)
+            name: Worker thread name suffix
+        """
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.queue: "queue.Queue[Optional[_Pending]]" = queue.Queue(maxsize=max_queue)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'items': 0, 'batches': 0, 'rejected': 0,
+                       'max_batch_seen': 0, 'wait_ms_total': 0.0, 'max_wait_ms_seen': 0.0,
+                       'encode_ms_total': 0.0}
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    @property
+    def max_wait_ms(self) -> float:
+        return self.max_wait * 1000.0
+
+    def submit(self, texts: List[str], timeout: Optional[float] = 60.0) -> np.ndarray:
+        """
+        Queue texts for the next batch and wait for their vectors
+
+        Raises:
+            QueueFullError: max_queue submits already pending
+            TimeoutError: Worker did not answer in time
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        pending = _Pending(list(texts))
+        try:
+            self.queue.put_nowait(pending)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise QueueFullError(f"Embedding queue full ({self.queue.maxsize} pending)")
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Embedding request timed out")
+        if pending.error is not None:
+            raise pending.error
+        return pending.vectors
+
+    def _collect(self, first: _Pending) -> List[_Pending]:
+        """Gather waiting submits until max_batch texts or max_wait elapses"""
+        batch = [first]
+        count = len(first.texts)
+        deadline = first.enqueued + self.max_wait
+        while count < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                nxt = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:  # close() sentinel: finish this batch, then stop
+                self._closed = True
+                break
+            batch.append(nxt)
+            count += len(nxt.texts)
+        return batch
+
+    def _run(self) -> None:
+        while not self._closed:
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            texts = [t for p in batch for t in p.texts]
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.encode_fn(texts), dtype=np.float32)
+                offset = 0
+                for p in batch:
+                    p.vectors = vectors[offset:offset + len(p.texts)]
+                    offset += len(p.texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for p in batch:
+                    p.error = e
+            finally:
+                encode_ms = (time.perf_counter() - started) * 1000
+                waits = [(started - p.enqueued) * 1000 for p in batch]
+                with self._stats_lock:
+                    s = self._stats
+                    s['requests'] += len(batch)
+                    s['items'] += len(texts)
+                    s['batches'] += 1
+                    s['max_batch_seen'] = max(s['max_batch_seen'], len(texts))
+                    s['wait_ms_total'] += sum(waits)
+                    s['max_wait_ms_seen'] = max(s['max_wait_ms_seen'], max(waits))
+                    s['encode_ms_total'] += encode_ms
+                for p in batch:
+                    p.done.set()
+
+    def close(self) -> None:
+        """Stop the worker after in-flight batches finish"""
+        if not self._closed:
+            self.queue.put(None)
+            self._worker.join(timeout=5)
+            self._closed = True
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus derived averages (for /stats and /api/status)"""
+        with self._stats_lock:
+            s = dict(self._stats)
+        batches = s['batches']
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait_ms,
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'requests': s['requests'],
+            'items': s['items'],
+            'batches': batches,
+            'rejected': s['rejected'],
+            'avg_batch': round(s['items'] / batches, 2) if batches else 0.0,
+            'max_batch_seen': s['max_batch_seen'],
+            'avg_wait_ms': round(s['wait_ms_total'] / s['requests'], 3) if s['requests'] else 0.0,
+            'max_wait_ms_seen': round(s['max_wait_ms_seen'], 3),
+            'avg_encode_ms': round(s['encode_ms_total'] / batches, 3) if batches else 0.0,
+        }
+
+
+class BatchingEmbeddingFunction(_ChromaEmbeddingFunction):
+    """Chroma EmbeddingFunction that routes calls through a MicroBatcher"""
+
+    def __init__(self, embedding_function, max_batch: int = 32, max_wait_ms: float = 5.0,
+                 max_queue: int = 0):
+        """
+        Args:
+            embedding_function: Any callable(list of texts) -> list of vectors
+            max_batch: Flush once this many texts are waiting
+            max_wait_ms: Longest a query waits for others to join its batch
+            max_queue: Max pending calls before QueueFullError (0 = unbounded)
+        """
+        self.inner = embedding_function
+        self.batcher = MicroBatcher(embedding_function, max_batch=max_batch,
+                                    max_wait_ms=max_wait_ms, max_queue=max_queue)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma EmbeddingFunction protocol"""
+        return self.batcher.submit(list(input)).tolist()
+
+    def stats(self) -> Dict[str, float]:
+        return self.batcher.stats()
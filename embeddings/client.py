@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Embedding Client - Talk to the shared embedding service, fall back to local models
+
+Two entry points cover every caller in the repo:
+
+    get_embedding_function(model)  -> Chroma EmbeddingFunction (query_texts / add)
+    get_encoder(model)             -> object with SentenceTransformer-style .encode()
+
+Both return a service-backed client when the embedding service
+(python -m embeddings.service) is reachable, and a locally loaded model
+otherwise. Set FAITHH_EMBED_SERVICE=off to always load locally. Local models
+use the backend chosen by FAITHH_EMBED_BACKEND (see embeddings.backends).
+"""
+import logging
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_URL = "http://127.0.0.1:5560"
+DEFAULT_MODEL = "all-mpnet-base-v2"
+
+try:
+    from chromadb.api.types import EmbeddingFunction as _ChromaEmbeddingFunction
+except ImportError:  # chromadb not installed (e.g. service-only hosts)
+    _ChromaEmbeddingFunction = object
+
+
+def service_url() -> Optional[str]:
+    """Configured service URL, or None when disabled"""
+    url = os.environ.get('FAITHH_EMBED_SERVICE', DEFAULT_SERVICE_URL)
+    if url.lower() in ('', 'off', 'none', '0', 'false'):
+        return None
+    return url.rstrip('/')
+
+
+class EmbeddingServiceClient(_ChromaEmbeddingFunction):
+    """
+    Chroma EmbeddingFunction + SentenceTransformer-style encoder
+    backed by the shared embedding service
+    """
+
+    def __init__(self, url: Optional[str] = None, model_name: str = DEFAULT_MODEL,
+                 timeout: float = 60.0, max_texts_per_call: int = 256):
+        """
+        Args:
+            url: Service base URL (default: FAITHH_EMBED_SERVICE or localhost:5560)
+            model_name: Model the service should use
+            timeout: Per-call HTTP timeout in seconds
+            max_texts_per_call: Split larger inputs into several calls
+        """
+        self.url = (url or service_url() or DEFAULT_SERVICE_URL).rstrip('/')
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_texts_per_call = max_texts_per_call
+        self._session = requests.Session()  # keep-alive across calls
+
+    def is_available(self, timeout: float = 0.5) -> bool:
+        """True when the service answers /health and allows this model"""
+        try:
+            r = self._session.get(f"{self.url}/health", timeout=timeout)
+            return r.status_code == 200 and self.model_name in r.json().get('models', [])
+        except (requests.RequestException, ValueError):
+            return False
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the service"""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.max_texts_per_call):
+            chunk = texts[start:start + self.max_texts_per_call]
+            r = self._session.post(
+                f"{self.url}/embed",
+                json={'texts': chunk, 'model': self.model_name},
+                timeout=self.timeout,
+            )
+            if r.status_code != 200:
+                raise RuntimeError(f"Embedding service returned {r.status_code}: {r.text[:200]}")
+            vectors.extend(r.json()['embeddings'])
+        return vectors
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma EmbeddingFunction protocol"""
+        return self.embed(list(input))
+
+    def encode(self, sentences: Any, **kwargs) -> np.ndarray:
+        """SentenceTransformer.encode() stand-in (extra kwargs are ignored)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.asarray(self.embed(texts), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+def _service_client(model_name: str) -> Optional[EmbeddingServiceClient]:
+    url = service_url()
+    if not url:
+        return None
+    client = EmbeddingServiceClient(url, model_name=model_name)
+    if client.is_available():
+        logger.info(f"Using shared embedding service at {url} ({model_name})")
+        return client
+    return None
+
+
+def get_embedding_function(model_name: str = DEFAULT_MODEL):
+    """Chroma embedding function: shared service if running, else a local model"""
+    client = _service_client(model_name)
+    if client is not None:
+        return client
+    from embeddings.backends import EncoderEmbeddingFunction, embedding_backend, load_encoder
+    logger.info(f"Embedding service unavailable, loading {model_name} locally")
+    if embedding_backend() == 'torch':
+        from chromadb.utils import embedding_functions
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+    return EncoderEmbeddingFunction(load_encoder(model_name))
+
+
+def get_encoder(model_name: str = DEFAULT_MODEL):
+    """SentenceTransformer-compatible encoder: shared service if running, else local"""
+    client = _service_client(model_name)
+    if client is not None:
+        return client
+    from embeddings.backends import load_encoder
+    logger.info(f"Embedding service unavailable, loading {model_name} locally")
+    return load_encoder(model_name)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Embedding Service - One SentenceTransformer process shared by every client
+
+The backend, indexers and test scripts used to each load their own copy of
+all-mpnet-base-v2 (~400 MB RSS apiece). This localhost HTTP service loads a
+model once and serves all of them:
+
+- Dynamic batching: texts from concurrent requests are encoded together
+  (embeddings.batcher.MicroBatcher, one per model)
+- Bounded queue: callers get 503 instead of unbounded memory growth
+- Embed cache: LRU of recent text -> vector (float32)
+
+Usage:
+    python -m embeddings.service                 # 127.0.0.1:5560
+    python -m embeddings.service --port 5560 --max-batch 64
+
+API:
+    POST /embed   {"texts": [...], "model": "all-mpnet-base-v2"}
+                  -> {"embeddings": [[...], ...], "model": ..., "dim": 768}
+    GET  /health  -> {"status": "ok", "models": [...]}
+    GET  /stats   -> per-model queue depth, batch sizes and waits, cache hit rate
+"""
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embeddings.batcher import MicroBatcher, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5560
+DEFAULT_MODEL = "all-mpnet-base-v2"
+
+
+class EmbedCache:
+    """Thread-safe LRU of (model, text) -> float32 vector"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha1(f"{model}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        k = self.key(model, text)
+        with self._lock:
+            vec = self._data.get(k)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(k)
+            self.hits += 1
+            return vec
+
+    def put(self, model: str, text: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        k = self.key(model, text)
+        with self._lock:
+            self._data[k] = vector
+            self._data.move_to_end(k)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class EmbeddingService:
+    """Model registry + one MicroBatcher per model + cache"""
+
+    def __init__(
+        self,
+        default_model: str = DEFAULT_MODEL,
+        allowed_models: Optional[List[str]] = None,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 256,
+        cache_entries: int = 10000,
+        device: Optional[str] = None,
+        backend: Optional[str] = None,
+        loader=None,
+    ):
+        """
+        Args:
+            default_model: Model used when a request names none
+            allowed_models: Models clients may request (default: default_model only)
+            max_batch: Max texts encoded per forward pass
+            max_wait_ms: How long the worker waits to fill a batch
+            max_queue: Max pending requests per model before QueueFullError
+            cache_entries: LRU embed cache size (0 disables)
+            device: SentenceTransformer device (cpu/cuda)
+            backend: torch / onnx / onnx-int8 (default: FAITHH_EMBED_BACKEND)
+            loader: Optional callable(model_name) -> encoder, for tests
+        """
+        self.default_model = default_model
+        self.allowed_models = set(allowed_models or [default_model])
+        self.allowed_models.add(default_model)
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.device = device
+        self.backend = backend
+        self._loader = loader
+        self._models: Dict[str, object] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._models_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.cache = EmbedCache(cache_entries)
+        self.stats = {'requests': 0, 'texts': 0}
+
+    def get_model(self, name: str):
+        """Load a model on first use (one copy per process)"""
+        with self._models_lock:
+            if name not in self._models:
+                logger.info(f"Loading embedding model: {name}")
+                if self._loader is not None:
+                    self._models[name] = self._loader(name)
+                else:
+                    from embeddings.backends import load_encoder
+                    self._models[name] = load_encoder(name, backend=self.backend, device=self.device)
+            return self._models[name]
+
+    def _batcher(self, model: str) -> MicroBatcher:
+        """Per-model batcher, created on first request for that model"""
+        with self._models_lock:
+            batcher = self._batchers.get(model)
+            if batcher is None:
+                def encode(texts, model=model):
+                    return self.get_model(model).encode(
+                        texts, batch_size=self.max_batch, show_progress_bar=False)
+                batcher = MicroBatcher(encode, max_batch=self.max_batch,
+                                       max_wait_ms=self.max_wait_ms,
+                                       max_queue=self.max_queue, name=model)
+                self._batchers[model] = batcher
+            return batcher
+
+    def embed(self, texts: List[str], model: Optional[str] = None, timeout: float = 60.0) -> np.ndarray:
+        """
+        Embed texts, serving cached vectors and batching the rest
+
+        Raises:
+            ValueError: Unknown model
+            QueueFullError: Too many pending requests
+            TimeoutError: Worker did not answer in time
+        """
+        model = model or self.default_model
+        if model not in self.allowed_models:
+            raise ValueError(f"Model not allowed: {model}")
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['texts'] += len(texts)
+
+        vectors: List[Optional[np.ndarray]] = [self.cache.get(model, t) for t in texts]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # Deduplicate within the request before queueing
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = dict(zip(unique, self._batcher(model).submit(unique, timeout=timeout)))
+            for text, vec in encoded.items():
+                self.cache.put(model, text, vec)
+            for i in missing:
+                vectors[i] = encoded[texts[i]]
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._models_lock:
+            batchers = {name: b.stats() for name, b in self._batchers.items()}
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            'models_loaded': sorted(self._models),
+            'cache': self.cache.stats(),
+            'rejected': sum(b['rejected'] for b in batchers.values()),
+            'batchers': batchers,
+            **stats,
+        }
+
+
+def make_handler(service: EmbeddingService):
+    """Build a request handler bound to one service instance"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'default_model': service.default_model,
+                                 'models': sorted(service.allowed_models)})
+            elif self.path == '/stats':
+                self._send(200, service.snapshot())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/embed':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                data = json.loads(self.rfile.read(length) or b'{}')
+                texts = data.get('texts')
+                if not isinstance(texts, list):
+                    self._send(400, {'error': "'texts' must be a list"})
+                    return
+                model = data.get('model') or service.default_model
+                vectors = service.embed([str(t) for t in texts], model=model)
+                self._send(200, {'embeddings': vectors.tolist(), 'model': model,
+                                 'dim': int(vectors.shape[1]) if vectors.size else 0})
+            except QueueFullError as e:
+                self._send(503, {'error': str(e)})
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+            except Exception as e:
+                logger.error(f"Embed request failed: {e}")
+                self._send(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+def serve(service: EmbeddingService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Create the HTTP server (call serve_forever() on the result)"""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared FAITHH embedding service")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Default model (loaded at startup)')
+    parser.add_argument('--allow-model', action='append', default=[],
+                        help='Extra model clients may request (e.g. BAAI/bge-base-en-v1.5)')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-queue', type=int, default=256)
+    parser.add_argument('--cache-entries', type=int, default=10000)
+    parser.add_argument('--device', default=None)
+    parser.add_argument('--backend', choices=['torch', 'onnx', 'onnx-int8'], default=None,
+                        help='Encoder backend (default: FAITHH_EMBED_BACKEND or torch)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    service = EmbeddingService(
+        default_model=args.model,
+        allowed_models=[args.model] + args.allow_model,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=args.max_queue,
+        cache_entries=args.cache_entries,
+        device=args.device,
+        backend=args.backend,
+    )
+    service.get_model(args.model)  # warm before accepting traffic
+
+    server = serve(service, args.host, args.port)
+    print(f"✅ Embedding service on http://{args.host}:{args.port} ({args.model})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Embedding service stopped")
+
+
+if __name__ == "__main__":
+    main()
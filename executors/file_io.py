@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+File I/O - Ranged, memory-mapped and streaming helpers for large files
+
+These are plain blocking functions; FilesystemExecutor runs them on its I/O
+thread pool so the event loop never waits on the disk. Nothing here reads a
+whole file into memory unless the caller asked for the whole file and it is
+under the size guard.
+"""
+import mmap
+import os
+import stat
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+# Whole-file reads above this need an explicit byte or line window
+MAX_FULL_READ_BYTES = 10 * 1024 * 1024
+# Edits above this are streamed through a temp file instead of done in memory
+STREAM_EDIT_THRESHOLD = 8 * 1024 * 1024
+CHUNK_BYTES = 1024 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """Raised when a whole-file read exceeds the size guard"""
+    pass
+
+
+def _mapped(f) -> Optional[mmap.mmap]:
+    """Read-only map of an open file, or None for empty files (mmap can't map 0 bytes)"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def count_lines(path: str) -> int:
+    """Line count without decoding (a final line without newline still counts)"""
+    newlines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            newlines += chunk.count(b'\n')
+            last = chunk[-1:]
+    return newlines + (1 if last and last != b'\n' else 0)
+
+
+def iter_chunks(path: str, chunk_size: int = CHUNK_BYTES, offset: int = 0) -> Iterator[bytes]:
+    """Yield the file in fixed-size byte chunks starting at offset"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        yield from iter(lambda: f.read(chunk_size), b'')
+
+
+def read_byte_range(path: str, offset: int = 0, length: Optional[int] = None) -> Tuple[bytes, int]:
+    """
+    Bytes [offset, offset + length) via mmap
+
+    Returns:
+        (data, file size)
+    """
+    with open(path, 'rb') as f:
+        mm = _mapped(f)
+        if mm is None:
+            return b'', 0
+        with mm:
+            size = len(mm)
+            offset = max(0, min(offset, size))
+            end = size if length is None else min(size, offset + max(0, length))
+            return mm[offset:end], size
+
+
+def read_line_range(path: str, start_line: int = 1, num_lines: Optional[int] = None) -> Tuple[bytes, int, int]:
+    """
+    Lines [start_line, start_line + num_lines) (1-based) via mmap, no decode
+
+    Returns:
+        (data, first line returned, number of lines returned)
+    """
+    start_line = max(1, start_line)
+    with open(path, 'rb') as f:
+        mm = _mapped(f)
+        if mm is None:
+            return b'', start_line, 0
+        with mm:
+            pos = 0
+            for _ in range(start_line - 1):
+                nl = mm.find(b'\n', pos)
+                if nl == -1:
+                    return b'', start_line, 0
+                pos = nl + 1
+            if pos >= len(mm):
+                return b'', start_line, 0
+            end, taken = pos, 0
+            while end < len(mm) and (num_lines is None or taken < num_lines):
+                nl = mm.find(b'\n', end)
+                end = len(mm) if nl == -1 else nl + 1
+                taken += 1
+            return mm[pos:end], start_line, taken
+
+
+def read_text(path: str, max_bytes: int = MAX_FULL_READ_BYTES, encoding: str = 'utf-8') -> str:
+    """Whole-file read behind the size guard"""
+    size = os.path.getsize(path)
+    if size > max_bytes:
+        raise FileTooLargeError(
+            f"File is {size:,} bytes (limit {max_bytes:,}); "
+            f"read a window with offset/length or start_line/num_lines")
+    with open(path, 'r', encoding=encoding) as f:
+        return f.read()
+
+
+def stream_replace(path: str, old: str, new: str, count: int = 1,
+                   encoding: str = 'utf-8', chunk_size: int = CHUNK_BYTES) -> int:
+    """
+    Replace the first `count` occurrences of old with new without loading the file
+
+    Writes to a temp file beside the original and renames it over, so a
+    crash mid-edit never leaves a half-written file.
+
+    Returns:
+        Number of replacements made (0 leaves the file untouched)
+    """
+    old_b, new_b = old.encode(encoding), new.encode(encoding)
+    if not old_b:
+        raise ValueError("old text must not be empty")
+    keep = len(old_b) - 1  # bytes that could start a match spanning chunks
+    replaced = 0
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.edit-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out, open(path, 'rb') as src:
+            pending = b''
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                pending += chunk
+                while replaced < count:
+                    idx = pending.find(old_b)
+                    if idx == -1:
+                        break
+                    out.write(pending[:idx])
+                    out.write(new_b)
+                    pending = pending[idx + len(old_b):]
+                    replaced += 1
+                if replaced >= count:
+                    out.write(pending)
+                    pending = b''
+                    for rest in iter(lambda: src.read(chunk_size), b''):
+                        out.write(rest)
+                    break
+                # Flush all but the tail that might begin a match
+                cut = len(pending) - keep
+                if cut > 0:
+                    out.write(pending[:cut])
+                    pending = pending[cut:]
+            out.write(pending)
+        if replaced:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+            os.replace(tmp_path, path)
+        else:
+            os.unlink(tmp_path)
+        return replaced
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -1,17 +1,39 @@
 #!/usr/bin/env python3
 """
 Filesystem Executor - Handles file operations
+
+Blocking disk work runs on a small dedicated thread pool, so a large read
+never stalls other coroutines on the event loop.
 """
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 import logging
 
+from . import file_io
+
 logger = logging.getLogger(__name__)
 
 class FilesystemExecutor:
     """Handles filesystem tool execution"""
     
+    def __init__(self, io_workers: int = 4, max_read_bytes: int = file_io.MAX_FULL_READ_BYTES):
+        """
+        Args:
+            io_workers: Threads for blocking file I/O
+            max_read_bytes: Whole-file reads above this need a byte/line window
+        """
+        self._pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='fs-io')
+        self.max_read_bytes = max_read_bytes
+    
+    async def _offload(self, func, *args, **kwargs):
+        """Run a blocking call on the I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+    
     async def execute(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a filesystem tool
@@ -28,6 +50,10 @@ class FilesystemExecutor:
                 return await self._read_file(parameters)
             elif tool_name == 'write_file':
                 return await self._write_file(parameters)
+            elif tool_name == 'edit_file':
+                return await self._edit_file(parameters)
+            elif tool_name == 'count_lines':
+                return await self._count_lines(parameters)
             elif tool_name == 'list_directory':
                 return await self._list_directory(parameters)
             elif tool_name == 'file_info':
@@ -39,15 +65,51 @@ class FilesystemExecutor:
             raise
     
     async def _read_file(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Read file contents"""
+        """
+        Read file contents
+        
+        Whole file by default (up to max_read_bytes); pass offset/length for a
+        byte window or start_line/num_lines for a line window of any size file.
+        """
         path = params.get('path')
         if not path:
             raise ValueError("Missing required parameter: path")
+        encoding = params.get('encoding', 'utf-8')
         
-        # Read file
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if params.get('start_line') is not None or params.get('num_lines') is not None:
+            data, first, taken = await self._offload(
+                file_io.read_line_range, path,
+                int(params.get('start_line') or 1),
+                None if params.get('num_lines') is None else int(params['num_lines'])
+            )
+            content = data.decode(encoding, errors='replace')
+            return {
+                'path': path,
+                'content': content,
+                'size': len(content),
+                'start_line': first,
+                'lines': taken,
+                'file_size': os.path.getsize(path)
+            }
         
+        if params.get('offset') is not None or params.get('length') is not None:
+            data, file_size = await self._offload(
+                file_io.read_byte_range, path,
+                int(params.get('offset') or 0),
+                None if params.get('length') is None else int(params['length'])
+            )
+            content = data.decode(encoding, errors='replace')
+            return {
+                'path': path,
+                'content': content,
+                'size': len(content),
+                'offset': int(params.get('offset') or 0),
+                'bytes': len(data),
+                'file_size': file_size
+            }
+        
+        # Whole file, behind the size guard
+        content = await self._offload(file_io.read_text, path, self.max_read_bytes, encoding)
         return {
             'path': path,
             'content': content,
@@ -55,6 +117,24 @@ class FilesystemExecutor:
             'lines': content.count('\n') + 1
         }
     
+    async def _count_lines(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Count lines without decoding the file"""
+        path = params.get('path')
+        if not path:
+            raise ValueError("Missing required parameter: path")
+        
+        lines = await self._offload(file_io.count_lines, path)
+        return {
+            'path': path,
+            'lines': lines,
+            'file_size': os.path.getsize(path)
+        }
+    
+    def _write_sync(self, path: str, content: str, mode: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode, encoding='utf-8') as f:
+            f.write(content)
+    
     async def _write_file(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Write content to file"""
         path = params.get('path')
@@ -64,12 +144,8 @@ class FilesystemExecutor:
         if not path:
             raise ValueError("Missing required parameter: path")
         
-        # Create parent directory if needed
-        Path(path).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write file
-        with open(path, mode, encoding='utf-8') as f:
-            f.write(content)
+        # Create parent directory if needed, then write
+        await self._offload(self._write_sync, path, content, mode)
         
         return {
             'path': path,
@@ -77,6 +153,36 @@ class FilesystemExecutor:
             'mode': mode
         }
     
+    async def _edit_file(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace old_text with new_text (first occurrence by default), streamed"""
+        path = params.get('path')
+        old_text = params.get('old_text')
+        new_text = params.get('new_text', '')
+        count = int(params.get('count', 1))
+        
+        if not path or not old_text:
+            raise ValueError("Missing required parameter: path/old_text")
+        
+        replaced = await self._offload(file_io.stream_replace, path, old_text, new_text, count)
+        if not replaced:
+            raise ValueError(f"Text not found in file: {old_text[:50]}...")
+        return {
+            'path': path,
+            'replacements': replaced
+        }
+    
+    def _list_sync(self, path: str) -> list:
+        items = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                is_file = entry.is_file()
+                items.append({
+                    'name': entry.name,
+                    'type': 'directory' if entry.is_dir() else 'file',
+                    'size': entry.stat().st_size if is_file else 0
+                })
+        return items
+    
     async def _list_directory(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """List directory contents"""
         path = params.get('path', '.')
@@ -84,14 +190,7 @@ class FilesystemExecutor:
         if not os.path.isdir(path):
             raise ValueError(f"Not a directory: {path}")
         
-        items = []
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            items.append({
-                'name': item,
-                'type': 'directory' if os.path.isdir(item_path) else 'file',
-                'size': os.path.getsize(item_path) if os.path.isfile(item_path) else 0
-            })
+        items = await self._offload(self._list_sync, path)
         
         return {
             'path': path,
@@ -108,7 +207,7 @@ class FilesystemExecutor:
         if not os.path.exists(path):
             raise FileNotFoundError(f"File not found: {path}")
         
-        stat = os.stat(path)
+        stat = await self._offload(os.stat, path)
         
         return {
             'path': path,
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Output Capture - Bounded head/tail retention for subprocess output
+
+Commands like `find /` or a chatty build can print far more than anyone
+will read. OutputCapture keeps the first head_bytes and the last
+(max_bytes - head_bytes) of a stream, counts everything, and reports when
+the cap was crossed so the caller can kill the process early.
+"""
+import codecs
+from collections import deque
+from typing import Optional
+
+DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024
+DEFAULT_HEAD_BYTES = 64 * 1024
+# Seconds to wait for a killed command's pipes to close; a grandchild that
+# left the process group can hold them open indefinitely
+DRAIN_TIMEOUT = 2.0
+
+
+def clamp_cap(requested, configured: int) -> int:
+    """A per-call output cap, never above the configured one"""
+    if requested is None:
+        return configured
+    return max(0, min(int(requested), configured))
+
+
+class OutputCapture:
+    """Head + tail ring buffer for one output stream"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+                 head_bytes: int = DEFAULT_HEAD_BYTES):
+        """
+        Args:
+            max_bytes: Total bytes retained (head + tail)
+            head_bytes: Bytes kept from the start; the rest of the budget is tail
+        """
+        self.max_bytes = max(0, int(max_bytes))
+        self.head_bytes = min(max(0, int(head_bytes)), self.max_bytes)
+        self.tail_bytes = self.max_bytes - self.head_bytes
+        self._head = bytearray()
+        self._tail: deque = deque()
+        self._tail_len = 0
+        self.total_bytes = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > self.max_bytes
+
+    def feed(self, data: bytes) -> None:
+        """Append bytes, dropping the middle once over budget"""
+        self.total_bytes += len(data)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if not data or self.tail_bytes == 0:
+            return
+        if len(data) >= self.tail_bytes:
+            self._tail.clear()
+            self._tail.append(bytes(data[-self.tail_bytes:]))
+            self._tail_len = self.tail_bytes
+            return
+        self._tail.append(bytes(data))
+        self._tail_len += len(data)
+        while self._tail_len > self.tail_bytes:
+            extra = self._tail_len - self.tail_bytes
+            first = self._tail[0]
+            if len(first) <= extra:
+                self._tail.popleft()
+                self._tail_len -= len(first)
+            else:
+                self._tail[0] = first[extra:]
+                self._tail_len -= extra
+
+    def decode_chunk(self, data: bytes) -> str:
+        """Incrementally decode a streamed chunk (multi-byte chars may span chunks)"""
+        return self._decoder.decode(data)
+
+    def text(self) -> str:
+        """Retained output, with a marker where bytes were dropped"""
+        head = bytes(self._head).decode('utf-8', errors='replace')
+        tail = b''.join(self._tail).decode('utf-8', errors='replace')
+        dropped = self.total_bytes - len(self._head) - self._tail_len
+        if dropped > 0:
+            return f"{head}\n... [{dropped:,} bytes truncated] ...\n{tail}"
+        return head + tail
+
+    def summary(self) -> dict:
+        return {'bytes': self.total_bytes, 'truncated': self.truncated}
+
+
+def over_cap(*captures: Optional[OutputCapture]) -> bool:
+    """True once any capture has seen more than its byte budget"""
+    return any(c is not None and c.truncated for c in captures)
@@ -3,77 +3,181 @@
 Process Executor - Handles command execution
 """
 import asyncio
-import subprocess
-from typing import Dict, Any
+import inspect
+import os
+import signal
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 import logging
 
+from .output import (DEFAULT_HEAD_BYTES, DEFAULT_MAX_OUTPUT_BYTES, DRAIN_TIMEOUT, OutputCapture,
+                     clamp_cap, over_cap)
+
 logger = logging.getLogger(__name__)
 
+READ_CHUNK_BYTES = 64 * 1024
+
+OutputCallback = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+def _kill(process) -> None:
+    """Kill the command's whole process group (shell + children holding the pipes)"""
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
 class ProcessExecutor:
     """Handles process/command execution"""
-    
+
+    def __init__(self, max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+                 head_bytes: int = DEFAULT_HEAD_BYTES, kill_on_cap: bool = True):
+        """
+        Args:
+            max_output_bytes: Bytes of stdout (and of stderr) kept per command;
+                a call's max_output_bytes parameter can only lower it
+            head_bytes: Part of that budget kept from the start; the rest is tail
+            kill_on_cap: Kill the command once a stream exceeds the budget;
+                a call's kill_on_cap parameter can only turn this on
+        """
+        self.max_output_bytes = max_output_bytes
+        self.head_bytes = head_bytes
+        self.kill_on_cap = kill_on_cap
+
     async def execute(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a process tool
-        
+
         Args:
             tool_name: Name of tool to execute
             parameters: Tool parameters
-            
+
         Returns:
             Execution result dict
         """
+        return await self.execute_streaming(tool_name, parameters, on_output=None)
+
+    async def execute_streaming(self, tool_name: str, parameters: Dict[str, Any],
+                                on_output: Optional[OutputCallback] = None) -> Dict[str, Any]:
+        """
+        Execute a process tool, passing output chunks to on_output as they arrive
+
+        Args:
+            tool_name: Name of tool to execute
+            parameters: Tool parameters
+            on_output: Called (sync or async) with {'stream', 'data'} per chunk
+
+        Returns:
+            Execution result dict (with head/tail-capped stdout/stderr)
+        """
         try:
             if tool_name == 'run_command':
-                return await self._run_command(parameters)
+                return await self._run_command(parameters, on_output)
             else:
                 raise ValueError(f"Unknown process tool: {tool_name}")
         except Exception as e:
             logger.error(f"Process execution error: {e}")
             raise
-    
-    async def _run_command(self, params: Dict[str, Any]) -> Dict[str, Any]:
+
+    async def _pump(self, name: str, stream, capture: OutputCapture, process,
+                    on_output: Optional[OutputCallback], killed: Dict[str, Optional[str]],
+                    kill_on_cap: bool) -> None:
+        """Read one pipe to EOF, streaming chunks until the cap is reached"""
+        while True:
+            data = await stream.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            was_truncated = capture.truncated
+            capture.feed(data)
+            if on_output is not None and not was_truncated:
+                text = capture.decode_chunk(data)
+                if text:
+                    sent = on_output({'stream': name, 'data': text})
+                    if inspect.isawaitable(sent):
+                        await sent
+                if capture.truncated:
+                    notice = on_output({'stream': name, 'truncated': True,
+                                        'message': f'{name} exceeded {capture.max_bytes:,} bytes'})
+                    if inspect.isawaitable(notice):
+                        await notice
+            if kill_on_cap and capture.truncated and killed['reason'] is None:
+                killed['reason'] = 'output_cap'
+                _kill(process)
+
+    async def _run_command(self, params: Dict[str, Any],
+                           on_output: Optional[OutputCallback] = None) -> Dict[str, Any]:
         """Execute a shell command"""
         command = params.get('command')
         if not command:
             raise ValueError("Missing required parameter: command")
-        
+
         timeout = params.get('timeout', 30)  # Default 30 second timeout
-        shell = params.get('shell', True)
-        
+        # Parameters come from the client: they may tighten the limits, never loosen them
+        max_bytes = clamp_cap(params.get('max_output_bytes'), self.max_output_bytes)
+        kill_on_cap = self.kill_on_cap or params.get('kill_on_cap') is True
+
+        process = None
+        stdout = OutputCapture(max_bytes, min(self.head_bytes, max_bytes // 2))
+        stderr = OutputCapture(max_bytes, min(self.head_bytes, max_bytes // 2))
+        killed: Dict[str, Optional[str]] = {'reason': None}
         try:
-            # Run command with timeout
+            # Pipes are drained incrementally, never buffered whole
             process = await asyncio.create_subprocess_shell(
                 command,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                shell=shell
+                start_new_session=True  # own process group, so kills reach children
             )
-            
-            # Wait for completion with timeout
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
+
+            pumps = asyncio.gather(
+                self._pump('stdout', process.stdout, stdout, process, on_output, killed, kill_on_cap),
+                self._pump('stderr', process.stderr, stderr, process, on_output, killed, kill_on_cap),
             )
-            
-            return {
-                'command': command,
-                'stdout': stdout.decode('utf-8'),
-                'stderr': stderr.decode('utf-8'),
-                'return_code': process.returncode,
-                'success': process.returncode == 0
-            }
-            
-        except asyncio.TimeoutError:
-            process.kill()
+            try:
+                await asyncio.wait_for(asyncio.shield(pumps), timeout=timeout)
+            except asyncio.TimeoutError:
+                killed['reason'] = killed['reason'] or 'timeout'
+                _kill(process)
+                try:
+                    await asyncio.wait_for(pumps, timeout=DRAIN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Output pipes still open {DRAIN_TIMEOUT}s after kill "
+                                   f"(escaped child?), abandoning: {command[:80]}")
+                    # Close our ends of the pipes rather than leave them to the escaped child
+                    transport = getattr(process, '_transport', None)
+                    if transport is not None:
+                        transport.close()
             await process.wait()
-            return {
+
+            result = {
                 'command': command,
-                'error': 'Command timeout',
-                'timeout': timeout,
-                'success': False
+                'stdout': stdout.text(),
+                'stderr': stderr.text(),
+                'return_code': process.returncode,
+                'success': process.returncode == 0 and killed['reason'] is None,
+                'truncated': over_cap(stdout, stderr),
+                'stdout_bytes': stdout.total_bytes,
+                'stderr_bytes': stderr.total_bytes,
+                'killed': killed['reason']
             }
+            if killed['reason'] == 'timeout':
+                result.update({'error': 'Command timeout', 'timeout': timeout})
+            elif killed['reason'] == 'output_cap':
+                result['error'] = f'Output exceeded {max_bytes:,} bytes'
+            return result
+
+        except asyncio.CancelledError:
+            if process is not None:
+                _kill(process)
+            raise
         except Exception as e:
+            if process is not None:
+                _kill(process)
             return {
                 'command': command,
                 'error': str(e),
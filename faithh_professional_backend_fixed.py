@@ -10,19 +10,17 @@ Added smart integrations:
 from flask import Flask, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-import requests
 import json
 import os
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
 from datetime import datetime
 import base64
 import mimetypes
 from dotenv import load_dotenv
 import threading
+import time
 from queue import Queue
-import re
 
 # Load environment variables
 load_dotenv()
@@ -42,28 +40,153 @@ UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 # Base directory
 BASE_DIR = Path(__file__).parent
 
-# Initialize ChromaDB with CORRECT 768-dim embedding function
-try:
-    chroma_client = chromadb.HttpClient(host="localhost", port=8000)
+# ChromaDB + embedding model come up in background threads so Flask binds
+# immediately; /health/ready reports per-dependency state meanwhile.
+CHROMA_CONNECTED = False
+chroma_client = None
+collection = None
+embedding_func = None
+
+# Optional quantized hot tier (build with scripts/rag/quantized_index.py build)
+QUANTIZED_INDEX_DIR = os.environ.get('FAITHH_QUANTIZED_INDEX')
+quantized_index = None
+rag_collection = None  # Read path for RAG queries; writes always go to `collection`
+# Per-category-group collections (scripts/rag/partition_collection.py build)
+PARTITIONED_LAYOUT = os.environ.get('FAITHH_PARTITIONED', '0') == '1'
+partitioned_collection = None
+# Per-conversation vectors for conversations -> chunks retrieval (built by the chunkers)
+HIERARCHICAL_RETRIEVAL = os.environ.get('FAITHH_HIERARCHICAL', '1') == '1'
+HIERARCHICAL_CONVERSATIONS = int(os.environ.get('FAITHH_HIERARCHICAL_CONVERSATIONS', '5'))
+conversation_index = None
+
+# Cross-request micro-batching of query embeddings (FAITHH_EMBED_MAX_WAIT_MS=0 disables)
+EMBED_MAX_BATCH = int(os.environ.get('FAITHH_EMBED_MAX_BATCH', '32'))
+EMBED_MAX_WAIT_MS = float(os.environ.get('FAITHH_EMBED_MAX_WAIT_MS', '5'))
+
+def init_embedding_model():
+    """Load all-mpnet-base-v2 (768-dim) and warm it with one encode
+
+    Uses the shared embedding service (python -m embeddings.service) when it
+    is running, so the model is held once per host instead of once per process.
+    """
+    global embedding_func
+    from embeddings.client import get_embedding_function, EmbeddingServiceClient
+    func = get_embedding_function("all-mpnet-base-v2")  # 768 dimensions
+    # The shared service batches on its side; a local model gets its own batcher
+    if EMBED_MAX_WAIT_MS > 0 and not isinstance(func, EmbeddingServiceClient):
+        from embeddings.batcher import BatchingEmbeddingFunction
+        func = BatchingEmbeddingFunction(func, max_batch=EMBED_MAX_BATCH,
+                                         max_wait_ms=EMBED_MAX_WAIT_MS)
+        print(f"✅ Query embedding micro-batching: max_batch={EMBED_MAX_BATCH}, max_wait={EMBED_MAX_WAIT_MS}ms")
+    func(["warmup"])
+    embedding_func = func
+    # Precompute intent prototype vectors so the first chat doesn't pay for them
+    intent_router.embedding_function = func
+    intent_router.prepare()
+    print(f"✅ Using all-mpnet-base-v2 (768-dim) embedding model")
+
+def init_chroma():
+    """Connect to ChromaDB and open documents_768 (retried with backoff)"""
+    global chroma_client, collection, rag_collection, quantized_index, partitioned_collection
+    global conversation_index, CHROMA_CONNECTED
+    client = chromadb.HttpClient(host="localhost", port=8000)
     
     # Use the 768-dim model to match the collection
-    embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-mpnet-base-v2"  # 768 dimensions
-    )
-    
-    collection = chroma_client.get_collection(
+    coll = client.get_collection(
         name="documents_768",
         embedding_function=embedding_func
     )
+    doc_count = coll.count()
+    
+    chroma_client = client
+    collection = coll
+    rag_collection = coll
+    if QUANTIZED_INDEX_DIR and Path(QUANTIZED_INDEX_DIR).exists():
+        try:
+            from retrieval.quantized import QuantizedIndex, QuantizedCollection
+            if quantized_index is None:
+                quantized_index = QuantizedIndex.load(QUANTIZED_INDEX_DIR)
+            rag_collection = QuantizedCollection(quantized_index, embedding_func, coll)
+            rag_collection.search_kwargs = {
+                'use_binary': os.environ.get('FAITHH_QUANTIZED_BINARY', '0') == '1'
+            }
+            footprint = quantized_index.memory_footprint()
+            print(f"✅ Quantized index loaded: {len(quantized_index)} vectors "
+                  f"({footprint['int8_codes'] // (1024 * 1024)} MB int8 resident)")
+        except Exception as e:
+            quantized_index = None
+            print(f"⚠️ Quantized index not loaded, using ChromaDB directly: {e}")
+    if PARTITIONED_LAYOUT and quantized_index is None:
+        from retrieval.partitions import PartitionedCollection
+        partitioned_collection = PartitionedCollection.discover(client, "documents_768", embedding_func)
+        if partitioned_collection is not None:
+            rag_collection = partitioned_collection
+            print(f"✅ Partitioned RAG layout: {', '.join(sorted(partitioned_collection.partitions))}")
+        else:
+            print(f"⚠️ FAITHH_PARTITIONED=1 but no partitions found, querying documents_768")
+    if HIERARCHICAL_RETRIEVAL:
+        from retrieval.hierarchical import CONVERSATION_COLLECTION
+        try:
+            conv_index = client.get_collection(name=CONVERSATION_COLLECTION,
+                                               embedding_function=embedding_func)
+            conversation_index = conv_index if conv_index.count() > 0 else None
+        except Exception:
+            conversation_index = None
+        if conversation_index is not None:
+            print(f"✅ Hierarchical retrieval: {conversation_index.count()} conversations indexed")
+        else:
+            print(f"ℹ️  No conversation index yet (run scripts/chunk_claude_chats.py) - flat chunk search")
+    
     CHROMA_CONNECTED = True
-    doc_count = collection.count()
     print(f"✅ ChromaDB connected: {doc_count} documents available")
-    print(f"✅ Using all-mpnet-base-v2 (768-dim) embedding model")
-except Exception as e:
-    CHROMA_CONNECTED = False
-    collection = None
-    embedding_func = None
-    print(f"⚠️ ChromaDB not connected: {e}")
+
+def check_chroma():
+    """Periodic heartbeat; a failure flips CHROMA_CONNECTED and triggers reconnect"""
+    global CHROMA_CONNECTED
+    try:
+        chroma_client.heartbeat()
+        return True
+    except Exception as e:
+        CHROMA_CONNECTED = False
+        print(f"⚠️ ChromaDB connection lost: {e}")
+        return False
+
+from runtime.readiness import ReadinessTracker
+from runtime.deadline import Deadline
+from runtime.singleflight import SingleFlight, make_key
+from retrieval.generation import GenerationStore
+from retrieval.hierarchical import HierarchicalRetriever
+from retrieval.parent_docs import ContextExpander, ParentStore
+from retrieval.result_cache import RAGResultCache, VersionedCollection
+from providers.base import ProviderError, ProviderTimeout
+from providers.registry import get_provider, provider_snapshot
+from providers.router import CircuitBreaker, CircuitOpenError, RollingStats, get_router
+
+# Semantic intent routing (calibrate with scripts/rag/eval_intent_router.py).
+# Created before the readiness threads start: init_embedding_model prepares it.
+from retrieval.intents import IntentRouter, load_thresholds, rule_intent
+INTENT_THRESHOLDS_FILE = os.environ.get('FAITHH_INTENT_THRESHOLDS')
+intent_router = IntentRouter(
+    thresholds=load_thresholds(INTENT_THRESHOLDS_FILE)
+    if INTENT_THRESHOLDS_FILE and Path(INTENT_THRESHOLDS_FILE).exists() else None
+)
+
+readiness = ReadinessTracker()
+generations = GenerationStore()
+readiness.register('embedding_model', init_embedding_model)
+readiness.register('chromadb', init_chroma, check_fn=check_chroma,
+                   depends_on=['embedding_model'])
+
+def start_background_init():
+    """Start the dependency probes once per serving process (safe to call repeatedly)"""
+    if readiness.start():
+        print(f"🚀 Background initialization started (pid {os.getpid()})")
+
+# Backstop for servers that never run an explicit startup hook: the first
+# request (usually the /health/ready probe) starts initialization
+@app.before_request
+def ensure_background_init():
+    start_background_init()
 
 # Check for Gemini
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
@@ -80,6 +203,23 @@ CURRENT_MODEL = {"name": "unknown", "provider": "unknown", "last_response_time":
 conversation_sessions = {}
 SESSION_TIMEOUT = 3600  # 1 hour in seconds
 
+# Exchanges kept verbatim per session - and shown verbatim in the prompt;
+# older ones are folded into a rolling summary in the background (set
+# FAITHH_SUMMARY_MODEL to a small Ollama model)
+HISTORY_PROMPT_TURNS = int(os.environ.get('FAITHH_HISTORY_TURNS', '5'))
+HISTORY_TOKEN_BUDGET = int(os.environ.get('FAITHH_HISTORY_TOKENS', '1500'))
+SUMMARY_MODEL = os.environ.get('FAITHH_SUMMARY_MODEL')  # None: Ollama's default model
+SUMMARY_TOKENS = int(os.environ.get('FAITHH_SUMMARY_TOKENS', '300'))
+SUMMARY_TIMEOUT = float(os.environ.get('FAITHH_SUMMARY_TIMEOUT', '60'))
+
+def summarize_with_local_model(prompt, max_tokens):
+    """Fold prompt -> summary text via the local Ollama model"""
+    return get_provider('ollama').generate(prompt, model=SUMMARY_MODEL, timeout=SUMMARY_TIMEOUT,
+                                           max_tokens=max_tokens)['text']
+
+from runtime.session_summary import SessionSummarizer, fit_history
+session_summarizer = SessionSummarizer(summarize_with_local_model, max_summary_tokens=SUMMARY_TOKENS)
+
 def cleanup_old_sessions():
     """Remove sessions older than timeout"""
     from datetime import datetime
@@ -122,35 +262,21 @@ def add_to_conversation_history(session_id, user_msg, assistant_msg, intent=None
     if session_id not in conversation_sessions:
         return
     
-    conversation_sessions[session_id]["history"].append({
+    # Keep only the exchanges the prompt shows; older ones go to the summarizer
+    session_summarizer.record(conversation_sessions[session_id], {
         "timestamp": datetime.now().isoformat(),
         "user": user_msg,
         "assistant": assistant_msg,
         "intent": intent or {}
-    })
-    
-    # Keep only last 10 exchanges (configurable)
-    if len(conversation_sessions[session_id]["history"]) > 10:
-        conversation_sessions[session_id]["history"] = conversation_sessions[session_id]["history"][-10:]
+    }, keep=HISTORY_PROMPT_TURNS)
 
-def format_conversation_history(history, last_n=5):
-    """Format conversation history for context"""
-    if not history:
+def format_conversation_history(history, last_n=5, summary=None, budget_tokens=HISTORY_TOKEN_BUDGET,
+                                pending=None):
+    """Format conversation history for context (running summary + recent turns, within budget)"""
+    if not history and not summary and not pending:
         return None
-    
-    recent = history[-last_n:]
-    formatted = []
-    
-    for exchange in recent:
-        formatted.append(f"User: {exchange['user']}")
-        # Truncate long responses but keep enough for context
-        assistant_text = exchange['assistant']
-        if len(assistant_text) > 500:
-            assistant_text = assistant_text[:500] + "..."
-        formatted.append(f"Assistant: {assistant_text}")
-        formatted.append("")
-    
-    return "\n".join(formatted)
+    return fit_history(history, summary=summary, max_turns=last_n, budget_tokens=budget_tokens,
+                       pending=pending)
 
 # ============================================================
 # AUTO-INDEX QUEUE (Background thread for conversation indexing)
@@ -176,12 +302,29 @@ def index_conversation_background(user_msg, assistant_msg, metadata):
             "user_preview": user_msg[:100]
         }
         meta.update(metadata or {})
-        
-        collection.add(
-            documents=[conversation_text],
-            metadatas=[meta],
-            ids=[conv_id]
-        )
+
+        if quantized_index is not None or partitioned_collection is not None:
+            # Embed once and keep the hot tier / partitions in step with ChromaDB
+            embeddings = embedding_func([conversation_text])
+            collection.add(
+                documents=[conversation_text],
+                embeddings=embeddings,
+                metadatas=[meta],
+                ids=[conv_id]
+            )
+            if quantized_index is not None:
+                quantized_index.add([conv_id], embeddings, [meta])
+            if partitioned_collection is not None:
+                partitioned_collection.add(ids=[conv_id], metadatas=[meta],
+                                           documents=[conversation_text], embeddings=embeddings)
+        else:
+            collection.add(
+                documents=[conversation_text],
+                metadatas=[meta],
+                ids=[conv_id]
+            )
+        # Cached RAG results from before this write are now unreachable
+        generations.bump("documents_768")
         print(f"📝 Indexed: {conv_id}")
     except Exception as e:
         print(f"❌ Index failed: {e}")
@@ -219,6 +362,16 @@ DECISIONS_LOG = Path.home() / "ai-stack/decisions_log.json"
 PROJECT_STATES = Path.home() / "ai-stack/project_states.json"
 SCAFFOLDING_FILE = Path.home() / "ai-stack/scaffolding_state.json"
 
+# Memory and scaffolding are read from memory and persisted as a JSONL journal
+# of small updates, compacted into the JSON file atomically (see runtime.journal_store)
+from runtime.journal_store import JournaledJSONStore
+memory_store = JournaledJSONStore(MEMORY_FILE, default={"user_profile": {"name": "Jonathan"}})
+scaffolding_store = JournaledJSONStore(SCAFFOLDING_FILE)
+
+# Ranked decision search; rebuilt whenever decisions_log.json changes on disk
+from retrieval.decisions import DecisionIndex
+decision_index = DecisionIndex(DECISIONS_LOG)
+
 def load_json_file(filepath):
     """Generic JSON file loader"""
     try:
@@ -231,12 +384,10 @@ def load_json_file(filepath):
         return None
 
 def load_memory():
-    """Load persistent memory from disk"""
-    memory = load_json_file(MEMORY_FILE)
-    if memory is None:
+    """Load persistent memory (in-memory view, no disk read)"""
+    if not memory_store.exists():
         print("⚠️  Memory file not found, using defaults")
-        return {"user_profile": {"name": "Jonathan"}}
-    return memory
+    return memory_store.view()
 
 def load_decisions():
     """Load decisions log"""
@@ -248,25 +399,23 @@ def load_project_states():
 
 def load_scaffolding():
     """Load scaffolding state for structural awareness"""
-    return load_json_file(SCAFFOLDING_FILE)
+    return scaffolding_store.view() if scaffolding_store.exists() else None
 
 def save_scaffolding(scaffolding):
-    """Persist scaffolding state to disk"""
+    """Persist scaffolding state (journals only the sections that changed)"""
     try:
-        scaffolding['meta']['last_updated'] = datetime.now().isoformat()
-        with open(SCAFFOLDING_FILE, 'w') as f:
-            json.dump(scaffolding, f, indent=2)
-        print(f"🏗️  Scaffolding saved: {datetime.now().strftime('%H:%M:%S')}")
+        scaffolding.setdefault('meta', {})['last_updated'] = datetime.now().isoformat()
+        changes = scaffolding_store.replace(scaffolding)
+        print(f"🏗️  Scaffolding saved: {datetime.now().strftime('%H:%M:%S')} ({changes} changes)")
     except Exception as e:
         print(f"❌ Error saving scaffolding: {e}")
 
 def save_memory(memory):
-    """Persist memory to disk"""
+    """Persist memory (journals only the sections that changed)"""
     try:
         memory["last_updated"] = datetime.now().isoformat()
-        with open(MEMORY_FILE, 'w') as f:
-            json.dump(memory, f, indent=2)
-        print(f"💾 Memory saved: {datetime.now().strftime('%H:%M:%S')}")
+        changes = memory_store.replace(memory)
+        print(f"💾 Memory saved: {datetime.now().strftime('%H:%M:%S')} ({changes} changes)")
     except Exception as e:
         print(f"❌ Error saving memory: {e}")
 
@@ -274,95 +423,31 @@ def save_memory(memory):
 # SMART QUERY ANALYSIS & INTEGRATION
 # ============================================================
 
-def detect_query_intent(query_text):
+def detect_query_intent(query_text, query_embedding=None):
     """
     Analyze query to determine which integrations to use
     Returns dict with flags and matched patterns
+
+    With the query's embedding, intents come from the prototype router
+    (retrieval.intents); without one, from the regex rules.
     """
-    query_lower = query_text.lower()
-    intent = {
-        'is_self_query': False,
-        'is_why_question': False,
-        'is_next_action_query': False,
-        'is_constella_query': False,
-        'needs_orientation': False,
-        'is_tangent': False,
-        'patterns_matched': []
-    }
-    
-    # Pattern 1: Self-awareness (asking about FAITHH itself)
-    self_patterns = [
-        r'\bfaithh\b',  # "FAITHH" as word (case insensitive)
-        r'what are you',
-        r'what is your',
-        r'tell me about yourself',
-        r'who are you',
-        r'what do you do'
-    ]
-    for pattern in self_patterns:
-        if re.search(pattern, query_lower):
-            intent['is_self_query'] = True
-            intent['patterns_matched'].append(f"self: {pattern}")
-            break
-    
-    # Pattern 2: "Why" decisions (asking rationale)
-    why_patterns = [
-        r'why did (we|you|i) (choose|use|pick|select|go with)',
-        r'why.*instead of',
-        r'why.*over',
-        r'what was the reason',
-        r'rationale for',
-        r'why.*decision'
-    ]
-    for pattern in why_patterns:
-        if re.search(pattern, query_lower):
-            intent['is_why_question'] = True
-            intent['patterns_matched'].append(f"why: {pattern}")
-            break
-    
-    # Pattern 3: Next actions (asking what to work on)
-    next_patterns = [
-        r'what should (i|we) work on',
-        r"what('s| is) next",
-        r'what to do next',
-        r'what should (i|we) focus on',
-        r'what are (my|the) priorities',
-        r'where should (i|we) start',
-        r'what.*missing'
-    ]
-    for pattern in next_patterns:
-        if re.search(pattern, query_lower):
-            intent['is_next_action_query'] = True
-            intent['patterns_matched'].append(f"next: {pattern}")
-            break
-    
-    # Pattern 4: Constella queries (domain-specific)
-    constella_keywords = ['constella', 'astris', 'auctor', 'civic tome', 'penumbra',
-                          'ucf', 'resonance gap', 'harmonic', 'celestial equilibrium']
-    if any(kw in query_lower for kw in constella_keywords):
-        intent['is_constella_query'] = True
-    
-    # Pattern 5: Orientation queries (scaffolding - where am I?)
-    orientation_patterns = [
-        r'where (was i|did i leave off|am i|are we)',
-        r'what was i (working on|doing)',
-        r'catch me up',
-        r'bring me up to speed',
-        r"what('s| is) (the |my )?(status|progress)",
-        r"(my |the |what('s| is) )progress",
-        r"what('s| is| have i) (been )?(done|complete|finished)",
-        r'am i on track',
-        r'where (did we|do we) stand',
-        r'what have (i|we) (done|accomplished|completed)',
-        r'update me'
-    ]
-    for pattern in orientation_patterns:
-        if re.search(pattern, query_lower):
-            intent['needs_orientation'] = True
-            intent['patterns_matched'].append(f"orientation: {pattern}")
-            break
-    
-    return intent
+    if embedding_func is not None:
+        intent_router.embedding_function = embedding_func
+    return intent_router.route(query_text, query_embedding)
+
+def embed_query(query_text, deadline=None):
+    """Embed a query once for intent routing, RAG and decisions (None if no model)"""
+    if embedding_func is None:
+        return None
+    intent_router.embedding_function = embedding_func
+    try:
+        return embed_flights.do(make_key('embed', query_text),
+                                lambda: intent_router.embed_query(query_text),
+                                timeout=deadline.timeout() if deadline else None)
+    except TimeoutError:
+        if deadline:
+            deadline.degrade('embedding_timeout')
+        return None
 
 def get_self_awareness_context():
     """Extract self-awareness section from memory"""
@@ -415,25 +500,16 @@ CRITICAL: {ca.get('when_asked_about_constella', '')}
         return context.strip()
     return None
 
-def search_decisions_log(query_text):
-    """Search decisions log for relevant decisions"""
-    decisions = load_decisions()
-    if not decisions or 'decisions' not in decisions:
-        return None
-    
-    query_lower = query_text.lower()
-    relevant_decisions = []
-    
-    for decision in decisions['decisions']:
-        # Check if query mentions the decision topic
-        decision_text = f"{decision.get('decision', '')} {decision.get('rationale', '')}".lower()
-        
-        # Simple keyword matching (could be improved with embeddings)
-        if any(word in decision_text for word in query_lower.split() if len(word) > 3):
-            relevant_decisions.append(decision)
-    
-    if not relevant_decisions:
+def search_decisions_log(query_text, query_embedding=None):
+    """Search decisions log for relevant decisions (ranked, see retrieval.decisions)"""
+    # Attach the embedding model once it's ready; until then ranking is BM25-only
+    decision_index.embedding_function = embedding_func
+    hits = decision_index.search(query_text, k=3, query_embedding=query_embedding)
+    if not hits:
         return None
+    relevant_decisions = [hit['decision'] for hit in hits]
+    print(f"   📋 Decisions: {len(hits)} match(es), best score {hits[0]['score']:.2f} "
+          f"({decision_index.stats['last_search_ms']}ms)")
     
     # Format decisions for context
     context = "\n=== RELEVANT DECISIONS ===\n"
@@ -581,11 +657,149 @@ After that: {proj_milestones.get('after_that', 'Unknown')}
     return "\n".join(context_parts) if context_parts else None
 
 
-def smart_rag_query(query_text, n_results=10, where=None, intent=None):
+# ChromaDB failures open this breaker so later queries (and the fallback
+# queries inside smart_rag_query) fail fast instead of each waiting on a dead server
+chroma_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=15.0)
+chroma_latency = RollingStats(window=50)
+
+# Per-request latency budget for /api/chat (clients may send deadline_ms)
+CHAT_DEADLINE_S = float(os.environ.get('FAITHH_CHAT_DEADLINE_S', '30'))
+CHAT_MAX_DEADLINE_S = float(os.environ.get('FAITHH_CHAT_MAX_DEADLINE_S', '120'))
+# Budget held back for the model while retrieval runs
+LLM_RESERVE_S = float(os.environ.get('FAITHH_LLM_RESERVE_S', '8'))
+# With less than this left for the model, the reply length is capped
+LLM_FULL_ANSWER_S = float(os.environ.get('FAITHH_LLM_FULL_ANSWER_S', '20'))
+LLM_TOKENS_PER_S = float(os.environ.get('FAITHH_LLM_TOKENS_PER_S', '20'))
+MIN_MAX_TOKENS = 64
+
+# Identical concurrent work (UI retries, several tabs asking the same thing)
+# runs once; every caller waits on the shared result
+embed_flights = SingleFlight('embed')
+rag_flights = SingleFlight('rag')
+llm_flights = SingleFlight('llm')
+
+# Query results keyed on the collection generation, which every writer bumps,
+# so repeated and paged queries skip the vector search until the index changes
+RAG_CACHE_ENTRIES = int(os.environ.get('FAITHH_RAG_CACHE_ENTRIES', '1024'))
+RAG_CACHE_MB = int(os.environ.get('FAITHH_RAG_CACHE_MB', '64'))
+rag_cache = RAGResultCache(generations, max_entries=RAG_CACHE_ENTRIES,
+                           max_bytes=RAG_CACHE_MB * 1024 * 1024)
+
+# Full texts of documents indexed as small child chunks (small-to-big retrieval)
+RAG_WINDOW_CHARS = int(os.environ.get('FAITHH_RAG_WINDOW_CHARS', '1000'))
+context_expander = ContextExpander(ParentStore(), window_chars=RAG_WINDOW_CHARS)
+
+def rag_query_cost():
+    """Expected seconds for one ChromaDB query (recent p95; 0.5s until measured)"""
+    p95 = chroma_latency.quantile(0.95)
+    return p95 if p95 is not None else 0.5
+
+def rag_budget_allows(deadline, step):
+    """Whether one more ChromaDB query fits the request budget (records the skip if not)"""
+    if deadline is None or deadline.allows(rag_query_cost(), reserve_s=LLM_RESERVE_S):
+        return True
+    deadline.degrade(f"{step}_skipped")
+    print(f"   ⏱️  Skipping {step} - {deadline.remaining():.1f}s left")
+    return False
+
+
+def guarded_rag_query(**kwargs):
+    """
+    rag_collection.query behind rag_cache and chroma_breaker
+    (raises CircuitOpenError while open and the result isn't cached)
+
+    Results are cached under the generations of the tier that serves the
+    query (partitions / quantized tier), so rebuilding it expires them.
+    """
+    cache_key = getattr(rag_collection, 'cache_key', "documents_768")
+    cached, generation = rag_cache.lookup(cache_key, kwargs)
+    if cached is not None:
+        return cached
+    if not chroma_breaker.allow():
+        raise CircuitOpenError("ChromaDB circuit open", 'chromadb')
+    start = time.perf_counter()
+    try:
+        results = rag_collection.query(**kwargs)
+    except Exception:
+        chroma_latency.record(False, time.perf_counter() - start)
+        chroma_breaker.record_failure()
+        raise
+    chroma_latency.record(True, time.perf_counter() - start)
+    chroma_breaker.record_success()
+    rag_cache.store(cache_key, kwargs, results, generation)
+    return results
+
+
+_conversation_retriever = None
+_conversation_retriever_lock = threading.Lock()
+
+def get_conversation_retriever():
+    """Conversations -> chunks retriever, or None until the conversation index exists"""
+    global _conversation_retriever
+    if conversation_index is None:
+        return None
+    with _conversation_retriever_lock:
+        if _conversation_retriever is None or _conversation_retriever.conversations.collection is not conversation_index:
+            _conversation_retriever = HierarchicalRetriever(
+                VersionedCollection(conversation_index, cache=rag_cache),
+                guarded_rag_query,
+                embedding_function=embedding_func,
+                n_conversations=HIERARCHICAL_CONVERSATIONS,
+            )
+        return _conversation_retriever
+
+def query_conversation_chunks(query_text, query_input, n_results):
+    """Conversation chunks: coarse-to-fine when the conversation index exists, else flat"""
+    retriever = get_conversation_retriever()
+    if retriever is not None:
+        try:
+            results = retriever.query(query_text=query_text,
+                                      query_embedding=(query_input.get('query_embeddings') or [None])[0],
+                                      n_results=n_results)
+            if results is not None:
+                print(f"   🧭 Searched chunks of {len(results['conversations'][0])} conversations")
+                return results
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"   ⚠️  Hierarchical search failed, using flat chunk search: {e}")
+    return guarded_rag_query(
+        **query_input,
+        n_results=n_results,
+        where={"category": "claude_conversation_chunk"}
+    )
+
+
+def smart_rag_query(query_text, n_results=10, where=None, intent=None, query_embedding=None,
+                    deadline=None):
     """
     Intelligent RAG query with integration support
     Now aware of query intent to boost relevant sources
+
+    With a deadline, fallback queries only run while the budget (minus the
+    model's reserve) still covers one; otherwise the best results so far win.
+    Identical concurrent queries share one run (the first caller's budget).
     """
+    intent_flags = {k: v for k, v in (intent or {}).items() if k.startswith(('is_', 'needs_'))}
+    key = make_key('rag', query_text, n_results, where, intent_flags)
+    timeout = max(0.1, deadline.remaining() - LLM_RESERVE_S) if deadline else None
+    try:
+        return rag_flights.do(key, lambda: _smart_rag_query(query_text, n_results, where, intent,
+                                                            query_embedding, deadline),
+                              timeout=timeout)
+    except TimeoutError:
+        print(f"   ⏱️  RAG query ran past its budget - continuing without it")
+        if deadline:
+            deadline.degrade('rag_timeout')
+        return None
+
+def _smart_rag_query(query_text, n_results, where, intent, query_embedding, deadline):
+    """smart_rag_query's body (runs once per in-flight key)"""
+    # Reuse the vector computed for intent routing instead of re-embedding
+    if query_embedding is not None:
+        query_input = {'query_embeddings': [query_embedding]}
+    else:
+        query_input = {'query_texts': [query_text]}
     try:
         print(f"🔍 Query: '{query_text[:60]}...'")
         
@@ -600,8 +814,8 @@ def smart_rag_query(query_text, n_results=10, where=None, intent=None):
         # For Constella queries, prioritize master reference docs
         if intent and intent['is_constella_query']:
             try:
-                constella_results = collection.query(
-                    query_texts=[query_text],
+                constella_results = guarded_rag_query(
+                    **query_input,
                     n_results=n_results,
                     where={"category": "constella_master"}
                 )
@@ -613,23 +827,19 @@ def smart_rag_query(query_text, n_results=10, where=None, intent=None):
             except Exception as e:
                 print(f"   ⚠️  Constella master query failed: {e}")
         
-        # Keywords that indicate a development/technical query
-        dev_keywords = ['discuss', 'talk', 'said', 'conversation', 'we', 'our',
-                       'plan', 'setup', 'configure', 'implement', 'build', 
-                       'create', 'did we', 'what was', 'how did', 'tell me about',
-                       'what did', 'what were', 'talked about']
-        
-        query_lower = query_text.lower()
-        is_dev_query = any(keyword in query_lower for keyword in dev_keywords)
+        # Development/history queries are flagged by the intent router
+        if intent is not None:
+            is_dev_query = intent.get('is_dev_query', False)
+        else:
+            is_dev_query = rule_intent(query_text)[0]['is_dev_query']
         
         # For dev queries, prioritize conversation chunks
-        if is_dev_query:
+        queried = bool(intent and intent['is_constella_query'])
+        conv_results = None
+        if is_dev_query and (not queried or rag_budget_allows(deadline, 'rag_conversation_chunks')):
+            queried = True
             try:
-                conv_results = collection.query(
-                    query_texts=[query_text],
-                    n_results=n_results,
-                    where={"category": "claude_conversation_chunk"}
-                )
+                conv_results = query_conversation_chunks(query_text, query_input, n_results)
                 
                 if (conv_results['distances'] and 
                     conv_results['distances'][0] and 
@@ -642,11 +852,13 @@ def smart_rag_query(query_text, n_results=10, where=None, intent=None):
             except Exception as e:
                 print(f"   ⚠️  Conversation chunk query failed: {e}")
         
-        # Fall back to broader search
+        # Fall back to broader search (out of budget: weak conversation matches beat none)
+        if queried and not rag_budget_allows(deadline, 'rag_fallback'):
+            return conv_results
         if where:
             print(f"   📚 Using backend's where clause")
-            return collection.query(
-                query_texts=[query_text],
+            return guarded_rag_query(
+                **query_input,
                 n_results=n_results,
                 where=where
             )
@@ -655,24 +867,34 @@ def smart_rag_query(query_text, n_results=10, where=None, intent=None):
                          "documentation", "code", "parity", "conversation"]
             print(f"   📚 Using mixed category search")
             try:
-                return collection.query(
-                    query_texts=[query_text],
+                return guarded_rag_query(
+                    **query_input,
                     n_results=n_results,
                     where={"category": {"$in": categories}}
                 )
             except:
+                if not rag_budget_allows(deadline, 'rag_unfiltered_fallback'):
+                    return None
                 print(f"   🔍 Using unfiltered search")
-                return collection.query(
-                    query_texts=[query_text],
+                return guarded_rag_query(
+                    **query_input,
                     n_results=n_results
                 )
         
+    except CircuitOpenError:
+        print(f"   ⏭️  ChromaDB circuit open - skipping RAG")
+        return None
     except Exception as e:
         print(f"❌ Error in smart RAG query: {e}")
-        return collection.query(
-            query_texts=[query_text],
-            n_results=n_results
-        )
+        if not rag_budget_allows(deadline, 'rag_unfiltered_fallback'):
+            return None
+        try:
+            return guarded_rag_query(
+                **query_input,
+                n_results=n_results
+            )
+        except CircuitOpenError:
+            return None
 
 
 # ============================================================
@@ -680,7 +902,8 @@ def smart_rag_query(query_text, n_results=10, where=None, intent=None):
 # This REPLACES your existing build_integrated_context function
 # ============================================================
 
-def build_integrated_context(query_text, intent, use_rag=True, session_id=None):
+def build_integrated_context(query_text, intent, use_rag=True, session_id=None, query_embedding=None,
+                             deadline=None):
     """
     Build context from all available sources based on query intent
     NOW WITH CONVERSATION MEMORY! (Phase 1)
@@ -690,16 +913,20 @@ def build_integrated_context(query_text, intent, use_rag=True, session_id=None):
     
     # Integration 0: Conversation History (NEW - PHASE 1!)
     if session_id and session_id in conversation_sessions:
-        history = conversation_sessions[session_id]["history"]
+        session = conversation_sessions[session_id]
+        history = session["history"]
         if history:
-            history_text = format_conversation_history(history, last_n=5)
+            history_text = format_conversation_history(history, last_n=HISTORY_PROMPT_TURNS,
+                                                       summary=session.get("summary"),
+                                                       pending=list(session.get("unsummarized", [])))
             if history_text:
                 context_parts.append(f"""
 === RECENT CONVERSATION ===
 {history_text}
 ============================
 """)
-                print(f"   💬 Added conversation history ({len(history)} exchanges)")
+                print(f"   💬 Added conversation history ({len(history)} exchanges, "
+                      f"{session.get('summarized_exchanges', 0)} summarized)")
                 integrations_used.append('conversation_history')
     
     # Integration 1: Self-Awareness Boost
@@ -720,7 +947,7 @@ def build_integrated_context(query_text, intent, use_rag=True, session_id=None):
     
     # Integration 2: Decision Citation
     if intent['is_why_question']:
-        decisions_context = search_decisions_log(query_text)
+        decisions_context = search_decisions_log(query_text, query_embedding)
         if decisions_context:
             context_parts.append(decisions_context)
             print("   ✅ Added decisions log context")
@@ -755,15 +982,21 @@ def build_integrated_context(query_text, intent, use_rag=True, session_id=None):
         # Skip RAG for pure orientation queries - scaffolding has the answer
         if intent.get('needs_orientation') and not intent.get('is_constella_query'):
             print("   ⭐ Skipping RAG for orientation query - using scaffolding")
+        elif not rag_budget_allows(deadline, 'rag'):
+            pass  # Not enough budget left for even one query
         else:
             try:
-                results = smart_rag_query(query_text, n_results=5, intent=intent)
+                results = smart_rag_query(query_text, n_results=5, intent=intent,
+                                          query_embedding=query_embedding, deadline=deadline)
                 
                 if results and results['documents'] and results['documents'][0]:
                     rag_context = "\n=== KNOWLEDGE BASE ===\n"
-                    for i, doc in enumerate(results['documents'][0][:3]):
-                        rag_context += f"{i+1}. {doc[:1000]}...\n\n"
-                        rag_results.append(doc[:500])
+                    # Child-chunk hits become windows around the match in their parent
+                    metadatas = results['metadatas'][0] if results.get('metadatas') else None
+                    windows = context_expander.expand(results['documents'][0], metadatas, limit=3)
+                    for i, window in enumerate(windows):
+                        rag_context += f"{i+1}. {window}\n\n"
+                        rag_results.append(window[:500])
                     rag_context += "=====================\n"
                     context_parts.append(rag_context.strip())
                     print(f"   ✅ Added RAG context ({len(results['documents'][0])} results)")
@@ -796,6 +1029,8 @@ def update_recent_topics(memory, query, response_preview):
     recent = memory["conversation_context"]["recent_topics"]
     recent.insert(0, topic)
     memory["conversation_context"]["recent_topics"] = recent[:50]
+    # One small journal op instead of rewriting the whole memory file
+    memory_store.push_front(["conversation_context", "recent_topics"], topic, limit=50)
     
     return memory
 
@@ -927,21 +1162,26 @@ def chat():
         use_rag = data.get('use_rag', True)
         session_id = data.get('session_id', None)
         session_id = get_or_create_session(session_id)
+        deadline = Deadline.from_request(data.get('deadline_ms'), CHAT_DEADLINE_S, CHAT_MAX_DEADLINE_S)
         
-        # STEP 1: Detect query intent
-        intent = detect_query_intent(message)
+        # STEP 1: Detect query intent (one embedding, reused for RAG + decisions)
+        query_embedding = embed_query(message, deadline)
+        intent = detect_query_intent(message, query_embedding)
         print(f"\n{'='*60}")
         print(f"📨 Query: {message[:80]}...")
         print(f"💬 Session: {session_id}")
         print(f"🎯 Intent Analysis:")
         for key, value in intent.items():
-            if key != 'patterns_matched' and value:
+            if key not in ('patterns_matched', 'intent_scores') and value:
                 print(f"   {key}: {value}")
+        if intent.get('intent_scores'):
+            print(f"   Scores: {intent['intent_scores']}")
         if intent['patterns_matched']:
             print(f"   Patterns: {', '.join(intent['patterns_matched'])}")
         
         # STEP 2: Build integrated context from all sources
-        context, rag_results, integrations_used = build_integrated_context(message, intent, use_rag, session_id)
+        context, rag_results, integrations_used = build_integrated_context(message, intent, use_rag, session_id,
+                                                                          query_embedding, deadline)
         
         # STEP 3: Build final prompt
         personality = get_faithh_personality()
@@ -954,118 +1194,84 @@ def chat():
         print(f"📝 Context built: {len(context)} chars")
         print(f"{'='*60}\n")
         
-        # STEP 4: Get response from LLM (Try Gemini first)
+        # STEP 4: Get response from LLM. Gemini requests fall back to Ollama;
+        # the router skips providers whose circuit is open and hedges to the
+        # fallback once the primary runs past its p95 latency.
         if GEMINI_AVAILABLE and 'gemini' in model.lower():
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=GEMINI_API_KEY)
-                gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                response = gemini_model.generate_content(full_prompt)
-                
-                assistant_response = response.text  # Store response
-                
-                CURRENT_MODEL = {
-                    "name": "gemini-2.0-flash-exp",
-                    "provider": "Google",
-                    "last_response_time": (datetime.now() - start_time).total_seconds()
-                }
-                
-                # PHASE 1: Add to conversation history BEFORE returning
-                add_to_conversation_history(session_id, message, assistant_response, intent)
-                
-                # Index conversation
-                if CHROMA_CONNECTED:
-                    index_queue.put({
-                        'user_msg': message,
-                        'assistant_msg': assistant_response,
-                        'metadata': {
-                            'model': 'gemini-2.0-flash-exp',
-                            'rag_used': bool(context),
-                            'intent_summary': ','.join(intent.get('patterns_matched', [])),
-                            'session_id': session_id
-                        }
-                    })
-                
-                return jsonify({
-                    'success': True,
-                    'response': assistant_response,
-                    'model_used': CURRENT_MODEL['name'],
-                    'provider': CURRENT_MODEL['provider'],
-                    'response_time': CURRENT_MODEL['last_response_time'],
-                    'rag_used': bool(context),
-                    'rag_results': rag_results,
-                    'intent_detected': intent,
-                    'session_id': session_id,  # PHASE 1: Return session info
-                    'conversation_depth': len(conversation_sessions.get(session_id, {}).get('history', [])),
-                    'integrations_used': integrations_used  # Show which integrations fired
-                })
-            except Exception as e:
-                print(f"Gemini error: {e}")
-        
-        # Use Ollama
-        response = requests.post(
-            f"{OLLAMA_HOST}/api/generate",
-            json={
-                "model": model,
-                "prompt": full_prompt,
-                "stream": False
-            },
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            assistant_response = result.get('response', 'No response generated')  # Store response
-            
-            model_info = result.get('model', model)
-            if 'llama' in model_info.lower():
-                provider = "Meta (via Ollama)"
-            elif 'qwen' in model_info.lower():
-                provider = "Alibaba (via Ollama)"
-            else:
-                provider = "Ollama"
-            
-            CURRENT_MODEL = {
-                "name": model_info,
-                "provider": provider,
-                "last_response_time": (datetime.now() - start_time).total_seconds()
-            }
-            
-            # PHASE 1: Add to conversation history BEFORE returning
-            add_to_conversation_history(session_id, message, assistant_response, intent)
-            
-            # Index conversation
-            if CHROMA_CONNECTED:
-                index_queue.put({
-                    'user_msg': message,
-                    'assistant_msg': assistant_response,
-                    'metadata': {
-                        'model': model_info,
-                        'rag_used': bool(context),
-                        'intent_summary': ','.join(intent.get('patterns_matched', [])),
-                        'session_id': session_id
-                    }
-                })
-            
-            return jsonify({
-                'success': True,
-                'response': assistant_response,
-                'model_used': CURRENT_MODEL['name'],
-                'provider': CURRENT_MODEL['provider'],
-                'response_time': CURRENT_MODEL['last_response_time'],
-                'rag_used': bool(context),
-                'rag_results': rag_results,
-                'intent_detected': intent,
-                'session_id': session_id,  # PHASE 1: Return session info
-                'conversation_depth': len(conversation_sessions.get(session_id, {}).get('history', [])),
-                'integrations_used': integrations_used  # Show which integrations fired
-            })
+            routes = [('gemini', None), ('ollama', None)]
         else:
+            routes = [('ollama', model)]
+        # Whatever retrieval left over is the model's budget; when that is
+        # short, cap the reply length so generation can finish in time
+        max_tokens = None
+        if deadline.remaining() < LLM_FULL_ANSWER_S:
+            max_tokens = max(MIN_MAX_TOKENS, int(deadline.remaining() * LLM_TOKENS_PER_S))
+            deadline.degrade('max_tokens_capped')
+            print(f"⏱️  {deadline.remaining():.1f}s left for the model - max_tokens={max_tokens}")
+        # A retried or duplicated request with the same prompt joins the call in flight
+        llm_key = make_key('llm', full_prompt, routes, max_tokens)
+        try:
+            completion = llm_flights.do(
+                llm_key,
+                lambda: get_router().generate(full_prompt, routes, timeout=deadline.timeout(),
+                                              max_tokens=max_tokens),
+                timeout=deadline.timeout())
+        except (ProviderTimeout, TimeoutError) as e:
+            deadline.degrade('llm_timeout')
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'response': "The model did not answer within the time budget",
+                'degradations': deadline.degradations,
+                'deadline': deadline.snapshot()
+            }), 504
+        except ProviderError as e:
             return jsonify({
                 'success': False,
-                'error': f"Ollama returned status {response.status_code}",
-                'response': "Failed to get response from Ollama"
+                'error': str(e),
+                'response': "Failed to get response from the model"
             }), 500
+        
+        assistant_response = completion['text']  # Store response
+        model_info = completion['model']
+        
+        CURRENT_MODEL = {
+            "name": model_info,
+            "provider": completion['provider'],
+            "last_response_time": (datetime.now() - start_time).total_seconds()
+        }
+        
+        # PHASE 1: Add to conversation history BEFORE returning
+        add_to_conversation_history(session_id, message, assistant_response, intent)
+        
+        # Index conversation
+        if CHROMA_CONNECTED:
+            index_queue.put({
+                'user_msg': message,
+                'assistant_msg': assistant_response,
+                'metadata': {
+                    'model': model_info,
+                    'rag_used': bool(context),
+                    'intent_summary': ','.join(intent.get('patterns_matched', [])),
+                    'session_id': session_id
+                }
+            })
+        
+        return jsonify({
+            'success': True,
+            'response': assistant_response,
+            'model_used': CURRENT_MODEL['name'],
+            'provider': CURRENT_MODEL['provider'],
+            'response_time': CURRENT_MODEL['last_response_time'],
+            'rag_used': bool(context),
+            'rag_results': rag_results,
+            'intent_detected': intent,
+            'session_id': session_id,  # PHASE 1: Return session info
+            'conversation_depth': len(conversation_sessions.get(session_id, {}).get('history', [])),
+            'integrations_used': integrations_used,  # Show which integrations fired
+            'degradations': deadline.degradations,  # Work cut to stay within the budget
+            'deadline': deadline.snapshot()
+        })
             
     except Exception as e:
         import traceback
@@ -1124,9 +1330,9 @@ def rag_search():
         query = data.get('query', '')
         n_results = data.get('n_results', 5)
         
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
+        results = rag_flights.do(
+            make_key('rag_search', query, n_results),
+            lambda: guarded_rag_query(query_texts=[query], n_results=n_results)
         )
         
         documents = results['documents'][0] if results['documents'] else []
@@ -1149,37 +1355,48 @@ def status():
     
     # Ollama status
     try:
-        r = requests.get(f"{OLLAMA_HOST}/api/tags", timeout=2)
-        if r.status_code == 200:
-            models = r.json().get('models', [])
-            model_names = [m['name'] for m in models]
-            services['ollama'] = {
-                'status': 'online',
-                'models': model_names,
-                'count': len(models)
-            }
-        else:
-            services['ollama'] = {'status': 'offline'}
-    except:
+        model_names = get_provider('ollama').models(timeout=2)
+        services['ollama'] = {
+            'status': 'online',
+            'models': model_names,
+            'count': len(model_names)
+        }
+    except ProviderError:
         services['ollama'] = {'status': 'offline'}
     
     # ChromaDB status
     services['chromadb'] = {
         'status': 'online' if CHROMA_CONNECTED else 'offline',
         'documents': collection.count() if CHROMA_CONNECTED else 0,
-        'embedding_model': 'all-mpnet-base-v2 (768-dim)'
+        'embedding_model': 'all-mpnet-base-v2 (768-dim)',
+        'quantized_index': quantized_index.memory_footprint() if quantized_index is not None else None,
+        'readiness': readiness.snapshot()['dependencies'],
+        'embedding_batcher': embedding_func.stats() if hasattr(embedding_func, 'stats') else None
     }
     
     # Gemini status
     services['gemini'] = {
         'status': 'configured' if GEMINI_AVAILABLE else 'not configured',
-        'model': 'gemini-2.0-flash-exp' if GEMINI_AVAILABLE else None
+        'model': get_provider('gemini').default_model if GEMINI_AVAILABLE else None
     }
+    services['providers'] = provider_snapshot()
+    services['routing'] = get_router().snapshot()
+    services['chromadb']['circuit'] = chroma_breaker.snapshot()
+    services['chromadb']['partitions'] = partitioned_collection.snapshot() if partitioned_collection is not None else None
+    services['chromadb']['hierarchical'] = _conversation_retriever.snapshot() if _conversation_retriever is not None else None
+    services['session_summarizer'] = session_summarizer.snapshot()
+    services['persistence'] = {'memory': memory_store.snapshot(),
+                               'scaffolding': scaffolding_store.snapshot()}
+    services['single_flight'] = {f.name: f.snapshot() for f in (embed_flights, rag_flights, llm_flights)}
+    services['rag_cache'] = rag_cache.snapshot()
+    services['context_windows'] = context_expander.snapshot()
     
     # Integration status
     services['integrations'] = {
         'memory': MEMORY_FILE.exists(),
         'decisions_log': DECISIONS_LOG.exists(),
+        'decision_index': decision_index.snapshot(),
+        'intent_router': intent_router.snapshot(),
         'project_states': PROJECT_STATES.exists(),
         'scaffolding': SCAFFOLDING_FILE.exists()
     }
@@ -1240,6 +1457,23 @@ def health():
         ]
     })
 
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is up and serving HTTP"""
+    return jsonify({'status': 'alive', 'uptime_s': readiness.snapshot()['uptime_s']})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: embedding model warmed and ChromaDB connected (503 until then)"""
+    snapshot = readiness.snapshot()
+    snapshot['status'] = 'ready' if snapshot['ready'] else 'starting'
+    return jsonify(snapshot), 200 if snapshot['ready'] else 503
+
+if __name__ != '__main__':
+    # Imported by a WSGI server (gunicorn faithh_professional_backend_fixed:app):
+    # the whole module is defined by now, so start initialization right away
+    start_background_init()
+
 if __name__ == '__main__':
     print("=" * 60)
     print("FAITHH PROFESSIONAL BACKEND v3.3 - SCAFFOLDING")
@@ -1253,4 +1487,9 @@ if __name__ == '__main__':
     print("=" * 60)
     print(f"Starting on http://localhost:5557")
     
-    app.run(host='0.0.0.0', port=5557, debug=True)
+    debug = os.environ.get('FAITHH_DEBUG', '1') == '1'
+    # With the reloader on, this process only watches files and its serving
+    # child (WERKZEUG_RUN_MAIN) loads the model; otherwise this process serves
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_init()
+    app.run(host='0.0.0.0', port=5557, debug=debug)
@@ -14,7 +14,12 @@ from typing import Dict, List, Any
 
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from embeddings.client import get_encoder
+from retrieval.result_cache import VersionedCollection
 
 # === CONFIGURATION ===
 CHROMADB_HOST = "100.79.85.32"
@@ -44,13 +49,14 @@ class KnowledgeBaseIndexer:
         )
         
         print(f"📦 Loading embedding model: {EMBEDDING_MODEL}...")
-        self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+        self.embedder = get_encoder(EMBEDDING_MODEL)
         
         # Get or create collection
-        self.collection = self.client.get_or_create_collection(
+        # Writes bump the collection generation so cached RAG results expire
+        self.collection = VersionedCollection(self.client.get_or_create_collection(
             name=COLLECTION_NAME,
             metadata={"description": "FAITHH Knowledge Base with BGE embeddings"}
-        )
+        ))
         print(f"✅ Collection '{COLLECTION_NAME}' ready. Current count: {self.collection.count()}")
     
     def detect_project(self, text: str) -> str:
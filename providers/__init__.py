@@ -0,0 +1,4 @@
+"""
+Providers package - Long-lived LLM clients (Gemini, Ollama) behind one interface
+"""
+# Make this a package
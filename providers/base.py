@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LLM Provider base - The interface every chat backend implements
+
+A provider is built once per process and holds its configured client
+(SDK model objects, pooled HTTP session). Callers only see:
+
+    provider.generate(prompt, model=None, timeout=None) -> result dict
+    provider.stream(prompt, model=None, timeout=None)   -> iterator of text deltas
+
+Result dicts look like {'text', 'model', 'provider', 'elapsed_s'}. Every
+failure, including timeouts, is raised as ProviderError so callers can
+fall back uniformly.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """A provider call failed (unreachable, bad status, SDK error)"""
+
+    def __init__(self, message: str, provider: str = '', status: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+
+
+class ProviderTimeout(ProviderError):
+    """A provider call ran past its timeout"""
+    pass
+
+
+class LLMProvider:
+    """Base class: subclasses implement _generate and _stream"""
+
+    name = 'base'
+    label = 'LLM'
+
+    def __init__(self, default_model: str, timeout: float = 60.0):
+        """
+        Args:
+            default_model: Model used when a call doesn't name one
+            timeout: Default per-call timeout in seconds
+        """
+        self.default_model = default_model
+        self.timeout = timeout
+        self.stats = {'calls': 0, 'errors': 0, 'timeouts': 0, 'total_s': 0.0}
+
+    def available(self) -> bool:
+        """Whether the provider is configured at all (not whether it is up)"""
+        return True
+
+    def models(self) -> List[str]:
+        """Models this provider can serve (best effort)"""
+        return [self.default_model]
+
+    def provider_label(self, model: str) -> str:
+        """Human-readable provider name for a model, shown in responses"""
+        return self.label
+
+    def generate(self, prompt: str, model: Optional[str] = None,
+                 timeout: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Complete a prompt
+
+        Args:
+            prompt: Full prompt text
+            model: Model name (default: default_model)
+            timeout: Seconds before ProviderTimeout (default: self.timeout)
+            max_tokens: Cap on generated tokens (default: the model's own limit)
+
+        Returns:
+            {'text', 'model', 'provider', 'elapsed_s'}
+
+        Raises:
+            ProviderError: On any failure (ProviderTimeout on timeout)
+        """
+        model = model or self.default_model
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        self.stats['calls'] += 1
+        try:
+            text, model_used = self._generate(prompt, model, timeout, **self._options(max_tokens))
+        except ProviderError as e:
+            self._count_error(e)
+            raise
+        except Exception as e:
+            error = ProviderError(str(e), self.name)
+            self._count_error(error)
+            raise error from e
+        elapsed = time.perf_counter() - start
+        self.stats['total_s'] += elapsed
+        return {
+            'text': text,
+            'model': model_used or model,
+            'provider': self.provider_label(model_used or model),
+            'elapsed_s': elapsed,
+        }
+
+    def stream(self, prompt: str, model: Optional[str] = None,
+               timeout: Optional[float] = None,
+               max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield text deltas as the model produces them
+
+        The timeout bounds connecting and the gap between chunks, not the
+        whole reply.
+
+        Raises:
+            ProviderError: On any failure (ProviderTimeout on timeout)
+        """
+        model = model or self.default_model
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        self.stats['calls'] += 1
+        try:
+            yield from self._stream(prompt, model, timeout, **self._options(max_tokens))
+        except ProviderError as e:
+            self._count_error(e)
+            raise
+        except Exception as e:
+            error = ProviderError(str(e), self.name)
+            self._count_error(error)
+            raise error from e
+        finally:
+            self.stats['total_s'] += time.perf_counter() - start
+
+    @staticmethod
+    def _options(max_tokens: Optional[int]) -> Dict[str, Any]:
+        """Optional generation settings, passed to _generate/_stream only when set"""
+        return {'max_tokens': max_tokens} if max_tokens else {}
+
+    def _count_error(self, error: ProviderError) -> None:
+        self.stats['errors'] += 1
+        if isinstance(error, ProviderTimeout):
+            self.stats['timeouts'] += 1
+        logger.warning(f"{self.name} call failed: {error}")
+
+    def _generate(self, prompt: str, model: str, timeout: float):
+        """Return (text, model actually used); accept max_tokens=N if supported"""
+        raise NotImplementedError
+
+    def _stream(self, prompt: str, model: str, timeout: float) -> Iterator[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'provider': self.name,
+            'available': self.available(),
+            'default_model': self.default_model,
+            'timeout_s': self.timeout,
+            **self.stats,
+        }
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Gemini Provider - One configured google-generativeai client per process
+
+genai.configure() runs once at construction and GenerativeModel objects are
+cached per model name, so a request pays only for the API call itself.
+Timeouts go through the SDK's request_options.
+"""
+import logging
+import threading
+from typing import Dict, Iterator, Optional
+
+from .base import LLMProvider, ProviderError, ProviderTimeout
+
+logger = logging.getLogger(__name__)
+
+try:
+    import google.generativeai as genai
+    GEMINI_SDK_AVAILABLE = True
+except ImportError:
+    genai = None
+    GEMINI_SDK_AVAILABLE = False
+
+try:
+    from google.api_core.exceptions import DeadlineExceeded
+except ImportError:
+    DeadlineExceeded = TimeoutError
+
+DEFAULT_MODEL = 'gemini-2.0-flash-exp'
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini via google-generativeai with cached model objects"""
+
+    name = 'gemini'
+    label = 'Google'
+
+    def __init__(self, api_key: Optional[str], default_model: str = DEFAULT_MODEL,
+                 timeout: float = 30.0):
+        """
+        Args:
+            api_key: Gemini API key (None leaves the provider unavailable)
+            default_model: Model used when a call doesn't name one
+            timeout: Default per-call timeout in seconds
+        """
+        super().__init__(default_model, timeout)
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.configured = False
+        if api_key and GEMINI_SDK_AVAILABLE:
+            try:
+                genai.configure(api_key=api_key)
+                self.configured = True
+                self._model(default_model)
+                logger.info(f"Gemini provider configured ({default_model})")
+            except Exception as e:
+                logger.warning(f"Gemini configure failed: {e}")
+
+    def available(self) -> bool:
+        return self.configured
+
+    def _model(self, model: str):
+        """Cached GenerativeModel for a model name"""
+        with self._lock:
+            instance = self._models.get(model)
+            if instance is None:
+                instance = genai.GenerativeModel(model)
+                self._models[model] = instance
+            return instance
+
+    def _call(self, prompt: str, model: str, timeout: float, stream: bool,
+              max_tokens: Optional[int] = None):
+        if not self.configured:
+            raise ProviderError("Gemini not configured", self.name)
+        generation_config = {'max_output_tokens': max_tokens} if max_tokens else None
+        try:
+            return self._model(model).generate_content(
+                prompt, stream=stream, generation_config=generation_config,
+                request_options={'timeout': timeout})
+        except (DeadlineExceeded, TimeoutError) as e:
+            raise ProviderTimeout(f"Gemini timed out after {timeout}s", self.name) from e
+
+    def _generate(self, prompt: str, model: str, timeout: float,
+                  max_tokens: Optional[int] = None):
+        response = self._call(prompt, model, timeout, stream=False, max_tokens=max_tokens)
+        return response.text, model
+
+    def _stream(self, prompt: str, model: str, timeout: float,
+                max_tokens: Optional[int] = None) -> Iterator[str]:
+        try:
+            for chunk in self._call(prompt, model, timeout, stream=True, max_tokens=max_tokens):
+                text = getattr(chunk, 'text', '')
+                if text:
+                    yield text
+        except (DeadlineExceeded, TimeoutError) as e:
+            raise ProviderTimeout(f"Gemini stream timed out after {timeout}s", self.name) from e
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Ollama Provider - Pooled HTTP session to a local Ollama server
+
+One requests.Session per provider keeps TCP connections to Ollama alive
+between requests. Timeouts are split into connect and read, so a dead
+server fails in connect_timeout seconds instead of the full read timeout.
+"""
+import json
+import logging
+from typing import Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .base import LLMProvider, ProviderError, ProviderTimeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "http://localhost:11434"
+
+
+class OllamaProvider(LLMProvider):
+    """Ollama /api/generate with connection reuse and streaming"""
+
+    name = 'ollama'
+    label = 'Ollama'
+
+    def __init__(self, host: str = DEFAULT_HOST, default_model: str = 'llama3.1-8b',
+                 timeout: float = 60.0, connect_timeout: float = 3.0, pool_size: int = 8):
+        """
+        Args:
+            host: Ollama base URL
+            default_model: Model used when a call doesn't name one
+            timeout: Read timeout in seconds (time to first byte / between chunks)
+            connect_timeout: TCP connect timeout in seconds
+            pool_size: Keep-alive connections held to the server
+        """
+        super().__init__(default_model, timeout)
+        self.host = host.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def provider_label(self, model: str) -> str:
+        lowered = model.lower()
+        if 'llama' in lowered:
+            return "Meta (via Ollama)"
+        if 'qwen' in lowered:
+            return "Alibaba (via Ollama)"
+        return "Ollama"
+
+    def _post(self, payload: dict, timeout: float, stream: bool) -> requests.Response:
+        try:
+            response = self.session.post(f"{self.host}/api/generate", json=payload,
+                                         timeout=(self.connect_timeout, timeout), stream=stream)
+        except requests.Timeout as e:
+            raise ProviderTimeout(f"Ollama timed out: {e}", self.name) from e
+        except requests.RequestException as e:
+            raise ProviderError(f"Ollama unreachable: {e}", self.name) from e
+        if response.status_code != 200:
+            response.close()
+            raise ProviderError(f"Ollama returned status {response.status_code}",
+                                self.name, response.status_code)
+        return response
+
+    @staticmethod
+    def _payload(prompt: str, model: str, stream: bool, max_tokens: Optional[int]) -> dict:
+        payload = {"model": model, "prompt": prompt, "stream": stream}
+        if max_tokens:
+            payload["options"] = {"num_predict": max_tokens}
+        return payload
+
+    def _generate(self, prompt: str, model: str, timeout: float,
+                  max_tokens: Optional[int] = None):
+        response = self._post(self._payload(prompt, model, False, max_tokens),
+                              timeout, stream=False)
+        result = response.json()
+        return result.get('response', 'No response generated'), result.get('model', model)
+
+    def _stream(self, prompt: str, model: str, timeout: float,
+                max_tokens: Optional[int] = None) -> Iterator[str]:
+        response = self._post(self._payload(prompt, model, True, max_tokens),
+                              timeout, stream=True)
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise ProviderError(f"Ollama error: {chunk['error']}", self.name)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+        except requests.Timeout as e:
+            raise ProviderTimeout(f"Ollama stream stalled: {e}", self.name) from e
+        except requests.RequestException as e:
+            raise ProviderError(f"Ollama stream failed: {e}", self.name) from e
+        finally:
+            response.close()
+
+    def models(self, timeout: Optional[float] = 2.0) -> List[str]:
+        """Installed models from /api/tags (raises ProviderError when offline)"""
+        try:
+            response = self.session.get(f"{self.host}/api/tags",
+                                        timeout=(self.connect_timeout, timeout))
+        except requests.RequestException as e:
+            raise ProviderError(f"Ollama unreachable: {e}", self.name) from e
+        if response.status_code != 200:
+            raise ProviderError(f"Ollama returned status {response.status_code}",
+                                self.name, response.status_code)
+        return [m['name'] for m in response.json().get('models', [])]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Provider Registry - Process-wide provider instances configured from env
+
+    GEMINI_API_KEY / GOOGLE_API_KEY   Gemini key (unset: Gemini unavailable)
+    FAITHH_GEMINI_MODEL               default gemini-2.0-flash-exp
+    FAITHH_GEMINI_TIMEOUT             seconds, default 30
+    OLLAMA_HOST                       default http://localhost:11434
+    FAITHH_OLLAMA_MODEL               default llama3.1-8b
+    FAITHH_OLLAMA_TIMEOUT             read timeout seconds, default 60
+    FAITHH_OLLAMA_CONNECT_TIMEOUT     seconds, default 3
+"""
+import os
+import threading
+from typing import Dict
+
+from .base import LLMProvider
+from .gemini import GeminiProvider, DEFAULT_MODEL as GEMINI_DEFAULT_MODEL
+from .ollama import OllamaProvider, DEFAULT_HOST as OLLAMA_DEFAULT_HOST
+
+_providers: Dict[str, LLMProvider] = {}
+_lock = threading.Lock()
+
+
+def _build(name: str) -> LLMProvider:
+    if name == 'gemini':
+        return GeminiProvider(
+            os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY'),
+            default_model=os.environ.get('FAITHH_GEMINI_MODEL', GEMINI_DEFAULT_MODEL),
+            timeout=float(os.environ.get('FAITHH_GEMINI_TIMEOUT', '30')),
+        )
+    if name == 'ollama':
+        return OllamaProvider(
+            os.environ.get('OLLAMA_HOST', OLLAMA_DEFAULT_HOST),
+            default_model=os.environ.get('FAITHH_OLLAMA_MODEL', 'llama3.1-8b'),
+            timeout=float(os.environ.get('FAITHH_OLLAMA_TIMEOUT', '60')),
+            connect_timeout=float(os.environ.get('FAITHH_OLLAMA_CONNECT_TIMEOUT', '3')),
+        )
+    raise ValueError(f"Unknown provider: {name}")
+
+
+def get_provider(name: str) -> LLMProvider:
+    """Get the process-wide provider instance ('gemini' or 'ollama')"""
+    with _lock:
+        provider = _providers.get(name)
+        if provider is None:
+            provider = _build(name)
+            _providers[name] = provider
+        return provider
+
+
+def register_provider(provider: LLMProvider) -> None:
+    """Install a provider instance under its name (replaces any existing one)"""
+    with _lock:
+        _providers[provider.name] = provider
+
+
+def provider_snapshot() -> Dict[str, dict]:
+    """Stats of every provider built so far"""
+    with _lock:
+        return {name: p.snapshot() for name, p in _providers.items()}
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Model Router - Latency-aware failover with circuit breakers and hedging
+
+Routes are (provider, model) pairs tried in preference order. For each
+route the router keeps a rolling window of latencies and outcomes:
+
+- A circuit breaker opens after consecutive failures, so a provider known
+  to be down is skipped instead of costing a full timeout per request.
+  After reset_timeout one trial call is let through (half-open).
+- With hedging on, the next route starts once the current one has run
+  longer than its own p95 latency, and the first good answer wins.
+  Hedging is off by default (FAITHH_ROUTER_HEDGE=1 enables it) since a
+  hedge can pay for two completions.
+- A failed attempt starts the next route immediately, whether or not
+  other attempts are still running.
+
+Losing calls cannot be interrupted mid-HTTP-request; they finish in the
+background and still feed the stats.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import ProviderError, ProviderTimeout
+from .registry import get_provider
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+Route = Tuple[str, Optional[str]]  # (provider name, model or None for its default)
+
+
+class CircuitOpenError(ProviderError):
+    """Every candidate route is behind an open circuit breaker"""
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds open before a trial call is allowed
+            clock: Monotonic time source (swappable in tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the probe when half-open)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures}
+
+
+class RollingStats:
+    """Latencies of recent successes and the outcome of recent calls"""
+
+    def __init__(self, window: int = 50):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency_s: float) -> None:
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency_s)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q-quantile of recent successful latencies (None without data)"""
+        with self._lock:
+            data = sorted(self._latencies)
+        if not data:
+            return None
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return (1 - sum(self._outcomes) / len(self._outcomes)) if self._outcomes else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        with self._lock:
+            calls = len(self._outcomes)
+        return {
+            'calls': calls,
+            'error_rate': round(self.error_rate(), 3),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class ModelRouter:
+    """
+    Try routes in order, skipping open circuits, optionally hedging
+
+    A failed attempt is replaced by the next route at once, without
+    waiting for a hedge delay or for attempts still in flight.
+    """
+
+    def __init__(self, hedge: bool = True, hedge_quantile: float = 0.95,
+                 hedge_min_delay: float = 0.5, hedge_max_delay: float = 10.0,
+                 hedge_default_delay: float = 3.0, min_samples: int = 5,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 window: int = 50, timeout: float = 60.0, max_workers: int = 8,
+                 provider_lookup: Callable[[str], Any] = get_provider):
+        """
+        Args:
+            hedge: Start the next route once the current one passes its p95
+            hedge_quantile: Latency quantile that triggers a hedge
+            hedge_min_delay: Never hedge sooner than this (seconds)
+            hedge_max_delay: Never wait longer than this before hedging
+            hedge_default_delay: Hedge delay until a route has min_samples
+            min_samples: Successful calls needed before trusting the quantile
+            failure_threshold: Consecutive failures that open a route's circuit
+            reset_timeout: Seconds before an open circuit gets a trial call
+            window: Calls kept per route for latency/error stats
+            timeout: Default overall deadline per request (seconds)
+            max_workers: Threads for in-flight provider calls
+            provider_lookup: Maps a provider name to an LLMProvider
+        """
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.window = window
+        self.timeout = timeout
+        self._lookup = provider_lookup
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-route')
+        self._lock = threading.Lock()
+        self._stats: Dict[Route, RollingStats] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.counters = {'requests': 0, 'hedges': 0, 'hedge_wins': 0, 'failovers': 0,
+                         'skipped_open': 0}
+
+    @classmethod
+    def from_env(cls) -> 'ModelRouter':
+        """Router configured from FAITHH_ROUTER_* environment variables"""
+        return cls(
+            hedge=os.environ.get('FAITHH_ROUTER_HEDGE', '0') == '1',
+            hedge_quantile=float(os.environ.get('FAITHH_ROUTER_HEDGE_QUANTILE', '0.95')),
+            hedge_min_delay=float(os.environ.get('FAITHH_ROUTER_HEDGE_MIN_S', '0.5')),
+            hedge_max_delay=float(os.environ.get('FAITHH_ROUTER_HEDGE_MAX_S', '10')),
+            failure_threshold=int(os.environ.get('FAITHH_ROUTER_FAILURES', '3')),
+            reset_timeout=float(os.environ.get('FAITHH_ROUTER_RESET_S', '30')),
+            timeout=float(os.environ.get('FAITHH_ROUTER_TIMEOUT', '60')),
+        )
+
+    def _route_stats(self, route: Route) -> RollingStats:
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                stats = self._stats[route] = RollingStats(self.window)
+            return stats
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """Per-provider breaker: an outage takes down every model it serves"""
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = self._breakers[provider] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def hedge_delay(self, route: Route) -> float:
+        """Seconds to wait on a route before starting the next one"""
+        stats = self._route_stats(route)
+        if stats.samples() < self.min_samples:
+            delay = self.hedge_default_delay
+        else:
+            delay = stats.quantile(self.hedge_quantile)
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, delay))
+
+    def _attempt(self, route: Route, prompt: str, timeout: float,
+                 max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        provider_name, model = route
+        start = time.perf_counter()
+        try:
+            result = self._lookup(provider_name).generate(prompt, model=model, timeout=timeout,
+                                                          max_tokens=max_tokens)
+        except ProviderError:
+            self._route_stats(route).record(False, time.perf_counter() - start)
+            self.breaker(provider_name).record_failure()
+            raise
+        except Exception as e:
+            self._route_stats(route).record(False, time.perf_counter() - start)
+            self.breaker(provider_name).record_failure()
+            raise ProviderError(str(e), provider_name) from e
+        self._route_stats(route).record(True, time.perf_counter() - start)
+        self.breaker(provider_name).record_success()
+        return result
+
+    def generate(self, prompt: str, routes: Sequence[Route],
+                 timeout: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        First good completion across routes
+
+        Args:
+            prompt: Full prompt text
+            routes: (provider, model) pairs in preference order
+            timeout: Overall deadline in seconds (default: self.timeout)
+            max_tokens: Cap on generated tokens, passed to every route
+
+        Returns:
+            The provider result dict plus 'route' (provider name), 'hedged'
+            (whether a hedge was started) and 'attempts' (routes started)
+
+        Raises:
+            CircuitOpenError: Every route's circuit is open
+            ProviderTimeout: Nothing answered before the deadline
+            ProviderError: Every route failed
+        """
+        self.counters['requests'] += 1
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        # Breakers are consulted at launch time, so a half-open probe is only
+        # claimed by a route that actually gets called
+        queue: List[Route] = list(routes)
+        pending = {}
+        started: List[Route] = []
+        errors: List[str] = []
+        hedged = False
+        last_start = 0.0
+
+        def launch() -> bool:
+            nonlocal last_start
+            while queue:
+                route = queue.pop(0)
+                if not self.breaker(route[0]).allow():
+                    self.counters['skipped_open'] += 1
+                    continue
+                remaining = max(0.1, deadline - time.monotonic())
+                pending[self._pool.submit(self._attempt, route, prompt, remaining,
+                                          max_tokens)] = route
+                started.append(route)
+                last_start = time.monotonic()
+                return True
+            return False
+
+        if not launch():
+            raise CircuitOpenError(f"All providers unavailable (circuit open): "
+                                   f"{[r[0] for r in routes]}")
+        while pending:
+            now = time.monotonic()
+            wake = deadline
+            if self.hedge and queue:
+                wake = min(wake, last_start + self.hedge_delay(started[-1]))
+            done, _ = wait(list(pending), timeout=max(0.0, wake - now),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                route = pending.pop(future)
+                try:
+                    result = future.result()
+                except ProviderError as e:
+                    errors.append(f"{route[0]}: {e}")
+                    continue
+                if route != started[0]:
+                    self.counters['hedge_wins' if hedged else 'failovers'] += 1
+                return {**result, 'route': route[0], 'hedged': hedged,
+                        'attempts': [r[0] for r in started]}
+
+            if done:
+                # Every finished attempt failed: replace each one now, even
+                # while a hedged attempt is still running
+                for _ in done:
+                    launch()
+            elif not done and queue and time.monotonic() < deadline:
+                slow = started[-1]
+                if launch():
+                    hedged = True
+                    self.counters['hedges'] += 1
+                    logger.info(f"Hedging: {slow[0]} past {self.hedge_delay(slow):.2f}s, "
+                                f"started {started[-1][0]}")
+            elif not done and time.monotonic() >= deadline:
+                raise ProviderTimeout(f"No provider answered within the deadline "
+                                      f"(tried {[r[0] for r in started]})")
+
+        raise ProviderError(f"All providers failed: {'; '.join(errors)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = dict(self._breakers)
+        return {
+            'hedge': self.hedge,
+            'counters': dict(self.counters),
+            'routes': {f"{p}:{m or 'default'}": {**s.snapshot(),
+                                                  'hedge_delay_s': round(self.hedge_delay((p, m)), 3)}
+                       for (p, m), s in stats.items()},
+            'breakers': {name: b.snapshot() for name, b in breakers.items()},
+        }
+
+
+# Global router instance
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Get the process-wide model router"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter.from_env()
+        return _router
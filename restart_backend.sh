@@ -71,9 +71,12 @@ BACKEND_PID=$!
 echo "   Backend started (PID: $BACKEND_PID)"
 echo "   Logs: ~/ai-stack/backend.log"
 
-# Wait for startup
-echo "   Waiting for backend to initialize..."
-sleep 4
+# Wait for the port to bind (model + ChromaDB warm up in the background)
+echo "   Waiting for backend to bind..."
+for i in $(seq 1 30); do
+    curl -s -o /dev/null http://localhost:5557/health/live 2>/dev/null && break
+    sleep 0.5
+done
 
 # Step 6: Verify it's running
 echo ""
@@ -89,7 +92,7 @@ else
 fi
 
 # Check if responding
-HEALTH_CHECK=$(curl -s http://localhost:5557/health 2>/dev/null)
+HEALTH_CHECK=$(curl -s http://localhost:5557/health/live 2>/dev/null)
 
 if [ $? -eq 0 ]; then
     echo "   ✅ Backend responding to requests"
@@ -98,6 +101,14 @@ else
     echo "   ⚠️  Backend not responding yet, check backend.log"
 fi
 
+# Readiness (embedding model + ChromaDB) may still be warming up
+READY_CODE=$(curl -s -o /dev/null -w "%{http_code}" http://localhost:5557/health/ready 2>/dev/null)
+if [ "$READY_CODE" = "200" ]; then
+    echo "   ✅ RAG dependencies ready"
+else
+    echo "   ⏳ RAG still warming up - check: curl http://localhost:5557/health/ready"
+fi
+
 echo ""
 echo "================================================"
 echo "✅ FAITHH BACKEND READY"
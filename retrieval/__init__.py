@@ -0,0 +1,4 @@
+"""
+Retrieval package - Vector search helpers layered on top of ChromaDB
+"""
+# Make this a package
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Decision Index - Ranked search over decisions_log.json
+
+Built once per version of the log (its mtime/size are checked on each
+search, one stat call) and held in memory:
+
+- a BM25 term index over each decision's text (decision, rationale,
+  alternatives, impact, category, project)
+- a normalized embedding matrix, when an embedding function is available
+
+Scores blend cosine similarity with max-normalized BM25, and a decision
+needs either a real term match or a minimum cosine to be returned at all,
+so "why" questions don't cite unrelated decisions.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have how i
+in into is it its me my of on or our should so than that the their them then there
+these they this to was we were what when where which who why will with would you your
+about after again all also any because before being between both each few more most
+other over same some such through under until very just like don't we're let's
+what's that's it's there's
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or 1-2 letter words"""
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+def decision_text(decision: Dict[str, Any]) -> str:
+    """Everything about a decision worth matching a question against"""
+    parts = [decision.get('decision', ''), decision.get('rationale', ''),
+             decision.get('impact', ''), decision.get('category', '').replace('_', ' '),
+             decision.get('project', '')]
+    for alt in decision.get('alternatives_considered', []) or []:
+        parts.append(f"{alt.get('option', '')} {alt.get('rejected_because', '')}")
+    return ' '.join(p for p in parts if p)
+
+
+class DecisionIndex:
+    """BM25 + embedding index over a decisions log, rebuilt when the file changes"""
+
+    def __init__(self, path, embedding_function: Optional[Callable[[List[str]], Any]] = None,
+                 semantic_weight: float = 0.6, min_cosine: float = 0.35,
+                 k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            path: decisions_log.json
+            embedding_function: Chroma-style callable (list of texts -> vectors)
+            semantic_weight: Share of the score from cosine similarity (rest BM25)
+            min_cosine: Cosine a decision needs when no query term matches it
+            k1, b: BM25 parameters
+        """
+        self.path = Path(path)
+        self.semantic_weight = semantic_weight
+        self.min_cosine = min_cosine
+        self.k1 = k1
+        self.b = b
+        self._embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._signature = None
+        self.decisions: List[Dict[str, Any]] = []
+        self._postings: Dict[str, List[tuple]] = {}
+        self._idf: Dict[str, float] = {}
+        self._doc_len = np.zeros(0)
+        self._avg_len = 1.0
+        self._vectors: Optional[np.ndarray] = None
+        self.stats = {'builds': 0, 'searches': 0, 'last_build_ms': 0.0, 'last_search_ms': 0.0}
+
+    @property
+    def embedding_function(self):
+        return self._embedding_function
+
+    @embedding_function.setter
+    def embedding_function(self, func) -> None:
+        """Attach (or swap) the embedding function; vectors are rebuilt on next search"""
+        with self._lock:
+            if func is not self._embedding_function:
+                self._embedding_function = func
+                self._vectors = None
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rebuild if decisions_log.json changed since the last build
+
+        Returns:
+            True if the index was rebuilt
+        """
+        signature = self._file_signature()
+        with self._lock:
+            if not force and signature == self._signature:
+                if self._vectors is None and self._embedding_function and self.decisions:
+                    self._embed_all()
+                return False
+            start = time.perf_counter()
+            decisions = []
+            if signature is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        decisions = (json.load(f) or {}).get('decisions', []) or []
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Decision index: could not read {self.path}: {e}")
+                    return False
+            self.decisions = decisions
+            self._build_terms([decision_text(d) for d in decisions])
+            self._vectors = None
+            if self._embedding_function and decisions:
+                self._embed_all()
+            self._signature = signature
+            self.stats['builds'] += 1
+            self.stats['last_build_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            logger.info(f"Decision index built: {len(decisions)} decisions "
+                        f"({self.stats['last_build_ms']}ms)")
+            return True
+
+    def _build_terms(self, texts: List[str]) -> None:
+        postings = defaultdict(list)
+        lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].append((doc_id, tf))
+        n = max(1, len(texts))
+        self._postings = dict(postings)
+        self._idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+        self._doc_len = np.asarray(lengths, dtype=np.float32)
+        self._avg_len = float(self._doc_len.mean()) if lengths else 1.0
+
+    def _embed_all(self) -> None:
+        try:
+            vectors = np.asarray(self._embedding_function(
+                [decision_text(d) for d in self.decisions]), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Decision index: embedding failed, using terms only: {e}")
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._vectors = vectors / np.maximum(norms, 1e-12)
+
+    def _bm25(self, terms: Sequence[str]) -> np.ndarray:
+        scores = np.zeros(len(self.decisions), dtype=np.float32)
+        for term in set(terms):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / self._avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 3,
+               query_embedding: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k decisions for a question
+
+        Args:
+            query: Question text
+            k: Max decisions returned
+            query_embedding: Precomputed query vector (e.g. the RAG query's);
+                computed with the embedding function when omitted
+
+        Returns:
+            [{'decision': <decision dict>, 'score', 'bm25', 'cosine'}] best first
+        """
+        self.refresh()
+        start = time.perf_counter()
+        with self._lock:
+            if not self.decisions:
+                return []
+            bm25 = self._bm25(tokenize(query))
+            vectors = self._vectors
+            decisions = self.decisions
+
+        cosine = None
+        if vectors is not None:
+            if query_embedding is None:
+                try:
+                    query_embedding = self._embedding_function([query])[0]
+                except Exception as e:
+                    logger.warning(f"Decision index: query embedding failed: {e}")
+            if query_embedding is not None:
+                q = np.asarray(query_embedding, dtype=np.float32)
+                q = q / max(float(np.linalg.norm(q)), 1e-12)
+                if q.shape[0] == vectors.shape[1]:
+                    cosine = vectors @ q
+
+        top_bm25 = float(bm25.max()) if len(bm25) else 0.0
+        lexical = bm25 / top_bm25 if top_bm25 > 0 else bm25
+        if cosine is None:
+            scores = lexical
+            eligible = bm25 > 0
+        else:
+            scores = self.semantic_weight * cosine + (1 - self.semantic_weight) * lexical
+            eligible = (bm25 > 0) | (cosine >= self.min_cosine)
+
+        candidates = np.flatnonzero(eligible)
+        order = candidates[np.argsort(-scores[candidates], kind='stable')][:k]
+        results = [{
+            'decision': decisions[i],
+            'score': round(float(scores[i]), 4),
+            'bm25': round(float(bm25[i]), 4),
+            'cosine': round(float(cosine[i]), 4) if cosine is not None else None,
+        } for i in order]
+        self.stats['searches'] += 1
+        self.stats['last_search_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'path': str(self.path),
+                'decisions': len(self.decisions),
+                'terms': len(self._postings),
+                'embedded': self._vectors is not None,
+                **self.stats,
+            }
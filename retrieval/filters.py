@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Metadata Filters - Evaluate Chroma-style `where` clauses locally
+Lets in-process indexes honour the same filters the backend sends to ChromaDB
+"""
+from typing import Any, Dict, Optional
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    """Check a single metadata value against a literal or operator dict"""
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for op, expected in condition.items():
+        if op == '$eq' and value != expected:
+            return False
+        if op == '$ne' and value == expected:
+            return False
+        if op == '$in' and value not in expected:
+            return False
+        if op == '$nin' and value in expected:
+            return False
+        if op in ('$gt', '$gte', '$lt', '$lte'):
+            if value is None:
+                return False
+            if op == '$gt' and not value > expected:
+                return False
+            if op == '$gte' and not value >= expected:
+                return False
+            if op == '$lt' and not value < expected:
+                return False
+            if op == '$lte' and not value <= expected:
+                return False
+    return True
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether a metadata dict satisfies a Chroma `where` clause
+
+    Supports field equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte and
+    the logical $and/$or combinators used across FAITHH.
+
+    Args:
+        metadata: Document metadata (None is treated as empty)
+        where: Chroma where clause (None matches everything)
+
+    Returns:
+        bool: True if the document passes the filter
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
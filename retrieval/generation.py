@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Collection Generations - Write-side change counter for Chroma collections
+
+ChromaDB has no cheap "did this collection change?" signal, so nothing read
+from it could be cached safely. Every writer (the backend's index_queue and
+the indexing scripts) bumps a per-collection generation in a small SQLite
+sidecar next to chroma_db after its writes land. Readers fold the current
+generation into their cache keys: any write makes every older entry
+unreachable, without the cache having to know what changed.
+
+The sidecar is shared between processes (WAL mode, short busy timeout).
+Reads are cached for `max_age` seconds, so a write from another process is
+seen within that window; bumps made through the same store are seen at once.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GENERATION_DB = Path(os.environ.get(
+    'FAITHH_GENERATION_DB',
+    Path.home() / "ai-stack" / "chroma_db" / "generations.sqlite"
+))
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS generations (
+    collection TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    writes INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+)"""
+
+
+class GenerationStore:
+    """Per-collection generation counters in a SQLite file"""
+
+    def __init__(self, path=None, max_age: float = 0.5):
+        """
+        Args:
+            path: SQLite file (default: $FAITHH_GENERATION_DB or
+                ~/ai-stack/chroma_db/generations.sqlite)
+            max_age: Seconds a read generation is reused before re-checking
+                the sidecar (0 = always read)
+        """
+        self.path = Path(path) if path else DEFAULT_GENERATION_DB
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._cached: Dict[str, tuple] = {}  # collection -> (generation, read_at)
+        self._initialized = False
+        self.stats = {'reads': 0, 'cached_reads': 0, 'bumps': 0, 'errors': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=5.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def current(self, collection: str) -> Optional[int]:
+        """
+        Current generation of a collection (0 if never bumped)
+
+        Returns:
+            Generation, or None if the sidecar can't be read (callers should
+            treat that as "don't cache")
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cached.get(collection)
+            if cached is not None and now - cached[1] < self.max_age:
+                self.stats['cached_reads'] += 1
+                return cached[0]
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT generation FROM generations WHERE collection = ?",
+                                   (collection,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Generation read failed for {collection}: {e}")
+            return None
+        generation = row[0] if row else 0
+        with self._lock:
+            self._cached[collection] = (generation, now)
+            self.stats['reads'] += 1
+        return generation
+
+    def bump(self, collection: str, writes: int = 1) -> Optional[int]:
+        """
+        Record that a collection changed (call after the write has landed)
+
+        Args:
+            collection: Collection name, e.g. "documents_768"
+            writes: Number of records written (kept for the status page)
+
+        Returns:
+            New generation, or None if the sidecar couldn't be updated
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO generations (collection, generation, writes, updated_at) "
+                        "VALUES (?, 1, ?, ?) "
+                        "ON CONFLICT(collection) DO UPDATE SET generation = generation + 1, "
+                        "writes = writes + excluded.writes, updated_at = excluded.updated_at",
+                        (collection, writes, datetime.now().isoformat()))
+                    generation = conn.execute("SELECT generation FROM generations WHERE collection = ?",
+                                              (collection,)).fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Generation bump failed for {collection}: {e}")
+            with self._lock:
+                # Can't record the change - at least stop trusting our cached read
+                self._cached.pop(collection, None)
+            return None
+        with self._lock:
+            self._cached[collection] = (generation, time.monotonic())
+            self.stats['bumps'] += 1
+        return generation
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Every collection's row (status page / scripts)"""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT collection, generation, writes, updated_at "
+                                    "FROM generations ORDER BY collection").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Generation listing failed: {e}")
+            return {}
+        return {name: {'generation': gen, 'writes': writes, 'updated_at': updated}
+                for name, gen, writes, updated in rows}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'path': str(self.path), 'collections': self.all(), **self.stats}
+
+
+_default_store: Optional[GenerationStore] = None
+_default_lock = threading.Lock()
+
+
+def get_generation_store() -> GenerationStore:
+    """Process-wide store on the default sidecar"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = GenerationStore()
+        return _default_store
+
+
+def bump_generation(collection: str, writes: int = 1) -> Optional[int]:
+    """Bump a collection's generation in the default sidecar (for indexing scripts)"""
+    return get_generation_store().bump(collection, writes)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Hierarchical Retrieval - Conversations first, then their chunks
+
+Conversation chunks all compete in one flat ANN search, so the top-k is
+often several neighbouring chunks of the same conversation and the three
+context slots repeat themselves. Two-stage retrieval instead:
+
+1. Search a small conversation-level collection (one vector per
+   conversation: title + summary + opening message) for the best
+   conversations.
+2. Search only the chunks of those conversations (metadata filter on
+   conversation_uuid), then pick the final hits with at most
+   `per_conversation` chunks from each conversation.
+
+The conversation-level collection is written by the chunking scripts
+(scripts/chunk_claude_chats.py, scripts/indexing/index_claude_chats_chunked.py)
+with conversation_record().
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_COLLECTION = "documents_768_conversations"
+CHUNK_CATEGORY = "claude_conversation_chunk"
+# Chunk metadata field linking a chunk to its conversation
+CONVERSATION_KEY = "conversation_uuid"
+
+# Characters of the opening user message folded into a conversation's vector
+OPENING_CHARS = 600
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    """Text of an export message (plain `text` or a content array)"""
+    if message.get('text'):
+        return message['text']
+    return '\n'.join(part.get('text', '') for part in message.get('content', [])
+                     if part.get('type') == 'text')
+
+
+def conversation_record(conversation: Dict[str, Any], chunk_count: int,
+                        source: str = "claude") -> Optional[Dict[str, Any]]:
+    """
+    Conversation-level entry for a chunked conversation
+
+    Args:
+        conversation: Conversation from the Claude export (uuid, name, summary, chat_messages)
+        chunk_count: Chunks indexed for it
+        source: Export the conversation came from
+
+    Returns:
+        {'id', 'document', 'metadata'} or None if there is nothing to index
+    """
+    uuid = conversation.get('uuid')
+    if not uuid or chunk_count <= 0:
+        return None
+    name = conversation.get('name') or 'Untitled Conversation'
+    parts = [name]
+    if conversation.get('summary'):
+        parts.append(conversation['summary'].strip())
+    for message in conversation.get('chat_messages', []):
+        if message.get('sender') == 'human':
+            opening = ' '.join(_message_text(message).split())
+            if opening:
+                parts.append(opening[:OPENING_CHARS])
+                break
+    return {
+        'id': f"conversation_{uuid}",
+        'document': '\n\n'.join(parts),
+        'metadata': {
+            CONVERSATION_KEY: uuid,
+            'conversation_name': name,
+            'created_at': conversation.get('created_at', ''),
+            'chunk_count': chunk_count,
+            'category': 'conversation_summary',
+            'source': source,
+        },
+    }
+
+
+def diversify(hits: List[Dict[str, Any]], n_results: int, per_source: int,
+              key: str = CONVERSATION_KEY) -> List[Dict[str, Any]]:
+    """
+    Best hits with at most `per_source` per source, topped up if that leaves too few
+
+    Args:
+        hits: Dicts with 'distance' and 'metadata'
+        n_results: Hits to return
+        per_source: Cap per distinct metadata[key]
+        key: Metadata field identifying the source
+
+    Returns:
+        Hits in distance order
+    """
+    ranked = sorted(hits, key=lambda h: h['distance'])
+    picked, spill, taken = [], [], {}
+    for hit in ranked:
+        source = (hit.get('metadata') or {}).get(key)
+        if taken.get(source, 0) < per_source:
+            taken[source] = taken.get(source, 0) + 1
+            picked.append(hit)
+        else:
+            spill.append(hit)
+        if len(picked) == n_results:
+            break
+    if len(picked) < n_results:
+        picked.extend(spill[:n_results - len(picked)])
+    return sorted(picked, key=lambda h: h['distance'])
+
+
+class HierarchicalRetriever:
+    """Coarse conversation search, then fine chunk search within the winners"""
+
+    def __init__(self, conversations, query_chunks: Callable[..., Dict[str, Any]],
+                 embedding_function=None, n_conversations: int = 5, per_conversation: int = 1,
+                 candidate_factor: int = 3):
+        """
+        Args:
+            conversations: Conversation-level collection (anything with .query)
+            query_chunks: Collection.query-compatible callable for the chunk collection
+            embedding_function: Embeds query text once for both stages
+            n_conversations: Conversations kept from stage 1
+            per_conversation: Max chunks per conversation in the final hits
+                (topped up from the best remaining chunks if that leaves too few)
+            candidate_factor: Stage-2 candidates fetched per requested result
+        """
+        self.conversations = conversations
+        self.query_chunks = query_chunks
+        self.embedding_function = embedding_function
+        self.n_conversations = n_conversations
+        self.per_conversation = per_conversation
+        self.candidate_factor = candidate_factor
+        self.stats = {'queries': 0, 'no_conversations': 0, 'no_chunks': 0}
+
+    def query(self, query_text: Optional[str] = None, query_embedding=None, n_results: int = 5,
+              where: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Two-stage search for conversation chunks
+
+        Args:
+            query_text: Query (embedded if no query_embedding is given)
+            query_embedding: Precomputed query vector
+            n_results: Chunks to return
+            where: Extra chunk filter, ANDed with the conversation filter
+
+        Returns:
+            Collection.query-shaped result (one query), or None if either stage
+            found nothing - callers fall back to a flat chunk search
+        """
+        self.stats['queries'] += 1
+        if query_embedding is None:
+            query_embedding = self.embedding_function([query_text])[0]
+        query_embedding = [float(x) for x in query_embedding]
+
+        coarse = self.conversations.query(query_embeddings=[query_embedding],
+                                          n_results=self.n_conversations,
+                                          include=['metadatas', 'distances'])
+        keys = [meta.get(CONVERSATION_KEY) for meta in (coarse.get('metadatas') or [[]])[0] if meta]
+        keys = [k for k in dict.fromkeys(keys) if k]
+        if not keys:
+            self.stats['no_conversations'] += 1
+            return None
+
+        clauses = [{'category': CHUNK_CATEGORY}, {CONVERSATION_KEY: {'$in': keys}}]
+        if where:
+            clauses.append(where)
+        fine = self.query_chunks(query_embeddings=[query_embedding],
+                                 n_results=n_results * self.candidate_factor,
+                                 where={'$and': clauses})
+        ids = (fine.get('ids') or [[]])[0]
+        if not ids:
+            self.stats['no_chunks'] += 1
+            return None
+
+        hits = [{'id': doc_id,
+                 'document': fine['documents'][0][i] if fine.get('documents') else None,
+                 'metadata': fine['metadatas'][0][i] if fine.get('metadatas') else {},
+                 'distance': fine['distances'][0][i]}
+                for i, doc_id in enumerate(ids)]
+        chosen = diversify(hits, n_results, self.per_conversation)
+        logger.debug(f"Hierarchical: {len(keys)} conversations -> {len(chosen)} chunks")
+        return {
+            'ids': [[h['id'] for h in chosen]],
+            'documents': [[h['document'] for h in chosen]],
+            'metadatas': [[h['metadata'] for h in chosen]],
+            'distances': [[h['distance'] for h in chosen]],
+            'conversations': [keys],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'n_conversations': self.n_conversations,
+                'per_conversation': self.per_conversation, **self.stats}
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Intent Router - Semantic query intent detection with regex fallback
+
+The query is embedded once (the same vector is reused for the RAG query)
+and compared against prototype phrasings for each intent. Prototype
+vectors are computed once per embedding function and kept in memory.
+
+Each intent has two calibrated cosine thresholds (reject_below, accept_at):
+
+    score >= accept_at    -> intent on
+    score <  reject_below -> intent off
+    in between            -> the regex rule decides
+
+With no embedding function (model still loading, embedding failed) the
+regex rules decide everything, exactly as before.
+
+Calibrate thresholds with scripts/rag/eval_intent_router.py and point
+FAITHH_INTENT_THRESHOLDS at the JSON it writes.
+"""
+import json
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Flags in the order the backend reports them
+INTENTS = ('is_self_query', 'is_why_question', 'is_next_action_query',
+           'is_constella_query', 'needs_orientation', 'is_dev_query')
+
+# ------------------------------------------------------------------
+# Regex / keyword rules (the original detector, now the fallback)
+# ------------------------------------------------------------------
+
+RULE_PATTERNS = {
+    # Self-awareness (asking about FAITHH itself)
+    'is_self_query': [
+        r'\bfaithh\b',
+        r'what are you',
+        r'what is your',
+        r'tell me about yourself',
+        r'who are you',
+        r'what do you do',
+    ],
+    # "Why" decisions (asking rationale)
+    'is_why_question': [
+        r'why did (we|you|i) (choose|use|pick|select|go with)',
+        r'why.*instead of',
+        r'why.*over',
+        r'what was the reason',
+        r'rationale for',
+        r'why.*decision',
+    ],
+    # Next actions (asking what to work on)
+    'is_next_action_query': [
+        r'what should (i|we) work on',
+        r"what('s| is) next",
+        r'what to do next',
+        r'what should (i|we) focus on',
+        r'what are (my|the) priorities',
+        r'where should (i|we) start',
+        r'what.*missing',
+    ],
+    # Orientation (scaffolding - where am I?)
+    'needs_orientation': [
+        r'where (was i|did i leave off|am i|are we)',
+        r'what was i (working on|doing)',
+        r'catch me up',
+        r'bring me up to speed',
+        r"what('s| is) (the |my )?(status|progress)",
+        r"(my |the |what('s| is) )progress",
+        r"what('s| is| have i) (been )?(done|complete|finished)",
+        r'am i on track',
+        r'where (did we|do we) stand',
+        r'what have (i|we) (done|accomplished|completed)',
+        r'update me',
+    ],
+}
+
+# Substring rules: domain vocabulary and development-history phrasing
+RULE_KEYWORDS = {
+    'is_constella_query': ['constella', 'astris', 'auctor', 'civic tome', 'penumbra',
+                           'ucf', 'resonance gap', 'harmonic', 'celestial equilibrium'],
+    'is_dev_query': ['discuss', 'talk', 'said', 'conversation', 'we', 'our',
+                     'plan', 'setup', 'configure', 'implement', 'build',
+                     'create', 'did we', 'what was', 'how did', 'tell me about',
+                     'what did', 'what were', 'talked about'],
+}
+
+_COMPILED_RULES = {name: [(p, re.compile(p)) for p in patterns]
+                   for name, patterns in RULE_PATTERNS.items()}
+
+
+def rule_intent(query_text: str) -> Tuple[Dict[str, bool], List[str]]:
+    """
+    Regex/keyword intent flags
+
+    Returns:
+        (flags, patterns_matched)
+    """
+    query_lower = query_text.lower()
+    flags = {name: False for name in INTENTS}
+    matched = []
+    for name, patterns in _COMPILED_RULES.items():
+        for pattern, regex in patterns:
+            if regex.search(query_lower):
+                flags[name] = True
+                matched.append(f"{name}: {pattern}")
+                break
+    for name, keywords in RULE_KEYWORDS.items():
+        flags[name] = any(kw in query_lower for kw in keywords)
+    return flags, matched
+
+
+# ------------------------------------------------------------------
+# Prototypes and thresholds
+# ------------------------------------------------------------------
+
+PROTOTYPES = {
+    'is_self_query': [
+        "What are you?",
+        "Tell me about yourself",
+        "Who are you and what do you do?",
+        "What is FAITHH meant to be?",
+        "What is your purpose?",
+        "What can you help me with?",
+        "Describe your own capabilities and limits",
+    ],
+    'is_why_question': [
+        "Why did we choose this approach?",
+        "What was the reason we went with this instead of the alternative?",
+        "What's the rationale behind that decision?",
+        "Why did we pick this database over the others?",
+        "Which alternatives did we consider and reject?",
+        "Why was it designed this way?",
+    ],
+    'is_next_action_query': [
+        "What should I work on next?",
+        "What are my priorities right now?",
+        "Where should I start today?",
+        "What's the next step?",
+        "What is still missing from the project?",
+        "What should we focus on this week?",
+    ],
+    'is_constella_query': [
+        "Explain the Constella framework",
+        "How does the Astris token decay work?",
+        "What is the Penumbra Accord?",
+        "How do Auctor tokens affect governance?",
+        "What goes into the Civic Tome?",
+        "What is the resonance gap in Constella?",
+    ],
+    'needs_orientation': [
+        "Where did I leave off?",
+        "Catch me up",
+        "What was I working on?",
+        "Bring me up to speed on the project",
+        "What's the current status and progress?",
+        "What have we accomplished so far?",
+    ],
+    'is_dev_query': [
+        "What did we discuss about the backend setup?",
+        "How did we configure the ChromaDB server?",
+        "What was the plan for implementing the memory system?",
+        "Tell me about the conversation where we built the indexer",
+        "What did we talk about last session?",
+        "How did we set up Docker for the stack?",
+    ],
+}
+
+# (reject_below, accept_at) cosine thresholds for all-mpnet-base-v2
+DEFAULT_THRESHOLDS = {
+    'is_self_query': (0.45, 0.62),
+    'is_why_question': (0.42, 0.60),
+    'is_next_action_query': (0.45, 0.62),
+    'is_constella_query': (0.40, 0.58),
+    'needs_orientation': (0.45, 0.62),
+    'is_dev_query': (0.40, 0.56),
+}
+
+# Exact domain vocabulary is never wrong, even if the embedding model has
+# never seen the word: a keyword hit keeps the intent on
+KEYWORD_OVERRIDES = frozenset({'is_constella_query'})
+
+
+def load_thresholds(path) -> Dict[str, Tuple[float, float]]:
+    """Default thresholds updated from a calibration JSON ({intent: [reject, accept]})"""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    with open(path, 'r') as f:
+        for name, pair in json.load(f).items():
+            if name in thresholds:
+                thresholds[name] = (float(pair[0]), float(pair[1]))
+    return thresholds
+
+
+class IntentRouter:
+    """Nearest-prototype intent detection over a shared query embedding"""
+
+    def __init__(self, embedding_function: Optional[Callable[[List[str]], Any]] = None,
+                 prototypes: Optional[Dict[str, Sequence[str]]] = None,
+                 thresholds: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            embedding_function: Chroma-style callable (list of texts -> vectors)
+            prototypes: {intent: example phrasings} (default PROTOTYPES)
+            thresholds: {intent: (reject_below, accept_at)} (default DEFAULT_THRESHOLDS)
+        """
+        self.prototypes = {name: list(texts) for name, texts in (prototypes or PROTOTYPES).items()}
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(thresholds or {})
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._slices: Dict[str, slice] = {}
+        self.stats = {'routed': 0, 'semantic': 0, 'rules': 0, 'deferred_to_rules': 0}
+
+    @property
+    def embedding_function(self):
+        return self._embedding_function
+
+    @embedding_function.setter
+    def embedding_function(self, func) -> None:
+        """Attach (or swap) the embedding function; prototypes are re-embedded lazily"""
+        with self._lock:
+            if func is not self._embedding_function:
+                self._embedding_function = func
+                self._matrix = None
+
+    def prepare(self) -> bool:
+        """
+        Embed the prototype phrasings (once per embedding function)
+
+        Returns:
+            True if prototype vectors are available
+        """
+        with self._lock:
+            if self._matrix is not None:
+                return True
+            if self._embedding_function is None:
+                return False
+            texts, slices = [], {}
+            for name, examples in self.prototypes.items():
+                slices[name] = slice(len(texts), len(texts) + len(examples))
+                texts.extend(examples)
+            try:
+                matrix = np.asarray(self._embedding_function(texts), dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"Intent router: prototype embedding failed: {e}")
+                return False
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.maximum(norms, 1e-12)
+            self._slices = slices
+            return True
+
+    def embed_query(self, query_text: str) -> Optional[List[float]]:
+        """One query vector (as a list, ready for collection.query) or None"""
+        if self._embedding_function is None:
+            return None
+        try:
+            return np.asarray(self._embedding_function([query_text])[0], dtype=np.float32).tolist()
+        except Exception as e:
+            logger.warning(f"Intent router: query embedding failed: {e}")
+            return None
+
+    def scores(self, query_embedding: Sequence[float]) -> Optional[Dict[str, float]]:
+        """Best prototype cosine per intent, or None without prototype vectors"""
+        if not self.prepare():
+            return None
+        q = np.asarray(query_embedding, dtype=np.float32)
+        if q.shape[0] != self._matrix.shape[1]:
+            return None
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        cosine = self._matrix @ q
+        return {name: float(cosine[s].max()) for name, s in self._slices.items()}
+
+    def route(self, query_text: str,
+              query_embedding: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+        """
+        Detect intents for a query
+
+        Args:
+            query_text: The user's message
+            query_embedding: The query's vector if already computed
+
+        Returns:
+            Dict with the INTENTS flags, 'is_tangent', 'patterns_matched',
+            'intent_source' ('semantic' or 'rules') and 'intent_scores'
+        """
+        rule_flags, matched = rule_intent(query_text)
+        scores = self.scores(query_embedding) if query_embedding is not None else None
+        self.stats['routed'] += 1
+
+        intent = {'is_tangent': False, 'patterns_matched': matched}
+        if scores is None:
+            self.stats['rules'] += 1
+            intent.update(rule_flags)
+            intent['intent_source'] = 'rules'
+            intent['intent_scores'] = {}
+            return intent
+
+        self.stats['semantic'] += 1
+        for name in INTENTS:
+            score = scores.get(name)
+            reject_below, accept_at = self.thresholds.get(name, (1.0, 1.0))
+            if score is None or reject_below <= score < accept_at:
+                intent[name] = rule_flags[name]
+                if score is not None:
+                    self.stats['deferred_to_rules'] += 1
+            else:
+                intent[name] = score >= accept_at
+            if name in KEYWORD_OVERRIDES and rule_flags[name]:
+                intent[name] = True
+        intent['intent_source'] = 'semantic'
+        intent['intent_scores'] = {name: round(score, 3) for name, score in scores.items()}
+        return intent
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'prototypes_embedded': self._matrix is not None,
+            'thresholds': {name: list(pair) for name, pair in self.thresholds.items()},
+            **self.stats,
+        }
+
+
+# ------------------------------------------------------------------
+# Offline evaluation helpers (scripts/rag/eval_intent_router.py)
+# ------------------------------------------------------------------
+
+def prf(predicted: Sequence[bool], actual: Sequence[bool]) -> Dict[str, float]:
+    """Precision / recall / F1 of boolean predictions"""
+    tp = sum(1 for p, a in zip(predicted, actual) if p and a)
+    fp = sum(1 for p, a in zip(predicted, actual) if p and not a)
+    fn = sum(1 for p, a in zip(predicted, actual) if a and not p)
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': round(precision, 3), 'recall': round(recall, 3), 'f1': round(f1, 3)}
+
+
+def calibrate_thresholds(scores: Sequence[float], labels: Sequence[bool],
+                         min_precision: float = 0.95, margin: float = 0.02) -> Tuple[float, float]:
+    """
+    Pick (reject_below, accept_at) for one intent from labeled scores
+
+    accept_at is the lowest cutoff whose precision reaches min_precision
+    (so confident "yes" is rarely wrong); reject_below sits just under the
+    lowest-scoring positive (so confident "no" never drops a true intent).
+    Everything in between is left to the regex rules.
+    """
+    pairs = sorted(zip(scores, labels), reverse=True)
+    positives = [s for s, label in pairs if label]
+    if not positives:
+        return (1.0, 1.0)  # never seen: rules only
+
+    accept_at = max(positives) + margin
+    tp = fp = 0
+    for score, label in pairs:
+        tp += label
+        fp += not label
+        if label and tp / (tp + fp) >= min_precision:
+            accept_at = score
+    reject_below = min(min(positives) - margin, accept_at)
+    return (round(max(reject_below, 0.0), 3), round(accept_at, 3))
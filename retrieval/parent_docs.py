@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Parent Documents - Small chunks for matching, bounded windows for context
+
+Indexers used to embed whole files or 1000-2500 char chunks, and the
+backend then kept the first 1000 chars of each hit (`doc[:1000]`), which
+is often not the part that matched. Small-to-big retrieval splits the two
+jobs:
+
+- Indexing: the full parent text goes into a local ParentStore (SQLite
+  next to chroma_db); only compact child chunks (~500 chars) are embedded.
+  Each child's metadata records parent_id and its [child_start, child_end)
+  character offsets in the parent.
+- Query time: ContextExpander turns each child hit into a window of at most
+  `window_chars` around the matched span, cut at paragraph / sentence /
+  word boundaries, and merges hits that land in the same part of a parent.
+
+Hits without parent metadata (older chunks, conversation chunks) fall back
+to a prefix of the stored document.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARENT_STORE = Path(os.environ.get(
+    'FAITHH_PARENT_STORE',
+    Path.home() / "ai-stack" / "chroma_db" / "parents.sqlite"
+))
+
+CHILD_CHARS = 500
+CHILD_OVERLAP = 100
+WINDOW_CHARS = 1000
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS parents (
+    parent_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+)"""
+
+
+def _snap_back(text: str, pos: int, floor: int) -> int:
+    """Move pos back to a paragraph, line, sentence or word break (not below floor)"""
+    if pos >= len(text):
+        return len(text)
+    for sep in ('\n\n', '\n', '. ', ' '):
+        cut = text.rfind(sep, floor, pos)
+        if cut > floor:
+            return cut + len(sep)
+    return pos
+
+
+def _snap_forward(text: str, pos: int, ceiling: int) -> int:
+    """Move pos forward to the next break (not past ceiling)"""
+    if pos <= 0:
+        return 0
+    for sep in ('\n\n', '\n', '. ', ' '):
+        cut = text.find(sep, pos, ceiling)
+        if cut != -1:
+            return cut + len(sep)
+    return pos
+
+
+def split_children(text: str, chunk_chars: int = CHILD_CHARS,
+                   overlap: int = CHILD_OVERLAP) -> List[Tuple[int, int]]:
+    """
+    Child spans covering the text, ending at natural breaks
+
+    Returns:
+        [(start, end), ...] character offsets into text
+    """
+    spans = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            end = _snap_back(text, end, start + chunk_chars // 2)
+        if text[start:end].strip():
+            spans.append((start, end))
+        if end >= len(text):
+            break
+        # Next child starts `overlap` chars back, at the start of a word
+        next_start = max(start + 1, end - overlap)
+        while next_start < end and not text[next_start - 1].isspace():
+            next_start += 1
+        start = next_start
+    return spans
+
+
+def child_records(parent_id: str, text: str, metadata: Dict[str, Any],
+                  chunk_chars: int = CHILD_CHARS, overlap: int = CHILD_OVERLAP) -> List[Dict[str, Any]]:
+    """Child chunks of a parent as {'id', 'document', 'metadata'} (metadata gains parent offsets)"""
+    records = []
+    for i, (start, end) in enumerate(split_children(text, chunk_chars, overlap)):
+        meta = dict(metadata)
+        meta.update({'parent_id': parent_id, 'child_index': i,
+                     'child_start': start, 'child_end': end})
+        records.append({'id': f"{parent_id}#{i:04d}", 'document': text[start:end], 'metadata': meta})
+    return records
+
+
+def expand_window(text: str, start: int, end: int, window_chars: int = WINDOW_CHARS) -> Tuple[int, int]:
+    """
+    A span of at most window_chars containing [start, end), centred on it
+    and cut at natural breaks
+
+    Returns:
+        (window_start, window_end)
+    """
+    n = len(text)
+    start, end = max(0, start), min(n, end)
+    if end - start >= window_chars:
+        return start, _snap_back(text, start + window_chars, start + window_chars // 2)
+    slack = window_chars - (end - start)
+    lo = max(0, start - slack // 2)
+    hi = min(n, end + slack - (start - lo))
+    if hi - lo < window_chars:  # hit the end of the text: spend the rest before the match
+        lo = max(0, hi - window_chars)
+    if lo > 0:
+        lo = _snap_forward(text, lo, start)
+    if hi < n:
+        hi = _snap_back(text, hi, end)
+    return lo, hi
+
+
+class ParentStore:
+    """Full parent texts in a SQLite file, keyed by parent_id"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: SQLite file (default: $FAITHH_PARENT_STORE or
+                ~/ai-stack/chroma_db/parents.sqlite)
+        """
+        self.path = Path(path) if path else DEFAULT_PARENT_STORE
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def put(self, parent_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO parents (parent_id, text, metadata, updated_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (parent_id, text, json.dumps(metadata or {}), datetime.now().isoformat()))
+
+    def get(self, parent_id: str) -> Optional[str]:
+        row = self._conn().execute("SELECT text FROM parents WHERE parent_id = ?", (parent_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, parent_ids: List[str]) -> Dict[str, str]:
+        ids = list(dict.fromkeys(parent_ids))
+        if not ids:
+            return {}
+        marks = ','.join('?' * len(ids))
+        rows = self._conn().execute(f"SELECT parent_id, text FROM parents WHERE parent_id IN ({marks})",
+                                    ids).fetchall()
+        return dict(rows)
+
+    def has(self, parent_id: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM parents WHERE parent_id = ?",
+                                    (parent_id,)).fetchone() is not None
+
+    def delete(self, parent_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM parents WHERE parent_id = ?", (parent_id,))
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+
+def index_parent(collection, store: ParentStore, parent_id: str, text: str, metadata: Dict[str, Any],
+                 chunk_chars: int = CHILD_CHARS, overlap: int = CHILD_OVERLAP) -> int:
+    """
+    Store a parent document and (re)index its child chunks
+
+    Old children of the parent (and a whole-document entry stored under
+    parent_id by older indexers) are deleted first, so re-indexing never
+    leaves stale spans behind.
+
+    Returns:
+        Number of child chunks written
+    """
+    records = child_records(parent_id, text, metadata, chunk_chars, overlap)
+    store.put(parent_id, text, metadata)
+    try:
+        collection.delete(ids=[parent_id])
+        collection.delete(where={'parent_id': parent_id})
+    except Exception as e:
+        logger.debug(f"No old entries removed for {parent_id}: {e}")
+    if records:
+        collection.upsert(ids=[r['id'] for r in records],
+                          documents=[r['document'] for r in records],
+                          metadatas=[r['metadata'] for r in records])
+    return len(records)
+
+
+class ContextExpander:
+    """Turns query hits into bounded context windows from their parents"""
+
+    def __init__(self, store: Optional[ParentStore], window_chars: int = WINDOW_CHARS):
+        """
+        Args:
+            store: Parent texts (None: every hit falls back to a prefix)
+            window_chars: Max characters per context window
+        """
+        self.store = store
+        self.window_chars = window_chars
+        self.stats = {'expanded': 0, 'merged': 0, 'fallbacks': 0}
+
+    def expand(self, documents: List[str], metadatas: List[Optional[Dict[str, Any]]],
+               limit: Optional[int] = None) -> List[str]:
+        """
+        Context text for each hit, best first
+
+        Hits whose windows overlap an earlier hit's window in the same parent
+        are merged into it (widening it up to window_chars) instead of
+        repeating the same passage.
+
+        Args:
+            documents: Hit documents (child chunks or whole documents)
+            metadatas: Hit metadata (parent_id / child_start / child_end when indexed as children)
+            limit: Max windows to return
+
+        Returns:
+            Context strings
+        """
+        metadatas = list(metadatas) if metadatas else [None] * len(documents)
+        parent_ids = [(m or {}).get('parent_id') for m in metadatas]
+        parents = {}
+        if self.store is not None and any(parent_ids):
+            try:
+                parents = self.store.get_many([p for p in parent_ids if p])
+            except sqlite3.Error as e:
+                logger.warning(f"Parent store unavailable, using chunk text: {e}")
+
+        windows: List[Dict[str, Any]] = []
+        for doc, meta, parent_id in zip(documents, metadatas, parent_ids):
+            if limit and len(windows) >= limit:
+                break
+            parent = parents.get(parent_id) if parent_id else None
+            if parent is None or 'child_start' not in (meta or {}):
+                self.stats['fallbacks'] += 1
+                doc = doc or ''
+                windows.append({'text': doc[:self.window_chars] + ("..." if len(doc) > self.window_chars else "")})
+                continue
+            start, end = int(meta['child_start']), int(meta.get('child_end', meta['child_start']))
+            merged = False
+            for window in windows:
+                if window.get('parent_id') != parent_id:
+                    continue
+                if start < window['hi'] and end > window['lo']:
+                    lo, hi = min(window['lo'], start), max(window['hi'], end)
+                    if hi - lo <= self.window_chars:
+                        window['lo'], window['hi'] = expand_window(parent, lo, hi, self.window_chars)
+                    merged = True
+                    self.stats['merged'] += 1
+                    break
+            if merged:
+                continue
+            lo, hi = expand_window(parent, start, end, self.window_chars)
+            windows.append({'parent_id': parent_id, 'parent': parent, 'lo': lo, 'hi': hi})
+            self.stats['expanded'] += 1
+
+        texts = []
+        for window in windows:
+            if 'parent' not in window:
+                texts.append(window['text'])
+                continue
+            text = window['parent'][window['lo']:window['hi']].strip()
+            prefix = "..." if window['lo'] > 0 else ""
+            suffix = "..." if window['hi'] < len(window['parent']) else ""
+            texts.append(f"{prefix}{text}{suffix}")
+        return texts
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'window_chars': self.window_chars, **self.stats}
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Category Partitions - One Chroma collection per category group
+
+Almost every RAG query filters on `category`. On a single 93k-vector
+collection that means a filtered HNSW search: Chroma walks the graph and
+throws away non-matching neighbours, which is slow and loses recall when
+the filter is selective (constella_master is a few dozen vectors).
+
+The partitioned layout splits documents_768 into documents_768__<group>
+collections. PartitionedCollection routes each query to the partitions
+whose categories can match the `where` clause, drops the category part of
+the filter where a partition is fully covered by it (so those partitions
+run a plain, unfiltered ANN search), scatter-gathers across partitions in
+parallel and merges hits by distance. Results have the same shape as
+Collection.query.
+
+Each partition records its base collection and categories in its
+collection metadata, so the layout is discovered from ChromaDB itself.
+scripts/rag/partition_collection.py builds and re-syncs it.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# group -> categories stored in that partition; anything else goes to OTHER_GROUP
+DEFAULT_PARTITION_GROUPS = {
+    'constella': ['constella_master'],
+    'chat_chunks': ['claude_conversation_chunk'],
+    'conversations': ['claude_conversation', 'conversation', 'live_chat', 'faithh_live_session'],
+    'docs': ['documentation'],
+    'code': ['code', 'backend_code'],
+    'parity': ['parity', 'parity_file'],
+}
+OTHER_GROUP = 'other'
+OTHER_MARKER = '*'
+SEPARATOR = '__'
+
+
+def partition_name(base: str, group: str) -> str:
+    return f"{base}{SEPARATOR}{group}"
+
+
+def category_set(where: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+    """
+    Categories a `where` clause can match
+
+    Returns:
+        Set of category values, or None if the clause doesn't restrict
+        category to a known list ($ne/$nin, no category clause, ...)
+    """
+    if not where:
+        return None
+    if '$or' in where:
+        union: Set[str] = set()
+        for clause in where['$or']:
+            clause_set = category_set(clause)
+            if clause_set is None:
+                return None
+            union |= clause_set
+        return union
+    if '$and' in where:
+        result = None
+        for clause in where['$and']:
+            clause_set = category_set(clause)
+            if clause_set is not None:
+                result = clause_set if result is None else result & clause_set
+        return result
+    condition = where.get('category')
+    if condition is None:
+        return None
+    if not isinstance(condition, dict):
+        return {condition}
+    if '$eq' in condition:
+        return {condition['$eq']}
+    if '$in' in condition:
+        return set(condition['$in'])
+    return None
+
+
+def _category_only(clause: Dict[str, Any]) -> bool:
+    if set(clause) == {'category'}:
+        return True
+    if set(clause) == {'$or'}:
+        return all(_category_only(c) for c in clause['$or'])
+    return False
+
+
+def strip_category(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The `where` clause minus its category restriction
+
+    Only used for partitions whose categories all satisfy the restriction.
+    Clauses where category is mixed with other conditions inside an $or
+    are returned unchanged (still correct, just filtered).
+    """
+    if not where:
+        return None
+    if _category_only(where):
+        return None
+    if '$and' in where:
+        rest = [strip_category(c) if _category_only(c) else c for c in where['$and']]
+        rest = [c for c in rest if c]
+        if not rest:
+            return None
+        return rest[0] if len(rest) == 1 else {'$and': rest}
+    if '$or' in where:
+        return where
+    rest = {k: v for k, v in where.items() if k != 'category'}
+    return rest or None
+
+
+class PartitionedCollection:
+    """
+    Query router over per-category-group collections
+
+    Exposes query / add / upsert / delete / get / count like a Chroma
+    collection, so it can stand in for rag_collection.
+    """
+
+    def __init__(self, partitions: Dict[str, Any], categories: Dict[str, List[str]],
+                 embedding_function=None, max_workers: int = 8, name: str = 'partitioned'):
+        """
+        Args:
+            partitions: group -> Chroma collection
+            categories: group -> categories it holds ([OTHER_MARKER] for the catch-all)
+            embedding_function: Used to embed query_texts once for all partitions
+            max_workers: Parallel partition queries
+            name: Base collection name (generation / cache key)
+        """
+        self.name = name
+        self.partitions = partitions
+        self.categories = {group: list(cats) for group, cats in categories.items()}
+        self.embedding_function = embedding_function
+        self._group_of = {cat: group for group, cats in self.categories.items()
+                          for cat in cats if cat != OTHER_MARKER}
+        self.other_group = next((g for g, cats in self.categories.items() if OTHER_MARKER in cats), None)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(partitions))),
+                                        thread_name_prefix='partition')
+        self.stats = {'queries': 0, 'partition_queries': 0, 'unfiltered_partition_queries': 0}
+
+    @classmethod
+    def discover(cls, client, base: str, embedding_function=None) -> Optional['PartitionedCollection']:
+        """
+        Open every <base>__<group> collection that declares itself a partition of base
+
+        Returns:
+            PartitionedCollection, or None if no partitions exist
+        """
+        partitions, categories = {}, {}
+        for entry in client.list_collections():
+            name = getattr(entry, 'name', entry)
+            if not name.startswith(base + SEPARATOR):
+                continue
+            coll = client.get_collection(name=name, embedding_function=embedding_function)
+            meta = coll.metadata or {}
+            if meta.get('partition_of') != base:
+                continue
+            group = name[len(base) + len(SEPARATOR):]
+            partitions[group] = coll
+            categories[group] = [c for c in meta.get('categories', '').split(',') if c]
+        if not partitions:
+            return None
+        return cls(partitions, categories, embedding_function, name=base)
+
+    @property
+    def cache_key(self) -> Tuple[str, ...]:
+        """Generation names for cached results: the base plus every partition"""
+        return (self.name,) + tuple(partition_name(self.name, group) for group in sorted(self.partitions))
+
+    def group_for(self, category: Optional[str]) -> Optional[str]:
+        """Partition a document with this category belongs to"""
+        return self._group_of.get(category, self.other_group)
+
+    def route(self, where: Optional[Dict[str, Any]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Partitions to search for a `where` clause, with the filter each one needs
+
+        Returns:
+            group -> where clause to send (None = unfiltered search)
+        """
+        wanted = category_set(where)
+        if wanted is None:
+            return {group: where for group in self.partitions}
+        plan = {}
+        for category in wanted:
+            group = self.group_for(category)
+            if group is None or group not in self.partitions:
+                continue
+            covered = OTHER_MARKER not in self.categories[group] and \
+                set(self.categories[group]) <= wanted
+            plan[group] = strip_category(where) if covered else where
+        return plan
+
+    def query(self, query_texts: Optional[List[str]] = None, query_embeddings: Optional[List[Any]] = None,
+              n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        """Same signature and result shape as chromadb Collection.query"""
+        include = include or ['documents', 'metadatas', 'distances']
+        if query_embeddings is None and self.embedding_function is not None:
+            query_embeddings = self.embedding_function(query_texts)
+            query_texts = None
+        n_queries = len(query_embeddings if query_embeddings is not None else query_texts)
+        plan = self.route(where)
+        self.stats['queries'] += 1
+        self.stats['partition_queries'] += len(plan)
+        self.stats['unfiltered_partition_queries'] += sum(1 for w in plan.values() if w is None)
+
+        fields = [f for f in ('documents', 'metadatas', 'embeddings') if f in include]
+        # Distances are needed to merge, even if the caller didn't ask for them
+        sub_include = list(dict.fromkeys(fields + ['distances']))
+
+        def run(group, sub_where):
+            params = dict(n_results=n_results, include=sub_include, **kwargs)
+            if query_embeddings is not None:
+                params['query_embeddings'] = query_embeddings
+            else:
+                params['query_texts'] = query_texts
+            if sub_where:
+                params['where'] = sub_where
+            return self.partitions[group].query(**params)
+
+        futures = [self._pool.submit(run, group, sub_where) for group, sub_where in plan.items()]
+        partials = [f.result() for f in futures]
+
+        merged: Dict[str, Any] = {'ids': [], 'distances': []}
+        for field in fields:
+            merged[field] = []
+        for q in range(n_queries):
+            hits = []
+            for part in partials:
+                for i, doc_id in enumerate(part['ids'][q]):
+                    hit = {'ids': doc_id, 'distances': part['distances'][q][i]}
+                    for field in fields:
+                        hit[field] = part[field][q][i] if part.get(field) is not None else None
+                    hits.append(hit)
+            hits.sort(key=lambda h: h['distances'])
+            for field in merged:
+                merged[field].append([h[field] for h in hits[:n_results]])
+        if 'distances' not in include:
+            merged.pop('distances')
+        return merged
+
+    def _by_group(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for i, meta in enumerate(metadatas):
+            group = self.group_for((meta or {}).get('category'))
+            if group is None or group not in self.partitions:
+                raise ValueError(f"No partition for category {(meta or {}).get('category')!r} ({ids[i]})")
+            groups.setdefault(group, []).append(i)
+        return groups
+
+    def _write(self, method: str, ids: List[str], metadatas: List[Dict[str, Any]], **columns) -> None:
+        for group, rows in self._by_group(ids, metadatas).items():
+            params = {'ids': [ids[i] for i in rows], 'metadatas': [metadatas[i] for i in rows]}
+            for key, values in columns.items():
+                if values is not None:
+                    params[key] = [values[i] for i in rows]
+            getattr(self.partitions[group], method)(**params)
+
+    def add(self, ids: List[str], metadatas: List[Dict[str, Any]], documents: Optional[List[str]] = None,
+            embeddings: Optional[List[Any]] = None) -> None:
+        """Add documents to the partition of their category"""
+        self._write('add', ids, metadatas, documents=documents, embeddings=embeddings)
+
+    def upsert(self, ids: List[str], metadatas: List[Dict[str, Any]], documents: Optional[List[str]] = None,
+               embeddings: Optional[List[Any]] = None) -> None:
+        self._write('upsert', ids, metadatas, documents=documents, embeddings=embeddings)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Delete ids from every partition (a missing id is a no-op in Chroma)"""
+        ids = list(ids)
+        for coll in self.partitions.values():
+            coll.delete(ids=ids)
+
+    def get(self, ids: List[str], include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Fetch ids from whichever partitions hold them (result order follows ids)"""
+        include = include or ['documents', 'metadatas']
+        found: Dict[str, Dict[str, Any]] = {}
+        for coll in self.partitions.values():
+            part = coll.get(ids=ids, include=include)
+            for i, doc_id in enumerate(part['ids']):
+                found[doc_id] = {field: part[field][i] for field in include if part.get(field) is not None}
+        order = [doc_id for doc_id in ids if doc_id in found]
+        result = {'ids': order}
+        for field in include:
+            result[field] = [found[doc_id].get(field) for doc_id in order]
+        return result
+
+    def count(self) -> int:
+        return sum(coll.count() for coll in self.partitions.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'partitions': {group: self.categories[group] for group in self.partitions},
+            **self.stats,
+        }
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Quantized Vector Tier - Compact in-memory search with full-precision re-scoring
+
+Keeps int8 scalar-quantized codes (and optional 1-bit binary codes) resident,
+while the float32 vectors stay on disk as a memory-mapped .npy file.
+
+Search flow:
+    binary Hamming prefilter (optional) -> int8 approximate scoring
+    -> exact re-score of the top candidates against float32 vectors
+
+For 768-dim mpnet vectors this is 768 bytes (int8) + 96 bytes (binary)
+per chunk instead of 3072 bytes, so the hot index can sit next to Ollama.
+"""
+import json
+import logging
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from retrieval.filters import matches_where
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block during int8 scoring (bounds temporary float32 memory)
+SCORE_BLOCK_ROWS = 16384
+
+# Popcount lookup for Hamming distance on packed bits
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+MANIFEST_FILE = 'manifest.json'
+# Generation name of a collection's quantized tier, bumped by every rebuild
+TIER_GENERATION_SUFFIX = ':quantized'
+
+
+def tier_generation(collection: str) -> str:
+    return f"{collection}{TIER_GENERATION_SUFFIX}"
+
+
+def _popcount_rows(packed: np.ndarray) -> np.ndarray:
+    """Count set bits per row of a packed uint8 matrix"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[packed].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedIndex:
+    """
+    Two-tier vector index: compact codes for candidate search,
+    full-precision vectors for re-scoring
+
+    Distances are reported in the same space as the source Chroma
+    collection ('l2' = squared L2, 'cosine' = 1 - cos, 'ip' = 1 - dot)
+    so existing distance thresholds keep working.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        codes: np.ndarray,
+        scale: np.ndarray,
+        offset: np.ndarray,
+        binary_codes: Optional[np.ndarray] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        space: str = 'l2',
+    ):
+        """
+        Initialize from prepared arrays (use build() or load() instead)
+
+        Args:
+            ids: Document ids, row-aligned with the arrays
+            vectors: float32 vectors (may be a read-only memmap)
+            codes: int8 codes, shape (n, dim)
+            scale: Per-dimension quantization step
+            offset: Per-dimension minimum
+            binary_codes: Packed sign bits, shape (n, dim / 8)
+            metadatas: Row-aligned metadata dicts (for where filtering)
+            space: Distance space of the source collection
+        """
+        self.ids = list(ids)
+        self.space = space
+        self.dim = int(codes.shape[1]) if codes.ndim == 2 else int(scale.shape[0])
+        self.scale = scale.astype(np.float32)
+        self.offset = offset.astype(np.float32)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.ids]
+
+        # Base segment (possibly memmapped) plus appended in-memory rows
+        self._vectors = vectors
+        self._codes = codes
+        self._binary = binary_codes
+        self._norms_sq = self._row_norms_sq(vectors)
+        self._extra_vectors: List[np.ndarray] = []
+        self._id_to_row = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._lock = threading.RLock()  # live adds come from the index_queue thread
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_norms_sq(vectors: np.ndarray) -> np.ndarray:
+        """Squared L2 norm per row, computed in blocks to keep memmaps cold"""
+        norms = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            norms[start:start + len(block)] = np.einsum('ij,ij->i', block, block)
+        return norms
+
+    @staticmethod
+    def calibrate(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute per-dimension (scale, offset) for int8 quantization"""
+        low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1e-8
+        return scale, low
+
+    @staticmethod
+    def quantize(vectors: np.ndarray, scale: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        """Map float32 vectors to int8 codes (values outside calibration are clipped)"""
+        levels = np.rint((vectors - offset) / scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    @staticmethod
+    def binarize(vectors: np.ndarray) -> np.ndarray:
+        """Pack the sign of each dimension into bits"""
+        return np.packbits(vectors > 0, axis=1)
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        embeddings: Any,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        space: str = 'l2',
+        binary: bool = True,
+    ) -> 'QuantizedIndex':
+        """
+        Build an index from raw embeddings
+
+        Args:
+            ids: Document ids
+            embeddings: Array-like of shape (n, dim)
+            metadatas: Optional metadata dicts
+            space: Distance space of the source collection
+            binary: Also build 1-bit codes for Hamming prefiltering
+
+        Returns:
+            QuantizedIndex
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        scale, offset = cls.calibrate(vectors)
+        codes = cls.quantize(vectors, scale, offset)
+        binary_codes = cls.binarize(vectors) if binary else None
+        return cls(list(ids), vectors, codes, scale, offset, binary_codes,
+                   list(metadatas) if metadatas is not None else None, space)
+
+    @classmethod
+    def from_collection(cls, collection, batch_size: int = 5000, binary: bool = True) -> 'QuantizedIndex':
+        """
+        Build an index by paging all embeddings out of a Chroma collection
+
+        Args:
+            collection: Chroma collection (e.g. documents_768)
+            batch_size: Rows fetched per page
+            binary: Also build 1-bit codes
+
+        Returns:
+            QuantizedIndex
+        """
+        space = (collection.metadata or {}).get('hnsw:space', 'l2')
+        total = collection.count()
+        ids, metadatas, chunks = [], [], []
+
+        for offset in range(0, total, batch_size):
+            page = collection.get(limit=batch_size, offset=offset,
+                                  include=['embeddings', 'metadatas'])
+            ids.extend(page['ids'])
+            metadatas.extend(page['metadatas'] or [{}] * len(page['ids']))
+            chunks.append(np.asarray(page['embeddings'], dtype=np.float32))
+            logger.info(f"Fetched {min(offset + batch_size, total)}/{total} embeddings")
+
+        embeddings = np.vstack(chunks) if chunks else np.zeros((0, 768), dtype=np.float32)
+        return cls.build(ids, embeddings, metadatas, space=space, binary=binary)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, directory) -> Path:
+        """
+        Save the index (vectors.npy, codes.npy, binary.npy, ids + metadata)
+
+        Args:
+            directory: Target directory (created if missing)
+
+        Returns:
+            Path to the directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        np.save(directory / 'vectors.npy', self._all_vectors())
+        np.save(directory / 'codes.npy', self._codes)
+        np.save(directory / 'scale.npy', self.scale)
+        np.save(directory / 'offset.npy', self.offset)
+        if self._binary is not None:
+            np.save(directory / 'binary.npy', self._binary)
+
+        with open(directory / 'metadatas.jsonl', 'w') as f:
+            for doc_id, meta in zip(self.ids, self.metadatas):
+                f.write(json.dumps({'id': doc_id, 'metadata': meta}) + '\n')
+
+        with open(directory / MANIFEST_FILE, 'w') as f:
+            json.dump({
+                'count': len(self.ids),
+                'dim': self.dim,
+                'space': self.space,
+                'binary': self._binary is not None,
+            }, f, indent=2)
+
+        logger.info(f"Saved quantized index ({len(self.ids)} vectors) to {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap_vectors: bool = True) -> 'QuantizedIndex':
+        """
+        Load a saved index
+
+        Args:
+            directory: Directory written by save()
+            mmap_vectors: Memory-map float32 vectors instead of loading them
+
+        Returns:
+            QuantizedIndex
+        """
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+
+        ids, metadatas = [], []
+        with open(directory / 'metadatas.jsonl', 'r') as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row['id'])
+                metadatas.append(row.get('metadata') or {})
+
+        binary_path = directory / 'binary.npy'
+        return cls(
+            ids=ids,
+            vectors=np.load(directory / 'vectors.npy', mmap_mode='r' if mmap_vectors else None),
+            codes=np.load(directory / 'codes.npy'),
+            scale=np.load(directory / 'scale.npy'),
+            offset=np.load(directory / 'offset.npy'),
+            binary_codes=np.load(binary_path) if binary_path.exists() else None,
+            metadatas=metadatas,
+            space=manifest.get('space', 'l2'),
+        )
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add(self, ids: Sequence[str], embeddings: Any,
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> int:
+        """
+        Append vectors using the existing calibration (e.g. live conversations)
+
+        Ids already present are skipped.
+
+        Returns:
+            Number of rows added
+        """
+        vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._id_to_row]
+            if not keep:
+                return 0
+
+            vectors = vectors[keep]
+            for i in keep:
+                self._id_to_row[ids[i]] = len(self.ids)
+                self.ids.append(ids[i])
+                self.metadatas.append(metadatas[i] or {})
+
+            self._codes = np.vstack([self._codes, self.quantize(vectors, self.scale, self.offset)])
+            if self._binary is not None:
+                self._binary = np.vstack([self._binary, self.binarize(vectors)])
+            self._norms_sq = np.concatenate([self._norms_sq, self._row_norms_sq(vectors)])
+            self._extra_vectors.append(vectors)
+            return len(keep)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def has_binary(self) -> bool:
+        return self._binary is not None
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Bytes held per tier (float32 is on disk when memmapped)"""
+        return {
+            'int8_codes': int(self._codes.nbytes),
+            'binary_codes': int(self._binary.nbytes) if self._binary is not None else 0,
+            'float32_vectors': int(len(self.ids) * self.dim * 4),
+            'float32_resident': not isinstance(self._vectors, np.memmap),
+        }
+
+    def _all_vectors(self) -> np.ndarray:
+        if not self._extra_vectors:
+            return np.asarray(self._vectors, dtype=np.float32)
+        return np.vstack([np.asarray(self._vectors, dtype=np.float32)] + self._extra_vectors)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """
+        What a search reads, taken under the lock
+
+        add() replaces the arrays rather than editing them and only appends
+        to ids/metadatas, so a search can score this snapshot without the
+        lock while live adds carry on.
+        """
+        with self._lock:
+            return {'n': len(self.ids), 'codes': self._codes, 'binary': self._binary,
+                    'norms_sq': self._norms_sq, 'extra': tuple(self._extra_vectors)}
+
+    def _rows(self, rows: np.ndarray, snap: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Fetch full-precision rows from the base memmap or appended segments"""
+        snap = snap or self._snapshot()
+        base_len = len(self._vectors)
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        base_mask = rows < base_len
+        if base_mask.any():
+            base_rows = rows[base_mask]
+            order = np.argsort(base_rows)  # sequential reads on the memmap
+            fetched = np.asarray(self._vectors[base_rows[order]], dtype=np.float32)
+            out_idx = np.flatnonzero(base_mask)[order]
+            out[out_idx] = fetched
+        if (~base_mask).any():
+            extra = np.vstack(snap['extra'])
+            out[~base_mask] = extra[rows[~base_mask] - base_len]
+        return out
+
+    def _to_distance(self, dots: np.ndarray, query: np.ndarray, rows: np.ndarray,
+                     norms_sq: np.ndarray) -> np.ndarray:
+        """Convert dot products to the collection's distance space"""
+        if self.space == 'ip':
+            return 1.0 - dots
+        if self.space == 'cosine':
+            denom = np.sqrt(norms_sq[rows]) * float(np.linalg.norm(query))
+            return 1.0 - dots / np.maximum(denom, 1e-12)
+        # Chroma reports squared L2
+        return np.maximum(norms_sq[rows] + float(query @ query) - 2.0 * dots, 0.0)
+
+    def _approx_scores(self, query: np.ndarray, rows: Optional[np.ndarray], codes: np.ndarray) -> np.ndarray:
+        """Asymmetric int8 scoring: float query against int8 codes"""
+        q_scaled = (query * self.scale).astype(np.float32)
+        bias = float(q_scaled.sum() * 128.0 + query @ self.offset)
+        codes = codes if rows is None else codes[rows]
+
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ q_scaled
+        return scores + bias
+
+    def _candidate_rows(self, where: Optional[Dict[str, Any]], n: int) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        return np.fromiter(
+            (i for i, meta in enumerate(islice(self.metadatas, n)) if matches_where(meta, where)),
+            dtype=np.int64,
+        )
+
+    def _hamming_prefilter(self, query: np.ndarray, rows: Optional[np.ndarray], keep: int,
+                           binary: np.ndarray) -> np.ndarray:
+        q_bits = self.binarize(query[None, :])[0]
+        codes = binary if rows is None else binary[rows]
+        distances = _popcount_rows(np.bitwise_xor(codes, q_bits))
+        keep = min(keep, len(distances))
+        top = np.argpartition(distances, keep - 1)[:keep]
+        return top if rows is None else rows[top]
+
+    def search(
+        self,
+        query_embedding: Any,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        rescore_factor: int = 4,
+        use_binary: bool = False,
+        binary_factor: int = 40,
+        exact: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """
+        Find nearest neighbours for one query vector
+
+        Only taking the snapshot holds the lock; scoring runs unlocked, so
+        concurrent queries search in parallel (numpy releases the GIL).
+
+        Args:
+            query_embedding: Query vector
+            n_results: Number of results to return
+            where: Optional Chroma-style metadata filter
+            rescore_factor: int8 candidates kept per result for re-scoring
+            use_binary: Hamming prefilter before int8 scoring (needs binary codes)
+            binary_factor: Hamming candidates kept per result
+            exact: Skip quantized tiers and brute-force float32 (benchmark baseline)
+
+        Returns:
+            List of (row, distance) sorted by ascending distance
+        """
+        snap = self._snapshot()
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        rows = self._candidate_rows(where, snap['n'])
+        if rows is not None and len(rows) == 0:
+            return []
+        total = snap['n'] if rows is None else len(rows)
+        if total == 0:
+            return []
+        n_results = min(n_results, total)
+
+        if exact:
+            candidates = np.arange(total) if rows is None else rows
+        else:
+            if use_binary and snap['binary'] is not None and total > n_results * binary_factor:
+                rows = self._hamming_prefilter(query, rows, n_results * binary_factor, snap['binary'])
+
+            approx = self._approx_scores(query, rows, snap['codes'])
+            approx_dist = self._to_distance(approx, query, np.arange(len(approx)) if rows is None else rows,
+                                            snap['norms_sq'])
+            keep = min(len(approx_dist), max(n_results * rescore_factor, n_results))
+            top = np.argpartition(approx_dist, keep - 1)[:keep]
+            candidates = top if rows is None else rows[top]
+
+        full = self._rows(np.asarray(candidates), snap)
+        distances = self._to_distance(full @ query, query, np.asarray(candidates), snap['norms_sq'])
+        order = np.argsort(distances)[:n_results]
+        return [(int(candidates[i]), float(distances[i])) for i in order]
+
+    def query(
+        self,
+        query_embeddings: Sequence[Any],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        **search_kwargs,
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Chroma-shaped query over one or more query vectors
+
+        Returns:
+            Dict with 'ids', 'metadatas' and 'distances' (documents are
+            left to the caller - see QuantizedCollection)
+        """
+        result = {'ids': [], 'metadatas': [], 'distances': []}
+        for embedding in query_embeddings:
+            hits = self.search(embedding, n_results=n_results, where=where, **search_kwargs)
+            result['ids'].append([self.ids[row] for row, _ in hits])
+            result['metadatas'].append([self.metadatas[row] for row, _ in hits])
+            result['distances'].append([dist for _, dist in hits])
+        return result
+
+
+class QuantizedCollection:
+    """
+    Drop-in stand-in for collection.query() backed by a QuantizedIndex
+
+    Documents are fetched from the real Chroma collection by id, so only
+    vectors and metadata live in the quantized tier.
+    """
+
+    def __init__(self, index: QuantizedIndex, embedding_function, collection):
+        """
+        Args:
+            index: Loaded QuantizedIndex
+            embedding_function: Chroma embedding function used for query_texts
+            collection: Backing Chroma collection (documents, count, writes)
+        """
+        self.index = index
+        self.embedding_function = embedding_function
+        self.collection = collection
+        self.search_kwargs: Dict[str, Any] = {}
+
+    @property
+    def cache_key(self) -> Tuple[str, str]:
+        """Generation names for cached results: the backing collection and its quantized tier"""
+        name = getattr(self.collection, 'name', 'documents_768')
+        return (name, tier_generation(name))
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[Any]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Same signature and result shape as chromadb Collection.query"""
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        include = include or ['documents', 'metadatas', 'distances']
+
+        result = self.index.query(query_embeddings, n_results=n_results, where=where,
+                                  **self.search_kwargs)
+
+        if 'documents' in include:
+            result['documents'] = []
+            for ids in result['ids']:
+                if not ids:
+                    result['documents'].append([])
+                    continue
+                fetched = self.collection.get(ids=ids, include=['documents'])
+                by_id = dict(zip(fetched['ids'], fetched['documents']))
+                result['documents'].append([by_id.get(doc_id, '') for doc_id in ids])
+        if 'metadatas' not in include:
+            result.pop('metadatas', None)
+        if 'distances' not in include:
+            result.pop('distances', None)
+        return result
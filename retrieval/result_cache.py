@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+RAG Result Cache - LRU cache of collection.query() results, versioned by
+collection generation
+
+Keys are (collection, query fingerprint, where filter, include, generation).
+The generation comes from retrieval.generation and is bumped by every
+writer, so a cached result is only ever served for the exact collection
+state it was computed against - there is no TTL and no invalidation logic.
+
+n_results is handled by coverage rather than being part of the key: an
+entry computed for n_results=20 also answers n_results=5 and 10 (the
+result lists are sliced), which is what paged queries and the UI's
+"show more" need. An entry that came back short (fewer hits than asked
+for) answers any larger n_results too.
+
+A read tier spread over several collections (partitions, a quantized copy
+plus the collection it fetches documents from) is cached under the tuple
+of their names; its generation is the sum of theirs, so a bump of any one
+of them moves the whole tier on.
+
+VersionedCollection wraps a Chroma collection for scripts: writes bump the
+generation automatically, queries go through a cache when one is given.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from retrieval.generation import GenerationStore, get_generation_store
+
+logger = logging.getLogger(__name__)
+
+# Result fields that hold one list per query (sliced to serve smaller n_results)
+RESULT_LIST_KEYS = ('ids', 'documents', 'metadatas', 'distances', 'embeddings', 'uris', 'data')
+
+
+def query_fingerprint(query_texts=None, query_embeddings=None) -> str:
+    """Hash of the query vectors (or texts, when the collection embeds them)"""
+    digest = hashlib.sha1()
+    if query_embeddings is not None:
+        digest.update(b'emb')
+        for embedding in query_embeddings:
+            digest.update(np.asarray(embedding, dtype=np.float32).tobytes())
+            digest.update(b'|')
+    else:
+        digest.update(b'text')
+        for text in query_texts or []:
+            digest.update(' '.join(str(text).split()).encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _result_size(result: Dict[str, Any]) -> int:
+    """Approximate bytes held by a query result (documents dominate)"""
+    size = 64
+    for key in RESULT_LIST_KEYS:
+        for row in result.get(key) or []:
+            for item in row or []:
+                if isinstance(item, str):
+                    size += len(item)
+                elif isinstance(item, dict):
+                    size += sum(len(str(k)) + len(str(v)) for k, v in item.items()) + 16
+                elif isinstance(item, (list, tuple, np.ndarray)):
+                    size += 4 * len(item)
+                else:
+                    size += 8
+    return size
+
+
+def _hits(result: Dict[str, Any]) -> int:
+    """Fewest hits returned for any query in the batch"""
+    ids = result.get('ids') or [[]]
+    return min(len(row or []) for row in ids) if ids else 0
+
+
+def slice_result(result: Dict[str, Any], n_results: int) -> Dict[str, Any]:
+    """Copy of a query result with every per-query list cut to n_results"""
+    sliced = dict(result)
+    for key in RESULT_LIST_KEYS:
+        rows = result.get(key)
+        if rows is not None:
+            sliced[key] = [list(row[:n_results]) if row is not None else None for row in rows]
+    return sliced
+
+
+class RAGResultCache:
+    """Thread-safe LRU of query results with entry and byte limits"""
+
+    def __init__(self, generations: Optional[GenerationStore] = None,
+                 max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            generations: Generation sidecar (default: the process-wide store)
+            max_entries: Max cached results
+            max_bytes: Approximate max total size of cached results
+        """
+        self.generations = generations or get_generation_store()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (result, n_results asked for, size)
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[str, Any], int, int]]" = OrderedDict()
+        self._latest: Dict[Any, int] = {}  # collection -> newest generation seen
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'uncacheable': 0, 'evictions': 0, 'expired': 0}
+
+    def current(self, collection: Union[str, Tuple[str, ...]]) -> Optional[int]:
+        """Generation of a collection, or the sum over a tuple of collections (None if any is unknown)"""
+        if isinstance(collection, str):
+            return self.generations.current(collection)
+        total = 0
+        for name in collection:
+            generation = self.generations.current(name)
+            if generation is None:
+                return None
+            total += generation
+        return total
+
+    @staticmethod
+    def make_key(collection: Union[str, Tuple[str, ...]], kwargs: Dict[str, Any], generation: int) -> Tuple:
+        """Key for one query call (everything but n_results)"""
+        return (
+            collection,
+            query_fingerprint(kwargs.get('query_texts'), kwargs.get('query_embeddings')),
+            json.dumps(kwargs.get('where'), sort_keys=True, default=str),
+            json.dumps(kwargs.get('where_document'), sort_keys=True, default=str),
+            json.dumps(sorted(kwargs['include']) if kwargs.get('include') else None),
+            generation,
+        )
+
+    def _observe_generation(self, collection: Union[str, Tuple[str, ...]], generation: int) -> None:
+        """Drop a collection's entries once a newer generation shows up (caller holds the lock)"""
+        latest = self._latest.get(collection)
+        if latest is not None and generation <= latest:
+            return
+        self._latest[collection] = generation
+        if latest is None:
+            return
+        stale = [key for key in self._entries if key[0] == collection and key[-1] < generation]
+        for key in stale:
+            self._drop(key)
+        self.stats['expired'] += len(stale)
+
+    def lookup(self, collection: Union[str, Tuple[str, ...]], kwargs: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        Cached result for a query call
+
+        Args:
+            collection: Collection name, or a tuple of names for a multi-collection tier
+            kwargs: collection.query() arguments
+
+        Returns:
+            (result or None, generation to store a fresh result under; None
+            means the generation is unknown and the result mustn't be cached)
+        """
+        generation = self.current(collection)
+        if generation is None:
+            self.stats['uncacheable'] += 1
+            return None, None
+        n_results = kwargs.get('n_results', 10)
+        key = self.make_key(collection, kwargs, generation)
+        with self._lock:
+            self._observe_generation(collection, generation)
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, cached_n, _ = entry
+                if n_results <= cached_n or _hits(result) < cached_n:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return slice_result(result, n_results), generation
+            self.stats['misses'] += 1
+        return None, generation
+
+    def store(self, collection: Union[str, Tuple[str, ...]], kwargs: Dict[str, Any], result: Dict[str, Any],
+              generation: Optional[int]) -> None:
+        """Cache a fresh result under the generation lookup() returned"""
+        if generation is None or not isinstance(result, dict):
+            return
+        n_results = kwargs.get('n_results', 10)
+        size = _result_size(result)
+        if size > self.max_bytes:
+            return
+        key = self.make_key(collection, kwargs, generation)
+        with self._lock:
+            if generation < self._latest.get(collection, generation):
+                return  # a write landed while this query ran
+            existing = self._entries.get(key)
+            if existing is not None and existing[1] >= n_results:
+                return  # already covers this page
+            self._drop(key)
+            self._entries[key] = (slice_result(result, n_results), n_results, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def query(self, collection: Union[str, Tuple[str, ...]], query_fn: Callable[..., Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """query_fn(**kwargs) through the cache"""
+        result, generation = self.lookup(collection, kwargs)
+        if result is not None:
+            return result
+        result = query_fn(**kwargs)
+        self.store(collection, kwargs, result, generation)
+        return result
+
+    def _drop(self, key: Tuple) -> None:
+        """Remove one entry (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                'generations': {key if isinstance(key, str) else '+'.join(key): generation
+                                for key, generation in self._latest.items()},
+                **self.stats,
+            }
+
+
+class VersionedCollection:
+    """
+    Chroma collection wrapper: writes bump the generation, queries use a cache
+
+    Everything else (count, get, peek, name, ...) is passed through, so
+    scripts can wrap the collection they already open and change nothing else.
+    """
+
+    WRITE_METHODS = ('add', 'upsert', 'update', 'delete')
+
+    def __init__(self, collection, cache: Optional[RAGResultCache] = None,
+                 generations: Optional[GenerationStore] = None):
+        """
+        Args:
+            collection: Chroma collection (or anything with the same methods)
+            cache: Result cache for query(); None queries the collection directly
+            generations: Generation sidecar (default: the cache's, else the
+                process-wide store)
+        """
+        self.collection = collection
+        self.cache = cache
+        self.generations = generations or (cache.generations if cache else get_generation_store())
+        self.collection_name = getattr(collection, 'name', 'default')
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.collection, name)
+        if name not in self.WRITE_METHODS:
+            return attr
+
+        def write(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            ids = kwargs.get('ids') or (args[0] if args else None)
+            writes = len(ids) if isinstance(ids, (list, tuple)) else 1
+            self.generations.bump(self.collection_name, writes)
+            return result
+        return write
+
+    def query(self, **kwargs) -> Dict[str, Any]:
+        if self.cache is None:
+            return self.collection.query(**kwargs)
+        return self.cache.query(self.collection_name, self.collection.query, **kwargs)
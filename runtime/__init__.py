@@ -0,0 +1,4 @@
+"""
+Runtime package - Backend lifecycle and request-path helpers
+"""
+# Make this a package
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Request Deadline - One latency budget shared by every stage of a request
+
+A Deadline is created when a request arrives and handed down the call
+chain. Each stage asks whether it can afford its next step (keeping back
+a reserve for later stages), caps its own timeouts to what is left, and
+records a named degradation whenever it skips or shortens work so the
+response can say what was cut.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Deadline:
+    """Absolute expiry time plus a log of degradations"""
+
+    def __init__(self, budget_s: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            budget_s: Seconds the whole request may take
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.budget_s = budget_s
+        self._clock = clock
+        self.started = clock()
+        self.expires_at = self.started + budget_s
+        self.degradations: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_request(cls, budget_ms: Any, default_s: float, max_s: float,
+                     min_s: float = 1.0) -> 'Deadline':
+        """
+        Deadline from a client-supplied budget in milliseconds
+
+        Missing or invalid values get default_s; valid ones are clamped to
+        [min_s, max_s] so a client can't ask for an unbounded request.
+        """
+        try:
+            budget_s = float(budget_ms) / 1000.0
+        except (TypeError, ValueError):
+            budget_s = default_s
+        if budget_s <= 0:
+            budget_s = default_s
+        return cls(min(max(budget_s, min_s), max_s))
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)"""
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, cost_s: float, reserve_s: float = 0.0) -> bool:
+        """True if a step costing cost_s fits while keeping reserve_s for later stages"""
+        return self.remaining() - reserve_s >= cost_s
+
+    def timeout(self, cap: Optional[float] = None, floor: float = 0.1) -> float:
+        """Remaining time as a timeout, optionally capped, never below floor"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return max(floor, remaining)
+
+    def degrade(self, what: str) -> None:
+        """Record that a stage skipped or shortened work (each name once)"""
+        with self._lock:
+            if what not in self.degradations:
+                self.degradations.append(what)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            degradations = list(self.degradations)
+        return {
+            'budget_ms': round(self.budget_s * 1000),
+            'elapsed_ms': round(self.elapsed() * 1000, 1),
+            'remaining_ms': round(self.remaining() * 1000, 1),
+            'degradations': degradations,
+        }
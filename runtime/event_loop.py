@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Background Event Loop - One long-lived asyncio loop for sync web handlers
+
+Flask routes and flask_sock handlers are synchronous. Instead of creating
+and closing an event loop per request, they hand coroutines to a single
+loop running on a daemon thread and either wait for the result or keep the
+future to cancel it later.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """An asyncio loop on its own daemon thread"""
+
+    def __init__(self, name: str = 'faithh-loop'):
+        """
+        Args:
+            name: Thread name (shows up in stack dumps)
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use"""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop, ready),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                logger.info(f"Background event loop started ({self.name})")
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine; returns immediately
+
+        Cancelling the returned future cancels the task on the loop.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def call_soon(self, callback, *args) -> None:
+        """Thread-safe call_soon on the loop"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the loop and join its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+# Global background loop
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Get the process-wide background loop"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Journaled JSON Store - In-memory JSON document with crash-safe persistence
+
+Replaces "rewrite the whole file on every update" for faithh_memory.json
+and scaffolding_state.json:
+
+- Reads come from an in-memory view (a copy, so callers can't corrupt it).
+- Updates are applied in memory and queued as small ops (set / delete /
+  push_front / append). A debounced flush appends them to a JSONL journal
+  next to the snapshot with a single write + fsync, off the request path.
+- Every `compact_every` ops (and on close) the full document is written to
+  the snapshot atomically (temp file + fsync + rename) and the journal is
+  reset to a header line naming the seq and the (mtime, size) of the
+  snapshot it extends. The snapshot itself stays plain user JSON.
+- A journal whose header doesn't match the snapshot on disk is older than
+  it: the snapshot was rewritten by another tool, or a compaction crashed
+  before resetting the journal. The snapshot wins and the journal's ops are
+  not replayed over it, so neither case applies an op twice or clobbers an
+  outside edit. (An outside writer that started from the snapshot alone
+  does drop journaled ops it never saw - last writer wins, as with any
+  shared file.)
+- A torn last journal line (crash mid-append) is ignored on load.
+- If the snapshot is edited by another tool while the store is open, the
+  store notices (mtime/size) and reloads it.
+
+Each file must have a single store. A store never re-reads the journal
+after loading, so ops another store appends are invisible to it and are
+lost when it compacts. Other processes should write the snapshot
+atomically (atomic_write_json) and let the store reload it.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Older snapshots carried their journal seq inline under this key; it is read
+# (and dropped) on load, never written
+SEQ_KEY = '_journal_seq'
+
+
+def atomic_write_json(path, data: Any, indent: int = 2) -> None:
+    """Write JSON to a temp file in the same directory, fsync, then rename over path"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def apply_op(doc: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """Apply one journal op to a document in place"""
+    path = op['path']
+    parent = doc
+    for key in path[:-1]:
+        if not isinstance(parent.get(key), dict):
+            parent[key] = {}
+        parent = parent[key]
+    key = path[-1]
+    kind = op['op']
+    if kind == 'set':
+        parent[key] = op['value']
+    elif kind == 'delete':
+        parent.pop(key, None)
+    elif kind in ('push_front', 'append'):
+        items = parent.get(key)
+        if not isinstance(items, list):
+            items = []
+        limit = op.get('limit')
+        if kind == 'push_front':
+            items.insert(0, op['value'])
+            if limit:
+                del items[limit:]
+        else:
+            items.append(op['value'])
+            if limit and len(items) > limit:
+                del items[:len(items) - limit]
+        parent[key] = items
+    else:
+        raise ValueError(f"Unknown journal op: {kind}")
+
+
+class JournaledJSONStore:
+    """One JSON document: snapshot file + append-only journal + in-memory view"""
+
+    def __init__(self, path, default: Optional[Dict[str, Any]] = None,
+                 journal_path=None, flush_delay: float = 0.5, compact_every: int = 200):
+        """
+        Args:
+            path: Snapshot file (e.g. ~/ai-stack/faithh_memory.json)
+            default: Document used when the snapshot doesn't exist yet
+            journal_path: Journal file (default: <stem>.journal.jsonl beside path)
+            flush_delay: Debounce window in seconds before queued ops hit the journal
+            compact_every: Journal ops before the snapshot is rewritten
+        """
+        self.path = Path(path)
+        self.journal_path = Path(journal_path) if journal_path else \
+            self.path.with_name(f"{self.path.stem}.journal.jsonl")
+        self.default = default
+        self.flush_delay = flush_delay
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._journal_ops = 0
+        self._seq = 0
+        self._base_seq = 0  # seq the snapshot on disk contains
+        self._signature = None
+        self._exists = False
+        self._data: Dict[str, Any] = {}
+        self.stats = {'ops': 0, 'flushes': 0, 'compactions': 0, 'reloads': 0,
+                      'superseded_journals': 0, 'torn_lines': 0, 'last_flush_ms': 0.0}
+        self._load()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _snapshot_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self) -> None:
+        """Snapshot + journal ops newer than it (caller holds the lock or is __init__)"""
+        data = None
+        self._signature = self._snapshot_signature()
+        if self._signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read {self.path}: {e}")
+        self._exists = data is not None
+        if not isinstance(data, dict):
+            data = copy.deepcopy(self.default) if self.default is not None else {}
+        legacy_seq = data.pop(SEQ_KEY, None)
+
+        header, ops = self._read_journal()
+        rewrite = False
+        if header is None:
+            # No journal yet, or one from before headers: the seq (if any) is in the snapshot
+            snapshot_seq = legacy_seq or 0
+            rewrite = bool(ops) or legacy_seq is not None
+        elif header.get('snapshot') == self._signature_field():
+            snapshot_seq = header['snapshot_seq']
+        else:
+            # The snapshot is newer than this journal: keep it as is
+            snapshot_seq = max([header['snapshot_seq']] + [op['seq'] for op in ops])
+            ops = []
+            rewrite = True
+            self.stats['superseded_journals'] += 1
+            logger.info(f"{self.path.name} was rewritten outside the journal; "
+                        f"not replaying older journal ops over it")
+
+        self._seq = self._base_seq = snapshot_seq
+        self._journal_ops = 0
+        kept = []
+        for op in ops:
+            if op['seq'] <= snapshot_seq:
+                continue
+            apply_op(data, op)
+            kept.append(op)
+            self._seq = op['seq']
+            self._journal_ops += 1
+            self._exists = True
+        self._data = data
+        if rewrite:
+            try:
+                self._write_journal(kept)
+            except OSError as e:
+                logger.error(f"Could not reset journal for {self.path.name}: {e}")
+
+    def _signature_field(self) -> Optional[List[int]]:
+        return list(self._signature) if self._signature is not None else None
+
+    def _header(self) -> Dict[str, Any]:
+        """First journal line: the snapshot (seq, mtime/size) the ops below extend"""
+        return {'snapshot_seq': self._base_seq, 'snapshot': self._signature_field()}
+
+    def _write_journal(self, ops: List[Dict[str, Any]]) -> None:
+        """Atomically replace the journal with a fresh header plus ops"""
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.journal_path.parent,
+                                        prefix=f'.{self.journal_path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in [self._header()] + ops))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _read_journal(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """(header or None, ops) from the journal file"""
+        header, ops = None, []
+        try:
+            with open(self.journal_path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return header, ops
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                self.stats['torn_lines'] += 1
+                logger.warning(f"{self.journal_path.name}: skipping unreadable line {number}")
+                continue
+            if 'op' in entry:
+                ops.append(entry)
+            elif header is None and 'snapshot_seq' in entry:
+                header = entry
+        return header, ops
+
+    def _check_external_edit(self) -> None:
+        signature = self._snapshot_signature()
+        if signature == self._signature:
+            return
+        logger.info(f"{self.path.name} changed on disk, reloading")
+        self.stats['reloads'] += 1
+        pending = self._pending
+        self._load()
+        for op in pending:
+            apply_op(self._data, op)
+            self._seq = max(self._seq, op['seq'])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        """True once there is a snapshot or any recorded update"""
+        with self._lock:
+            self._check_external_edit()
+            return self._exists or bool(self._pending)
+
+    def view(self) -> Dict[str, Any]:
+        """Deep copy of the current document"""
+        with self._lock:
+            self._check_external_edit()
+            return copy.deepcopy(self._data)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _record(self, kind: str, path: Sequence[str], value: Any = None,
+                limit: Optional[int] = None) -> None:
+        if not path:
+            raise ValueError("Journal ops need a non-empty path")
+        with self._lock:
+            self._check_external_edit()
+            self._seq += 1
+            op = {'seq': self._seq, 'op': kind, 'path': list(path),
+                  'ts': datetime.now().isoformat()}
+            if kind != 'delete':
+                op['value'] = copy.deepcopy(value)
+            if limit:
+                op['limit'] = limit
+            apply_op(self._data, op)
+            self._pending.append(op)
+            self.stats['ops'] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def set(self, path: Sequence[str], value: Any) -> None:
+        """doc[path] = value"""
+        self._record('set', path, value)
+
+    def delete(self, path: Sequence[str]) -> None:
+        self._record('delete', path)
+
+    def push_front(self, path: Sequence[str], item: Any, limit: Optional[int] = None) -> None:
+        """Insert at the head of the list at path, keeping at most `limit` items"""
+        self._record('push_front', path, item, limit)
+
+    def append(self, path: Sequence[str], item: Any, limit: Optional[int] = None) -> None:
+        """Append to the list at path, keeping the newest `limit` items"""
+        self._record('append', path, item, limit)
+
+    def replace(self, document: Dict[str, Any]) -> int:
+        """
+        Make the stored document equal `document`, journaling only changed top-level keys
+
+        Returns:
+            Number of ops recorded
+        """
+        with self._lock:
+            self._check_external_edit()
+            current = self._data
+            changed = 0
+            for key in list(current):
+                if key not in document:
+                    self.delete([key])
+                    changed += 1
+            for key, value in document.items():
+                if key == SEQ_KEY:
+                    continue
+                if key not in current or current[key] != value:
+                    self.set([key], value)
+                    changed += 1
+            return changed
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def flush(self) -> None:
+        """Append queued ops to the journal now (compacting if it has grown)"""
+        with self._lock:
+            self._timer = None
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            start = time.perf_counter()
+            try:
+                if not self.journal_path.exists():
+                    self._write_journal(pending)
+                else:
+                    with open(self.journal_path, 'a') as f:
+                        f.write(''.join(json.dumps(op) + '\n' for op in pending))
+                        f.flush()
+                        os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"Journal write failed for {self.path.name}: {e}")
+                self._pending = pending + self._pending
+                return
+            self._journal_ops += len(pending)
+            self._exists = True
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            if self._journal_ops >= self.compact_every:
+                self.compact()
+
+    def compact(self) -> None:
+        """Write the full document to the snapshot atomically and empty the journal"""
+        with self._lock:
+            # Queued ops go straight into the snapshot instead of the journal
+            pending, self._pending = self._pending, []
+            try:
+                atomic_write_json(self.path, self._data)
+                self._signature = self._snapshot_signature()
+                self._base_seq = self._seq
+                # Ops up to _seq are in the snapshot now; a crash before this
+                # reset leaves a header that no longer matches the snapshot,
+                # so the old ops are skipped on load
+                self._write_journal([])
+            except OSError as e:
+                logger.error(f"Compaction failed for {self.path.name}: {e}")
+                self._pending = pending + self._pending
+                return
+            self._journal_ops = 0
+            self._exists = True
+            self.stats['compactions'] += 1
+
+    def close(self) -> None:
+        """Flush and compact (registered with atexit)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending or self._journal_ops:
+                self.compact()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'path': str(self.path),
+                'seq': self._seq,
+                'pending_ops': len(self._pending),
+                'journal_ops': self._journal_ops,
+                **self.stats,
+            }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Readiness Tracker - Background dependency initialization with backoff
+
+Lets the backend bind its port immediately while slow dependencies
+(embedding model, ChromaDB) come up in background threads. Each
+dependency reports its own state for /health/ready.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+STARTING = 'starting'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Dependency:
+    """One background-initialized dependency and its current state"""
+
+    def __init__(
+        self,
+        name: str,
+        init_fn: Callable[[], Any],
+        check_fn: Optional[Callable[[], bool]] = None,
+        required: bool = True,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        check_interval: float = 30.0,
+        depends_on: Optional[list] = None,
+    ):
+        """
+        Args:
+            name: Dependency name shown in /health/ready
+            init_fn: Connects/loads the dependency; raises on failure
+            check_fn: Optional liveness check once ready; False/raise triggers reconnect
+            required: Whether readiness of the service requires this dependency
+            initial_backoff: First retry delay in seconds
+            max_backoff: Retry delay cap in seconds
+            check_interval: Seconds between check_fn calls while ready
+            depends_on: Dependencies that must be ready before init_fn runs
+        """
+        self.name = name
+        self.init_fn = init_fn
+        self.check_fn = check_fn
+        self.required = required
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.check_interval = check_interval
+        self.depends_on = depends_on or []
+
+        self.state = PENDING
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.ready_at: Optional[str] = None
+        self.time_to_ready: Optional[float] = None
+        self.ready_event = threading.Event()
+        self._started = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'required': self.required,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'ready_at': self.ready_at,
+            'time_to_ready_s': round(self.time_to_ready, 3) if self.time_to_ready is not None else None,
+        }
+
+
+class ReadinessTracker:
+    """Starts dependencies in daemon threads and keeps them connected"""
+
+    def __init__(self):
+        self.dependencies: Dict[str, Dependency] = {}
+        self.started_at = time.monotonic()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self.started = False
+
+    def register(self, name: str, init_fn: Callable[[], Any], **kwargs) -> Dependency:
+        """Register a dependency (call start() to begin initialization)"""
+        dep = Dependency(name, init_fn, **kwargs)
+        self.dependencies[name] = dep
+        return dep
+
+    def start(self) -> bool:
+        """
+        Launch one supervisor thread per dependency (only the first call does)
+
+        Returns:
+            True if this call started them
+        """
+        with self._start_lock:
+            if self.started:
+                return False
+            self.started = True
+        for dep in self.dependencies.values():
+            thread = threading.Thread(target=self._supervise, args=(dep,),
+                                      name=f"init-{dep.name}", daemon=True)
+            thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Readiness of one dependency, or of all required ones"""
+        if name is not None:
+            dep = self.dependencies.get(name)
+            return bool(dep and dep.state == READY)
+        return all(d.state == READY for d in self.dependencies.values() if d.required)
+
+    def wait_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        dep = self.dependencies.get(name)
+        return bool(dep and dep.ready_event.wait(timeout))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'ready': self.is_ready(),
+            'uptime_s': round(time.monotonic() - self.started_at, 3),
+            'dependencies': {name: dep.snapshot() for name, dep in self.dependencies.items()},
+        }
+
+    def _supervise(self, dep: Dependency) -> None:
+        """Init with exponential backoff, then health-check and reconnect on loss"""
+        for upstream in dep.depends_on:
+            while not self._stop.is_set() and not self.wait_ready(upstream, timeout=1.0):
+                pass
+
+        backoff = dep.initial_backoff
+        while not self._stop.is_set():
+            if dep.state != READY:
+                dep.state = STARTING
+                dep.attempts += 1
+                try:
+                    dep.init_fn()
+                    dep.state = READY
+                    dep.last_error = None
+                    dep.ready_at = datetime.now().isoformat()
+                    if dep.time_to_ready is None:
+                        dep.time_to_ready = time.monotonic() - dep._started
+                    dep.ready_event.set()
+                    backoff = dep.initial_backoff
+                    logger.info(f"{dep.name} ready after {dep.attempts} attempt(s)")
+                except Exception as e:
+                    dep.state = FAILED
+                    dep.last_error = str(e)
+                    logger.warning(f"{dep.name} init failed (retry in {backoff:.0f}s): {e}")
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, dep.max_backoff)
+                    continue
+
+            if dep.check_fn is None:
+                return  # nothing to monitor once ready
+
+            self._stop.wait(dep.check_interval)
+            try:
+                healthy = dep.check_fn()
+            except Exception as e:
+                healthy = False
+                dep.last_error = str(e)
+            if not healthy:
+                logger.warning(f"{dep.name} health check failed, reconnecting")
+                dep.state = FAILED
+                dep.ready_event.clear()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Session Summary - Rolling summaries of evicted chat history
+
+Sessions keep their last few exchanges verbatim. Exchanges pushed out of
+that window are handed to a SessionSummarizer, which folds them into a
+compact running summary on a background thread (after the reply has gone
+out), preferably with a small local model. fit_history() then renders
+summary + recent turns within a fixed token budget, so long sessions keep
+their context while the prompt stays the same size.
+
+The verbatim window and the prompt's recent turns are the same size, and
+exchanges still waiting for (or in the middle of) a fold are rendered as
+one-line notes after the summary, so every exchange is in the prompt in
+one form or another.
+
+If the model is unavailable the fold falls back to an extractive summary
+(one trimmed line per exchange), so nothing is silently lost.
+"""
+import logging
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate; good enough for budgeting prompt sections
+CHARS_PER_TOKEN = 4
+
+FOLD_PROMPT = """You maintain a running summary of a conversation between a user and FAITHH, their AI assistant.
+Update the summary with the new exchanges below. Keep decisions, facts, names, open questions and the user's goals; drop pleasantries and anything already covered.
+Reply with terse bullet points only, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New exchanges:
+{exchanges}
+
+Updated summary:"""
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to roughly `tokens` tokens (marking the cut)"""
+    limit = max(0, tokens) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 3)].rstrip() + "..."
+
+
+def format_exchange(exchange: Dict[str, Any], max_assistant_chars: int = 500) -> str:
+    """One exchange as prompt text (long assistant replies truncated)"""
+    assistant_text = exchange.get('assistant', '')
+    if len(assistant_text) > max_assistant_chars:
+        assistant_text = assistant_text[:max_assistant_chars] + "..."
+    return f"User: {exchange.get('user', '')}\nAssistant: {assistant_text}\n"
+
+
+def exchange_line(exchange: Dict[str, Any], max_chars: int = 160) -> str:
+    """One trimmed summary line for an exchange"""
+    user = ' '.join(exchange.get('user', '').split())[:max_chars]
+    reply = ' '.join(exchange.get('assistant', '').split())[:max_chars]
+    return f"- User asked: {user} | FAITHH: {reply}"
+
+
+def fit_history(history: List[Dict[str, Any]], summary: Optional[str] = None,
+                max_turns: int = 5, budget_tokens: int = 1500,
+                max_assistant_chars: int = 500,
+                pending: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    """
+    Render summary + recent turns within a token budget
+
+    The summary gets at most half the budget; recent turns fill the rest,
+    newest first, so the oldest of the recent turns is what gets dropped.
+
+    Args:
+        history: Exchanges kept verbatim
+        summary: Running summary of older exchanges
+        max_turns: Recent exchanges shown verbatim
+        budget_tokens: Size cap of the rendered text
+        max_assistant_chars: Per-reply cap for verbatim turns
+        pending: Exchanges evicted but not folded into the summary yet
+            (shown as one line each after it)
+
+    Returns:
+        History text, or None if there is nothing to show
+    """
+    parts = []
+    used = 0
+    if pending:
+        summary = "\n".join(([summary] if summary else []) + [exchange_line(e) for e in pending])
+    if summary:
+        summary = truncate_to_tokens(summary, budget_tokens // 2)
+        block = f"Earlier in this conversation (summary):\n{summary}\n"
+        parts.append(block)
+        used += estimate_tokens(block)
+
+    turns = []
+    for exchange in reversed(history[-max_turns:] if max_turns > 0 else []):
+        text = format_exchange(exchange, max_assistant_chars)
+        cost = estimate_tokens(text)
+        if used + cost > budget_tokens:
+            if not turns:  # always keep the latest turn, trimmed
+                turns.append(truncate_to_tokens(text, budget_tokens - used))
+            break
+        turns.append(text)
+        used += cost
+    parts.extend(reversed(turns))
+    return "\n".join(parts) if parts else None
+
+
+class SessionSummarizer:
+    """Folds evicted exchanges into session['summary'] on a worker thread"""
+
+    def __init__(self, summarize_fn: Optional[Callable[[str, int], str]] = None,
+                 max_summary_tokens: int = 300, max_exchange_chars: int = 1500):
+        """
+        Args:
+            summarize_fn: (prompt, max_tokens) -> summary text; None for
+                extractive summaries only
+            max_summary_tokens: Size cap of a session's running summary
+            max_exchange_chars: Per-message cap when building the fold prompt
+        """
+        self.summarize_fn = summarize_fn
+        self.max_summary_tokens = max_summary_tokens
+        self.max_exchange_chars = max_exchange_chars
+        self._queue: Queue = Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {'folds': 0, 'exchanges_folded': 0, 'fallbacks': 0, 'last_fold_ms': 0.0}
+
+    def record(self, session: Dict[str, Any], exchange: Dict[str, Any], keep: int) -> None:
+        """Append an exchange to session['history'], evicting all but the newest `keep`"""
+        history = session.setdefault('history', [])
+        history.append(exchange)
+        if len(history) > keep:
+            session['history'] = history[-keep:] if keep > 0 else []
+            self.evict(session, history[:len(history) - len(session['history'])])
+
+    def evict(self, session: Dict[str, Any], exchanges: List[Dict[str, Any]]) -> None:
+        """Queue exchanges that left the session's verbatim window (returns immediately)"""
+        if not exchanges:
+            return
+        with self._lock:
+            session.setdefault('unsummarized', []).extend(exchanges)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='session-summarizer',
+                                                daemon=True)
+                self._worker.start()
+        self._queue.put(session)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                session = self._queue.get(timeout=60)
+            except Empty:
+                continue
+            try:
+                self.fold(session)
+            except Exception as e:
+                logger.warning(f"Session summary fold failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def fold(self, session: Dict[str, Any]) -> bool:
+        """
+        Fold the session's pending exchanges into its summary (synchronously)
+
+        Returns:
+            True if the summary changed
+        """
+        # Exchanges stay in 'unsummarized' (and so in the prompt) until the
+        # new summary that covers them is in place
+        with self._lock:
+            pending = list(session.get('unsummarized', []))
+            summary = session.get('summary', '')
+        if not pending:
+            return False
+
+        start = time.perf_counter()
+        new_summary = None
+        if self.summarize_fn is not None:
+            prompt = FOLD_PROMPT.format(
+                max_words=int(self.max_summary_tokens * 0.75),
+                summary=summary or "(empty)",
+                exchanges="\n".join(format_exchange(e, self.max_exchange_chars)[:2 * self.max_exchange_chars]
+                                    for e in pending),
+            )
+            try:
+                new_summary = (self.summarize_fn(prompt, self.max_summary_tokens) or '').strip()
+            except Exception as e:
+                logger.warning(f"Session summary model failed, using extractive summary: {e}")
+        if not new_summary:
+            self.stats['fallbacks'] += 1
+            new_summary = self._extractive(summary, pending)
+
+        with self._lock:
+            session['summary'] = truncate_to_tokens(new_summary, self.max_summary_tokens)
+            remaining = session.get('unsummarized', [])[len(pending):]
+            if remaining:
+                session['unsummarized'] = remaining
+            else:
+                session.pop('unsummarized', None)
+            session['summarized_exchanges'] = session.get('summarized_exchanges', 0) + len(pending)
+        self.stats['folds'] += 1
+        self.stats['exchanges_folded'] += len(pending)
+        self.stats['last_fold_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return True
+
+    def _extractive(self, summary: str, pending: List[Dict[str, Any]]) -> str:
+        """Previous summary lines + one trimmed line per exchange, oldest dropped first"""
+        lines = [line for line in (summary or '').splitlines() if line.strip()]
+        lines.extend(exchange_line(exchange) for exchange in pending)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.max_summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued fold has finished (tests / shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'pending': self._queue.unfinished_tasks, **self.stats}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Single-Flight - Coalesce identical concurrent calls into one computation
+
+When the UI retries, or several tabs ask the same thing at once, every
+request would otherwise run its own ChromaDB query / embedding / model
+call. A SingleFlight group runs the first call for a key on its worker
+pool and lets every identical call that arrives while it is running wait
+on the same future:
+
+    rag_flights = SingleFlight('rag')
+    results = rag_flights.do(make_key('rag', query, where), lambda: query_chroma(...),
+                             timeout=deadline.timeout())
+
+- Results and exceptions reach every waiter.
+- Each waiter has its own timeout; leaving early doesn't affect the others.
+- When the last waiter leaves, work that hasn't started yet is cancelled;
+  work already running finishes and its result is dropped.
+- Nothing is cached: once a flight lands, the next call starts a new one.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different retries share a key"""
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def make_key(*parts: Any) -> str:
+    """Stable digest of the parts (strings whitespace-normalized, dicts key-sorted)"""
+    normalized = [normalize_text(p) if isinstance(p, str) else p for p in parts]
+    raw = json.dumps(normalized, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    __slots__ = ('future', 'waiters')
+
+    def __init__(self, future: Future):
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Group of in-flight calls keyed by make_key()"""
+
+    def __init__(self, name: str, max_workers: int = 16):
+        """
+        Args:
+            name: Used for thread names and logs
+            max_workers: Concurrent distinct computations
+        """
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix=f"flight-{name}")
+        self._flights: Dict[str, _Flight] = {}
+        # Reentrant: a flight that finishes instantly lands inside _join
+        self._lock = threading.RLock()
+        self.counters = {'calls': 0, 'started': 0, 'coalesced': 0,
+                         'abandoned': 0, 'errors': 0, 'timeouts': 0}
+
+    def _join(self, key: str, fn: Callable[[], Any]) -> _Flight:
+        with self._lock:
+            self.counters['calls'] += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight(self._pool.submit(fn))
+                self._flights[key] = flight
+                self.counters['started'] += 1
+                flight.future.add_done_callback(lambda f, k=key, fl=flight: self._land(k, fl))
+            else:
+                self.counters['coalesced'] += 1
+            flight.waiters += 1
+            return flight
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not flight.future.cancelled() and flight.future.exception() is not None:
+                self.counters['errors'] += 1
+
+    def _leave(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters > 0 or flight.future.done():
+                return
+            # Nobody is waiting any more: drop queued work, let running work finish
+            self.counters['abandoned'] += 1
+            if flight.future.cancel() and self._flights.get(key) is flight:
+                del self._flights[key]
+        logger.info(f"single-flight {self.name}: all waiters left {key[:12]}")
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn once per concurrent key and return its result to every caller
+
+        Args:
+            key: Identity of the call (see make_key)
+            fn: Zero-argument callable doing the work
+            timeout: Seconds this caller will wait (None: until done)
+
+        Returns:
+            fn's result
+
+        Raises:
+            Whatever fn raised; TimeoutError if this caller's timeout ran out
+        """
+        flight = self._join(key, fn)
+        try:
+            return flight.future.result(timeout)
+        except TimeoutError:
+            if not flight.future.done():  # this caller gave up (not fn raising)
+                with self._lock:
+                    self.counters['timeouts'] += 1
+            raise
+        except CancelledError:
+            raise TimeoutError(f"single-flight {self.name}: call abandoned")
+        finally:
+            self._leave(key, flight)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'in_flight': len(self._flights), **self.counters}
@@ -11,6 +11,8 @@ from pathlib import Path
 from datetime import datetime
 import json
 
+from runtime.journal_store import atomic_write_json
+
 # ============================================================
 # SCAFFOLDING STATE - PERSISTENT STRUCTURAL AWARENESS
 # ============================================================
@@ -32,8 +34,9 @@ def save_scaffolding(scaffolding):
     """Persist scaffolding state to disk"""
     try:
         scaffolding['meta']['last_updated'] = datetime.now().isoformat()
-        with open(SCAFFOLDING_FILE, 'w') as f:
-            json.dump(scaffolding, f, indent=2)
+        # Atomic, so the backend's journaled store never reads a half-written
+        # file; it notices the new snapshot and reloads it
+        atomic_write_json(SCAFFOLDING_FILE, scaffolding)
         print(f"🏗️  Scaffolding saved: {datetime.now().strftime('%H:%M:%S')}")
     except Exception as e:
         print(f"❌ Error saving scaffolding: {e}")
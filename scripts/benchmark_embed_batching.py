@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Embedding Micro-Batching Benchmark - Concurrent single-query encode throughput
+
+Simulates N chat requests each embedding one query at a time, first with
+direct model calls (batch size 1 per request) and then through MicroBatcher.
+
+Usage:
+    python scripts/benchmark_embed_batching.py --threads 16 --queries 20
+    python scripts/benchmark_embed_batching.py --wait-ms 2 5 10 --max-batch 32
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from embeddings.batcher import MicroBatcher
+
+SAMPLE_QUERIES = [
+    "What is FAITHH?",
+    "How does the RAG pipeline pick chunks?",
+    "What did we decide about ChromaDB collections?",
+    "Explain the Constella governance model",
+    "Which mastering chain did I use for the last track?",
+    "How do I restart the backend?",
+    "What is the resonance journal for?",
+    "Summarize the Penumbra thread",
+]
+
+
+def run_load(encode_one, threads: int, per_thread: int):
+    """Fire threads * per_thread single-query calls, return (qps, latencies ms)"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(tid):
+        barrier.wait()
+        local = []
+        for i in range(per_thread):
+            query = f"{SAMPLE_QUERIES[(tid + i) % len(SAMPLE_QUERIES)]} #{tid}-{i}"
+            start = time.perf_counter()
+            encode_one(query)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.array(latencies)
+
+
+def report(name, qps, latencies, extra=""):
+    print(f"{name:<26}{qps:>10.1f}{np.percentile(latencies, 50):>10.1f}"
+          f"{np.percentile(latencies, 95):>10.1f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching throughput benchmark")
+    parser.add_argument('--model', default='all-mpnet-base-v2')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent requests')
+    parser.add_argument('--queries', type=int, default=20, help='Queries per thread')
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--wait-ms', type=float, nargs='+', default=[2.0, 5.0, 10.0])
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    print(f"Loading {args.model}...")
+    model = SentenceTransformer(args.model)
+    model.encode(["warmup"])
+
+    def encode(texts):
+        return model.encode(texts, batch_size=args.max_batch, show_progress_bar=False)
+
+    print(f"{args.threads} threads x {args.queries} queries\n")
+    print(f"{'config':<26}{'qps':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 56)
+
+    qps, lat = run_load(lambda q: encode([q]), args.threads, args.queries)
+    report("unbatched (bs=1)", qps, lat)
+    baseline = qps
+
+    for wait_ms in args.wait_ms:
+        batcher = MicroBatcher(encode, max_batch=args.max_batch, max_wait_ms=wait_ms)
+        qps, lat = run_load(lambda q: batcher.submit([q]), args.threads, args.queries)
+        s = batcher.stats()
+        report(f"batched wait={wait_ms:g}ms", qps, lat,
+               f"x{qps / baseline:.1f}  avg_batch={s['avg_batch']}  avg_wait={s['avg_wait_ms']}ms")
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
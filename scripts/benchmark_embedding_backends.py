@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Tool - Export ONNX models, verify agreement, benchmark
+
+Usage:
+    # 1. Export all-mpnet-base-v2 to ONNX (+ int8) and verify vs PyTorch
+    python scripts/benchmark_embedding_backends.py export
+
+    # 2. Compare encode throughput and peak RSS per backend
+    python scripts/benchmark_embedding_backends.py benchmark --texts 512
+
+    # 3. Select a backend for the backend server and indexers
+    export FAITHH_EMBED_BACKEND=onnx-int8
+
+The export step embeds the test_rag_quality questions plus chunks of the
+repo's markdown docs with both PyTorch and ONNX, and records the cosine
+agreement in the export manifest. Variants below --min-cosine are reported
+as failing, and the loader refuses them at runtime.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from embeddings.backends import (
+    BACKENDS, DEFAULT_MIN_COSINE, OnnxEncoder, export_onnx, load_encoder,
+    measure_agreement, onnx_model_dir, record_agreement,
+)
+
+DEFAULT_MODEL = "all-mpnet-base-v2"
+
+
+def sample_texts(limit: int, chunk_chars: int = 800):
+    """RAG test questions plus fixed-size chunks of the repo's markdown docs"""
+    texts = []
+    try:
+        from tests.test_rag_quality import TEST_QUERIES
+        texts.extend(q['query'] for q in TEST_QUERIES)
+    except (ImportError, SystemExit):
+        pass
+    for path in sorted(REPO_ROOT.glob("*.md")) + sorted((REPO_ROOT / "docs").rglob("*.md")):
+        content = path.read_text(errors='ignore')
+        for start in range(0, len(content), chunk_chars):
+            chunk = content[start:start + chunk_chars].strip()
+            if len(chunk) > 40:
+                texts.append(chunk)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def export(args):
+    print(f"1. Exporting {args.model} to ONNX...")
+    out_dir = export_onnx(args.model, args.out_dir, quantize=not args.no_int8)
+    print(f"✅ Export written to {out_dir}")
+
+    print("\n2. Verifying cosine agreement against PyTorch...")
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(args.model, device='cpu')
+    texts = sample_texts(args.texts)
+
+    failed = False
+    variants = ['onnx'] if args.no_int8 else ['onnx', 'onnx-int8']
+    for variant in variants:
+        encoder = OnnxEncoder(out_dir, quantized=(variant == 'onnx-int8'))
+        agreement = measure_agreement(encoder, reference, texts)
+        agreement['threshold'] = args.min_cosine
+        agreement['passed'] = agreement['min_cosine'] >= args.min_cosine
+        record_agreement(out_dir, variant, agreement)
+        status = "✅" if agreement['passed'] else "❌"
+        failed |= not agreement['passed']
+        print(f"{status} {variant:<10} min={agreement['min_cosine']:.5f} "
+              f"p01={agreement['p01_cosine']:.5f} mean={agreement['mean_cosine']:.5f} "
+              f"({agreement['texts']} texts)")
+
+    if failed:
+        print(f"\n⚠️  Variants below {args.min_cosine} will be refused by the loader")
+        sys.exit(1)
+
+
+def run_one(args):
+    """Child process: load one backend, encode, print JSON (isolates RSS)"""
+    os.environ['FAITHH_ONNX_MIN_COSINE'] = str(args.min_cosine)
+    texts = sample_texts(args.texts)
+
+    start = time.perf_counter()
+    encoder = load_encoder(args.model, backend=args.backend)
+    load_s = time.perf_counter() - start
+    encoder.encode(texts[:8], batch_size=args.batch_size)  # warm up
+
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=args.batch_size)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts[:args.single_queries]:
+        encoder.encode([text])
+    single_ms = (time.perf_counter() - start) * 1000 / max(1, min(len(texts), args.single_queries))
+
+    print(json.dumps({
+        'backend': args.backend,
+        'actual': type(encoder).__name__,
+        'load_s': load_s,
+        'texts_per_s': len(texts) / batch_s,
+        'single_query_ms': single_ms,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def benchmark(args):
+    print(f"{args.model}: {args.texts} texts, batch_size={args.batch_size}\n")
+    print(f"{'backend':<12}{'load s':>9}{'texts/s':>10}{'1-query ms':>12}{'peak RSS MB':>13}")
+    print("-" * 56)
+    for backend in args.backends:
+        cmd = [sys.executable, __file__, '_run', '--backend', backend, '--model', args.model,
+               '--texts', str(args.texts), '--batch-size', str(args.batch_size),
+               '--single-queries', str(args.single_queries), '--min-cosine', str(args.min_cosine)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend:<12}❌ {proc.stderr.strip().splitlines()[-1] if proc.stderr else 'failed'}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        note = "" if r['actual'] == 'OnnxEncoder' or backend == 'torch' else "  (fell back to torch)"
+        print(f"{backend:<12}{r['load_s']:>9.1f}{r['texts_per_s']:>10.1f}"
+              f"{r['single_query_ms']:>12.1f}{r['peak_rss_mb']:>13.0f}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tool")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--min-cosine', type=float, default=DEFAULT_MIN_COSINE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_p = sub.add_parser('export', help='Export to ONNX and verify agreement')
+    export_p.add_argument('--out-dir', type=Path, default=None,
+                          help=f'Default: {onnx_model_dir(DEFAULT_MODEL)}')
+    export_p.add_argument('--no-int8', action='store_true', help='Skip dynamic int8 model')
+    export_p.add_argument('--texts', type=int, default=500, help='Texts for agreement check')
+
+    for name in ('benchmark', '_run'):
+        p = sub.add_parser(name, help='Throughput + RSS per backend' if name == 'benchmark' else None)
+        p.add_argument('--texts', type=int, default=512)
+        p.add_argument('--batch-size', type=int, default=32)
+        p.add_argument('--single-queries', type=int, default=50)
+        if name == 'benchmark':
+            p.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+        else:
+            p.add_argument('--backend', choices=BACKENDS, required=True)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        export(args)
+    elif args.command == 'benchmark':
+        benchmark(args)
+    else:
+        run_one(args)
+
+
+if __name__ == "__main__":
+    main()
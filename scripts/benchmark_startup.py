@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Backend Startup Benchmark
+Launches the backend and measures time-to-live (port bound) and
+time-to-ready (embedding model warm + ChromaDB connected).
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 3 --timeout 180
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+BACKEND = Path(__file__).resolve().parent.parent / "faithh_professional_backend_fixed.py"
+BASE_URL = "http://localhost:5557"
+
+
+def wait_for(url, expect_ok, deadline):
+    """Poll url until it answers (and returns 200 if expect_ok); return elapsed or None"""
+    while time.monotonic() < deadline:
+        try:
+            r = requests.get(url, timeout=1)
+            if not expect_ok or r.status_code == 200:
+                return r
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return None
+
+
+def run_once(timeout):
+    start = time.monotonic()
+    deadline = start + timeout
+    proc = subprocess.Popen(
+        [sys.executable, str(BACKEND)],
+        cwd=BACKEND.parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=dict(os.environ),
+    )
+    try:
+        live = wait_for(f"{BASE_URL}/health/live", expect_ok=True, deadline=deadline)
+        t_live = time.monotonic() - start if live else None
+        ready = wait_for(f"{BASE_URL}/health/ready", expect_ok=True, deadline=deadline)
+        t_ready = time.monotonic() - start if ready else None
+        deps = ready.json().get('dependencies', {}) if ready else {}
+        return t_live, t_ready, deps
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        time.sleep(1)  # let the port free up
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend startup benchmark")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=180)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FAITHH BACKEND STARTUP BENCHMARK")
+    print("=" * 60)
+
+    lives, readies = [], []
+    for i in range(args.runs):
+        t_live, t_ready, deps = run_once(args.timeout)
+        live_s = f"{t_live:.2f}s" if t_live is not None else "timeout"
+        ready_s = f"{t_ready:.2f}s" if t_ready is not None else "timeout"
+        print(f"Run {i + 1}: live {live_s}  ready {ready_s}")
+        for name, dep in deps.items():
+            print(f"   {name}: {dep.get('time_to_ready_s')}s ({dep.get('attempts')} attempts)")
+        if t_live is not None:
+            lives.append(t_live)
+        if t_ready is not None:
+            readies.append(t_ready)
+
+    print("-" * 60)
+    if lives:
+        print(f"Time to live  (median): {statistics.median(lives):.2f}s")
+    if readies:
+        print(f"Time to ready (median): {statistics.median(readies):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,17 @@ Breaks long conversations into topical chunks for better RAG retrieval
 
 import json
 import chromadb
-from chromadb.utils import embedding_functions
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import re
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from embeddings.client import get_embedding_function
+from retrieval.hierarchical import CONVERSATION_COLLECTION, conversation_record
+from retrieval.result_cache import VersionedCollection
 
 # Configuration
 CHROMA_HOST = "localhost"
@@ -93,14 +99,20 @@ def main():
     try:
         client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
         
-        embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-mpnet-base-v2"
-        )
+        embedding_func = get_embedding_function("all-mpnet-base-v2")
         
-        collection = client.get_collection(
+        # Writes bump the collection generation so cached RAG results expire
+        collection = VersionedCollection(client.get_collection(
             name=COLLECTION_NAME,
             embedding_function=embedding_func
-        )
+        ))
+        
+        # One vector per conversation for coarse-to-fine retrieval
+        conversation_index = VersionedCollection(client.get_or_create_collection(
+            name=CONVERSATION_COLLECTION,
+            embedding_function=embedding_func,
+            metadata={'hnsw:space': (collection.metadata or {}).get('hnsw:space', 'l2')}
+        ))
         
         print(f"✅ Connected to collection '{COLLECTION_NAME}'")
         print(f"   Current documents: {collection.count()}")
@@ -136,11 +148,15 @@ def main():
     batch_ids = []
     batch_docs = []
     batch_metas = []
+    conversation_records = []
     
     for conv in conversations_with_messages:
         try:
             chunks = chunk_conversation(conv, chunk_size=5)  # 5 message pairs per chunk
             total_chunks += len(chunks)
+            record = conversation_record(conv, len(chunks))
+            if record:
+                conversation_records.append(record)
             
             for chunk in chunks:
                 chunk_id = get_chunk_id(conv['uuid'], chunk['chunk_num'])
@@ -150,6 +166,7 @@ def main():
                     'source': f"Claude: {conv.get('name', 'Untitled')} (Part {chunk['chunk_num']+1})",
                     'category': 'claude_conversation_chunk',
                     'conversation_name': conv.get('name', 'Untitled'),
+                    'conversation_uuid': conv['uuid'],
                     'created_at': conv.get('created_at', ''),
                     'chunk_num': chunk['chunk_num'],
                     'message_count': chunk['message_count'],
@@ -160,10 +177,11 @@ def main():
                 batch_docs.append(chunk['text'])
                 batch_metas.append(metadata)
                 
-                # Add batch when full
+                # Write batch when full (upsert, so chunks indexed by an older
+                # run gain conversation_uuid instead of being skipped by add)
                 if len(batch_ids) >= batch_size:
                     try:
-                        collection.add(
+                        collection.upsert(
                             ids=batch_ids,
                             documents=batch_docs,
                             metadatas=batch_metas
@@ -184,10 +202,10 @@ def main():
             print(f"   ⚠️  Error processing conversation: {e}")
             errors += 1
     
-    # Add remaining batch
+    # Write remaining batch
     if batch_ids:
         try:
-            collection.add(
+            collection.upsert(
                 ids=batch_ids,
                 documents=batch_docs,
                 metadatas=batch_metas
@@ -197,9 +215,24 @@ def main():
             print(f"   ⚠️  Error indexing final batch: {e}")
             errors += len(batch_ids)
     
+    # Conversation-level index (upsert: re-runs refresh titles/summaries)
+    conversations_indexed = 0
+    for i in range(0, len(conversation_records), 50):
+        batch = conversation_records[i:i + 50]
+        try:
+            conversation_index.upsert(
+                ids=[r['id'] for r in batch],
+                documents=[r['document'] for r in batch],
+                metadatas=[r['metadata'] for r in batch]
+            )
+            conversations_indexed += len(batch)
+        except Exception as e:
+            print(f"   ⚠️  Error indexing conversation summaries: {e}")
+    
     print(f"\n5. Chunking complete!")
     print(f"   ✅ Created: {total_chunks} chunks from {len(conversations_with_messages)} conversations")
     print(f"   ✅ Indexed: {indexed} chunks")
+    print(f"   ✅ Conversation index: {conversations_indexed} conversations in '{CONVERSATION_COLLECTION}'")
     print(f"   ❌ Errors:  {errors}")
     print(f"   📊 Total in collection: {collection.count()}")
     
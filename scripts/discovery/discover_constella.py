@@ -12,11 +12,18 @@ Usage:
 """
 
 import chromadb
-from chromadb.utils import embedding_functions
 import json
+import os
 from datetime import datetime
 from pathlib import Path
 import argparse
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from embeddings.client import get_embedding_function
+from retrieval.partitions import PartitionedCollection
+from retrieval.result_cache import RAGResultCache, VersionedCollection
 
 # Discovery queries for each unknown/partial section
 DISCOVERY_QUERIES = {
@@ -134,13 +141,20 @@ def connect_chromadb():
     """Connect to ChromaDB and return collection"""
     try:
         client = chromadb.HttpClient(host="localhost", port=8000)
-        embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-mpnet-base-v2"
-        )
+        embedding_func = get_embedding_function("all-mpnet-base-v2")
         collection = client.get_collection(
             name="documents_768",
             embedding_function=embedding_func
         )
+        # The $or category searches below only touch the matching partitions
+        if os.environ.get('FAITHH_PARTITIONED', '0') == '1':
+            partitioned = PartitionedCollection.discover(client, "documents_768", embedding_func)
+            if partitioned is not None:
+                collection = partitioned
+                print(f"✅ Using {len(partitioned.partitions)} category partitions")
+        # Repeated queries (interactive mode, --all after --section) are served
+        # from the cache until an indexer bumps the collection generation
+        collection = VersionedCollection(collection, cache=RAGResultCache(max_entries=256))
         print(f"✅ Connected to ChromaDB: {collection.count()} documents")
         return collection
     except Exception as e:
@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 """
 Complete Constella indexing with smart chunking for FAITHH RAG.
+
+Documents are indexed small-to-big: full texts go to the local parent store,
+~500-char child chunks are embedded, and the backend expands each hit to a
+window around the match.
 """
 
 import os
 import json
 import chromadb
-from chromadb.utils import embedding_functions
+import sys
+from pathlib import Path
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from embeddings.client import get_embedding_function
+from retrieval.parent_docs import ParentStore, index_parent
+from retrieval.result_cache import VersionedCollection
 
 CONSTELLA_REPO = "./constella-framework"
 
@@ -30,23 +41,6 @@ CHUNK_DOCS = [
     {"path": "docs/conversations/resonant_conversations.md", "prefix": "resonant_conv"},
 ]
 
-def chunk_document(content, chunk_size=2500, overlap=250):
-    """Split into overlapping chunks at natural breaks."""
-    chunks = []
-    start = 0
-    while start < len(content):
-        end = start + chunk_size
-        chunk = content[start:end]
-        if end < len(content):
-            last_break = chunk.rfind('\n\n')
-            if last_break > chunk_size // 2:
-                end = start + last_break
-                chunk = content[start:end]
-        if chunk.strip():
-            chunks.append(chunk.strip())
-        start = end - overlap
-    return chunks
-
 def main():
     print("🌌 Constella Complete Indexer")
     print("=" * 60)
@@ -56,17 +50,24 @@ def main():
         return
     
     client = chromadb.HttpClient(host="localhost", port=8000)
-    ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-mpnet-base-v2")
-    collection = client.get_collection(name="documents_768", embedding_function=ef)
+    ef = get_embedding_function("all-mpnet-base-v2")
+    # Writes bump the collection generation so cached RAG results expire
+    collection = VersionedCollection(client.get_collection(name="documents_768", embedding_function=ef))
     print(f"📂 Connected! Current docs: {collection.count()}")
+    parents = ParentStore()
     
-    # Clear existing constella_master docs
+    # Clear existing constella_master docs (whole docs and child chunks)
     print("\n🧹 Clearing old Constella entries...")
     try:
-        existing = collection.get(where={"category": "constella_master"}, limit=1000)
-        if existing['ids']:
+        removed = 0
+        while True:
+            existing = collection.get(where={"category": "constella_master"}, limit=1000, include=[])
+            if not existing['ids']:
+                break
             collection.delete(ids=existing['ids'])
-            print(f"   Removed {len(existing['ids'])} old docs")
+            removed += len(existing['ids'])
+        if removed:
+            print(f"   Removed {removed} old docs")
     except:
         pass
     
@@ -83,8 +84,8 @@ def main():
         meta = {"source": "constella_master", "category": "constella_master", 
                 "priority": "highest", "file": doc["path"], "description": doc["desc"]}
         try:
-            collection.add(documents=[content], metadatas=[meta], ids=[doc["id"]])
-            print(f"   ✅ {doc['path'].split('/')[-1]}")
+            children = index_parent(collection, parents, doc["id"], content, meta)
+            print(f"   ✅ {doc['path'].split('/')[-1]} ({children} chunks)")
             indexed += 1
         except Exception as e:
             print(f"   ❌ {doc['id']}: {e}")
@@ -106,7 +107,7 @@ def main():
                 doc = f"# {name}\n\n{json.dumps(content, indent=2)}"
                 meta = {"source": "constella_master", "category": "constella_master", "priority": "highest"}
                 try:
-                    collection.add(documents=[doc], metadatas=[meta], ids=[f"constella_json_{name}"])
+                    index_parent(collection, parents, f"constella_json_{name}", doc, meta)
                     print(f"   ✅ {name}")
                     indexed += 1
                 except:
@@ -120,18 +121,17 @@ def main():
             continue
         with open(path, 'r') as f:
             content = f.read()
-        chunks = chunk_document(content)
-        print(f"   📄 {doc['path'].split('/')[-1]}: {len(chunks)} chunks")
-        for i, chunk in enumerate(chunks):
-            meta = {"source": "constella_conversation", "category": "constella_master", "priority": "high"}
-            try:
-                collection.add(documents=[chunk], metadatas=[meta], ids=[f"{doc['prefix']}_{i:04d}"])
-                indexed += 1
-            except:
-                pass
+        meta = {"source": "constella_conversation", "category": "constella_master",
+                "priority": "high", "file": doc["path"]}
+        try:
+            children = index_parent(collection, parents, doc["prefix"], content, meta)
+            print(f"   📄 {doc['path'].split('/')[-1]}: {children} chunks")
+            indexed += 1
+        except Exception as e:
+            print(f"   ❌ {doc['prefix']}: {e}")
     
     print("\n" + "=" * 60)
-    print(f"✅ Indexed {indexed} Constella documents")
+    print(f"✅ Indexed {indexed} Constella documents ({parents.count()} parents stored)")
     print(f"📊 Total in collection: {collection.count()}")
 
 if __name__ == "__main__":
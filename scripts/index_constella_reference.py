@@ -5,7 +5,13 @@ Index Constella reference documents into ChromaDB with highest priority.
 
 import os
 import chromadb
-from chromadb.utils import embedding_functions
+import sys
+from pathlib import Path
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from embeddings.client import get_embedding_function
+from retrieval.result_cache import VersionedCollection
 
 # Configuration - matches your FAITHH setup
 CONSTELLA_REPO = "./constella-framework"
@@ -31,11 +37,10 @@ def main():
     client = chromadb.HttpClient(host="localhost", port=8000)
     
     # Use the same embedding function as your main collection
-    ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-mpnet-base-v2"
-    )
+    ef = get_embedding_function("all-mpnet-base-v2")
     
-    collection = client.get_collection(name="documents_768", embedding_function=ef)
+    # Writes bump the collection generation so cached RAG results expire
+    collection = VersionedCollection(client.get_collection(name="documents_768", embedding_function=ef))
     print(f"✅ Connected! Collection has {collection.count()} documents")
     
     # Remove existing constella master docs if present
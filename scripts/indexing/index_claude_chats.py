@@ -6,10 +6,15 @@ Extracts conversations from Claude export and indexes them into ChromaDB
 
 import json
 import chromadb
-from chromadb.utils import embedding_functions
 from pathlib import Path
 from datetime import datetime
 import hashlib
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from embeddings.client import get_embedding_function
+from retrieval.result_cache import VersionedCollection
 
 # Configuration
 CHROMA_HOST = "localhost"
@@ -79,14 +84,13 @@ def main():
     try:
         client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
         
-        embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-mpnet-base-v2"
-        )
+        embedding_func = get_embedding_function("all-mpnet-base-v2")
         
-        collection = client.get_collection(
+        # Writes bump the collection generation so cached RAG results expire
+        collection = VersionedCollection(client.get_collection(
             name=COLLECTION_NAME,
             embedding_function=embedding_func
-        )
+        ))
         
         print(f"✅ Connected to collection '{COLLECTION_NAME}'")
         print(f"   Current documents: {collection.count()}")
@@ -9,9 +9,14 @@ import hashlib
 from datetime import datetime
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
 import sys
 
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from embeddings.client import get_embedding_function
+from retrieval.hierarchical import CONVERSATION_COLLECTION, conversation_record
+from retrieval.result_cache import VersionedCollection
+
 def load_conversations(json_path):
     """Load Claude conversations from export JSON"""
     print(f"\n1. Loading conversations from {json_path}...")
@@ -78,16 +83,39 @@ def chunk_conversation(conversation):
     
     return chunks
 
-def index_conversations(conversations, collection):
-    """Index conversation chunks into ChromaDB"""
+def index_conversation_summaries(records, conversation_index):
+    """Upsert one vector per conversation (stage 1 of hierarchical retrieval)"""
+    indexed = 0
+    for i in range(0, len(records), 50):
+        batch = records[i:i + 50]
+        try:
+            conversation_index.upsert(
+                ids=[r['id'] for r in batch],
+                documents=[r['document'] for r in batch],
+                metadatas=[r['metadata'] for r in batch]
+            )
+            indexed += len(batch)
+        except Exception as e:
+            print(f"   ⚠️  Error indexing conversation summaries: {e}")
+    print(f"✅ Conversation index: {indexed} conversations in '{CONVERSATION_COLLECTION}'")
+    return indexed
+
+def index_conversations(conversations, collection, conversation_index=None):
+    """Index conversation chunks (and per-conversation summaries) into ChromaDB"""
     print(f"\n3. Chunking and indexing {len(conversations)} conversations...")
     
     all_chunks = []
+    records = []
     for conv in conversations:
         chunks = chunk_conversation(conv)
         all_chunks.extend(chunks)
+        record = conversation_record(conv, len(chunks))
+        if record:
+            records.append(record)
     
     print(f"✅ Created {len(all_chunks)} chunks from conversations")
+    if conversation_index is not None:
+        index_conversation_summaries(records, conversation_index)
     
     # Check for existing chunks
     existing_hashes = set()
@@ -187,13 +215,17 @@ def main():
     print("\n2. Connecting to ChromaDB at localhost:8000...")
     try:
         client = chromadb.HttpClient(host="localhost", port=8000)
-        embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-mpnet-base-v2"
-        )
-        collection = client.get_collection(
+        embedding_func = get_embedding_function("all-mpnet-base-v2")
+        # Writes bump the collection generation so cached RAG results expire
+        collection = VersionedCollection(client.get_collection(
             name="documents_768",
             embedding_function=embedding_func
-        )
+        ))
+        conversation_index = VersionedCollection(client.get_or_create_collection(
+            name=CONVERSATION_COLLECTION,
+            embedding_function=embedding_func,
+            metadata={'hnsw:space': (collection.metadata or {}).get('hnsw:space', 'l2')}
+        ))
         print(f"✅ Connected to collection 'documents_768'")
         print(f"   Current documents: {collection.count()}")
     except Exception as e:
@@ -201,7 +233,7 @@ def main():
         sys.exit(1)
     
     # Index conversations
-    indexed, skipped = index_conversations(conversations, collection)
+    indexed, skipped = index_conversations(conversations, collection, conversation_index)
     
     print("\n4. Indexing complete!")
     print(f"   ✅ Indexed: {indexed} new chunks")
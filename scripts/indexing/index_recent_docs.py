@@ -2,13 +2,22 @@
 """
 Index Recent FAITHH Documentation into ChromaDB
 Adds recent markdown files and code to the documents_768 collection
+
+Files are indexed small-to-big: the full text goes to the local parent
+store and only ~500-char child chunks are embedded.
 """
 
 import chromadb
-from chromadb.utils import embedding_functions
 from pathlib import Path
 from datetime import datetime, timedelta
 import hashlib
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from embeddings.client import get_embedding_function
+from retrieval.parent_docs import ParentStore, index_parent
+from retrieval.result_cache import VersionedCollection
 
 # Configuration
 CHROMA_HOST = "localhost"
@@ -98,17 +107,17 @@ def main():
     client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
     
     # Get collection with correct embedding function
-    embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-mpnet-base-v2"
-    )
+    embedding_func = get_embedding_function("all-mpnet-base-v2")
     
-    collection = client.get_collection(
+    # Writes bump the collection generation so cached RAG results expire
+    collection = VersionedCollection(client.get_collection(
         name=COLLECTION_NAME,
         embedding_function=embedding_func
-    )
+    ))
     
     print(f"✅ Connected to collection '{COLLECTION_NAME}'")
     print(f"   Current documents: {collection.count()}")
+    parents = ParentStore()
     
     # Collect files to index
     print(f"\n2. Scanning for files in {AI_STACK_DIR}...")
@@ -123,65 +132,40 @@ def main():
     files_to_index = list(set(files_to_index))
     print(f"✅ Found {len(files_to_index)} files to index")
     
-    # Index files in batches
+    # Index files (one parent + its child chunks per file)
     print(f"\n3. Indexing files...")
-    batch_size = 10
     indexed = 0
     skipped = 0
     errors = 0
+    chunks = 0
     
-    for i in range(0, len(files_to_index), batch_size):
-        batch = files_to_index[i:i+batch_size]
+    for filepath in files_to_index:
+        # Read content
+        content = read_file_content(filepath)
+        if not content:
+            errors += 1
+            continue
         
-        ids = []
-        documents = []
-        metadatas = []
+        # Get metadata
+        metadata = get_file_metadata(filepath)
         
-        for filepath in batch:
-            # Read content
-            content = read_file_content(filepath)
-            if not content:
-                errors += 1
-                continue
-            
-            # Get metadata
-            metadata = get_file_metadata(filepath)
-            
-            # Create unique ID from hash
-            doc_id = f"faithh_{metadata['hash'][:16]}"
-            
-            # Check if already indexed (by hash)
-            try:
-                existing = collection.get(
-                    ids=[doc_id],
-                    include=[]
-                )
-                if existing['ids']:
-                    skipped += 1
-                    continue
-            except:
-                pass
-            
-            ids.append(doc_id)
-            documents.append(content)
-            metadatas.append(metadata)
+        # Create unique ID from hash (unchanged files are already stored)
+        doc_id = f"faithh_{metadata['hash'][:16]}"
+        if parents.has(doc_id):
+            skipped += 1
+            continue
         
-        # Add batch to collection
-        if ids:
-            try:
-                collection.add(
-                    ids=ids,
-                    documents=documents,
-                    metadatas=metadatas
-                )
-                indexed += len(ids)
-                print(f"   Indexed batch {i//batch_size + 1}: {len(ids)} documents")
-            except Exception as e:
-                print(f"   Error indexing batch: {e}")
-                errors += len(ids)
+        try:
+            chunks += index_parent(collection, parents, doc_id, content, metadata)
+            indexed += 1
+            if indexed % 10 == 0:
+                print(f"   Indexed {indexed} documents ({chunks} chunks)")
+        except Exception as e:
+            print(f"   Error indexing {filepath.name}: {e}")
+            errors += 1
     
     print(f"\n4. Indexing complete!")
-    print(f"   ✅ Indexed: {indexed} new documents")
+    print(f"   ✅ Indexed: {indexed} new documents ({chunks} chunks)")
     print(f"   ⏭️  Skipped: {skipped} (already indexed)")
     print(f"   ❌ Errors:  {errors}")
     print(f"   📊 Total in collection: {collection.count()}")
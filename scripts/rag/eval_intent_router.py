@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Intent Router Evaluation - Score regex rules vs. the semantic router offline
+
+Usage:
+    python scripts/rag/eval_intent_router.py
+    python scripts/rag/eval_intent_router.py --calibrate --write ~/ai-stack/intent_thresholds.json
+
+Then point the backend at the calibrated thresholds:
+    export FAITHH_INTENT_THRESHOLDS=~/ai-stack/intent_thresholds.json
+
+Labeled queries live in scripts/rag/intent_eval_set.json ({"query", "intents"}).
+Calibrated numbers are in-sample; add examples before trusting small gains.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from retrieval.intents import (INTENTS, IntentRouter, calibrate_thresholds, load_thresholds,
+                               prf, rule_intent)
+
+DEFAULT_EVAL_SET = Path(__file__).resolve().parent / "intent_eval_set.json"
+
+
+def _report(title, predictions, examples):
+    """Per-intent precision/recall/F1 plus exact-match accuracy"""
+    print(f"\n{title}")
+    print(f"   {'intent':<22} {'P':>6} {'R':>6} {'F1':>6}")
+    for name in INTENTS:
+        actual = [name in ex['intents'] for ex in examples]
+        predicted = [p[name] for p in predictions]
+        m = prf(predicted, actual)
+        print(f"   {name:<22} {m['precision']:>6.2f} {m['recall']:>6.2f} {m['f1']:>6.2f}")
+    exact = sum(1 for p, ex in zip(predictions, examples)
+                if {n for n in INTENTS if p[n]} == set(ex['intents']))
+    print(f"   exact match: {exact}/{len(examples)} ({100 * exact / len(examples):.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline intent router evaluation")
+    parser.add_argument('--eval-set', type=Path, default=DEFAULT_EVAL_SET)
+    parser.add_argument('--model', default='all-mpnet-base-v2')
+    parser.add_argument('--thresholds', type=Path, help='Calibration JSON to evaluate')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Fit (reject_below, accept_at) per intent from the labels')
+    parser.add_argument('--min-precision', type=float, default=0.95)
+    parser.add_argument('--write', type=Path, help='Write calibrated thresholds here')
+    parser.add_argument('--show-misses', action='store_true')
+    args = parser.parse_args()
+
+    examples = json.loads(args.eval_set.read_text())['examples']
+    print(f"📋 {len(examples)} labeled queries from {args.eval_set}")
+
+    from embeddings.client import get_embedding_function
+    embed = get_embedding_function(args.model)
+    router = IntentRouter(embed, thresholds=load_thresholds(args.thresholds) if args.thresholds else None)
+
+    start = time.perf_counter()
+    router.prepare()
+    print(f"✅ Prototypes embedded in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    vectors = embed([ex['query'] for ex in examples])
+    start = time.perf_counter()
+    routed = [router.route(ex['query'], vec) for ex, vec in zip(examples, vectors)]
+    per_query_ms = (time.perf_counter() - start) * 1000 / len(examples)
+
+    _report("Regex rules", [rule_intent(ex['query'])[0] for ex in examples], examples)
+    _report(f"Semantic router ({per_query_ms:.2f}ms/query, embedding excluded)", routed, examples)
+
+    if args.calibrate:
+        thresholds = {}
+        print(f"\n🎯 Calibrated thresholds (min precision {args.min_precision}):")
+        for name in INTENTS:
+            scores = [r['intent_scores'][name] for r in routed]
+            labels = [name in ex['intents'] for ex in examples]
+            thresholds[name] = calibrate_thresholds(scores, labels, args.min_precision)
+            print(f"   {name:<22} reject<{thresholds[name][0]:.3f}  accept>={thresholds[name][1]:.3f}")
+        router.thresholds.update(thresholds)
+        routed = [router.route(ex['query'], vec) for ex, vec in zip(examples, vectors)]
+        _report("Semantic router, calibrated (in-sample)", routed, examples)
+        if args.write:
+            args.write.parent.mkdir(parents=True, exist_ok=True)
+            args.write.write_text(json.dumps({n: list(t) for n, t in thresholds.items()}, indent=2))
+            print(f"\n💾 Wrote {args.write}")
+
+    if args.show_misses:
+        print("\n❌ Misrouted:")
+        for r, ex in zip(routed, examples):
+            got = {n for n in INTENTS if r[n]}
+            if got != set(ex['intents']):
+                print(f"   {ex['query']!r}: expected {sorted(ex['intents'])}, got {sorted(got)}")
+
+
+if __name__ == "__main__":
+    main()
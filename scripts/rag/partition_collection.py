@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Partition Tool - Split documents_768 into per-category-group collections
+
+Usage:
+    python scripts/rag/partition_collection.py plan       # category counts -> partitions
+    python scripts/rag/partition_collection.py build      # copy (upsert) into partitions
+    python scripts/rag/partition_collection.py build --prune   # ...and drop ids gone from the source
+    python scripts/rag/partition_collection.py verify     # per-partition counts vs source
+
+Embeddings are copied as-is (nothing is re-embedded) and `build` is
+idempotent, so re-run it after the indexing scripts to re-sync. Then point
+the backend at the partitions:
+    export FAITHH_PARTITIONED=1
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from retrieval.generation import bump_generation
+from retrieval.partitions import (DEFAULT_PARTITION_GROUPS, OTHER_GROUP, OTHER_MARKER,
+                                  PartitionedCollection, partition_name)
+
+CHROMA_HOST = "localhost"
+CHROMA_PORT = 8000
+COLLECTION_NAME = "documents_768"
+
+
+def _connect(args):
+    import chromadb
+
+    print(f"Connecting to ChromaDB at {args.host}:{args.port}...")
+    client = chromadb.HttpClient(host=args.host, port=args.port)
+    source = client.get_collection(args.collection)
+    print(f"✅ Source '{args.collection}': {source.count():,} documents")
+    return client, source
+
+
+def _pages(source, batch_size, include):
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        yield offset, total, source.get(limit=batch_size, offset=offset, include=include)
+
+
+def _category_counts(source, batch_size):
+    counts = Counter()
+    for _, _, page in _pages(source, batch_size, ['metadatas']):
+        counts.update((meta or {}).get('category') for meta in page['metadatas'])
+    return counts
+
+
+def _router(categories):
+    """A PartitionedCollection used only for its category -> group mapping"""
+    return PartitionedCollection({group: None for group in categories}, categories)
+
+
+def _layout():
+    categories = {group: list(cats) for group, cats in DEFAULT_PARTITION_GROUPS.items()}
+    categories[OTHER_GROUP] = [OTHER_MARKER]
+    return categories
+
+
+def plan(args):
+    """Show where every category would land"""
+    _, source = _connect(args)
+    router = _router(_layout())
+    counts = _category_counts(source, args.batch_size)
+    per_group = Counter()
+    print(f"\n{'category':<32}{'documents':>10}  partition")
+    print("-" * 60)
+    for category, n in counts.most_common():
+        group = router.group_for(category)
+        per_group[group] += n
+        print(f"{str(category):<32}{n:>10,}  {partition_name(args.collection, group)}")
+    print(f"\n{'partition':<40}{'documents':>10}")
+    print("-" * 50)
+    for group, n in per_group.most_common():
+        print(f"{partition_name(args.collection, group):<40}{n:>10,}")
+
+
+def build(args):
+    """Upsert every source document (with its embedding) into its partition"""
+    client, source = _connect(args)
+    space = (source.metadata or {}).get('hnsw:space', 'l2')
+    categories = _layout()
+    partitions = {}
+    for group, cats in categories.items():
+        partitions[group] = client.get_or_create_collection(
+            name=partition_name(args.collection, group),
+            metadata={'hnsw:space': space, 'partition_of': args.collection,
+                      'categories': ','.join(cats)}
+        )
+    router = PartitionedCollection(partitions, categories)
+
+    print(f"\nCopying into {len(partitions)} partitions ({space} space)...")
+    start = time.perf_counter()
+    source_ids = set()
+    for offset, total, page in _pages(source, args.batch_size, ['embeddings', 'documents', 'metadatas']):
+        if not page['ids']:
+            continue
+        source_ids.update(page['ids'])
+        router.upsert(ids=page['ids'], metadatas=[m or {} for m in page['metadatas']],
+                      documents=page['documents'], embeddings=page['embeddings'])
+        print(f"   {min(offset + args.batch_size, total):,}/{total:,}")
+    print(f"✅ Copied {len(source_ids):,} documents in {time.perf_counter() - start:.1f}s")
+
+    if args.prune:
+        removed = 0
+        for group, coll in partitions.items():
+            stale = []
+            for _, _, page in _pages(coll, args.batch_size, []):
+                stale.extend(doc_id for doc_id in page['ids'] if doc_id not in source_ids)
+            if stale:
+                coll.delete(ids=stale)
+                removed += len(stale)
+        print(f"🧹 Pruned {removed:,} documents no longer in '{args.collection}'")
+
+    # Cached RAG results may have come from the partitions
+    bump_generation(args.collection, writes=len(source_ids))
+    for group in partitions:
+        bump_generation(partition_name(args.collection, group))
+    verify(args, client=client, source=source)
+
+
+def verify(args, client=None, source=None):
+    """Per-partition counts must add up to the source's"""
+    if client is None:
+        client, source = _connect(args)
+    partitioned = PartitionedCollection.discover(client, args.collection)
+    if partitioned is None:
+        print(f"❌ No partitions of '{args.collection}' found - run build first")
+        return False
+    counts = _category_counts(source, args.batch_size)
+    expected = Counter()
+    for category, n in counts.items():
+        expected[partitioned.group_for(category)] += n
+
+    ok = True
+    print(f"\n{'partition':<40}{'expected':>10}{'actual':>10}")
+    print("-" * 60)
+    for group, coll in sorted(partitioned.partitions.items()):
+        actual = coll.count()
+        mark = "✅" if actual == expected[group] else "❌"
+        ok = ok and actual == expected[group]
+        print(f"{partition_name(args.collection, group):<40}{expected[group]:>10,}{actual:>10,}  {mark}")
+    print(f"\n{'✅ Partitions match the source' if ok else '❌ Partitions out of sync - re-run build --prune'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Category partition tool")
+    parser.add_argument('--host', default=CHROMA_HOST)
+    parser.add_argument('--port', type=int, default=CHROMA_PORT)
+    parser.add_argument('--collection', default=COLLECTION_NAME)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('plan', help='Show category -> partition counts')
+    build_p = sub.add_parser('build', help='Create/re-sync the partitions')
+    build_p.add_argument('--prune', action='store_true',
+                         help='Delete partition documents missing from the source')
+    sub.add_parser('verify', help='Compare partition counts with the source')
+
+    args = parser.parse_args()
+    if args.command == 'plan':
+        plan(args)
+    elif args.command == 'build':
+        build(args)
+    else:
+        sys.exit(0 if verify(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
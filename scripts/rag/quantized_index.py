@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Quantized Index Tool - Build and benchmark the int8/binary vector tier
+
+Usage:
+    python scripts/rag/quantized_index.py build
+    python scripts/rag/quantized_index.py benchmark --queries 200 --k 10
+
+Then point the backend at it:
+    export FAITHH_QUANTIZED_INDEX=~/ai-stack/chroma_db/quantized/documents_768
+    export FAITHH_QUANTIZED_BINARY=1   # optional Hamming prefilter
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from retrieval.generation import bump_generation
+from retrieval.quantized import QuantizedIndex, tier_generation
+
+CHROMA_HOST = "localhost"
+CHROMA_PORT = 8000
+COLLECTION_NAME = "documents_768"
+DEFAULT_INDEX_DIR = Path.home() / "ai-stack" / "chroma_db" / "quantized" / COLLECTION_NAME
+
+
+def build(args):
+    """Page embeddings out of ChromaDB and write the quantized tier"""
+    import chromadb
+
+    print(f"1. Connecting to ChromaDB at {args.host}:{args.port}...")
+    client = chromadb.HttpClient(host=args.host, port=args.port)
+    collection = client.get_collection(args.collection)
+    print(f"✅ Collection '{args.collection}': {collection.count():,} documents")
+
+    print("\n2. Fetching embeddings and quantizing...")
+    start = time.perf_counter()
+    index = QuantizedIndex.from_collection(collection, batch_size=args.batch_size,
+                                           binary=not args.no_binary)
+    print(f"✅ Quantized {len(index):,} vectors in {time.perf_counter() - start:.1f}s")
+
+    index.save(args.index_dir)
+    # Cached RAG results served from the old tier are now stale
+    bump_generation(tier_generation(args.collection), writes=len(index))
+    footprint = index.memory_footprint()
+    print(f"\n3. Saved to {args.index_dir}")
+    print(f"   float32 (on disk, memmapped): {footprint['float32_vectors'] / 1e6:8.1f} MB")
+    print(f"   int8 codes (resident):        {footprint['int8_codes'] / 1e6:8.1f} MB")
+    print(f"   binary codes (resident):      {footprint['binary_codes'] / 1e6:8.1f} MB")
+
+
+def _time_queries(index, queries, k, **kwargs):
+    """Run queries, return (per-query hit rows, latencies in ms)"""
+    hits, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        rows = [row for row, _ in index.search(q, n_results=k, **kwargs)]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits.append(rows)
+    return hits, np.array(latencies)
+
+
+def _recall(truth, hits, k):
+    return float(np.mean([len(set(t) & set(h)) / k for t, h in zip(truth, hits)]))
+
+
+def benchmark(args):
+    """Recall@k vs exact float32 search, with latency per configuration"""
+    index = QuantizedIndex.load(args.index_dir)
+    print(f"Loaded {len(index):,} vectors ({index.space} space) from {args.index_dir}")
+
+    # Query set: the known-answer RAG questions plus sampled corpus vectors
+    queries = []
+    if not args.no_text_queries:
+        try:
+            from embeddings.client import get_encoder
+            from tests.test_rag_quality import TEST_QUERIES
+            model = get_encoder("all-mpnet-base-v2")
+            queries.extend(model.encode([q['query'] for q in TEST_QUERIES]))
+        except ImportError as e:
+            print(f"⚠️  Skipping text queries: {e}")
+
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    queries.extend(index._rows(np.sort(sample)))
+    print(f"Benchmarking {len(queries)} queries, k={args.k}\n")
+
+    truth, exact_ms = _time_queries(index, queries, args.k, exact=True)
+
+    configs = [("float32 exact", dict(exact=True))]
+    for factor in args.rescore_factors:
+        configs.append((f"int8 rescore x{factor}", dict(rescore_factor=factor)))
+    if index.has_binary:
+        for factor in args.rescore_factors:
+            configs.append((f"binary+int8 x{factor}",
+                            dict(rescore_factor=factor, use_binary=True,
+                                 binary_factor=args.binary_factor)))
+
+    print(f"{'config':<24}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 54)
+    for name, kwargs in configs:
+        if kwargs.get('exact'):
+            hits, latencies = truth, exact_ms
+        else:
+            hits, latencies = _time_queries(index, queries, args.k, **kwargs)
+        print(f"{name:<24}{_recall(truth, hits, args.k):>10.3f}"
+              f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized vector tier tool")
+    parser.add_argument('--index-dir', type=Path,
+                        default=Path(os.environ.get('FAITHH_QUANTIZED_INDEX', DEFAULT_INDEX_DIR)).expanduser())
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_p = sub.add_parser('build', help='Build the index from ChromaDB')
+    build_p.add_argument('--host', default=CHROMA_HOST)
+    build_p.add_argument('--port', type=int, default=CHROMA_PORT)
+    build_p.add_argument('--collection', default=COLLECTION_NAME)
+    build_p.add_argument('--batch-size', type=int, default=5000)
+    build_p.add_argument('--no-binary', action='store_true', help='Skip 1-bit codes')
+
+    bench_p = sub.add_parser('benchmark', help='Recall vs speed against exact search')
+    bench_p.add_argument('--queries', type=int, default=200, help='Sampled corpus queries')
+    bench_p.add_argument('--k', type=int, default=10)
+    bench_p.add_argument('--rescore-factors', type=int, nargs='+', default=[2, 4, 8])
+    bench_p.add_argument('--binary-factor', type=int, default=40)
+    bench_p.add_argument('--no-text-queries', action='store_true',
+                         help='Skip encoding the test_rag_quality questions')
+    bench_p.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        build(args)
+    else:
+        benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,12 @@ from pathlib import Path
 from datetime import datetime
 from typing import Generator, Dict, Any, List
 import chromadb
-from sentence_transformers import SentenceTransformer
+import sys
+
+# Add repo root to path for the shared embedding client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from embeddings.client import get_encoder
+from retrieval.result_cache import VersionedCollection
 
 # Configuration
 EXPORT_BASE = Path.home() / "ai-stack" / "AI_Chat_Exports"
@@ -201,7 +206,7 @@ class MultiPlatformIndexer:
         
         # Initialize embedding model
         print(f"Loading embedding model: {EMBEDDING_MODEL}...")
-        self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+        self.embedder = get_encoder(EMBEDDING_MODEL)
         
         # Initialize ChromaDB
         if not dry_run:
@@ -218,6 +223,8 @@ class MultiPlatformIndexer:
                     metadata={"hnsw:space": "cosine"}
                 )
                 print(f"Created new collection: {collection_name}")
+            # Writes bump the collection generation so cached RAG results expire
+            self.collection = VersionedCollection(self.collection)
         
         # Initialize parsers
         self.parsers = {
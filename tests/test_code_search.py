@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test backend/code_index.py + ToolSystem.search_code - trigram narrowing,
+incremental refresh, ignore patterns and pagination
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path for flat imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from code_index import TrigramIndex, required_trigrams
+from tool_system import ToolSystem
+
+
+def _make_tree(root: Path) -> None:
+    (root / "pkg").mkdir()
+    (root / "archive").mkdir()
+    (root / "pkg" / "alpha.py").write_text("def load_index():\n    return build_index()\n")
+    (root / "pkg" / "beta.py").write_text("class Beta:\n    pass\n")
+    (root / "archive" / "old.py").write_text("def load_index():\n    pass\n")
+
+
+def test_required_trigrams():
+    """Literals become required trigrams; unconstrained regexes can't narrow"""
+    assert required_trigrams("load_index") == [{'loa', 'oad', 'ad_', 'd_i', '_in', 'ind', 'nde', 'dex'}]
+    assert required_trigrams(r"def \w+_index\(")[0] >= {'def', 'ind', 'dex'}
+    assert len(required_trigrams("Beta|load")) == 2
+    assert required_trigrams(r"\d+") is None
+    assert required_trigrams("x|load") is None  # one branch too short to constrain
+    print("✅ Regex -> trigram planning OK")
+
+
+def test_index_refresh_and_candidates():
+    """Changed files are re-indexed, deleted files dropped, ignored dirs skipped"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_tree(root)
+        index = TrigramIndex(root, ['archive'], min_refresh_interval=0)
+        index.refresh()
+        assert len(index) == 2
+        assert index.candidates("load_index") == ["pkg/alpha.py"]
+
+        (root / "pkg" / "beta.py").write_text("class Beta:\n    load_index = None\n  \n")
+        (root / "pkg" / "alpha.py").unlink()
+        counts = index.refresh()
+        assert counts['changed'] == 1 and counts['removed'] == 1
+        assert index.candidates("load_index") == ["pkg/beta.py"]
+        assert index.candidates(r"\w+") is None
+    print("✅ Incremental refresh OK")
+
+
+def test_search_code_index_matches_scan_and_paginates():
+    """Indexed and full-scan search agree; pages concatenate to the full result"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_tree(root)
+        for i in range(30):
+            (root / "pkg" / f"gen_{i:02d}.py").write_text(f"VALUE_{i} = 'needle'\nother = 1\n")
+
+        tools = ToolSystem(str(root), ignore_patterns=['archive'])
+        indexed = tools.search_code("needle", max_results=1000)
+        tools.use_code_index = False
+        scanned = tools.search_code("needle", max_results=1000)
+        tools.use_code_index = True
+
+        assert indexed['indexed'] and not scanned['indexed']
+        assert indexed['matches'] == scanned['matches']
+        assert indexed['count'] == 30
+
+        pages, offset = [], 0
+        while True:
+            page = tools.search_code("needle", max_results=7, offset=offset)
+            pages.extend(page['matches'])
+            if not page['has_more']:
+                break
+            offset = page['next_offset']
+        assert pages == indexed['matches']
+
+        # Archive is ignored; writes through the tool system are searchable immediately
+        assert tools.search_code("load_index")['count'] == 1
+        tools.write_file("pkg/new.py", "def load_index():\n    pass\n")
+        assert tools.search_code("load_index")['count'] == 2
+        assert tools.search_code("load_index", ignore_patterns=['new.py'])['count'] == 1
+    print("✅ search_code index/scan parity + pagination OK")
+
+
+if __name__ == "__main__":
+    test_required_trigrams()
+    test_index_refresh_and_candidates()
+    test_search_code_index_matches_scan_and_paginates()
+    print("\n🎉 All tests passed!")
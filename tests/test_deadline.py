@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test runtime/deadline.py - request budgets, reserves and degradations, and
+a deadline bounding a routed model call
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from runtime.deadline import Deadline
+from providers.base import LLMProvider, ProviderTimeout
+from providers.router import ModelRouter
+
+
+class RecordingProvider(LLMProvider):
+    """Sleeps `delay` seconds and remembers the max_tokens it was given"""
+    name = 'recording'
+
+    def __init__(self, delay=0.0):
+        super().__init__('fake-model', timeout=60)
+        self.delay = delay
+        self.max_tokens = []
+
+    def _generate(self, prompt, model, timeout, max_tokens=None):
+        self.max_tokens.append(max_tokens)
+        time.sleep(self.delay)
+        return "ok", model
+
+
+def test_budget_accounting():
+    """Remaining time, reserves, capped timeouts and one entry per degradation"""
+    now = [100.0]
+    deadline = Deadline(10.0, clock=lambda: now[0])
+    assert deadline.allows(1.0, reserve_s=8.0)
+    now[0] = 101.5
+    assert not deadline.allows(1.0, reserve_s=8.0) and deadline.allows(1.0)
+    assert deadline.timeout(cap=2.0) == 2.0 and deadline.timeout() == 8.5
+    now[0] = 111.0
+    assert deadline.expired() and deadline.remaining() == 0.0 and deadline.timeout() == 0.1
+
+    deadline.degrade('rag_fallback_skipped')
+    deadline.degrade('rag_fallback_skipped')
+    deadline.degrade('max_tokens_capped')
+    snapshot = deadline.snapshot()
+    assert snapshot['degradations'] == ['rag_fallback_skipped', 'max_tokens_capped']
+    assert snapshot['budget_ms'] == 10000 and snapshot['remaining_ms'] == 0.0
+    print("✅ Budget accounting OK")
+
+
+def test_client_budget_is_clamped():
+    """Missing/invalid budgets use the default; valid ones stay within [min, max]"""
+    assert Deadline.from_request(None, 30, 120).budget_s == 30
+    assert Deadline.from_request('soon', 30, 120).budget_s == 30
+    assert Deadline.from_request(-5, 30, 120).budget_s == 30
+    assert Deadline.from_request(5000, 30, 120).budget_s == 5.0
+    assert Deadline.from_request(10, 30, 120).budget_s == 1.0
+    assert Deadline.from_request(10 ** 9, 30, 120).budget_s == 120
+    print("✅ Client budget clamping OK")
+
+
+def test_deadline_bounds_model_call():
+    """The router gets the remaining budget and passes max_tokens through"""
+    fast, slow = RecordingProvider(), RecordingProvider(delay=1.5)
+    providers = {'fast': fast, 'slow': slow}
+    router = ModelRouter(provider_lookup=providers.__getitem__, hedge=False)
+
+    result = router.generate("hi", [('fast', None)], timeout=Deadline(5).timeout(), max_tokens=128)
+    assert result['text'] == "ok" and fast.max_tokens == [128]
+    router.generate("hi", [('fast', None)])
+    assert fast.max_tokens == [128, None]
+
+    deadline = Deadline(0.3)
+    start = time.monotonic()
+    try:
+        router.generate("hi", [('slow', None)], timeout=deadline.timeout())
+        assert False, "expected ProviderTimeout"
+    except ProviderTimeout:
+        pass
+    assert time.monotonic() - start < 1.0
+    print("✅ Deadline-bounded model call OK")
+
+
+if __name__ == "__main__":
+    test_budget_accounting()
+    test_client_budget_is_clamped()
+    test_deadline_bounds_model_call()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/decisions.py - ranked decision search, relevance floor,
+rebuild on file change and embedding blend
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.decisions import DecisionIndex, tokenize
+
+
+def _copy_log():
+    tmpdir = tempfile.mkdtemp()
+    path = Path(tmpdir) / 'decisions_log.json'
+    shutil.copy(REPO_ROOT / 'decisions_log.json', path)
+    return tmpdir, path
+
+
+def test_ranks_relevant_decision_and_rejects_noise():
+    """The matching decision ranks first; unrelated questions cite nothing"""
+    index = DecisionIndex(REPO_ROOT / 'decisions_log.json')
+    hits = index.search("Why did we pick ChromaDB and 768-dim embeddings?")
+    assert hits and hits[0]['decision']['id'] == 'faithh_001', hits
+    hits = index.search("why hot warm cold memory tiers")
+    assert hits[0]['decision']['id'] == 'faithh_002'
+    assert index.search("what's the weather like in Lisbon?") == []
+    assert 'why' not in tokenize("Why did we do that?")
+
+    start = time.perf_counter()
+    for _ in range(200):
+        index.search("Astris decay rate weekly")
+    per_search_ms = (time.perf_counter() - start) * 1000 / 200
+    assert index.stats['builds'] == 1
+    assert per_search_ms < 5, per_search_ms
+    print(f"✅ Decision ranking OK ({per_search_ms:.3f}ms/search)")
+
+
+def test_rebuilds_when_log_changes():
+    """Editing decisions_log.json is picked up on the next search"""
+    tmpdir, path = _copy_log()
+    try:
+        index = DecisionIndex(path)
+        assert index.search("kubernetes cluster") == []
+        data = json.loads(path.read_text())
+        data['decisions'].append({'id': 'faithh_004', 'decision': 'Deploy on a Kubernetes cluster',
+                                  'rationale': 'Scales inference pods', 'category': 'infrastructure'})
+        path.write_text(json.dumps(data))
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        hits = index.search("kubernetes cluster")
+        assert hits[0]['decision']['id'] == 'faithh_004'
+        assert index.stats['builds'] == 2
+        assert index.snapshot()['decisions'] == 6
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Rebuild on change OK")
+
+
+def test_embedding_blend_finds_paraphrases():
+    """With vectors, a paraphrase sharing no terms still finds its decision"""
+    calls = []
+
+    def embed(texts):
+        calls.append(len(texts))
+        # Two toy "topics": storage vs. product philosophy
+        return [[1.0, 0.0] if ('ChromaDB' in t or 'disk' in t) else [0.0, 1.0]
+                for t in texts]
+
+    index = DecisionIndex(REPO_ROOT / 'decisions_log.json', embedding_function=embed)
+    hits = index.search("where is knowledge kept on disk")
+    assert hits[0]['decision']['id'] == 'faithh_001'
+    assert hits[0]['cosine'] == 1.0 and hits[0]['bm25'] == 0.0
+    assert calls == [5, 1]  # decisions embedded once, then just the query
+
+    index.search("anything", query_embedding=[1.0, 0.0])
+    assert calls == [5, 1]  # precomputed query vector reused
+    assert index.snapshot()['embedded']
+    print("✅ Embedding blend OK")
+
+
+if __name__ == "__main__":
+    test_ranks_relevant_decision_and_rejects_noise()
+    test_rebuilds_when_log_changes()
+    test_embedding_blend_finds_paraphrases()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test embeddings/service.py, batcher.py and backends.py - batching, cache,
+bounded queue and backend agreement checks (no model download)
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embeddings.backends import embedding_backend, measure_agreement
+from embeddings.batcher import BatchingEmbeddingFunction, MicroBatcher
+from embeddings.service import EmbeddingService, QueueFullError
+
+
+class FakeEncoder:
+    """Deterministic 4-dim encoder that records batch sizes"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return np.array([[len(t), t.count('a'), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_are_batched_and_cached():
+    """Concurrent callers share forward passes; repeats are served from cache"""
+    encoder = FakeEncoder(delay=0.02)
+    service = EmbeddingService(max_batch=32, max_wait_ms=50, loader=lambda name: encoder)
+
+    results = {}
+
+    def call(i):
+        results[i] = service.embed([f"text {i}", "shared"])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    assert results[3].shape == (2, 4)
+    assert results[3][0][0] == len("text 3")
+    assert len(encoder.batches) < 8, encoder.batches
+
+    passes = len(encoder.batches)
+    again = service.embed(["text 3", "shared"])
+    assert len(encoder.batches) == passes  # fully cached
+    assert np.array_equal(again, results[3])
+    assert service.snapshot()['cache']['hits'] >= 2
+    print(f"✅ Batching + cache OK (batches={encoder.batches})")
+
+
+def test_queue_full_and_unknown_model():
+    """Full queue raises QueueFullError; unknown models are refused"""
+    gate = threading.Event()
+
+    class BlockingEncoder(FakeEncoder):
+        def encode(self, texts, **kwargs):
+            gate.wait(2)
+            return super().encode(texts)
+
+    service = EmbeddingService(max_batch=1, max_wait_ms=0, max_queue=1,
+                               loader=lambda name: BlockingEncoder())
+    worker_busy = threading.Thread(target=service.embed, args=(["first"],))
+    worker_busy.start()
+    time.sleep(0.05)  # worker is now blocked inside encode()
+    queued = threading.Thread(target=service.embed, args=(["second"],))
+    queued.start()
+    time.sleep(0.05)
+
+    try:
+        service.embed(["third"])
+        assert False, "expected QueueFullError"
+    except QueueFullError:
+        pass
+    assert service.snapshot()['rejected'] == 1
+
+    try:
+        service.embed(["x"], model="not-a-model")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    gate.set()
+    worker_busy.join()
+    queued.join()
+    print("✅ Queue limit + model allow-list OK")
+
+
+def test_micro_batcher_scatters_and_reports():
+    """Concurrent submits share one pass, each caller gets its own rows back"""
+    encoder = FakeEncoder(delay=0.01)
+    batcher = MicroBatcher(encoder.encode, max_batch=16, max_wait_ms=30)
+
+    results = {}
+
+    def call(i):
+        results[i] = batcher.submit(["a" * i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i in range(1, 9):
+        assert results[i].shape == (1, 4)
+        assert results[i][0][1] == i  # count('a') identifies the caller's text
+    stats = batcher.stats()
+    assert stats['requests'] == 8 and stats['items'] == 8
+    assert stats['avg_batch'] > 1, encoder.batches
+    assert stats['max_wait_ms_seen'] >= 0
+
+    # Errors reach every caller in the failed batch
+    failing = MicroBatcher(lambda texts: 1 / 0, max_wait_ms=0)
+    try:
+        failing.submit(["x"])
+        assert False, "expected ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+
+    func = BatchingEmbeddingFunction(lambda texts: [[1.0, 2.0]] * len(texts), max_wait_ms=1)
+    assert func(["q"]) == [[1.0, 2.0]]
+    batcher.close()
+    failing.close()
+    print(f"✅ MicroBatcher OK (batches={encoder.batches})")
+
+
+def test_backend_selection_and_agreement():
+    """FAITHH_EMBED_BACKEND parsing and cosine agreement between encoders"""
+    old = os.environ.get('FAITHH_EMBED_BACKEND')
+    try:
+        os.environ['FAITHH_EMBED_BACKEND'] = 'ONNX-int8'
+        assert embedding_backend() == 'onnx-int8'
+        os.environ['FAITHH_EMBED_BACKEND'] = 'tensorrt'
+        assert embedding_backend() == 'torch'
+    finally:
+        if old is None:
+            os.environ.pop('FAITHH_EMBED_BACKEND', None)
+        else:
+            os.environ['FAITHH_EMBED_BACKEND'] = old
+
+    class Noisy(FakeEncoder):
+        def encode(self, texts, **kwargs):
+            return super().encode(texts) * 3.0 + 0.01  # scale-invariant, tiny shift
+
+    texts = ["alpha", "banana", "a cat", "database"]
+    agreement = measure_agreement(Noisy(), FakeEncoder(), texts)
+    assert agreement['texts'] == 4
+    assert 0.99 < agreement['min_cosine'] <= agreement['mean_cosine'] <= 1.0 + 1e-6
+    print(f"✅ Backend selection + agreement OK (min={agreement['min_cosine']:.4f})")
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_batched_and_cached()
+    test_queue_full_and_unknown_model()
+    test_micro_batcher_scatters_and_reports()
+    test_backend_selection_and_agreement()
+    print("\n🎉 All tests passed!")
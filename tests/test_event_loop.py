@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test runtime/event_loop.py - one shared loop for sync callers, concurrent
+submissions and cancellation
+"""
+import asyncio
+import concurrent.futures
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from runtime.event_loop import BackgroundLoop
+
+
+def test_run_reuses_one_loop():
+    """Every call lands on the same long-lived loop thread"""
+    bg = BackgroundLoop(name='test-loop')
+
+    async def where():
+        await asyncio.sleep(0)
+        return asyncio.get_running_loop(), threading.current_thread().name
+
+    try:
+        first = bg.run(where())
+        second = bg.run(where())
+        assert first == second and first[1] == 'test-loop'
+    finally:
+        bg.stop()
+    print("✅ Persistent loop OK")
+
+
+def test_concurrent_submissions_and_cancel():
+    """In-flight coroutines overlap; cancelling one leaves the others running"""
+    bg = BackgroundLoop(name='test-loop-2')
+    cancelled = threading.Event()
+
+    async def work(delay, tag):
+        try:
+            await asyncio.sleep(delay)
+            return tag
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    try:
+        start = time.monotonic()
+        futures = [bg.submit(work(0.2, i)) for i in range(5)]
+        slow = bg.submit(work(10, 'slow'))
+        assert [f.result(2) for f in futures] == list(range(5))
+        assert time.monotonic() - start < 1.0  # ran concurrently, not 5 x 0.2s
+
+        assert slow.cancel()
+        assert cancelled.wait(1)
+        try:
+            slow.result(1)
+            assert False, "expected CancelledError"
+        except concurrent.futures.CancelledError:
+            pass
+
+        try:
+            bg.run(work(10, 'timeout'), timeout=0.1)
+            assert False, "expected TimeoutError"
+        except concurrent.futures.TimeoutError:
+            pass
+        assert bg.run(work(0, 'after')) == 'after'
+    finally:
+        bg.stop()
+    print("✅ Concurrent submit + cancel OK")
+
+
+if __name__ == "__main__":
+    test_run_reuses_one_loop()
+    test_concurrent_submissions_and_cancel()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/hierarchical.py - conversation records, diversity and
+two-stage conversations -> chunks retrieval
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.filters import matches_where
+from retrieval.hierarchical import (CONVERSATION_KEY, HierarchicalRetriever, conversation_record,
+                                    diversify)
+
+
+class VectorCollection:
+    """Exact squared-L2 search over (vector, document, metadata) rows"""
+
+    def __init__(self, rows):
+        self.rows = rows  # id -> (vector, document, metadata)
+        self.wheres = []
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        self.wheres.append(where)
+        q = np.asarray(query_embeddings[0], dtype=np.float32)
+        hits = sorted((float(np.sum((vec - q) ** 2)), doc_id)
+                      for doc_id, (vec, _, meta) in self.rows.items() if matches_where(meta, where))[:n_results]
+        return {'ids': [[d for _, d in hits]], 'distances': [[dist for dist, _ in hits]],
+                'documents': [[self.rows[d][1] for _, d in hits]],
+                'metadatas': [[self.rows[d][2] for _, d in hits]]}
+
+
+def _unit(angle):
+    return np.array([np.cos(angle), np.sin(angle)], dtype=np.float32)
+
+
+def _corpus():
+    """Three conversations; 'indexer' has many near-identical chunks close to the query"""
+    conversations, chunks = {}, {}
+    for uuid, angle, n_chunks in (('indexer', 0.0, 6), ('batching', 0.3, 2), ('audio', 2.5, 4)):
+        conversations[f"conversation_{uuid}"] = (_unit(angle), uuid, {CONVERSATION_KEY: uuid})
+        for i in range(n_chunks):
+            meta = {CONVERSATION_KEY: uuid, 'category': 'claude_conversation_chunk'}
+            chunks[f"{uuid}_chunk_{i}"] = (_unit(angle + 0.01 * i), f"{uuid} part {i}", meta)
+    chunks["doc_1"] = (_unit(0.0), "documentation near the query", {'category': 'documentation'})
+    return VectorCollection(conversations), VectorCollection(chunks)
+
+
+def test_conversation_record():
+    """One record per chunked conversation: title, summary and opening human message"""
+    conv = {'uuid': 'abc', 'name': 'FAITHH indexer', 'summary': 'Planned batching. ',
+            'created_at': '2025-11-01',
+            'chat_messages': [{'sender': 'assistant', 'text': 'hello'},
+                              {'sender': 'human', 'content': [{'type': 'text', 'text': 'How  should we\nindex?'}]}]}
+    record = conversation_record(conv, chunk_count=4)
+    assert record['id'] == 'conversation_abc'
+    assert record['document'] == 'FAITHH indexer\n\nPlanned batching.\n\nHow should we index?'
+    assert record['metadata'][CONVERSATION_KEY] == 'abc' and record['metadata']['chunk_count'] == 4
+    assert conversation_record(conv, chunk_count=0) is None
+    assert conversation_record({'name': 'no uuid'}, chunk_count=3) is None
+    print("✅ Conversation records OK")
+
+
+def test_diversify():
+    """At most per_source hits per conversation, topped up when sources run out"""
+    hits = [{'distance': d, 'metadata': {CONVERSATION_KEY: c}}
+            for d, c in ((0.1, 'a'), (0.2, 'a'), (0.3, 'a'), (0.4, 'b'), (0.5, 'c'))]
+    assert [h['metadata'][CONVERSATION_KEY] for h in diversify(hits, 3, 1)] == ['a', 'b', 'c']
+    assert [h['distance'] for h in diversify(hits, 4, 1)] == [0.1, 0.2, 0.4, 0.5]
+    assert [h['distance'] for h in diversify(hits[:3], 2, 1)] == [0.1, 0.2]
+    print("✅ Diversity OK")
+
+
+def test_two_stage_retrieval():
+    """Only the top conversations' chunks are searched, and the slots span conversations"""
+    conversations, chunks = _corpus()
+    query = _unit(0.05)
+
+    flat = chunks.query([query], n_results=3, where={'category': 'claude_conversation_chunk'})
+    assert {m[CONVERSATION_KEY] for m in flat['metadatas'][0]} == {'indexer'}
+
+    retriever = HierarchicalRetriever(conversations, chunks.query, n_conversations=2)
+    results = retriever.query(query_embedding=query, n_results=3)
+    assert results['conversations'] == [['indexer', 'batching']]
+    sources = [m[CONVERSATION_KEY] for m in results['metadatas'][0]]
+    # One chunk per conversation first, then the best remaining chunk fills the third slot
+    assert sorted(sources) == ['batching', 'indexer', 'indexer']
+    assert results['distances'][0] == sorted(results['distances'][0])
+    assert chunks.wheres[-1] == {'$and': [{'category': 'claude_conversation_chunk'},
+                                          {CONVERSATION_KEY: {'$in': ['indexer', 'batching']}}]}
+    assert all('audio' not in doc for doc in results['documents'][0])
+
+    # Text queries are embedded once and reused for both stages
+    embedded = []
+    retriever.embedding_function = lambda texts: embedded.append(texts) or [query]
+    assert retriever.query(query_text="indexer", n_results=2)['ids'][0][0] == 'indexer_chunk_5'
+    assert embedded == [["indexer"]]
+
+    empty = HierarchicalRetriever(VectorCollection({}), chunks.query)
+    assert empty.query(query_embedding=query) is None and empty.stats['no_conversations'] == 1
+    print("✅ Two-stage retrieval OK")
+
+
+if __name__ == "__main__":
+    test_conversation_record()
+    test_diversify()
+    test_two_stage_retrieval()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/intents.py - regex fallback, prototype routing over a shared
+query embedding, and threshold calibration
+"""
+import sys
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.intents import INTENTS, IntentRouter, calibrate_thresholds, prf, rule_intent
+
+# One toy dimension per intent, lit by cue words, plus a small bias dimension
+CUES = [
+    ('you', 'yourself'),
+    ('why', 'reason', 'rationale', 'alternatives'),
+    ('next', 'priorit', 'start', 'focus', 'missing'),
+    ('constella', 'astris', 'auctor', 'penumbra', 'civic', 'resonance'),
+    ('leave off', 'catch me up', 'working on', 'status', 'speed', 'accomplished'),
+    ('discuss', 'configure', 'plan', 'conversation', 'talk', 'set up'),
+]
+
+
+class FakeEmbedding:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(len(texts))
+        return [[float(sum(c in t.lower() for c in cues)) for cues in CUES] + [0.1]
+                for t in texts]
+
+
+def test_rules_fallback_without_embeddings():
+    """No model: the regex rules decide, same flags as the old detector"""
+    router = IntentRouter()
+    intent = router.route("Why did faithh use ChromaDB over Pinecone?")
+    assert intent['intent_source'] == 'rules'
+    assert intent['is_why_question'] and intent['is_self_query']  # the old misroute
+    assert set(INTENTS) <= set(intent) and intent['is_tangent'] is False
+    flags, matched = rule_intent("catch me up on constella")
+    assert flags['needs_orientation'] and flags['is_constella_query'] and matched
+    print("✅ Regex fallback OK")
+
+
+def test_semantic_routing_reuses_query_embedding():
+    """Prototypes are embedded once; the query vector is computed once and reused"""
+    embed = FakeEmbedding()
+    router = IntentRouter(embed)
+    query = "Why did faithh use ChromaDB over Pinecone?"
+    vector = router.embed_query(query)
+    intent = router.route(query, vector)
+    assert intent['intent_source'] == 'semantic'
+    assert intent['is_why_question'] and not intent['is_self_query']
+    assert intent['intent_scores']['is_why_question'] > 0.9
+
+    router.route("Where did I leave off?", router.embed_query("Where did I leave off?"))
+    router.route("How do Astris decay rules work?", [0.0] * 7)  # keyword keeps constella on
+    assert embed.calls == [1, sum(len(p) for p in router.prototypes.values()), 1]
+    assert router.route("tell me about astris", [0.0] * 7)['is_constella_query']
+
+    # A swapped model invalidates the prototype vectors
+    router.embedding_function = FakeEmbedding()
+    assert not router.snapshot()['prototypes_embedded']
+    print("✅ Semantic routing OK")
+
+
+def test_uncertain_band_defers_to_rules():
+    """Scores between reject_below and accept_at take the regex verdict"""
+    embed = FakeEmbedding()
+    router = IntentRouter(embed, thresholds={name: (-1.0, 2.0) for name in INTENTS})
+    query = "Why did faithh use ChromaDB over Pinecone?"
+    intent = router.route(query, router.embed_query(query))
+    assert intent['intent_source'] == 'semantic'
+    assert intent['is_self_query'] and intent['is_why_question']  # rules decided
+    assert router.stats['deferred_to_rules'] == len(INTENTS)
+    print("✅ Uncertain band OK")
+
+
+def test_calibration():
+    """accept_at reaches the precision target; reject_below keeps every positive"""
+    scores = [0.9, 0.8, 0.7, 0.6, 0.5, 0.3]
+    labels = [True, True, False, True, False, False]
+    assert calibrate_thresholds(scores, labels, min_precision=0.95) == (0.58, 0.8)
+    assert calibrate_thresholds(scores, [False] * 6) == (1.0, 1.0)
+    assert prf([True, True, False], [True, False, True]) == {'precision': 0.5, 'recall': 0.5, 'f1': 0.5}
+    print("✅ Calibration OK")
+
+
+if __name__ == "__main__":
+    test_rules_fallback_without_embeddings()
+    test_semantic_routing_reuses_query_embedding()
+    test_uncertain_band_defers_to_rules()
+    test_calibration()
+    print("\n🎉 All tests passed!")
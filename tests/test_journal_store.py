@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test runtime/journal_store.py - journaled updates, debounced flushes,
+atomic compaction and crash recovery
+"""
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from runtime.journal_store import SEQ_KEY, JournaledJSONStore, atomic_write_json
+
+
+def _topic(i):
+    return {'query': f"question {i}", 'date': '2026-01-01'}
+
+
+def test_journal_roundtrip_and_compaction():
+    """Ops survive a restart; compaction folds them into the snapshot"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        path = tmpdir / 'faithh_memory.json'
+        path.write_text(json.dumps({'user_profile': {'name': 'Jonathan'}}))
+        store = JournaledJSONStore(path, flush_delay=60, compact_every=1000)
+        for i in range(60):
+            store.push_front(['conversation_context', 'recent_topics'], _topic(i), limit=50)
+        store.set(['user_profile', 'focus'], 'indexer')
+        store.flush()
+        assert store.stats['flushes'] == 1
+        assert json.loads(path.read_text()) == {'user_profile': {'name': 'Jonathan'}}  # untouched
+
+        reopened = JournaledJSONStore(path).view()
+        topics = reopened['conversation_context']['recent_topics']
+        assert len(topics) == 50 and topics[0]['query'] == 'question 59'
+        assert reopened['user_profile'] == {'name': 'Jonathan', 'focus': 'indexer'}
+
+        store.compact()
+        on_disk = json.loads(path.read_text())
+        assert SEQ_KEY not in on_disk and on_disk['user_profile']['focus'] == 'indexer'
+        header = json.loads(store.journal_path.read_text())
+        assert header['snapshot_seq'] == 61 and 'op' not in header
+        assert JournaledJSONStore(path).view() == store.view()
+        assert not list(tmpdir.glob('.*.tmp'))
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Journal roundtrip + compaction OK")
+
+
+def test_crash_recovery():
+    """A torn journal line is skipped; ops already in the snapshot aren't replayed"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        path = tmpdir / 'memory.json'
+        store = JournaledJSONStore(path, flush_delay=60, compact_every=1000)
+        for i in range(3):
+            store.push_front(['recent'], _topic(i))
+        store.flush()
+        journal = store.journal_path.read_text()
+
+        # Crash after the snapshot rename but before the journal was emptied
+        store.compact()
+        store.journal_path.write_text(journal + '{"seq": 4, "op": "push_fr')
+        recovered = JournaledJSONStore(path)
+        assert [t['query'] for t in recovered.view()['recent']] == ['question 2', 'question 1', 'question 0']
+        assert recovered.stats['torn_lines'] == 1
+
+        recovered.push_front(['recent'], _topic(3))
+        assert recovered.snapshot()['seq'] == 4
+        recovered.close()
+        assert len(json.loads(path.read_text())['recent']) == 4
+        assert JournaledJSONStore(path).snapshot()['seq'] == 4
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Crash recovery OK")
+
+
+def test_outside_writes_win_over_older_journal():
+    """A snapshot rewritten without the store keeps its content after a restart"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        path = tmpdir / 'scaffolding_state.json'
+        path.write_text(json.dumps({'active_context': {'phase_goal': 'old'}}))
+        store = JournaledJSONStore(path, flush_delay=60, compact_every=1000)
+        store.set(['active_context', 'phase_goal'], 'journaled')
+        store.flush()
+
+        # e.g. a script that rewrites scaffolding_state.json directly
+        time.sleep(0.01)
+        path.write_text(json.dumps({'active_context': {'phase_goal': 'edited by hand'}}))
+        reopened = JournaledJSONStore(path, flush_delay=60)
+        assert reopened.view()['active_context']['phase_goal'] == 'edited by hand'
+        assert reopened.stats['superseded_journals'] == 1
+
+        # Updates after the outside write still journal and replay normally
+        reopened.set(['meta'], {'last_updated': 'later'})
+        reopened.flush()
+        again = JournaledJSONStore(path).view()
+        assert again == {'active_context': {'phase_goal': 'edited by hand'}, 'meta': {'last_updated': 'later'}}
+
+        # Snapshots from before journal headers carried their seq inline
+        legacy = tmpdir / 'memory.json'
+        legacy.write_text(json.dumps({'n': 1, SEQ_KEY: 2}))
+        journal = legacy.with_name('memory.journal.jsonl')
+        journal.write_text(''.join(json.dumps({'seq': seq, 'op': 'set', 'path': ['n'], 'value': seq}) + '\n'
+                                   for seq in (1, 2, 3)))
+        migrated = JournaledJSONStore(legacy)
+        assert migrated.view() == {'n': 3} and migrated.snapshot()['seq'] == 3
+        assert JournaledJSONStore(legacy).view() == {'n': 3}
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Outside writes win over older journal OK")
+
+
+def test_debounce_views_and_external_edits():
+    """Bursts flush once; views are copies; hand edits to the snapshot are picked up"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        path = tmpdir / 'scaffolding_state.json'
+        store = JournaledJSONStore(path, flush_delay=0.1)
+        assert not store.exists()
+        for i in range(20):
+            store.append(['open_loops'], {'id': i}, limit=10)
+        time.sleep(0.3)
+        assert store.stats['flushes'] == 1 and len(store.view()['open_loops']) == 10
+
+        view = store.view()
+        view['open_loops'].clear()
+        assert len(store.view()['open_loops']) == 10
+
+        assert store.replace({**store.view(), 'meta': {'last_updated': 'now'}}) == 1
+
+        store.compact()
+        edited = json.loads(path.read_text())
+        edited['active_context'] = {'primary_project': 'constella'}
+        time.sleep(0.01)
+        path.write_text(json.dumps(edited))
+        assert store.view()['active_context'] == {'primary_project': 'constella'}
+        assert store.stats['reloads'] == 1 and store.exists()
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Debounce, views and external edits OK")
+
+
+def test_atomic_outside_saves_survive_compaction():
+    """A save_scaffolding-style atomic rewrite is seen by the store and kept by its compaction"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        path = tmpdir / 'scaffolding_state.json'
+        store = JournaledJSONStore(path)
+        store.set(['meta'], {'version': 1})
+        store.compact()
+        time.sleep(0.01)
+        atomic_write_json(path, {'meta': {'version': 1}, 'cli_key': 'from the CLI'})
+        assert store.view()['cli_key'] == 'from the CLI'
+        store.set(['active_context'], {'primary_project': 'faithh'})
+        store.flush()
+        store.compact()
+        assert json.loads(path.read_text()) == {'meta': {'version': 1}, 'cli_key': 'from the CLI',
+                                                'active_context': {'primary_project': 'faithh'}}
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Atomic outside saves OK")
+
+
+if __name__ == "__main__":
+    test_journal_roundtrip_and_compaction()
+    test_crash_recovery()
+    test_outside_writes_win_over_older_journal()
+    test_debounce_views_and_external_edits()
+    test_atomic_outside_saves_survive_compaction()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test providers/router.py - circuit breakers, immediate failover and
+p95-based hedging across fake providers
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from providers.base import LLMProvider, ProviderError
+from providers.router import CircuitBreaker, CircuitOpenError, ModelRouter, OPEN, CLOSED
+
+
+class FakeProvider(LLMProvider):
+    """Sleeps `delay` seconds, then answers or fails"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__('fake-model', timeout=5)
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def _generate(self, prompt, model, timeout):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ProviderError(f"{self.name} down", self.name)
+        return f"{self.name}: {prompt}", model
+
+
+def _router(providers, **kwargs):
+    return ModelRouter(provider_lookup=providers.__getitem__, **kwargs)
+
+
+def test_breaker_skips_dead_provider():
+    """After the threshold the dead primary costs nothing; a probe reopens it"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    now[0] = 11
+    assert breaker.allow() and not breaker.allow()  # one half-open probe only
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    providers = {'primary': FakeProvider('primary', delay=0.05, fail=True),
+                 'backup': FakeProvider('backup')}
+    router = _router(providers, hedge=False, failure_threshold=2)
+    routes = [('primary', None), ('backup', None)]
+    for _ in range(4):
+        assert router.generate("hi", routes)['route'] == 'backup'
+    assert providers['primary'].calls == 2  # circuit open after two failures
+    assert router.counters['skipped_open'] == 2
+
+    providers['backup'].fail = True
+    for _ in range(2):
+        try:
+            router.generate("hi", routes)
+        except ProviderError:
+            pass
+    try:
+        router.generate("hi", routes)
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    print("✅ Circuit breakers OK")
+
+
+def test_failover_is_immediate():
+    """A fast failure starts the next route without waiting for a hedge delay"""
+    providers = {'primary': FakeProvider('primary', fail=True),
+                 'backup': FakeProvider('backup')}
+    router = _router(providers, hedge=True, hedge_default_delay=5)
+    start = time.monotonic()
+    result = router.generate("hi", [('primary', None), ('backup', None)])
+    assert result['route'] == 'backup' and not result['hedged']
+    assert time.monotonic() - start < 0.5
+    assert router.counters['failovers'] == 1
+    print("✅ Immediate failover OK")
+
+
+def test_failure_during_hedge_fails_over():
+    """A hedge that fails starts the next route while the slow primary still runs"""
+    providers = {'primary': FakeProvider('primary', delay=2.0),
+                 'backup': FakeProvider('backup', fail=True),
+                 'third': FakeProvider('third')}
+    router = _router(providers, hedge=True, hedge_default_delay=0.05, hedge_min_delay=0.01,
+                     hedge_max_delay=5, min_samples=5)
+    for _ in range(5):  # backup is normally slow, so its own hedge delay would be 1s
+        router._route_stats(('backup', None)).record(True, 1.0)
+    start = time.monotonic()
+    result = router.generate("hi", [('primary', None), ('backup', None), ('third', None)])
+    elapsed = time.monotonic() - start
+    assert result['route'] == 'third' and result['attempts'] == ['primary', 'backup', 'third']
+    assert elapsed < 0.5, elapsed
+    print("✅ Failover during hedge OK")
+
+
+def test_hedge_after_p95():
+    """A primary slower than its own p95 is raced by the fallback"""
+    providers = {'primary': FakeProvider('primary', delay=0.02),
+                 'backup': FakeProvider('backup', delay=0.05)}
+    router = _router(providers, hedge=True, hedge_min_delay=0.01, min_samples=5)
+    routes = [('primary', None), ('backup', None)]
+    for _ in range(6):
+        assert router.generate("hi", routes)['route'] == 'primary'
+    assert router.hedge_delay(routes[0]) < 0.1
+
+    providers['primary'].delay = 2.0  # primary degrades
+    start = time.monotonic()
+    result = router.generate("hi", routes)
+    elapsed = time.monotonic() - start
+    assert result['route'] == 'backup' and result['hedged']
+    assert result['attempts'] == ['primary', 'backup']
+    assert elapsed < 0.5, elapsed
+    snapshot = router.snapshot()
+    assert snapshot['counters']['hedge_wins'] == 1
+    assert snapshot['routes']['primary:default']['calls'] == 6  # slow call still running
+    print(f"✅ Hedged request OK ({elapsed * 1000:.0f}ms vs 2000ms primary)")
+
+
+if __name__ == "__main__":
+    test_breaker_skips_dead_provider()
+    test_failover_is_immediate()
+    test_failure_during_hedge_fails_over()
+    test_hedge_after_p95()
+    print("\n🎉 All tests passed!")
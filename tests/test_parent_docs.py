@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/parent_docs.py - child spans, parent store indexing and
+bounded context windows around matches
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.filters import matches_where
+from retrieval.parent_docs import (ContextExpander, ParentStore, expand_window, index_parent,
+                                   split_children)
+
+
+def _document(paragraphs=30):
+    return "\n\n".join(f"Paragraph {i}. " + " ".join(f"word{i}_{j}" for j in range(25))
+                       for i in range(paragraphs))
+
+
+class RecordingCollection:
+    """Stores upserted rows; delete honours ids and where"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, documents, metadatas):
+        self.rows.update({i: (d, m) for i, d, m in zip(ids, documents, metadatas)})
+
+    def delete(self, ids=None, where=None):
+        for doc_id in list(self.rows):
+            if (ids and doc_id in ids) or (where and matches_where(self.rows[doc_id][1], where)):
+                del self.rows[doc_id]
+
+
+def test_child_spans():
+    """Children cover the text, overlap a little, stay small and end at breaks"""
+    text = _document()
+    spans = split_children(text, chunk_chars=500, overlap=100)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (s1, e1), (s2, e2) in zip(spans, spans[1:]):
+        assert s2 < e1 and s2 > s1  # overlapping, always advancing
+    assert all(e - s <= 500 for s, e in spans)
+    assert all(text[e - 1] in " \n" or e == len(text) for _, e in spans)
+    assert split_children("short note") == [(0, 10)] and split_children("") == []
+    print("✅ Child spans OK")
+
+
+def test_index_parent_roundtrip():
+    """Parents go to the store, children carry offsets, re-indexing replaces children"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        store = ParentStore(tmpdir / 'parents.sqlite')
+        collection = RecordingCollection()
+        collection.rows['constella_ucf'] = ("old whole document", {'category': 'constella_master'})
+        text = _document()
+        n = index_parent(collection, store, 'constella_ucf', text, {'category': 'constella_master'})
+        assert n == len(collection.rows) and 'constella_ucf' not in collection.rows
+        for doc, meta in collection.rows.values():
+            assert text[meta['child_start']:meta['child_end']] == doc
+            assert meta['parent_id'] == 'constella_ucf' and meta['category'] == 'constella_master'
+        assert store.get('constella_ucf') == text and store.has('constella_ucf')
+
+        index_parent(collection, store, 'constella_ucf', "Edited. " * 10, {'category': 'constella_master'})
+        assert len(collection.rows) == 1 and store.count() == 1
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Parent indexing OK")
+
+
+def test_windows_around_matches():
+    """A deep match yields the window around it, not the document prefix"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        store = ParentStore(tmpdir / 'parents.sqlite')
+        text = _document()
+        store.put('doc', text)
+        target = text.index("Paragraph 20.")
+        lo, hi = expand_window(text, target, target + 200, window_chars=1000)
+        assert lo <= target and hi >= target + 200 and hi - lo <= 1000
+        assert text[lo:lo + 9] == "Paragraph"  # starts on a paragraph break
+
+        children = [(s, e) for s, e in split_children(text) if s <= target < e or s > target][:3]
+        metas = [{'parent_id': 'doc', 'child_start': s, 'child_end': e} for s, e in children]
+        metas.append({'source': 'old chunk'})
+        docs = [text[s:e] for s, e in children] + ["x" * 1500]
+        expander = ContextExpander(store, window_chars=1000)
+        windows = expander.expand(docs, metas, limit=3)
+        assert "Paragraph 20." in windows[0] and windows[0].startswith("...")
+        assert len(windows[0]) <= 1006 and "Paragraph 0." not in windows[0]
+        # Neighbouring children merge into the first window, freeing slots
+        assert expander.stats['merged'] >= 1 and windows[-1] == "x" * 1000 + "..."
+
+        assert ContextExpander(None).expand(["short"], [{'parent_id': 'doc', 'child_start': 0}]) == ["short"]
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Context windows OK")
+
+
+if __name__ == "__main__":
+    test_child_spans()
+    test_index_parent_roundtrip()
+    test_windows_around_matches()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/partitions.py - where-clause routing, scatter-gather
+equivalence with a single collection, and category-routed writes
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.filters import matches_where
+from retrieval.partitions import (DEFAULT_PARTITION_GROUPS, OTHER_GROUP, OTHER_MARKER,
+                                  PartitionedCollection, category_set, strip_category)
+
+CATEGORIES = ['constella_master', 'claude_conversation_chunk', 'claude_conversation',
+              'documentation', 'live_chat', 'filesystem']
+
+
+class BruteForceCollection:
+    """Exact-search stand-in for a Chroma collection (squared L2)"""
+
+    def __init__(self):
+        self.rows = {}  # id -> (vector, document, metadata)
+        self.queries = []
+
+    def add(self, ids, metadatas, documents=None, embeddings=None):
+        for i, doc_id in enumerate(ids):
+            self.rows[doc_id] = (np.asarray(embeddings[i], dtype=np.float32),
+                                 documents[i] if documents else None, metadatas[i])
+
+    upsert = add
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def get(self, ids, include=None):
+        found = [i for i in ids if i in self.rows]
+        return {'ids': found, 'documents': [self.rows[i][1] for i in found],
+                'metadatas': [self.rows[i][2] for i in found]}
+
+    def count(self):
+        return len(self.rows)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        self.queries.append(where)
+        result = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        for q in query_embeddings:
+            q = np.asarray(q, dtype=np.float32)
+            hits = sorted((float(np.sum((vec - q) ** 2)), doc_id)
+                          for doc_id, (vec, _, meta) in self.rows.items() if matches_where(meta, where))
+            hits = hits[:n_results]
+            result['ids'].append([doc_id for _, doc_id in hits])
+            result['distances'].append([dist for dist, _ in hits])
+            result['documents'].append([self.rows[doc_id][1] for _, doc_id in hits])
+            result['metadatas'].append([self.rows[doc_id][2] for _, doc_id in hits])
+        return result
+
+
+def _layout():
+    categories = {group: list(cats) for group, cats in DEFAULT_PARTITION_GROUPS.items()}
+    categories[OTHER_GROUP] = [OTHER_MARKER]
+    return categories
+
+
+def _corpus(n=400, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"doc_{i}" for i in range(n)]
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    metadatas = [{'category': CATEGORIES[i % len(CATEGORIES)], 'source': f"s{i % 3}"} for i in range(n)]
+    documents = [f"document {i}" for i in range(n)]
+    return ids, vectors, metadatas, documents
+
+
+def test_where_routing():
+    """Only partitions that can match are searched; fully covered ones run unfiltered"""
+    assert category_set({"category": "constella_master"}) == {"constella_master"}
+    assert category_set({"$or": [{"category": "a"}, {"category": {"$in": ["b", "c"]}}]}) == {"a", "b", "c"}
+    assert category_set({"$and": [{"category": {"$in": ["a", "b"]}}, {"category": "b"}]}) == {"b"}
+    assert category_set({"category": {"$ne": "a"}}) is None and category_set({"source": "x"}) is None
+    assert strip_category({"category": "a", "source": "x"}) == {"source": "x"}
+    assert strip_category({"$and": [{"category": "a"}, {"source": "x"}]}) == {"source": "x"}
+
+    router = PartitionedCollection({group: BruteForceCollection() for group in _layout()}, _layout())
+    assert router.route({"category": "constella_master"}) == {'constella': None}
+    discover_where = {"$or": [{"category": "claude_conversation_chunk"},
+                              {"category": "claude_conversation"}, {"category": "documentation"}]}
+    plan = router.route(discover_where)
+    # conversations also holds live_chat, so it keeps the filter
+    assert plan == {'chat_chunks': None, 'docs': None, 'conversations': discover_where}
+    assert router.route({"category": "filesystem"}) == {'other': {"category": "filesystem"}}
+    assert set(router.route(None)) == set(_layout())
+    print("✅ Where routing OK")
+
+
+def test_scatter_gather_matches_single_collection():
+    """Merged partition results equal a filtered search over the whole collection"""
+    ids, vectors, metadatas, documents = _corpus()
+    single = BruteForceCollection()
+    single.add(ids, metadatas, documents, vectors)
+    partitions = {group: BruteForceCollection() for group in _layout()}
+    router = PartitionedCollection(partitions, _layout(), name='documents_768')
+    router.add(ids, metadatas, documents, vectors)
+    assert router.count() == len(ids) and partitions['constella'].count() == len(ids) // len(CATEGORIES) + 1
+
+    queries = np.random.default_rng(1).normal(size=(5, vectors.shape[1]))
+    wheres = [None, {"category": "constella_master"},
+              {"category": {"$in": ["constella_master", "claude_conversation_chunk", "documentation"]}},
+              {"$or": [{"category": "claude_conversation"}, {"category": "documentation"}]},
+              {"$and": [{"category": "documentation"}, {"source": "s1"}]}]
+    for where in wheres:
+        expected = single.query(queries, n_results=7, where=where)
+        got = router.query(query_embeddings=queries, n_results=7, where=where)
+        assert got['ids'] == expected['ids'], where
+        assert np.allclose(got['distances'], expected['distances'])
+        assert got['documents'] == expected['documents']
+
+    for coll in partitions.values():
+        coll.queries.clear()
+    router.query(query_embeddings=queries[:1], n_results=3, where={"category": "constella_master"})
+    assert partitions['constella'].queries == [None]  # unfiltered search of the small partition
+    assert all(not coll.queries for group, coll in partitions.items() if group != 'constella')
+    print("✅ Scatter-gather equivalence OK")
+
+
+def test_writes_follow_category():
+    """add/get/delete route by category; uncategorized docs land in the catch-all"""
+    partitions = {group: BruteForceCollection() for group in _layout()}
+    router = PartitionedCollection(partitions, _layout())
+    vec = [np.ones(4)]
+    router.add(ids=["live_1"], metadatas=[{'category': 'live_chat'}], documents=["hi"], embeddings=vec)
+    router.add(ids=["misc_1"], metadatas=[{}], documents=["misc"], embeddings=vec)
+    assert "live_1" in partitions['conversations'].rows and "misc_1" in partitions['other'].rows
+
+    fetched = router.get(ids=["misc_1", "live_1", "missing"])
+    assert fetched['ids'] == ["misc_1", "live_1"] and fetched['documents'] == ["misc", "hi"]
+    router.delete(ids=["live_1"])
+    assert router.count() == 1
+
+    no_catch_all = PartitionedCollection({'docs': BruteForceCollection()}, {'docs': ['documentation']})
+    try:
+        no_catch_all.add(ids=["x"], metadatas=[{'category': 'code'}], documents=["x"], embeddings=vec)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Category-routed writes OK")
+
+
+if __name__ == "__main__":
+    test_where_routing()
+    test_scatter_gather_matches_single_collection()
+    test_writes_follow_category()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test executors/output.py + ProcessExecutor streaming - head/tail capping,
+early kill on cap or timeout, incremental chunks
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add repo root (executors) and backend (flat imports) to path
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from executors.output import OutputCapture
+from executors.process import ProcessExecutor
+
+
+def test_output_capture_keeps_head_and_tail():
+    """Only max_bytes are retained: the start, a marker, and the end"""
+    capture = OutputCapture(max_bytes=10, head_bytes=4)
+    for piece in (b"abc", b"defgh", b"ijklmnop", b"qrstuvwxyz"):
+        capture.feed(piece)
+    assert capture.total_bytes == 26 and capture.truncated
+    text = capture.text()
+    assert text.startswith("abcd") and text.endswith("uvwxyz")
+    assert "[16 bytes truncated]" in text
+
+    small = OutputCapture(max_bytes=100, head_bytes=10)
+    small.feed(b"hello ")
+    small.feed(b"world")
+    assert small.text() == "hello world" and not small.truncated
+    print("✅ Head/tail capture OK")
+
+
+def test_process_executor_streams_and_kills():
+    """Chunks arrive before exit; cap and timeout kill the process group"""
+    executor = ProcessExecutor(max_output_bytes=64 * 1024, head_bytes=1024)
+
+    async def scenario():
+        chunks = []
+        stamps = []
+
+        async def on_output(chunk):
+            chunks.append(chunk)
+            stamps.append(time.monotonic())
+
+        start = time.monotonic()
+        result = await executor.execute_streaming(
+            'run_command', {'command': 'echo one; sleep 0.3; echo two'}, on_output)
+        assert result['success'] and result['stdout'] == "one\ntwo\n"
+        assert [c['data'] for c in chunks] == ["one\n", "two\n"]
+        assert stamps[0] - start < 0.25  # first chunk before the command finished
+
+        start = time.monotonic()
+        flood = await executor.execute('run_command', {'command': 'yes'})
+        assert flood['killed'] == 'output_cap' and flood['truncated']
+        assert len(flood['stdout']) < 70 * 1024
+        assert time.monotonic() - start < 5
+
+        start = time.monotonic()
+        slow = await executor.execute('run_command',
+                                      {'command': 'echo started; sleep 10', 'timeout': 0.3})
+        assert slow['killed'] == 'timeout' and slow['error'] == 'Command timeout'
+        assert slow['stdout'] == "started\n"
+        assert time.monotonic() - start < 3
+
+        # Client parameters can lower the cap but not raise it or disable the kill
+        greedy = await executor.execute('run_command', {'command': 'yes', 'kill_on_cap': False,
+                                                        'max_output_bytes': 1 << 30})
+        assert greedy['killed'] == 'output_cap' and len(greedy['stdout']) < 70 * 1024
+        small = await executor.execute('run_command', {'command': 'head -c 5000 /dev/zero',
+                                                       'max_output_bytes': 1000})
+        assert small['truncated'] and small['killed'] == 'output_cap'
+
+        # A grandchild in its own session keeps the pipes open after the kill
+        start = time.monotonic()
+        escaped = await executor.execute('run_command', {'command': 'setsid sleep 5 & echo x; sleep 10',
+                                                         'timeout': 0.3})
+        assert escaped['killed'] == 'timeout' and escaped['stdout'] == "x\n"
+        assert time.monotonic() - start < 4
+
+    asyncio.run(scenario())
+    print("✅ Streaming + cap/timeout kill OK")
+
+
+def test_tool_system_run_command_caps_output():
+    """ToolSystem.run_command keeps memory bounded and reports truncation"""
+    from tool_system import ToolSystem
+    tools = ToolSystem(str(REPO_ROOT), kill_on_cap=False)
+    result = tools.run_command("yes | head -c 500000", max_output_bytes=4096)
+    assert result['success'] and result['truncated']
+    assert result['stdout_bytes'] == 500000
+    assert len(result['stdout']) < 4200
+
+    # Per-call parameters only tighten the configured limits
+    capped = ToolSystem(str(REPO_ROOT), max_output_bytes=4096)
+    result = capped.execute_tool("run_command", command="yes | head -c 500000",
+                                 max_output_bytes=1 << 30, kill_on_cap=False)
+    assert result['killed'] == 'output_cap' and len(result['stdout']) < 4200
+
+    start = time.monotonic()
+    result = tools.run_command("setsid sleep 5 & echo x; sleep 10", timeout=0.3)
+    assert result['killed'] == 'timeout' and time.monotonic() - start < 4
+    print("✅ ToolSystem.run_command cap OK")
+
+
+if __name__ == "__main__":
+    test_output_capture_keeps_head_and_tail()
+    test_process_executor_streams_and_kills()
+    test_tool_system_run_command_caps_output()
+    print("\n🎉 All tests passed!")
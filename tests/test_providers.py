@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test providers/ - uniform generate/stream, connection reuse and timeouts
+against a local fake Ollama server
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from providers.base import ProviderError, ProviderTimeout
+from providers.gemini import GeminiProvider
+from providers.ollama import OllamaProvider
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Answers /api/generate (plain, streamed, slow, failing) and /api/tags"""
+    protocol_version = 'HTTP/1.1'
+    client_ports = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except BrokenPipeError:
+            pass  # client already gave up (timeout test)
+
+    def do_GET(self):
+        self._json(200, {'models': [{'name': 'llama3.1-8b'}, {'name': 'qwen2.5'}]})
+
+    def do_POST(self):
+        FakeOllama.client_ports.add(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        model = body['model']
+        if model == 'broken':
+            return self._json(500, {'error': 'boom'})
+        if model == 'slow':
+            time.sleep(1.0)
+        if not body['stream']:
+            return self._json(200, {'model': model, 'response': f"echo: {body['prompt']}"})
+        lines = [json.dumps({'response': w}) + '\n' for w in ('one ', 'two ', 'three')]
+        lines.append(json.dumps({'done': True}) + '\n')
+        data = ''.join(lines).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_ollama_generate_stream_and_reuse():
+    """Same interface for both modes; one pooled connection serves every call"""
+    server, url = _serve()
+    try:
+        FakeOllama.client_ports.clear()
+        ollama = OllamaProvider(url, default_model='llama3.1-8b', timeout=5)
+        for i in range(5):
+            result = ollama.generate(f"hi {i}")
+            assert result['text'] == f"echo: hi {i}"
+            assert result['model'] == 'llama3.1-8b' and result['provider'] == "Meta (via Ollama)"
+        assert ''.join(ollama.stream("hi", model='qwen2.5')) == "one two three"
+        assert len(FakeOllama.client_ports) == 1, FakeOllama.client_ports
+        assert ollama.models() == ['llama3.1-8b', 'qwen2.5']
+        assert ollama.snapshot()['calls'] == 6
+    finally:
+        server.shutdown()
+    print("✅ Ollama generate/stream + connection reuse OK")
+
+
+def test_ollama_errors_are_uniform():
+    """Bad status, read timeout and dead server all raise ProviderError"""
+    server, url = _serve()
+    try:
+        ollama = OllamaProvider(url, timeout=0.2)
+        try:
+            ollama.generate("x", model='broken')
+            assert False, "expected ProviderError"
+        except ProviderError as e:
+            assert e.status == 500 and e.provider == 'ollama'
+        try:
+            ollama.generate("x", model='slow')
+            assert False, "expected ProviderTimeout"
+        except ProviderTimeout:
+            pass
+        assert ollama.stats['errors'] == 2 and ollama.stats['timeouts'] == 1
+    finally:
+        server.shutdown()
+
+    dead = OllamaProvider("http://127.0.0.1:9", connect_timeout=0.5)
+    start = time.monotonic()
+    try:
+        dead.generate("x")
+        assert False, "expected ProviderError"
+    except ProviderError:
+        pass
+    assert time.monotonic() - start < 2
+    print("✅ Uniform provider errors OK")
+
+
+def test_gemini_without_key_is_unavailable():
+    """No key: available() is False and calls raise ProviderError"""
+    gemini = GeminiProvider(None)
+    assert not gemini.available()
+    try:
+        gemini.generate("hello")
+        assert False, "expected ProviderError"
+    except ProviderError as e:
+        assert e.provider == 'gemini'
+    print("✅ Unconfigured Gemini OK")
+
+
+if __name__ == "__main__":
+    test_ollama_generate_stream_and_reuse()
+    test_ollama_errors_are_uniform()
+    test_gemini_without_key_is_unavailable()
+    print("\n🎉 All tests passed!")
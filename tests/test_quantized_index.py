@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/quantized.py - int8/binary tier agrees with exact search
+"""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from retrieval.quantized import QuantizedIndex
+
+
+def _corpus(n=3000, dim=768, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = [{'category': 'constella_master' if i % 4 == 0 else 'documentation'} for i in range(n)]
+    return [f"doc_{i}" for i in range(n)], vectors, metadatas
+
+
+def test_int8_rescoring_matches_exact():
+    """Re-scored int8 results should match brute-force float32"""
+    ids, vectors, metadatas = _corpus()
+    index = QuantizedIndex.build(ids, vectors, metadatas)
+    queries = vectors[:20] + 0.02 * np.random.default_rng(1).normal(size=(20, 768)).astype(np.float32)
+
+    recall = []
+    for q in queries:
+        exact = {row for row, _ in index.search(q, n_results=10, exact=True)}
+        approx = {row for row, _ in index.search(q, n_results=10)}
+        recall.append(len(exact & approx) / 10)
+    assert np.mean(recall) >= 0.95, f"int8 recall too low: {np.mean(recall):.3f}"
+    print(f"✅ int8 recall@10: {np.mean(recall):.3f}")
+
+
+def test_where_filter_and_save_load():
+    """Filters apply before scoring and the saved index round-trips via memmap"""
+    ids, vectors, metadatas = _corpus(n=500)
+    index = QuantizedIndex.build(ids, vectors, metadatas)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        loaded = QuantizedIndex.load(tmp)
+        result = loaded.query([vectors[4]], n_results=5, where={"category": "constella_master"})
+
+    assert result['ids'][0][0] == "doc_4"
+    assert all(m['category'] == 'constella_master' for m in result['metadatas'][0])
+    assert result['distances'][0][0] < 1e-4  # squared L2 to itself
+    print("✅ Filtered query + save/load OK")
+
+
+def test_live_add():
+    """Vectors appended after load are searchable"""
+    ids, vectors, metadatas = _corpus(n=200)
+    index = QuantizedIndex.build(ids, vectors, metadatas)
+    new_vec = -vectors[0]
+    assert index.add(["live_conv_1"], [new_vec], [{'category': 'live_chat'}]) == 1
+    assert index.add(["live_conv_1"], [new_vec]) == 0  # duplicate id skipped
+
+    result = index.query([new_vec], n_results=1, use_binary=True, binary_factor=2)
+    assert result['ids'][0] == ["live_conv_1"]
+    print("✅ Live add OK")
+
+
+def test_scoring_runs_outside_the_lock():
+    """Adds can proceed while a search scores; the search sees its own snapshot"""
+    ids, vectors, metadatas = _corpus(n=200)
+    index = QuantizedIndex.build(ids, vectors, metadatas)
+    score = index._approx_scores
+    added = []
+
+    def add_during_scoring(query, rows, codes):
+        worker = threading.Thread(target=lambda: added.append(index.add(["live_mid"], [-vectors[1]])))
+        worker.start()
+        worker.join(timeout=2)
+        return score(query, rows, codes)
+
+    index._approx_scores = add_during_scoring
+    hits = index.search(-vectors[1], n_results=3)
+    assert added == [1]  # the add didn't wait for the search to finish
+    assert all(row < 200 for row, _ in hits)  # rows added mid-search aren't half-seen
+    del index._approx_scores
+    assert index.search(-vectors[1], n_results=1)[0][0] == 200
+    print("✅ Unlocked scoring OK")
+
+
+if __name__ == "__main__":
+    test_int8_rescoring_matches_exact()
+    test_where_filter_and_save_load()
+    test_live_add()
+    test_scoring_runs_outside_the_lock()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test retrieval/generation.py and retrieval/result_cache.py - generation
+sidecar, versioned result cache, paging and LRU bounds
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from retrieval.generation import GenerationStore
+from retrieval.result_cache import RAGResultCache, VersionedCollection
+
+
+class FakeCollection:
+    """Just enough of a Chroma collection: query() counts ANN searches"""
+
+    name = 'documents_768'
+
+    def __init__(self, n_docs=30):
+        self.docs = {f"doc_{i}": f"document {i}" for i in range(n_docs)}
+        self.queries = 0
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        self.queries += 1
+        ids = sorted(self.docs)[:n_results]
+        return {'ids': [ids], 'documents': [[self.docs[i] for i in ids]],
+                'metadatas': [[{'category': 'documentation'} for _ in ids]],
+                'distances': [[0.1 * n for n in range(len(ids))]]}
+
+    def add(self, ids, documents, metadatas=None):
+        self.docs.update(zip(ids, documents))
+
+    def count(self):
+        return len(self.docs)
+
+
+def test_generations_shared_across_processes():
+    """Bumps are visible to other stores on the same sidecar once max_age passes"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        backend = GenerationStore(tmpdir / 'generations.sqlite', max_age=0)
+        indexer = GenerationStore(tmpdir / 'generations.sqlite')
+        assert backend.current('documents_768') == 0
+        assert indexer.bump('documents_768', writes=120) == 1
+        assert indexer.bump('documents_768') == 2
+        assert backend.current('documents_768') == 2 and backend.current('other') == 0
+        assert indexer.all()['documents_768']['writes'] == 121
+
+        cached = GenerationStore(tmpdir / 'generations.sqlite', max_age=60)
+        assert cached.current('documents_768') == 2
+        indexer.bump('documents_768')
+        assert cached.current('documents_768') == 2  # within max_age
+        assert cached.bump('documents_768') == 4  # own bumps are seen at once
+
+        broken = GenerationStore(tmpdir)  # a directory, not a database
+        assert broken.current('documents_768') is None and broken.stats['errors'] == 1
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Generation sidecar OK")
+
+
+def test_cache_hits_pages_and_expires_on_write():
+    """Repeats and smaller pages skip the search; a write makes old entries unreachable"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        generations = GenerationStore(tmpdir / 'generations.sqlite', max_age=0)
+        cache = RAGResultCache(generations)
+        raw = FakeCollection()
+        collection = VersionedCollection(raw, cache=cache)
+        where = {"$or": [{"category": "claude_conversation_chunk"}, {"category": "documentation"}]}
+
+        first = collection.query(query_texts=["UCF governance"], n_results=10, where=where)
+        again = collection.query(query_texts=["  UCF   governance"], n_results=10, where=where)
+        page = collection.query(query_texts=["UCF governance"], n_results=5, where=where)
+        assert raw.queries == 1 and again == first
+        assert page['ids'][0] == first['ids'][0][:5] and len(page['distances'][0]) == 5
+
+        collection.query(query_texts=["UCF governance"], n_results=20, where=where)
+        collection.query(query_texts=["UCF governance"], n_results=10, where={"category": "documentation"})
+        collection.query(query_embeddings=[[0.1, 0.2, 0.3]], n_results=10, where=where)
+        assert raw.queries == 4
+
+        page['ids'][0].clear()  # callers can't corrupt the cached copy
+        assert len(collection.query(query_texts=["UCF governance"], n_results=10, where=where)['ids'][0]) == 10
+
+        collection.add(ids=["a_fresh_doc"], documents=["fresh document"])
+        fresh = collection.query(query_texts=["UCF governance"], n_results=10, where=where)
+        assert raw.queries == 5 and fresh['ids'][0][0] == "a_fresh_doc"
+        assert cache.snapshot()['generations'] == {'documents_768': 1}
+        assert cache.stats['expired'] == 3 and cache.snapshot()['entries'] == 1
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Versioned cache OK")
+
+
+def test_short_results_lru_and_uncacheable():
+    """Exhausted results answer bigger pages; LRU bounds hold; no generation, no caching"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        generations = GenerationStore(tmpdir / 'generations.sqlite', max_age=0)
+        raw = FakeCollection(n_docs=3)
+        cache = RAGResultCache(generations, max_entries=2)
+        cache.query('documents_768', raw.query, query_texts=["q"], n_results=5)
+        result = cache.query('documents_768', raw.query, query_texts=["q"], n_results=50)
+        assert raw.queries == 1 and len(result['ids'][0]) == 3
+
+        for text in ("a", "b", "c"):
+            cache.query('documents_768', raw.query, query_texts=[text], n_results=5)
+        assert cache.snapshot()['entries'] == 2 and cache.stats['evictions'] == 2
+        cache.query('documents_768', raw.query, query_texts=["c"], n_results=5)
+        assert raw.queries == 4
+
+        uncached = RAGResultCache(GenerationStore(tmpdir))
+        for _ in range(2):
+            uncached.query('documents_768', raw.query, query_texts=["q"], n_results=5)
+        assert raw.queries == 6 and uncached.stats['uncacheable'] == 2
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Paging, LRU and uncacheable OK")
+
+
+def test_tier_keys_follow_every_collection():
+    """A multi-collection tier expires when any of its collections is bumped"""
+    tmpdir = Path(tempfile.mkdtemp())
+    try:
+        generations = GenerationStore(tmpdir / 'generations.sqlite', max_age=0)
+        raw = FakeCollection()
+        cache = RAGResultCache(generations)
+        tier = ('documents_768', 'documents_768__docs', 'documents_768:quantized')
+        cache.query(tier, raw.query, query_texts=["q"], n_results=5)
+        cache.query(tier, raw.query, query_texts=["q"], n_results=5)
+        assert raw.queries == 1
+
+        generations.bump('documents_768__docs')  # partition rebuilt behind the base's back
+        cache.query(tier, raw.query, query_texts=["q"], n_results=5)
+        generations.bump('documents_768:quantized')
+        cache.query(tier, raw.query, query_texts=["q"], n_results=5)
+        assert raw.queries == 3 and cache.stats['expired'] == 2
+        assert cache.snapshot()['generations'] == {'+'.join(tier): 2}
+    finally:
+        shutil.rmtree(tmpdir)
+    print("✅ Tier cache keys OK")
+
+
+if __name__ == "__main__":
+    test_generations_shared_across_processes()
+    test_cache_hits_pages_and_expires_on_write()
+    test_short_results_lru_and_uncacheable()
+    test_tier_keys_follow_every_collection()
+    print("\n🎉 All tests passed!")
@@ -102,7 +102,8 @@ class RAGQualityTester:
 
     def __init__(self, chroma_path: str = None, chroma_host: str = "localhost",
                  chroma_port: int = 8000, collection_name: str = "documents_768",
-                 n_results: int = 5, verbose: bool = False):
+                 n_results: int = 5, verbose: bool = False,
+                 quantized_index: str = None):
         """
         Initialize the RAG quality tester.
 
@@ -113,6 +114,7 @@ class RAGQualityTester:
             collection_name: Name of the ChromaDB collection
             n_results: Number of results to retrieve per query
             verbose: Enable verbose output
+            quantized_index: Optional quantized index directory to query instead of HNSW
         """
         self.collection_name = collection_name
         self.n_results = n_results
@@ -157,6 +159,19 @@ class RAGQualityTester:
                 print("  (Unable to list collections)")
             sys.exit(1)
 
+        # Optionally route queries through the int8/binary quantized tier
+        if quantized_index:
+            from retrieval.quantized import QuantizedIndex, QuantizedCollection
+            from embeddings.client import get_encoder
+            print(f"Loading quantized index from {quantized_index}...")
+            model = get_encoder("all-mpnet-base-v2")
+            self.collection = QuantizedCollection(
+                QuantizedIndex.load(quantized_index),
+                lambda texts: model.encode(texts).tolist(),
+                self.collection
+            )
+            self.connection_type += f" + QuantizedIndex({quantized_index})"
+
     def score_result(self, query_data: Dict, retrieval_results: Dict) -> Dict[str, Any]:
         """
         Score a single query result.
@@ -472,6 +487,11 @@ Examples:
         action='store_true',
         help='Enable verbose output showing all results'
     )
+    parser.add_argument(
+        '--quantized-index',
+        default=None,
+        help='Query through a quantized index directory (see scripts/rag/quantized_index.py)'
+    )
     parser.add_argument(
         '--save-report',
         action='store_true',
@@ -487,7 +507,8 @@ Examples:
         chroma_port=args.chroma_port,
         collection_name=args.collection,
         n_results=args.n_results,
-        verbose=args.verbose
+        verbose=args.verbose,
+        quantized_index=args.quantized_index
     )
 
     tester.run_all_tests()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test runtime/readiness.py - background init, backoff retry, reconnect
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from runtime.readiness import ReadinessTracker, READY
+
+
+def test_retry_until_ready():
+    """A dependency that fails twice becomes ready on the third attempt"""
+    calls = {'n': 0}
+
+    def flaky():
+        calls['n'] += 1
+        if calls['n'] < 3:
+            raise ConnectionError("chroma down")
+
+    tracker = ReadinessTracker()
+    tracker.register('chromadb', flaky, initial_backoff=0.01, max_backoff=0.02)
+    assert tracker.start()
+    assert not tracker.start()  # a second startup hook doesn't double the probes
+
+    assert tracker.wait_ready('chromadb', timeout=2)
+    snap = tracker.snapshot()
+    assert snap['ready'] is True
+    assert snap['dependencies']['chromadb']['attempts'] == 3
+    tracker.stop()
+    print("✅ Retry with backoff OK")
+
+
+def test_dependency_order_and_reconnect():
+    """Dependents wait for upstream; a failed health check triggers re-init"""
+    order = []
+    healthy = {'ok': False}
+
+    tracker = ReadinessTracker()
+    tracker.register('embedding_model', lambda: (time.sleep(0.05), order.append('model')))
+    tracker.register('chromadb', lambda: order.append('chroma'),
+                     check_fn=lambda: healthy['ok'], check_interval=0.02,
+                     depends_on=['embedding_model'])
+    tracker.start()
+
+    assert tracker.wait_ready('chromadb', timeout=2)
+    assert order[:2] == ['model', 'chroma']
+    time.sleep(0.2)  # health check fails -> reconnect attempts
+    assert order.count('chroma') >= 2
+    healthy['ok'] = True
+    time.sleep(0.1)
+    assert tracker.dependencies['chromadb'].state == READY
+    tracker.stop()
+    print("✅ Dependency order + reconnect OK")
+
+
+if __name__ == "__main__":
+    test_retry_until_ready()
+    test_dependency_order_and_reconnect()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test backend/security_manager.py SecurityPolicy - root trie, physical path
+resolution, command set, batch validation and ToolSystem confinement
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add repo root (executors) and backend (flat imports) to path
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from security_manager import SecurityManager, SecurityPolicy
+
+
+def test_paths_resolve_physically():
+    """Sibling prefixes, symlink escapes and link/.. tricks are rejected"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = os.path.realpath(tmp)
+        allowed = os.path.join(tmp, "faithh")
+        outside = os.path.join(tmp, "faithh-other")
+        os.makedirs(os.path.join(allowed, "sub"))
+        os.makedirs(os.path.join(outside, "deep"))
+        os.symlink(outside, os.path.join(allowed, "escape"))
+        os.symlink(os.path.join(outside, "deep"), os.path.join(allowed, "hop"))
+
+        policy = SecurityPolicy([allowed])
+        assert policy.check_path(os.path.join(allowed, "sub", "a.py")) is not None
+        assert policy.check_path(allowed) == allowed
+        assert policy.check_path(os.path.join(allowed, "new", "file.txt")) is not None
+        assert policy.check_path(os.path.join(outside, "x")) is None      # not a prefix match
+        assert policy.check_path(os.path.join(allowed, "escape")) is None
+        assert policy.check_path(os.path.join(allowed, "escape", "x")) is None
+        assert policy.check_path(os.path.join(allowed, "hop", "..", "x")) is None
+        assert policy.check_path("sub/a.py", base=allowed) is not None
+
+        files = [os.path.join(allowed, "sub", f"f{i}.py") for i in range(50)]
+        files.append(os.path.join(allowed, "escape", "y"))
+        results = policy.check_paths(files)
+        assert results == [True] * 50 + [False]
+        assert policy.stats['hits'] >= 49  # one directory resolution, reused
+    print("✅ Physical path resolution + batch OK")
+
+
+def test_swapped_directory_is_reresolved():
+    """A cached directory later replaced by a symlink out of the root is not trusted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = os.path.realpath(tmp)
+        workspace = os.path.join(tmp, "workspace")
+        outside = os.path.join(tmp, "outside")
+        os.makedirs(os.path.join(workspace, "d", "e"))
+        os.makedirs(os.path.join(outside, "e"))
+
+        policy = SecurityPolicy([workspace])
+        assert policy.check_path("d/x.txt", base=workspace) is not None
+        assert policy.check_path("d/e/x.txt", base=workspace) is not None
+        hits = policy.stats['hits']
+        assert policy.check_path("d/y.txt", base=workspace) is not None
+        assert policy.stats['hits'] == hits + 1
+
+        # Swap d for a symlink, without telling the policy (as a shell command could)
+        os.rename(os.path.join(workspace, "d"), os.path.join(tmp, "moved"))
+        os.symlink(outside, os.path.join(workspace, "d"))
+        assert policy.resolve("d/x.txt", base=workspace) == os.path.join(outside, "x.txt")
+        assert policy.check_path("d/x.txt", base=workspace) is None
+        assert policy.check_path("d/e/x.txt", base=workspace) is None
+        assert policy.stats['stale'] >= 1
+
+        # Moving the real directory out and linking to it keeps its inodes; still caught
+        os.unlink(os.path.join(workspace, "d"))
+        os.rename(os.path.join(tmp, "moved"), os.path.join(workspace, "d"))
+        assert policy.check_path("d/e/x.txt", base=workspace) is not None
+        os.rename(os.path.join(workspace, "d"), os.path.join(outside, "d"))
+        os.symlink(os.path.join(outside, "d"), os.path.join(workspace, "d"))
+        assert policy.check_path("d/e/x.txt", base=workspace) is None
+    print("✅ Swapped directory re-resolved OK")
+
+
+def test_command_policy():
+    """Blocked names match by basename in every chained segment"""
+    manager = SecurityManager({'allowed_directories': ['/tmp/faithh'],
+                               'blocked_commands': ['rm', 'shutdown']})
+    assert manager.validate_command("ls -la")
+    assert manager.validate_command("grep -r rm .")
+    assert not manager.validate_command("rm -rf /")
+    assert not manager.validate_command("/bin/rm x")
+    assert not manager.validate_command("ls && rm x")
+    assert not manager.validate_command("echo hi; sudo shutdown now")
+    assert not manager.validate_command("FOO=1 rm x")
+    assert not manager.validate_command("   ")
+    # Wrapper options and their values don't hide the wrapped command
+    assert not manager.validate_command("sudo -u root rm -rf /")
+    assert not manager.validate_command("nice -n 10 rm -rf x")
+    assert not manager.validate_command("timeout 5 rm x")
+    assert not manager.validate_command("env -i PATH=/bin rm x")
+    assert not manager.validate_command("find . -name '*.pyc' | xargs rm")
+    assert not manager.validate_command("bash -c 'rm -rf x'")
+    assert not manager.validate_command("echo $(rm x)")
+    assert manager.validate_command("timeout 5 ls -la")
+    # A blocked wrapper is still blocked
+    strict = SecurityManager({'allowed_directories': ['/tmp/faithh'], 'blocked_commands': ['sudo']})
+    assert not strict.validate_command("sudo ls") and not strict.validate_command("ls | sudo tee x")
+    assert manager.validate_paths(["/tmp/faithh/a", "/etc/passwd"]) == [True, False]
+    print("✅ Command policy OK")
+
+
+def test_tool_system_confinement():
+    """ToolSystem rejects escaping paths and search skips escaping symlinks"""
+    from tool_system import ToolSystem
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as other:
+        Path(other, "secret.py").write_text("TOKEN = 'abc'\n")
+        Path(tmp, "ok.py").write_text("TOKEN = 'workspace'\n")
+        os.symlink(os.path.join(other, "secret.py"), os.path.join(tmp, "link.py"))
+
+        tools = ToolSystem(tmp)
+        assert not tools.read_file("link.py")["success"]
+        assert not tools.read_file("../" + os.path.basename(other) + "/secret.py")["success"]
+        result = tools.search_code("TOKEN")
+        assert [m["file"] for m in result["matches"]] == ["ok.py"]
+
+        # A command swapping a checked directory for a symlink can't open an escape hatch
+        os.mkdir(os.path.join(tmp, "d"))
+        assert tools.write_file("d/x.txt", "inside")["success"]
+        assert tools.execute_tool("run_command", command=f"rm -r d && ln -s {other} d")["success"]
+        assert not tools.execute_tool("read_file", filepath="d/secret.py")["success"]
+        assert not tools.execute_tool("write_file", filepath="d/x.txt", content="escaped")["success"]
+        assert not os.path.exists(os.path.join(other, "x.txt"))
+    print("✅ ToolSystem confinement OK")
+
+
+if __name__ == "__main__":
+    test_paths_resolve_physically()
+    test_swapped_directory_is_reresolved()
+    test_command_policy()
+    test_tool_system_confinement()
+    print("\n🎉 All tests passed!")
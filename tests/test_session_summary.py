@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test runtime/session_summary.py - budgeted history rendering and the
+background summary fold (model and extractive fallback)
+"""
+import re
+import sys
+import threading
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from runtime.session_summary import SessionSummarizer, estimate_tokens, fit_history
+
+
+def _exchange(i, size=800):
+    return {'user': f"question {i} about the indexer", 'assistant': f"answer {i} " + "x" * size}
+
+
+def test_history_fits_budget():
+    """Summary + newest turns stay within the budget however long the session"""
+    sizes = []
+    for n in (3, 10, 50):
+        history = [_exchange(i) for i in range(n)]
+        text = fit_history(history, summary="- user is building an indexer", max_turns=5,
+                           budget_tokens=400)
+        sizes.append(estimate_tokens(text))
+        assert f"question {n - 1}" in text and "building an indexer" in text
+        assert estimate_tokens(text) <= 400 + 10
+    assert abs(sizes[1] - sizes[2]) <= 2  # constant prompt size once the window is full
+
+    one = fit_history([_exchange(0, size=10000)], budget_tokens=100, max_assistant_chars=10000)
+    assert estimate_tokens(one) <= 101 and one.endswith("...")
+    assert fit_history([], summary=None) is None
+    print("✅ Budgeted history OK")
+
+
+def test_background_fold_with_model():
+    """Evicted exchanges are folded off the request thread into the running summary"""
+    prompts, threads = [], []
+
+    def fake_model(prompt, max_tokens):
+        prompts.append((prompt, max_tokens))
+        threads.append(threading.current_thread().name)
+        return "- discussed the indexer\n- decided to batch embeddings"
+
+    summarizer = SessionSummarizer(fake_model, max_summary_tokens=50)
+    session = {'history': [], 'summary': "- earlier: picked ChromaDB"}
+    summarizer.evict(session, [_exchange(1), _exchange(2)])
+    assert summarizer.wait_idle()
+    assert session['summary'].startswith("- discussed the indexer")
+    assert session['summarized_exchanges'] == 2 and 'unsummarized' not in session
+    prompt, max_tokens = prompts[0]
+    assert "picked ChromaDB" in prompt and "question 2" in prompt and max_tokens == 50
+    assert threads == ['session-summarizer']
+    assert summarizer.stats['folds'] == 1 and summarizer.stats['fallbacks'] == 0
+    print("✅ Background fold OK")
+
+
+def test_extractive_fallback():
+    """A failing model still produces a bounded summary, newest exchanges kept"""
+    def broken(prompt, max_tokens):
+        raise RuntimeError("ollama offline")
+
+    summarizer = SessionSummarizer(broken, max_summary_tokens=60)
+    session = {}
+    for i in range(10):
+        session.setdefault('unsummarized', []).append(_exchange(i))
+        summarizer.fold(session)
+    assert summarizer.stats['fallbacks'] == 10
+    assert estimate_tokens(session['summary']) <= 60
+    assert "question 9" in session['summary'] and "question 0" not in session['summary']
+    assert session['summarized_exchanges'] == 10
+    print("✅ Extractive fallback OK")
+
+
+def test_every_exchange_is_in_summary_or_prompt():
+    """The verbatim window is the prompt window; evictions still being folded are shown too"""
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_model(prompt, max_tokens):
+        entered.set()
+        release.wait(5)
+        return "\n".join(f"- {q}" for q in dict.fromkeys(re.findall(r"question \d+", prompt)))
+
+    def rendered(session):
+        return fit_history(session['history'], summary=session['summary'], max_turns=3,
+                           budget_tokens=4000, pending=list(session.get('unsummarized', []))) + "\n"
+
+    summarizer = SessionSummarizer(slow_model, max_summary_tokens=200)
+    session = {'history': [], 'summary': ''}
+    for i in range(8):
+        summarizer.record(session, _exchange(i, size=20), keep=3)
+        assert len(session['history']) == min(i + 1, 3)
+        if i == 3:
+            assert entered.wait(2)  # a fold of question 0 is now in flight
+        text = rendered(session)
+        missing = [j for j in range(i + 1) if f"question {j} " not in text and f"question {j}\n" not in text]
+        assert not missing, (i, missing)
+    release.set()
+    assert summarizer.wait_idle()
+    text = rendered(session)
+    assert 'unsummarized' not in session and session['summarized_exchanges'] == 5
+    assert all(f"question {j} " in text or f"question {j}\n" in text for j in range(8))
+    print("✅ No exchange falls between summary and prompt OK")
+
+
+if __name__ == "__main__":
+    test_history_fits_budget()
+    test_background_fold_with_model()
+    test_extractive_fallback()
+    test_every_exchange_is_in_summary_or_prompt()
+    print("\n🎉 All tests passed!")
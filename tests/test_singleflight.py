@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test runtime/singleflight.py - coalescing, error propagation and
+abandonment when every waiter leaves
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add repo root to path for imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from runtime.singleflight import SingleFlight, make_key
+
+
+def _run_concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_identical_calls_share_one_run():
+    """A retry storm of identical calls costs one computation"""
+    flights = SingleFlight('test')
+    calls = []
+
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'documents': [['doc']]}
+
+    key = make_key('rag', 'what did we  decide?', {'category': 'x', 'k': 5})
+    assert key == make_key('rag', ' what did we decide? ', {'k': 5, 'category': 'x'})
+    results, errors = _run_concurrently(8, lambda: flights.do(key, slow_query))
+    assert errors == [None] * 8 and len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.counters['started'] == 1 and flights.counters['coalesced'] == 7
+    assert flights.in_flight() == 0
+
+    flights.do(key, slow_query)  # landed flights aren't cached
+    assert len(calls) == 2
+    print("✅ Coalescing OK")
+
+
+def test_errors_reach_every_waiter():
+    """The shared call's exception is raised in every caller"""
+    flights = SingleFlight('test')
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("chroma down")
+
+    _, errors = _run_concurrently(4, lambda: flights.do('k', failing))
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flights.counters['errors'] == 1 and flights.counters['started'] == 1
+    print("✅ Error propagation OK")
+
+
+def test_abandoned_work_is_cancelled():
+    """Queued work nobody waits for is dropped; running work keeps its waiters"""
+    flights = SingleFlight('test', max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    blocker = threading.Thread(target=lambda: flights.do('busy', lambda: release.wait(2)))
+    blocker.start()
+    time.sleep(0.05)
+
+    try:
+        flights.do('queued', lambda: ran.append('queued'), timeout=0.05)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    assert flights.counters['abandoned'] == 1 and flights.counters['timeouts'] == 1
+    assert flights.in_flight() == 1  # only 'busy' is left
+
+    # One impatient waiter leaving doesn't cancel the others' running call
+    try:
+        flights.do('busy', lambda: None, timeout=0.05)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    release.set()
+    blocker.join()
+    assert flights.counters['abandoned'] == 1
+
+    assert flights.do('queued', lambda: ran.append('fresh') or 'ok') == 'ok'
+    assert ran == ['fresh']  # the abandoned call never ran
+    print("✅ Abandonment OK")
+
+
+if __name__ == "__main__":
+    test_identical_calls_share_one_run()
+    test_errors_reach_every_waiter()
+    test_abandoned_work_is_cancelled()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test backend/tool_cache.py - file-identity keys, LRU/byte limits, write
+invalidation in ToolSystem and ToolExecutor
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repo root (executors) and backend (flat imports) to path
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from tool_cache import ToolResultCache
+from tool_system import ToolSystem
+from tool_executor import ToolExecutor
+
+
+def _age(*paths, seconds=10):
+    """Backdate mtimes so listed files aren't treated as written during the listing"""
+    past = time.time() - seconds
+    for path in paths:
+        os.utime(path, (past, past))
+
+
+def test_identity_lru_and_invalidation():
+    """Entries go stale on change, evict by count/bytes, and drop with ancestors"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sub", "a.txt")
+        os.makedirs(os.path.dirname(path))
+        Path(path).write_text("one")
+
+        cache = ToolResultCache(max_entries=2, max_bytes=1000)
+        key = cache.make_key('read_file', {'path': path})
+        cache.put(key, {'content': 'one'}, [path])
+        assert cache.get(key) == {'content': 'one'}
+
+        Path(path).write_text("two!")  # size changes -> fingerprint differs
+        assert cache.get(key) is None and cache.stats['stale'] == 1
+
+        # Count limit evicts least recently used
+        for name in ('k1', 'k2', 'k3'):
+            cache.put(cache.make_key(name, {}), {'v': name}, [path])
+        assert cache.get(cache.make_key('k1', {})) is None
+        assert cache.snapshot()['entries'] == 2 and cache.stats['evictions'] == 1
+
+        # Byte limit: oversized results are never cached
+        cache.put(cache.make_key('big', {}), {'content': 'x' * 2000}, [path])
+        assert cache.get(cache.make_key('big', {})) is None
+
+        # Writing the file drops entries on it and on its directory listings
+        listing = cache.make_key('list_directory', {'path': tmp})
+        cache.put(listing, {'items': []}, [tmp])
+        assert cache.invalidate_path(path) == 2
+        assert cache.get(listing) is None and cache.snapshot()['entries'] == 0
+    print("✅ Identity keys + LRU + invalidation OK")
+
+
+def test_races_and_copies():
+    """A path that changes while the tool runs isn't cached; hits are private copies"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "a.txt")
+        Path(path).write_text("old")
+        cache = ToolResultCache()
+        key = cache.make_key('read_file', {'path': path})
+
+        started_ns = time.time_ns()
+        before = cache.fingerprints([path])
+        result = {'content': 'old'}  # the tool read the file...
+        Path(path).write_text("newer")  # ...then a write landed before put()
+        cache.put(key, result, [path], before=before, started_ns=started_ns)
+        assert cache.get(key) is None and cache.stats['races'] == 1
+
+        # Paths only known from the result must predate the call
+        listing = cache.make_key('list_directory', {'path': tmp})
+        before = cache.fingerprints([tmp])
+        cache.put(listing, {'items': [{'name': 'a.txt'}]}, [tmp, path],
+                  before=before, started_ns=time.time_ns())
+        assert cache.get(listing) is None and cache.stats['races'] == 2
+        _age(path)
+        cache.put(listing, {'items': [{'name': 'a.txt'}]}, [tmp, path],
+                  before=cache.fingerprints([tmp]), started_ns=time.time_ns())
+        hit = cache.get(listing)
+        hit['items'].clear()
+        assert cache.get(listing) == {'items': [{'name': 'a.txt'}]}
+    print("✅ Races and copies OK")
+
+
+def test_tool_system_caches_reads_until_write():
+    """Repeat reads/listings/searches hit; tool writes invalidate them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tools = ToolSystem(tmp)
+        tools.write_file("pkg/mod.py", "def alpha():\n    pass\n")
+        _age(Path(tmp, "pkg", "mod.py"))
+
+        first = tools.execute_tool("read_file", filepath="pkg/mod.py")
+        again = tools.execute_tool("read_file", filepath="pkg/mod.py")
+        assert "cached" not in first and again["cached"] and again["content"] == first["content"]
+
+        listing = tools.execute_tool("list_directory", dirpath="pkg")
+        assert tools.execute_tool("list_directory", dirpath="pkg").get("cached")
+        search = tools.execute_tool("search_code", pattern="def alpha")
+        assert search["count"] == 1
+        assert tools.execute_tool("search_code", pattern="def alpha").get("cached")
+
+        tools.execute_tool("edit_file", filepath="pkg/mod.py",
+                           old_text="def alpha", new_text="def beta")
+        fresh = tools.execute_tool("read_file", filepath="pkg/mod.py")
+        assert "cached" not in fresh and "def beta" in fresh["content"]
+        assert tools.execute_tool("search_code", pattern="def alpha")["count"] == 0
+
+        tools.execute_tool("write_file", filepath="pkg/new.py", content="x = 1\n")
+        relisted = tools.execute_tool("list_directory", dirpath="pkg")
+        assert "cached" not in relisted and relisted["count"] == listing["count"] + 1
+
+        # Edits outside the tool system are caught by the file fingerprint
+        Path(tmp, "pkg", "new.py").write_text("x = 22\n")
+        assert tools.execute_tool("read_file", filepath="pkg/new.py")["content"] == "x = 22\n"
+
+        tools.execute_tool("delete_file", filepath="pkg/new.py")
+        assert not tools.execute_tool("get_file_info", filepath="pkg/new.py")["success"]
+        assert tools.result_cache.snapshot()["hits"] >= 3
+    print("✅ ToolSystem result cache OK")
+
+
+def test_listings_track_their_entries():
+    """Outside edits to listed files, and globs into subdirectories, never serve stale listings"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tools = ToolSystem(tmp)
+        Path(tmp, "a.txt").write_text("abc")
+        Path(tmp, "sub").mkdir()
+        Path(tmp, "sub", "b.py").write_text("b = 1\n")
+        _age(Path(tmp, "a.txt"), Path(tmp, "sub"), Path(tmp, "sub", "b.py"))
+
+        assert tools.execute_tool("list_directory")["success"]
+        assert tools.execute_tool("list_directory").get("cached")
+        with open(Path(tmp, "a.txt"), "a") as f:
+            f.write("defg")
+        relisted = tools.execute_tool("list_directory")
+        assert "cached" not in relisted
+        assert {f["name"]: f["size"] for f in relisted["files"]}["a.txt"] == 7
+
+        assert tools.execute_tool("list_directory", pattern="sub/*")["count"] == 1
+        Path(tmp, "sub", "c.py").write_text("c = 1\n")
+        nested = tools.execute_tool("list_directory", pattern="sub/*")
+        assert "cached" not in nested and nested["count"] == 2
+    print("✅ Listing cache dependencies OK")
+
+
+def test_tool_executor_caches_idempotent_tools():
+    """Only registry tools marked idempotent are cached; writes invalidate"""
+    from executors.filesystem import FilesystemExecutor
+
+    executor = ToolExecutor(str(REPO_ROOT / "config.yaml"))
+    executor.register_executor('filesystem', FilesystemExecutor())
+    for name, idempotent in (('read_file', True), ('write_file', False), ('list_directory', True)):
+        executor.registry.register_tool({'name': name, 'executor': 'filesystem',
+                                         'category': 'filesystem', 'permissions': [],
+                                         'idempotent': idempotent})
+
+    async def scenario(path):
+        await executor.execute_tool('write_file', {'path': path, 'content': 'v1'})
+        first = await executor.execute_tool('read_file', {'path': path})
+        second = await executor.execute_tool('read_file', {'path': path})
+        await executor.execute_tool('write_file', {'path': path, 'content': 'v2'})
+        third = await executor.execute_tool('read_file', {'path': path})
+        await executor.execute_tool('list_directory', {'path': os.path.dirname(path)})
+        with open(path, 'a') as f:
+            f.write('+outside')
+        listing = await executor.execute_tool('list_directory', {'path': os.path.dirname(path)})
+        return first, second, third, listing
+
+    # /tmp/faithh is one of config.yaml's allowed_directories
+    os.makedirs("/tmp/faithh", exist_ok=True)
+    with tempfile.TemporaryDirectory(dir="/tmp/faithh") as tmp:
+        path = os.path.join(tmp, "cached.txt")
+        try:
+            first, second, third, listing = asyncio.run(scenario(path))
+        finally:
+            for name in ('read_file', 'write_file', 'list_directory'):
+                executor.registry.unregister_tool(name)
+
+    assert first['success'] and not first.get('cached'), first
+    assert second['cached'] and second['result']['content'] == 'v1'
+    assert not third.get('cached') and third['result']['content'] == 'v2'
+    assert not listing.get('cached') and listing['result']['items'][0]['size'] == len('v2+outside')
+    print("✅ ToolExecutor idempotent cache OK")
+
+
+if __name__ == "__main__":
+    test_identity_lru_and_invalidation()
+    test_races_and_copies()
+    test_tool_system_caches_reads_until_write()
+    test_listings_track_their_entries()
+    test_tool_executor_caches_idempotent_tools()
+    print("\n🎉 All tests passed!")
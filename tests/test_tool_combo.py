@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test ToolExecutor.execute_combo - DAG scheduling, result references,
+per-branch stop-on-failure and legacy chain format
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path for flat imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from tool_executor import ToolExecutor
+
+
+class FakeExecutor:
+    """echo returns its params after a delay; fail always raises"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, tool_name, parameters):
+        self.calls.append((tool_name, parameters))
+        await asyncio.sleep(parameters.get('delay', 0.05))
+        if tool_name == 'combo_fail':
+            raise RuntimeError("chip jammed")
+        return {'echo': parameters.get('value'), 'items': [parameters.get('value')]}
+
+
+def _make_executor():
+    executor = ToolExecutor(str(REPO_ROOT / "config.yaml"))
+    fake = FakeExecutor()
+    executor.register_executor('combo_test', fake)
+    for name in ('combo_echo', 'combo_fail'):
+        executor.registry.register_tool({'name': name, 'executor': 'combo_test',
+                                         'category': 'test', 'permissions': []})
+    return executor, fake
+
+
+def test_independent_steps_run_concurrently_with_refs():
+    """Three parallel reads + a dependent step finish in ~2 step-times, not 4"""
+    executor, fake = _make_executor()
+    combo = [
+        {'id': 'a', 'tool': 'combo_echo', 'params': {'value': 'alpha'}},
+        {'id': 'b', 'tool': 'combo_echo', 'params': {'value': 'beta'}},
+        {'id': 'c', 'tool': 'combo_echo', 'params': {'value': 3}},
+        {'id': 'd', 'tool': 'combo_echo',
+         'params': {'value': '${a.echo}+${b.echo}', 'count': '${c.echo}', 'first': '${b.items.0}'}},
+    ]
+    start = time.monotonic()
+    result = asyncio.run(executor.execute_combo(combo))
+    elapsed = time.monotonic() - start
+
+    assert result['success'], result
+    assert result['combo_size'] == 4 and result['skipped'] == []
+    assert [r['step'] for r in result['results']] == ['a', 'b', 'c', 'd']
+    d_params = fake.calls[-1][1]
+    assert d_params == {'value': 'alpha+beta', 'count': 3, 'first': 'beta'}
+    assert elapsed < 0.18, elapsed  # sequential would be >= 0.2
+    print(f"✅ DAG combo OK ({elapsed * 1000:.0f}ms)")
+
+
+def test_failure_skips_only_its_branch_and_validation():
+    """Downstream of a failure is skipped; the other branch completes"""
+    executor, fake = _make_executor()
+    combo = [
+        {'id': 'bad', 'tool': 'combo_fail', 'params': {}},
+        {'id': 'after_bad', 'tool': 'combo_echo', 'params': {'value': 1}, 'depends_on': ['bad']},
+        {'id': 'good', 'tool': 'combo_echo', 'params': {'value': 2}},
+        {'id': 'after_good', 'tool': 'combo_echo', 'params': {'value': '${good.echo}'}},
+    ]
+    result = asyncio.run(executor.execute_combo(combo))
+    assert not result['success'] and not result['bonus_applied']
+    assert result['skipped'] == ['after_bad']
+    statuses = {r['step']: r['success'] for r in result['results']}
+    assert statuses == {'bad': False, 'good': True, 'after_good': True}
+
+    cycle = [{'id': 'x', 'tool': 'combo_echo', 'depends_on': ['y']},
+             {'id': 'y', 'tool': 'combo_echo', 'depends_on': ['x']}]
+    assert 'cycle' in asyncio.run(executor.execute_combo(cycle))['error']
+    unknown = [{'id': 'x', 'tool': 'combo_echo', 'params': {'v': '${nope.echo}'}}]
+    assert 'unknown' in asyncio.run(executor.execute_combo(unknown))['error']
+    print("✅ Per-branch stop-on-failure + validation OK")
+
+
+def test_legacy_tuple_combo_is_a_chain():
+    """(tool, params) tuples still run in order and stop at the first failure"""
+    executor, fake = _make_executor()
+    combo = [('combo_echo', {'value': 1, 'delay': 0.01}),
+             ('combo_fail', {'delay': 0.01}),
+             ('combo_echo', {'value': 3, 'delay': 0.01})]
+    result = asyncio.run(executor.execute_combo(combo))
+    assert not result['success']
+    assert result['combo_size'] == 2
+    assert [call[0] for call in fake.calls] == ['combo_echo', 'combo_fail']
+    print("✅ Legacy chain OK")
+
+
+if __name__ == "__main__":
+    test_independent_steps_run_concurrently_with_refs()
+    test_failure_skips_only_its_branch_and_validation()
+    test_legacy_tuple_combo_is_a_chain()
+    print("\n🎉 All tests passed!")
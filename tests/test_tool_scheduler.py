@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test backend/tool_scheduler.py - global/per-executor limits, priorities,
+queue timeouts and ToolExecutor integration
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# Add backend to path for flat imports
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from tool_scheduler import ExecutionScheduler, QueueTimeoutError, BACKGROUND, INTERACTIVE
+from tool_executor import ToolExecutor
+
+
+def test_global_limit_across_event_loops():
+    """Callers on separate threads/loops share one global limit"""
+    scheduler = ExecutionScheduler(max_concurrent=3)
+    state = {'running': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    async def job():
+        async with scheduler.slot('filesystem'):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+
+    def worker():
+        async def many():
+            await asyncio.gather(*(job() for _ in range(4)))
+        asyncio.run(many())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snap = scheduler.snapshot()
+    assert state['peak'] == 3, state
+    assert snap['running'] == 0
+    assert snap['by_priority'][INTERACTIVE]['started'] == 12
+    print(f"✅ Global limit OK (peak={state['peak']})")
+
+
+def test_executor_limit_priority_and_timeout():
+    """A run_command burst can't starve reads; interactive beats background; timeouts dequeue"""
+    async def scenario():
+        scheduler = ExecutionScheduler(max_concurrent=3, executor_limits={'process': 1},
+                                       background_aging_ms=60000)
+        order = []
+
+        async def run(executor, priority, tag, hold=0.05):
+            async with scheduler.slot(executor, priority):
+                order.append(tag)
+                await asyncio.sleep(hold)
+
+        # Five slow commands queue behind the process limit; a read still gets through
+        commands = [asyncio.create_task(run('process', INTERACTIVE, f'cmd{i}')) for i in range(5)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(run('filesystem', INTERACTIVE, 'read', hold=0), timeout=0.04)
+        assert order[:2] == ['cmd0', 'read'], order
+        await asyncio.gather(*commands)
+
+        # Interactive waiter overtakes an earlier background waiter
+        order.clear()
+        await scheduler.acquire('process')
+        bg = asyncio.create_task(run('process', BACKGROUND, 'bg', hold=0))
+        await asyncio.sleep(0.01)
+        fg = asyncio.create_task(run('process', INTERACTIVE, 'fg', hold=0))
+        await asyncio.sleep(0.01)
+        scheduler.release('process')
+        await asyncio.gather(bg, fg)
+        assert order == ['fg', 'bg'], order
+
+        # Queue timeout removes the waiter; it never runs later
+        await scheduler.acquire('process')
+        try:
+            await scheduler.acquire('process', timeout=0.03)
+            assert False, "expected QueueTimeoutError"
+        except QueueTimeoutError:
+            pass
+        scheduler.release('process')
+        snap = scheduler.snapshot()
+        assert snap['running'] == 0 and snap['queued'][INTERACTIVE] == 0
+        assert snap['by_executor']['process']['queue_timeouts'] == 1
+        assert snap['by_executor']['process']['max_wait_ms'] > 0
+
+    asyncio.run(scenario())
+    print("✅ Executor limit + priority + queue timeout OK")
+
+
+def test_tool_executor_enforces_config_limit():
+    """execute_tool runs at most max_concurrent_executions tools at once"""
+    executor = ToolExecutor(str(REPO_ROOT / "config.yaml"))
+    limit = executor.config['tools']['max_concurrent_executions']
+    state = {'running': 0, 'peak': 0}
+
+    class SlowExecutor:
+        async def execute(self, tool_name, parameters):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.02)
+            state['running'] -= 1
+            return {'ok': True}
+
+    executor.register_executor('sched_test', SlowExecutor())
+    executor.registry.register_tool({'name': 'sched_test_tool', 'executor': 'sched_test',
+                                     'category': 'test', 'permissions': []})
+
+    async def burst():
+        return await asyncio.gather(*(executor.execute_tool('sched_test_tool', {})
+                                      for _ in range(limit * 3)))
+
+    results = asyncio.run(burst())
+    executor.registry.unregister_tool('sched_test_tool')
+    assert all(r['success'] for r in results)
+    assert state['peak'] == limit, state
+    assert max(r['queue_wait_ms'] for r in results) > 0
+    print(f"✅ ToolExecutor limit OK (peak={state['peak']}/{limit})")
+
+
+if __name__ == "__main__":
+    test_global_limit_across_event_loops()
+    test_executor_limit_priority_and_timeout()
+    test_tool_executor_enforces_config_limit()
+    print("\n🎉 All tests passed!")